@@ -1,8 +1,12 @@
 # app/deps.py
 from __future__ import annotations
+import ipaddress
+from functools import lru_cache
 from fastapi import Cookie, HTTPException, Header, status, Request
-from typing import Optional
-from .services import find_user_by_id
+from typing import List, Optional, Tuple, Union
+from . import settings as settings_module
+from . import usage
+from .service.principal_cache import principal_cache
 from .i18n import get_message
 
 # Global auth service instance (will be set by main.py)
@@ -29,6 +33,62 @@ def get_request_lang(request: Request) -> str:
     return "ja"
 
 
+IPNetwork = Union[ipaddress.IPv4Network, ipaddress.IPv6Network]
+
+
+@lru_cache(maxsize=8)
+def _trusted_networks(spec: str) -> Tuple[bool, List[IPNetwork]]:
+    """(trust any peer, networks) parsed from settings.trusted_proxies"""
+    networks = []
+    for item in (part.strip() for part in spec.split(",")):
+        if item == "*":
+            return True, []
+        if item:
+            networks.append(ipaddress.ip_network(item, strict=False))
+    return False, networks
+
+
+def _is_trusted(host: str, networks: List[IPNetwork]) -> bool:
+    try:
+        address = ipaddress.ip_address(host)
+    except ValueError:
+        return False
+    return any(address in network for network in networks)
+
+
+def get_client_address(request: Request) -> str:
+    """
+    Address of the calling client.
+
+    When the peer is a trusted proxy (settings.trusted_proxies), X-Forwarded-For
+    is read from the right and the first address that is not a trusted proxy
+    is the client; otherwise the peer itself is.
+    """
+    peer = request.client.host if request.client else "unknown"
+    trust_any, networks = _trusted_networks(settings_module.settings.trusted_proxies)
+    if not (trust_any or _is_trusted(peer, networks)):
+        return peer
+    forwarded = [h.strip() for h in request.headers.get("x-forwarded-for", "").split(",") if h.strip()]
+    if not forwarded:
+        return peer
+    if trust_any:
+        return forwarded[0]
+    for host in reversed(forwarded):
+        if not _is_trusted(host, networks):
+            return host
+    return forwarded[0]
+
+
+async def get_optional_user_id(authorization: Optional[str] = Header(default=None)) -> Optional[str]:
+    """userId of a valid Bearer token, or None (for endpoints that do not require auth)"""
+    if not authorization or not _auth_service:
+        return None
+    parts = authorization.split()
+    if len(parts) != 2 or parts[0].lower() != "bearer":
+        return None
+    return await _auth_service.verify_access_token(parts[1])
+
+
 async def require_auth(
     request: Request,
     authorization: Optional[str] = Header(default=None)
@@ -96,8 +156,8 @@ async def require_auth(
             headers={"WWW-Authenticate": "Bearer"}
         )
     
-    # Load user
-    user = find_user_by_id(user_id)
+    # Load user (compact record from the principal cache, no users.json scan)
+    user = principal_cache.user(user_id)
     if not user or user.get("disabled"):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -111,4 +171,31 @@ async def require_auth(
             headers={"WWW-Authenticate": "Bearer"}
         )
     
+    usage.set_user(user_id)
+    return user
+
+
+async def require_admin(
+    request: Request,
+    authorization: Optional[str] = Header(default=None)
+) -> dict:
+    """
+    Require an authenticated user with the "admin" role.
+
+    Raises:
+        HTTPException: 401 if not authenticated, 403 if not an admin
+    """
+    user = await require_auth(request, authorization)
+    if "admin" not in (user.get("roles") or []):
+        lang = get_request_lang(request)
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail={
+                "error": {
+                    "error_code": "ADMIN_REQUIRED",
+                    "message": get_message("auth.forbidden", lang),
+                    "message_key": "auth.forbidden"
+                }
+            }
+        )
     return user
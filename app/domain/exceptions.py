@@ -18,3 +18,21 @@ class RefreshTokenReusedError(AuthDomainError):
 
     def __init__(self):
         super().__init__(self.error_code)
+
+
+class PasswordHashingBusyError(AuthDomainError):
+    """Raised when too many password hashing jobs are already queued."""
+
+    error_code = "AUTH_BUSY"
+
+    def __init__(self):
+        super().__init__(self.error_code)
+
+
+class PasswordHashingUnavailableError(AuthDomainError):
+    """Raised when the password hashing pool is not running."""
+
+    error_code = "AUTH_UNAVAILABLE"
+
+    def __init__(self):
+        super().__init__(self.error_code)
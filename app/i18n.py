@@ -5,7 +5,7 @@ Internationalization support for error messages.
 
 import json
 from pathlib import Path
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional
 
 # Load message resources
 _RESOURCES: Dict[str, Dict] = {}
@@ -22,6 +22,15 @@ def load_resources():
             _RESOURCES[lang_code] = json.load(f)
 
 
+def stats() -> Dict[str, int]:
+    return {"languages": len(_RESOURCES)}
+
+
+def memory_roots() -> List[Any]:
+    """Loaded message tables for memory diagnostics"""
+    return [dict(_RESOURCES)]
+
+
 def get_message(message_key: str, lang: str = "ja") -> str:
     """
     Get localized message by key.
@@ -0,0 +1,259 @@
+"""
+SQLite index of app.audit events.
+File: data/logs/audit.sqlite3
+
+AuditStoreHandler sits next to the audit.log file handler on the app.audit
+logging listener, so every audit record is also inserted here, from the
+listener thread (never on the event loop), with the same JSON line as audit.log.
+Rows are indexed by (user_id, time), (event, time) and time; queries walk one of
+those indexes newest first and page with a (time, id) cursor, so "what did
+user X do last week" reads only that user's rows in that range.
+
+audit.log stays the source of truth: the index can be dropped and rebuilt from
+the log segments (plain or gzip-compressed) with scripts/rebuild_audit_index.py.
+Audit lines carry ``ts_utc`` (record_ts_utc, microseconds) next to the
+second-precision local ``ts``, and both the live insert and the rebuild index
+that value, so a rebuilt index orders rows and honours cursors like the live one.
+"""
+
+from __future__ import annotations
+
+import base64
+import binascii
+import json
+import logging
+import sqlite3
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from app.infra.log_archive import log_segments, open_segment
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS audit_events (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    ts_utc TEXT NOT NULL,
+    event TEXT,
+    user_id TEXT,
+    request_id TEXT,
+    line TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_audit_events_user_ts ON audit_events (user_id, ts_utc);
+CREATE INDEX IF NOT EXISTS ix_audit_events_event_ts ON audit_events (event, ts_utc);
+CREATE INDEX IF NOT EXISTS ix_audit_events_ts ON audit_events (ts_utc);
+"""
+
+_INSERT = "INSERT INTO audit_events (ts_utc, event, user_id, request_id, line) VALUES (?, ?, ?, ?, ?)"
+
+
+def utc_iso(dt: datetime) -> str:
+    """Canonical UTC form stored in ts_utc (compared as text, so every value must share it)"""
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.astimezone(timezone.utc).isoformat(timespec="microseconds")
+
+
+def record_ts_utc(created: float) -> str:
+    """ts_utc of a log record (LogRecord.created), as written to audit lines and indexed"""
+    return utc_iso(datetime.fromtimestamp(created, timezone.utc))
+
+
+def _prefix_upper_bound(prefix: str) -> str:
+    """Smallest string greater than every string starting with ``prefix``"""
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+class AuditStore:
+    """Indexed audit events in SQLite (thread-safe; calls are short and blocking)"""
+
+    def __init__(self, db_path: Path):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        # Autocommit; bulk loads use explicit transactions
+        self._conn = sqlite3.connect(self.db_path, isolation_level=None, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # The log file is the durable copy; the index may lose the last commits on power loss
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def append(self, ts_utc: str, event: Optional[str], user_id: Optional[str], request_id: Optional[str], line: str) -> None:
+        with self._lock:
+            self._conn.execute(_INSERT, (ts_utc, event, user_id, request_id, line))
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM audit_events").fetchone()[0]
+
+    @staticmethod
+    def select_sql(
+        user_id: Optional[str] = None,
+        event: Optional[str] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        cursor: Optional[Tuple[str, int]] = None,
+        limit: int = 100,
+    ) -> Tuple[str, Tuple[Any, ...]]:
+        """
+        SQL for a query, newest first.
+
+        Args:
+            event: Exact event name, or a prefix ending in "*" ("vocab.sync.*")
+            since / until: ts_utc bounds (since inclusive, until exclusive)
+            cursor: (ts_utc, id) of the last row of the previous page
+        """
+        where: List[str] = []
+        params: List[Any] = []
+        if user_id is not None:
+            where.append("user_id = ?")
+            params.append(user_id)
+        if event is not None:
+            if event.endswith("*") and len(event) > 1:
+                prefix = event[:-1]
+                where.append("event >= ? AND event < ?")
+                params.extend((prefix, _prefix_upper_bound(prefix)))
+            else:
+                where.append("event = ?")
+                params.append(event)
+        if since is not None:
+            where.append("ts_utc >= ?")
+            params.append(since)
+        if until is not None:
+            where.append("ts_utc < ?")
+            params.append(until)
+        if cursor is not None:
+            where.append("(ts_utc < ? OR (ts_utc = ? AND id < ?))")
+            params.extend((cursor[0], cursor[0], cursor[1]))
+        sql = "SELECT id, ts_utc, line FROM audit_events"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY ts_utc DESC, id DESC LIMIT ?"
+        params.append(limit)
+        return sql, tuple(params)
+
+    def query(
+        self,
+        user_id: Optional[str] = None,
+        event: Optional[str] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        cursor: Optional[str] = None,
+        limit: int = 100,
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        Matching events (parsed audit.log lines), newest first.
+
+        Returns:
+            (events, next_cursor) where next_cursor is None on the last page
+
+        Raises:
+            ValueError: Malformed cursor
+        """
+        position = self.parse_cursor(cursor) if cursor else None
+        sql, params = self.select_sql(user_id, event, since, until, position, limit + 1)
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = self.make_cursor(rows[-1]["ts_utc"], rows[-1]["id"])
+        return [json.loads(row["line"]) for row in rows], next_cursor
+
+    @staticmethod
+    def make_cursor(ts_utc: str, row_id: int) -> str:
+        """Opaque, URL-safe page position"""
+        return base64.urlsafe_b64encode(f"{ts_utc}|{row_id}".encode("utf-8")).decode("ascii").rstrip("=")
+
+    @staticmethod
+    def parse_cursor(cursor: str) -> Tuple[str, int]:
+        try:
+            raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode("utf-8")
+        except (binascii.Error, UnicodeDecodeError):
+            raise ValueError(f"Invalid cursor: {cursor!r}")
+        ts_utc, sep, row_id = raw.rpartition("|")
+        if not sep or not ts_utc or not row_id.isdigit():
+            raise ValueError(f"Invalid cursor: {cursor!r}")
+        return ts_utc, int(row_id)
+
+    def rebuild(self, lines: Iterable[str]) -> int:
+        """
+        Replace the whole index with the given audit.log lines (oldest first).
+        Lines that are not JSON objects are skipped.
+
+        Returns:
+            Number of indexed events
+        """
+        indexed = 0
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.execute("DELETE FROM audit_events")
+                for line in lines:
+                    row = _row_from_line(line)
+                    if row is not None:
+                        self._conn.execute(_INSERT, row)
+                        indexed += 1
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return indexed
+
+
+def _row_from_line(line: str) -> Optional[Tuple[str, Any, Any, Any, str]]:
+    line = line.strip()
+    if not line:
+        return None
+    try:
+        entry = json.loads(line)
+        ts_utc = entry.get("ts_utc")
+        if not isinstance(ts_utc, str):
+            # Lines written before ts_utc existed: local time with an offset, to the second
+            ts_utc = utc_iso(datetime.strptime(entry["ts"], "%Y-%m-%dT%H:%M:%S%z"))
+    except (ValueError, KeyError, TypeError, AttributeError):
+        return None
+    return ts_utc, entry.get("event"), entry.get("user_id"), entry.get("request_id"), line
+
+
+def audit_log_segments(log_dir: Path) -> List[Path]:
+    """audit.log's rotated segments (plain or .gz), oldest first, then audit.log itself"""
+    segments = log_segments(log_dir / "audit.log")
+    current = log_dir / "audit.log"
+    if current.exists():
+        segments.append(current)
+    return segments
+
+
+def read_segment_lines(paths: Iterable[Path]) -> Iterator[str]:
+    for path in paths:
+        with open_segment(path) as f:
+            yield from f
+
+
+class AuditStoreHandler(logging.Handler):
+    """Logging handler that inserts each formatted audit record into an AuditStore"""
+
+    def __init__(self, store: AuditStore, level: int = logging.NOTSET):
+        super().__init__(level)
+        self.store = store
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            line = self.format(record)
+            ts_utc = record_ts_utc(record.created)
+            attrs = record.__dict__
+            self.store.append(ts_utc, attrs.get("event"), attrs.get("user_id"), attrs.get("request_id"), line)
+        except Exception:
+            self.handleError(record)
+
+    def close(self) -> None:
+        try:
+            self.store.close()
+        finally:
+            super().close()
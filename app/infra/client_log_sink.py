@@ -0,0 +1,157 @@
+"""
+Bounded buffer + background writer for /api/logs/client entries.
+
+The request handler only appends entries to an in-memory buffer of fixed
+capacity (no formatting, no I/O on the event loop). A writer thread drains the
+buffer in batches, serializes each entry as one JSON line and appends it to a
+size-rotated ``client.log``, kept apart from ``app.log`` so a noisy client build
+cannot flood the server logs. When the buffer is full ``offer`` refuses the
+whole batch and the endpoint answers 429.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from logging.handlers import RotatingFileHandler
+from pathlib import Path
+from typing import Any, Deque, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Entries serialized per wake-up of the writer
+_WRITE_BATCH = 512
+
+
+class ClientLogSink:
+    """Fixed-capacity buffer of client log entries drained into client.log"""
+
+    def __init__(
+        self,
+        path: Path,
+        capacity: int,
+        max_bytes: Optional[int] = None,
+        backup_count: Optional[int] = None,
+    ):
+        """
+        Args:
+            path: client.log path
+            capacity: Entries that may wait for the writer; beyond it offer() refuses
+            max_bytes / backup_count: Rotation (defaults VOCAB_LOG_MAX_BYTES / VOCAB_LOG_BACKUP_COUNT)
+        """
+        self.path = Path(path)
+        self.capacity = capacity
+        self.max_bytes = max_bytes if max_bytes is not None else int(os.getenv("VOCAB_LOG_MAX_BYTES", str(10 * 1024 * 1024)))
+        self.backup_count = backup_count if backup_count is not None else int(os.getenv("VOCAB_LOG_BACKUP_COUNT", "10"))
+        self._buffer: Deque[Dict[str, Any]] = deque()
+        self._cond = threading.Condition()
+        self._writing = 0
+        self._stopping = False
+        self._thread: Optional[threading.Thread] = None
+        self._handler: Optional[RotatingFileHandler] = None
+        self.accepted_total = 0
+        self.rejected_total = 0
+        self.written_total = 0
+
+    def start(self) -> None:
+        """Open client.log and start the writer thread"""
+        if self._thread is not None:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._handler = RotatingFileHandler(
+            self.path, maxBytes=self.max_bytes, backupCount=self.backup_count, encoding="utf-8"
+        )
+        self._handler.setFormatter(logging.Formatter("%(message)s"))
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name="client-log-writer", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Write what is buffered, then stop the writer and close the file"""
+        if self._thread is None:
+            return
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        self._thread.join()
+        self._thread = None
+        if self._handler is not None:
+            self._handler.close()
+            self._handler = None
+
+    def available(self) -> int:
+        """Free slots in the buffer"""
+        return self.capacity - len(self._buffer)
+
+    def offer(self, entries: List[Dict[str, Any]]) -> bool:
+        """
+        Queue entries for the writer (all or nothing).
+
+        Returns:
+            False when the buffer has no room for the whole batch
+        """
+        with self._cond:
+            if len(self._buffer) + len(entries) > self.capacity:
+                self.rejected_total += len(entries)
+                return False
+            self._buffer.extend(entries)
+            self.accepted_total += len(entries)
+            self._cond.notify()
+        return True
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Wait until everything offered so far is written (tests / shutdown)"""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while self._buffer or self._writing:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or self._thread is None:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def stats(self) -> Dict[str, int]:
+        """Buffer occupancy and counters for diagnostics"""
+        return {
+            "buffered": len(self._buffer),
+            "capacity": self.capacity,
+            "accepted": self.accepted_total,
+            "rejected": self.rejected_total,
+            "written": self.written_total,
+        }
+
+    def memory_roots(self) -> List[Any]:
+        """Copy of the buffered entries for memory diagnostics"""
+        with self._cond:
+            return [list(self._buffer)]
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._buffer and not self._stopping:
+                    self._cond.wait()
+                if not self._buffer:
+                    return
+                batch = [self._buffer.popleft() for _ in range(min(_WRITE_BATCH, len(self._buffer)))]
+                self._writing = len(batch)
+            try:
+                self._write(batch)
+            except Exception:
+                logger.exception("client_log_write_failed")
+            finally:
+                with self._cond:
+                    self.written_total += self._writing
+                    self._writing = 0
+                    self._cond.notify_all()
+
+    def _write(self, batch: List[Dict[str, Any]]) -> None:
+        assert self._handler is not None
+        for entry in batch:
+            line = json.dumps(entry, ensure_ascii=False, default=str)
+            # The handler decides rotation before each line
+            self._handler.handle(logging.makeLogRecord({"msg": line, "levelno": logging.INFO}))
+        self._handler.flush()
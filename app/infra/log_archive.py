@@ -0,0 +1,228 @@
+"""
+Rotated log segments: background compression and retention.
+
+CompressingRotatingFileHandler rotates like RotatingFileHandler, but instead of
+shifting ``app.log.1 .. app.log.N`` on every rollover (N renames under the
+handler lock) it renames the full file once to a UTC-timestamped segment,
+``app.log.20260119T003501123456``, and hands it to a background archiver thread.
+The archiver gzips it to ``<segment>.gz`` (via a temporary file, so a segment is
+always complete under one of its two names) and then applies retention to the
+log's segments: at most ``max_segments``, at most ``max_bytes`` in total, none
+older than ``max_age_seconds``; oldest are removed first. The writer only pays
+for one rename.
+
+Segments rotated by the old numbered scheme (``audit.log.3``) are still listed
+(as the oldest), compressed and expired. ``log_segments`` / ``open_segment`` let
+tooling read plain and compressed segments alike, oldest first.
+"""
+
+from __future__ import annotations
+
+import gzip
+import logging
+import os
+import queue
+import re
+import shutil
+import threading
+import time
+from datetime import datetime, timezone
+from logging.handlers import RotatingFileHandler
+from pathlib import Path
+from typing import IO, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+_TIMESTAMP = re.compile(r"^\d{8}T\d{12}(-\d+)?$")
+_STOP = object()
+
+
+def _segment_key(base: Path, path: Path) -> Optional[Tuple[int, object]]:
+    """Sort key of a rotated segment of ``base`` (legacy numbered ones first), or None"""
+    suffix = path.name[len(base.name) + 1:]
+    if suffix.endswith(".gz"):
+        suffix = suffix[:-3]
+    if suffix.isdigit():
+        return (0, -int(suffix))
+    if _TIMESTAMP.match(suffix):
+        return (1, suffix)
+    return None
+
+
+def log_segments(base: Path) -> List[Path]:
+    """
+    Rotated segments of the log file ``base``, oldest first (``base`` itself excluded).
+    A segment caught mid-compression is listed once, under its finished .gz name.
+    """
+    found = {}
+    for path in base.parent.glob(base.name + ".*"):
+        key = _segment_key(base, path)
+        if key is None:
+            continue
+        plain = path.name[:-3] if path.name.endswith(".gz") else path.name
+        if plain not in found or path.name.endswith(".gz"):
+            found[plain] = (key, path)
+    return [path for _, path in sorted(found.values())]
+
+
+def open_segment(path: Path) -> IO[str]:
+    """Open a plain or gzip-compressed segment for reading text"""
+    if path.name.endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8", errors="replace")
+    return open(path, "r", encoding="utf-8", errors="replace")
+
+
+class SegmentArchiver:
+    """Compresses rotated segments of one log file and enforces retention, in its own thread"""
+
+    def __init__(
+        self,
+        base: Path,
+        max_segments: int = 10,
+        max_bytes: int = 0,
+        max_age_seconds: float = 0,
+        compress: bool = True,
+    ):
+        """
+        Args:
+            base: The live log file
+            max_segments: Rotated segments kept (0: no limit)
+            max_bytes: Total size of rotated segments kept (0: no limit)
+            max_age_seconds: Segments last written longer ago are removed (0: no limit)
+            compress: gzip segments after rotation
+        """
+        self.base = Path(base)
+        self.max_segments = max_segments
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+        self.compress = compress
+        self._queue: "queue.Queue[object]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self.compressed = 0
+        self.removed = 0
+
+    def start(self) -> None:
+        """Start the thread; segments left uncompressed by a previous process are picked up first"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name=f"log-archiver-{self.base.name}", daemon=True)
+            self._thread.start()
+            self._queue.put(None)
+
+    def stop(self) -> None:
+        """Finish queued work and stop the thread"""
+        if self._thread is not None:
+            self._queue.put(_STOP)
+            self._thread.join()
+            self._thread = None
+
+    def submit(self, segment: Path) -> None:
+        self._queue.put(segment)
+
+    def wait_idle(self) -> None:
+        """Block until every submitted segment is processed (tests, shutdown)"""
+        self._queue.join()
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            try:
+                if item is _STOP:
+                    return
+                self.run_once()
+            except Exception:
+                logger.exception(f"Archiving segments of {self.base} failed", extra={"event": "log_archive_failed"})
+            finally:
+                self._queue.task_done()
+
+    def run_once(self) -> None:
+        """Compress every plain segment, then apply retention"""
+        # Only this thread writes .gz.tmp files: any found here were left by a crash
+        for stale in self.base.parent.glob(self.base.name + ".*.gz.tmp"):
+            stale.unlink(missing_ok=True)
+        if self.compress:
+            for segment in log_segments(self.base):
+                if not segment.name.endswith(".gz"):
+                    self._compress(segment)
+        self._enforce_retention()
+
+    def _compress(self, segment: Path) -> None:
+        target = segment.with_name(segment.name + ".gz")
+        tmp = segment.with_name(segment.name + ".gz.tmp")
+        with open(segment, "rb") as src, gzip.open(tmp, "wb", compresslevel=6) as dst:
+            shutil.copyfileobj(src, dst, 1024 * 1024)
+        # Keep the original mtime so age-based retention measures the segment, not the compression
+        st = segment.stat()
+        os.utime(tmp, ns=(st.st_atime_ns, st.st_mtime_ns))
+        os.replace(tmp, target)
+        segment.unlink(missing_ok=True)
+        self.compressed += 1
+
+    def _enforce_retention(self) -> None:
+        segments = []
+        for path in log_segments(self.base):
+            try:
+                st = path.stat()
+            except FileNotFoundError:
+                continue
+            segments.append((path, st.st_size, st.st_mtime))
+        total = sum(size for _, size, _ in segments)
+        cutoff = time.time() - self.max_age_seconds if self.max_age_seconds > 0 else None
+        while segments:
+            path, size, mtime = segments[0]
+            too_many = self.max_segments > 0 and len(segments) > self.max_segments
+            too_big = self.max_bytes > 0 and total > self.max_bytes
+            too_old = cutoff is not None and mtime < cutoff
+            if not (too_many or too_big or too_old):
+                break
+            path.unlink(missing_ok=True)
+            segments.pop(0)
+            total -= size
+            self.removed += 1
+
+
+class CompressingRotatingFileHandler(RotatingFileHandler):
+    """RotatingFileHandler that rotates to timestamped segments archived in the background"""
+
+    def __init__(
+        self,
+        filename: Path,
+        max_bytes: int,
+        backup_count: int,
+        max_archive_bytes: int = 0,
+        retention_seconds: float = 0,
+        compress: bool = True,
+        encoding: str = "utf-8",
+    ):
+        super().__init__(filename, maxBytes=max_bytes, backupCount=backup_count, encoding=encoding)
+        self.archiver = SegmentArchiver(
+            Path(self.baseFilename),
+            max_segments=backup_count,
+            max_bytes=max_archive_bytes,
+            max_age_seconds=retention_seconds,
+            compress=compress,
+        )
+        self.archiver.start()
+
+    def _segment_path(self) -> Path:
+        now = datetime.now(timezone.utc)
+        path = Path(f"{self.baseFilename}.{now.strftime('%Y%m%dT%H%M%S%f')}")
+        n = 1
+        while path.exists() or path.with_name(path.name + ".gz").exists():
+            path = Path(f"{self.baseFilename}.{now.strftime('%Y%m%dT%H%M%S%f')}-{n}")
+            n += 1
+        return path
+
+    def doRollover(self) -> None:
+        if self.stream:
+            self.stream.close()
+            self.stream = None  # type: ignore[assignment]
+        if os.path.exists(self.baseFilename) and os.path.getsize(self.baseFilename) > 0:
+            segment = self._segment_path()
+            os.rename(self.baseFilename, segment)
+            self.archiver.submit(segment)
+        if not self.delay:
+            self.stream = self._open()
+
+    def close(self) -> None:
+        super().close()
+        self.archiver.stop()
@@ -0,0 +1,137 @@
+"""
+Argon2 password hashing in a dedicated process pool.
+
+Hashing and verification are CPU-bound for tens to hundreds of milliseconds, so
+running them inline blocks the event loop and caps login throughput at one core.
+Jobs are sent to worker processes instead, behind an admission limit: once
+``max_pending`` jobs are queued or running, new ones fail fast with
+PasswordHashingBusyError rather than piling up behind a burst.
+
+The pepper is applied and the current argon2 parameters are chosen in the
+server process, so workers hold no state of their own.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from app import security
+from app.domain.exceptions import PasswordHashingBusyError, PasswordHashingUnavailableError
+
+logger = logging.getLogger(__name__)
+
+# Calibration results per (target_ms, memory_cost, parallelism, min_time_cost);
+# the hardware does not change while the process runs
+_calibrations: Dict[Tuple[int, int, int, int], security.HasherParams] = {}
+
+
+class PasswordHashPool:
+    """Runs argon2 hash/verify on worker processes with bounded admission"""
+
+    def __init__(self, workers: int = 2, max_pending: int = 32):
+        """
+        Args:
+            workers: Number of worker processes
+            max_pending: Jobs queued or running before new ones are rejected
+        """
+        self.workers = max(1, workers)
+        self.max_pending = max(1, max_pending)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._pending = 0
+        self._completed = 0
+        self._failed = 0  # raised, broke the pool or were cancelled
+        self._rejected = 0
+
+    def _new_executor(self) -> ProcessPoolExecutor:
+        # forkserver: workers are forked from a clean helper process, not from
+        # the server with its event loop and threads
+        ctx = multiprocessing.get_context("forkserver")
+        ctx.set_forkserver_preload(["app.security"])
+        return ProcessPoolExecutor(max_workers=self.workers, mp_context=ctx)
+
+    async def start(self) -> None:
+        """Create the worker pool (processes are spawned on first use)"""
+        if self._executor is None:
+            self._executor = self._new_executor()
+
+    async def stop(self) -> None:
+        """Shut the worker pool down; queued jobs are cancelled"""
+        executor, self._executor = self._executor, None
+        if executor is not None:
+            await asyncio.to_thread(executor.shutdown, True, cancel_futures=True)
+
+    async def _submit(self, fn: Callable[..., Any], *args: Any) -> Any:
+        executor = self._executor
+        if executor is None:
+            raise PasswordHashingUnavailableError()
+        if self._pending >= self.max_pending:
+            self._rejected += 1
+            raise PasswordHashingBusyError()
+
+        self._pending += 1
+        succeeded = False
+        try:
+            result = await asyncio.get_running_loop().run_in_executor(executor, fn, *args)
+            succeeded = True
+            return result
+        except BrokenProcessPool:
+            # A worker died (e.g. OOM-killed); replace the pool for later jobs
+            logger.error("Password hashing pool broken; restarting it")
+            if self._executor is executor:
+                self._executor = self._new_executor()
+            raise PasswordHashingUnavailableError()
+        finally:
+            self._pending -= 1
+            if succeeded:
+                self._completed += 1
+            else:
+                self._failed += 1
+
+    async def hash(self, password: str) -> str:
+        """Hash a password with the current parameters"""
+        return await self._submit(
+            security.hash_peppered, security.hasher_params(), security.pepper_password(password)
+        )
+
+    async def verify(self, password: str, password_hash: str) -> bool:
+        """Verify a password against a stored hash"""
+        return await self._submit(
+            security.verify_peppered, security.hasher_params(), security.pepper_password(password), password_hash
+        )
+
+    def needs_rehash(self, password_hash: str) -> bool:
+        """True when the stored hash was made with other than the current parameters"""
+        return security.needs_rehash(password_hash)
+
+    async def calibrate(self, target_ms: int, min_time_cost: int) -> security.HasherParams:
+        """
+        Pick the smallest argon2 time_cost (not below ``min_time_cost``) whose hash
+        takes at least ``target_ms`` on a worker, and use it from now on.
+        """
+        current = security.hasher_params()
+        key = (target_ms, current["memory_cost"], current["parallelism"], min_time_cost)
+        params = _calibrations.get(key)
+        if params is None:
+            params = await self._submit(
+                security.calibrate_hasher, target_ms, current["memory_cost"], current["parallelism"], min_time_cost
+            )
+            _calibrations[key] = params
+            logger.info(f"Calibrated password hashing for {target_ms} ms: {params}")
+        security.configure_hasher(params)
+        return params
+
+    def stats(self) -> Dict[str, Any]:
+        """Pool counters for diagnostics"""
+        return {
+            "workers": self.workers,
+            "pending": self._pending,
+            "completed": self._completed,
+            "failed": self._failed,
+            "rejected": self._rejected,
+            "params": security.hasher_params(),
+        }
@@ -1,120 +1,330 @@
-# app/infra/token_store_json.py
 """
-JSON-based refresh token store with atomic writes and locking.
-File: data/auth/refresh_store.json
+JSON-based refresh token store, resident in memory with write-through persistence.
+Files: data/auth/refresh_store.json (snapshot) + data/auth/refresh_store.log (append log)
+
+The store is loaded once (snapshot plus log replay) and then served from memory,
+with token_hash/user/family indexes. Every mutation appends one JSON line holding
+the full post-change records ("put") or removed ids ("del") and fsyncs it, on the
+event loop. Every ``snapshot_every`` appends the log is moved aside to
+refresh_store.log.1 and a copy of the store is written as the new snapshot in a
+worker thread; the old log is removed once the snapshot is in place. Loading
+replays refresh_store.log.1 and then refresh_store.log over the snapshot, and
+replaying a line twice is harmless, so a crash at any point loses nothing (changes
+made while the snapshot is written are in the new log). All state changes happen
+without awaiting, so no lock is needed on the single event loop; the store
+assumes one server process owns the files.
+
+Expiry and revocation times are also kept in two min-heaps, so compact() reclaims
+the oldest dead tokens in small batches without scanning or re-parsing the store.
+Heap entries are checked against the record when popped; stale ones are skipped.
 """
 
 import asyncio
 import hashlib
+import heapq
 import json
 import logging
 import os
 import secrets
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
-from typing import Optional
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 
 from app.domain.models.tokens import RefreshStore, TokenRecord
 
 logger = logging.getLogger(__name__)
 
 
+def _empty_store() -> RefreshStore:
+    return RefreshStore(
+        version=1,
+        updated_at_utc=datetime.now(timezone.utc).isoformat(),
+        tokens={},
+        user_index={},
+        family_index={}
+    )
+
+
+def _ts(iso_utc: str) -> float:
+    return datetime.fromisoformat(iso_utc.replace("Z", "+00:00")).timestamp()
+
+
 class JsonTokenStore:
-    """Manages refresh tokens in a JSON file with atomic writes"""
-    
-    def __init__(self, data_dir: str):
+    """Manages refresh tokens in memory, persisted as JSON snapshot + append log"""
+
+    def __init__(self, data_dir: str, snapshot_every: int = 500):
         """
         Args:
             data_dir: Base data directory
+            snapshot_every: Log appends between two snapshots
         """
         self.auth_dir = Path(data_dir) / "auth"
         self.store_path = self.auth_dir / "refresh_store.json"
         self.tmp_path = self.auth_dir / "refresh_store.json.tmp"
-        self._lock = asyncio.Lock()
-        
+        self.log_path = self.auth_dir / "refresh_store.log"
+        self.old_log_path = self.auth_dir / "refresh_store.log.1"  # log covered by the snapshot being written
+        self.snapshot_every = max(1, snapshot_every)
+
+        self._store: Optional[RefreshStore] = None
+        self._hash_index: Dict[str, str] = {}  # token_hash -> token_id
+        self._expiry_heap: List[Tuple[float, str]] = []   # (expires_at, token_id)
+        self._revoked_heap: List[Tuple[float, str]] = []  # (revoked_at, token_id)
+        self._log_entries = 0
+        self._snapshot_task: Optional["asyncio.Task[None]"] = None
+
         # Ensure directory exists
         self.auth_dir.mkdir(parents=True, exist_ok=True)
-    
-    async def load(self) -> RefreshStore:
-        """Load refresh store from file (atomic)"""
-        async with self._lock:
-            if not self.store_path.exists():
-                # Initialize empty store
-                return RefreshStore(
-                    version=1,
-                    updated_at_utc=datetime.now(timezone.utc).isoformat(),
-                    tokens={},
-                    user_index={},
-                    family_index={}
-                )
-            
+
+    # ---------- persistence ----------
+
+    def _read_snapshot(self) -> RefreshStore:
+        if not self.store_path.exists():
+            return _empty_store()
+        try:
+            with open(self.store_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            return RefreshStore(**data)
+        except Exception as e:
+            logger.error(f"Failed to load refresh store: {e}")
+            # Return empty store on corruption
+            return _empty_store()
+
+    def _replay_log(self, store: RefreshStore, path: Path) -> int:
+        if not path.exists():
+            return 0
+        applied = 0
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    entry = json.loads(line)
+                    for token_id, rec in entry.get("put", {}).items():
+                        self._put(store, token_id, TokenRecord(**rec))
+                    for token_id in entry.get("del", []):
+                        self._delete(store, token_id)
+                except Exception as e:
+                    # A torn last line after a crash; everything before it is intact
+                    logger.warning(f"Skipping unreadable refresh store log entry: {e}")
+                    continue
+                applied += 1
+        return applied
+
+    def _ensure_loaded(self) -> RefreshStore:
+        if self._store is None:
+            store = self._read_snapshot()
+            self._reindex(store)
+            self._log_entries = self._replay_log(store, self.old_log_path) + self._replay_log(store, self.log_path)
+            self._store = store
+        return self._store
+
+    def _reindex(self, store: RefreshStore) -> None:
+        self._hash_index = {rec.token_hash: tid for tid, rec in store.tokens.items()}
+        self._expiry_heap = [(_ts(rec.expires_at_utc), tid) for tid, rec in store.tokens.items()]
+        self._revoked_heap = [
+            (_ts(rec.revoked_at_utc), tid) for tid, rec in store.tokens.items() if rec.revoked_at_utc
+        ]
+        heapq.heapify(self._expiry_heap)
+        heapq.heapify(self._revoked_heap)
+
+    def _write_snapshot(self, store: RefreshStore) -> None:
+        """Write the full store atomically (tmp file + fsync + rename); runs in a worker thread"""
+        # Ensure directory exists (race condition protection)
+        self.auth_dir.mkdir(parents=True, exist_ok=True)
+
+        try:
+            # Write to temporary file
+            with open(self.tmp_path, "w", encoding="utf-8") as f:
+                json.dump(store.model_dump(), f, indent=2, ensure_ascii=False)
+                f.flush()
+                os.fsync(f.fileno())  # Ensure written to disk
+
+            # Verify tmp file exists before rename (after file is closed)
+            # NOTE: Check must be outside with block to ensure file is closed
+            if not self.tmp_path.exists():
+                raise FileNotFoundError(f"Temporary file not created: {self.tmp_path}")
+
+            # Atomic rename
+            os.replace(self.tmp_path, self.store_path)
+            logger.debug("Refresh store saved atomically")
+        except Exception as e:
+            # Clean up tmp file if it exists
+            if self.tmp_path.exists():
+                try:
+                    self.tmp_path.unlink()
+                except Exception:
+                    pass
+            logger.error(f"Failed to save refresh store: {e}")
+            raise
+
+    def _rotate_log(self) -> None:
+        """Move the append log aside (the next snapshot covers it) and start an empty one"""
+        if self.old_log_path.exists():
+            # A failed snapshot left its log behind: keep it until a snapshot succeeds
+            pending = self.log_path.read_text(encoding="utf-8") if self.log_path.exists() else ""
+            with open(self.old_log_path, "a", encoding="utf-8") as f:
+                f.write("\n" + pending)  # blank lines are skipped; guards against a torn last line
+                f.flush()
+                os.fsync(f.fileno())
+        elif self.log_path.exists():
+            os.replace(self.log_path, self.old_log_path)
+        with open(self.log_path, "w", encoding="utf-8") as f:
+            f.flush()
+            os.fsync(f.fileno())
+        self._log_entries = 0
+
+    def _start_snapshot(self, store: RefreshStore) -> RefreshStore:
+        """
+        Rotate the log and copy the store for a snapshot (on the loop, without awaiting).
+
+        Records are shared with the live store, not copied: any later change to one
+        is appended to the new log and replayed over the snapshot.
+        """
+        self._rotate_log()
+        return RefreshStore.model_construct(
+            version=store.version,
+            updated_at_utc=datetime.now(timezone.utc).isoformat(),
+            tokens=dict(store.tokens),
+            user_index={k: list(v) for k, v in store.user_index.items()},
+            family_index={k: list(v) for k, v in store.family_index.items()},
+        )
+
+    async def _finish_snapshot(self, copy: RefreshStore) -> None:
+        """Write a snapshot started by _start_snapshot, then drop the log it covers"""
+        await asyncio.to_thread(self._write_snapshot, copy)
+        self.old_log_path.unlink(missing_ok=True)
+
+    async def _background_snapshot(self, copy: RefreshStore) -> None:
+        try:
+            await self._finish_snapshot(copy)
+        except Exception:
+            # refresh_store.log.1 stays and is folded into the next snapshot
+            logger.exception("Background refresh store snapshot failed")
+        finally:
+            self._snapshot_task = None
+
+    async def _wait_snapshot(self) -> None:
+        task = self._snapshot_task
+        if task is not None:
+            await asyncio.shield(task)
+
+    def _append(self, put: Iterable[str] = (), delete: Iterable[str] = ()) -> None:
+        """Persist changed/removed token ids as one log line (one fsync)"""
+        store = self._ensure_loaded()
+        entry: Dict[str, Any] = {}
+        put_ids = list(put)
+        delete_ids = list(delete)
+        if put_ids:
+            entry["put"] = {tid: store.tokens[tid].model_dump() for tid in put_ids}
+        if delete_ids:
+            entry["del"] = delete_ids
+        if not entry:
+            return
+        store.updated_at_utc = datetime.now(timezone.utc).isoformat()
+
+        with open(self.log_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry, ensure_ascii=False, separators=(",", ":")) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self._log_entries += 1
+        if self._log_entries >= self.snapshot_every and self._snapshot_task is None:
+            self._snapshot_task = asyncio.get_running_loop().create_task(
+                self._background_snapshot(self._start_snapshot(store))
+            )
+
+    # ---------- in-memory indexes ----------
+
+    def _put(self, store: RefreshStore, token_id: str, record: TokenRecord) -> None:
+        previous = store.tokens.get(token_id)
+        store.tokens[token_id] = record
+        if record.revoked_at_utc and (previous is None or previous.revoked_at_utc != record.revoked_at_utc):
+            self._track_revoked(token_id, record)
+        if previous is not None:
+            if previous.token_hash != record.token_hash:
+                self._hash_index.pop(previous.token_hash, None)
+            if previous.expires_at_utc != record.expires_at_utc:
+                heapq.heappush(self._expiry_heap, (_ts(record.expires_at_utc), token_id))
+            self._hash_index[record.token_hash] = token_id
+            return
+        self._hash_index[record.token_hash] = token_id
+        heapq.heappush(self._expiry_heap, (_ts(record.expires_at_utc), token_id))
+        store.user_index.setdefault(record.user_id, []).append(token_id)
+        store.family_index.setdefault(record.family_id, []).append(token_id)
+
+    def _track_revoked(self, token_id: str, record: TokenRecord) -> None:
+        if record.revoked_at_utc:
+            heapq.heappush(self._revoked_heap, (_ts(record.revoked_at_utc), token_id))
+
+    def _delete(self, store: RefreshStore, token_id: str) -> Optional[TokenRecord]:
+        record = store.tokens.pop(token_id, None)
+        if record is None:
+            return None
+        if self._hash_index.get(record.token_hash) == token_id:
+            del self._hash_index[record.token_hash]
+        for index, key in ((store.user_index, record.user_id), (store.family_index, record.family_id)):
+            ids = index.get(key)
+            if ids is None:
+                continue
             try:
-                with open(self.store_path, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-                return RefreshStore(**data)
-            except Exception as e:
-                logger.error(f"Failed to load refresh store: {e}")
-                # Return empty store on corruption
-                return RefreshStore(
-                    version=1,
-                    updated_at_utc=datetime.now(timezone.utc).isoformat(),
-                    tokens={},
-                    user_index={},
-                    family_index={}
-                )
-    
+                ids.remove(token_id)
+            except ValueError:
+                pass
+            if not ids:
+                del index[key]
+        return record
+
+    # ---------- public API ----------
+
+    async def load(self) -> RefreshStore:
+        """Return the resident refresh store (treat as read-only; mutate via the store methods)"""
+        return self._ensure_loaded()
+
     async def save(self, store: RefreshStore) -> None:
         """
-        Save refresh store to file atomically.
+        Replace the resident store and write it as a new snapshot.
         Uses tmp file + rename for atomic replacement.
         """
-        async with self._lock:
-            store.updated_at_utc = datetime.now(timezone.utc).isoformat()
-            
-            # Ensure directory exists (race condition protection)
-            self.auth_dir.mkdir(parents=True, exist_ok=True)
-            
-            try:
-                # Write to temporary file
-                with open(self.tmp_path, "w", encoding="utf-8") as f:
-                    json.dump(store.model_dump(), f, indent=2, ensure_ascii=False)
-                    f.flush()
-                    os.fsync(f.fileno())  # Ensure written to disk
-                
-                # Verify tmp file exists before rename (after file is closed)
-                # NOTE: Check must be outside with block to ensure file is closed
-                if not self.tmp_path.exists():
-                    raise FileNotFoundError(f"Temporary file not created: {self.tmp_path}")
-                
-                # Atomic rename
-                os.replace(self.tmp_path, self.store_path)
-                logger.debug("Refresh store saved atomically")
-            except Exception as e:
-                # Clean up tmp file if it exists
-                if self.tmp_path.exists():
-                    try:
-                        self.tmp_path.unlink()
-                    except Exception:
-                        pass
-                logger.error(f"Failed to save refresh store: {e}")
-                raise
-    
+        await self._wait_snapshot()
+        self._store = store
+        self._reindex(store)
+        # Old log entries describe the replaced store; only later appends apply
+        self.old_log_path.unlink(missing_ok=True)
+        await self._finish_snapshot(self._start_snapshot(store))
+
+    async def close(self) -> None:
+        """Fold the append log into a snapshot (called on shutdown)"""
+        await self._wait_snapshot()
+        if self._store is not None and (self._log_entries or self.old_log_path.exists()):
+            await self._finish_snapshot(self._start_snapshot(self._store))
+
+    async def count(self) -> int:
+        """Number of stored token records"""
+        return len(self._ensure_loaded().tokens)
+
+    def memory_roots(self) -> List[Any]:
+        """Copies of the resident store and its indexes for memory diagnostics"""
+        roots: List[Any] = [dict(self._hash_index), list(self._expiry_heap), list(self._revoked_heap)]
+        if self._store is not None:
+            roots += [dict(self._store.tokens), dict(self._store.user_index), dict(self._store.family_index)]
+        return roots
+
     async def find_by_hash(self, token_hash: str) -> Optional[tuple[str, TokenRecord]]:
         """
         Find token record by hash.
-        
+
         Args:
             token_hash: SHA256 hash of token
-            
+
         Returns:
             Tuple of (token_id, TokenRecord) if found, None otherwise
         """
-        store = await self.load()
-        for token_id, record in store.tokens.items():
-            if record.token_hash == token_hash:
-                return (token_id, record)
-        return None
-    
+        store = self._ensure_loaded()
+        token_id = self._hash_index.get(token_hash)
+        if token_id is None:
+            return None
+        # Copy so callers cannot alter the resident record behind the log's back
+        return (token_id, store.tokens[token_id].model_copy())
+
     async def add_token(
         self,
         token_id: str,
@@ -126,7 +336,7 @@ class JsonTokenStore:
     ) -> None:
         """
         Add a new refresh token record.
-        
+
         Args:
             token_id: Unique token identifier
             user_id: User identifier
@@ -135,12 +345,11 @@ class JsonTokenStore:
             prev_token_id: Previous token in rotation chain
             ttl_days: Time-to-live in days
         """
-        store = await self.load()
-        
+        store = self._ensure_loaded()
+
         now_utc = datetime.now(timezone.utc)
-        from datetime import timedelta
         expires_at_utc = now_utc + timedelta(days=ttl_days)
-        
+
         record = TokenRecord(
             user_id=user_id,
             token_hash=token_hash,
@@ -152,92 +361,132 @@ class JsonTokenStore:
             replaced_by_token_id=None,
             last_used_at_utc=None
         )
-        
-        store.tokens[token_id] = record
-        
-        # Update indexes
-        if user_id not in store.user_index:
-            store.user_index[user_id] = []
-        store.user_index[user_id].append(token_id)
-        
-        if family_id not in store.family_index:
-            store.family_index[family_id] = []
-        store.family_index[family_id].append(token_id)
-        
-        await self.save(store)
-    
+
+        self._put(store, token_id, record)
+        self._append(put=[token_id])
+
+    async def rotate_token(
+        self,
+        token_id: str,
+        new_token_id: str,
+        new_token_hash: str,
+        ttl_days: int
+    ) -> None:
+        """
+        Rotation as one transaction: add the successor to the same family, mark
+        the old token replaced and stamp its last use, persisted as one log line.
+
+        Args:
+            token_id: Token being rotated
+            new_token_id: Identifier of the successor token
+            new_token_hash: SHA256 hash of the successor token
+            ttl_days: Successor time-to-live in days
+        """
+        store = self._ensure_loaded()
+        old = store.tokens.get(token_id)
+        if old is None:
+            raise KeyError(token_id)
+
+        now_utc = datetime.now(timezone.utc)
+        record = TokenRecord(
+            user_id=old.user_id,
+            token_hash=new_token_hash,
+            family_id=old.family_id,
+            prev_token_id=token_id,
+            issued_at_utc=now_utc.isoformat(),
+            expires_at_utc=(now_utc + timedelta(days=ttl_days)).isoformat(),
+        )
+        self._put(store, new_token_id, record)
+        old.replaced_by_token_id = new_token_id
+        old.last_used_at_utc = now_utc.isoformat()
+        self._append(put=[new_token_id, token_id])
+
     async def mark_replaced(self, token_id: str, new_token_id: str) -> None:
         """Mark token as replaced during rotation"""
-        store = await self.load()
+        store = self._ensure_loaded()
         if token_id in store.tokens:
             store.tokens[token_id].replaced_by_token_id = new_token_id
-            await self.save(store)
-    
+            self._append(put=[token_id])
+
     async def revoke_token(self, token_id: str) -> None:
         """Revoke a single token"""
-        store = await self.load()
+        store = self._ensure_loaded()
         if token_id in store.tokens:
             store.tokens[token_id].revoked_at_utc = datetime.now(timezone.utc).isoformat()
-            await self.save(store)
-    
+            self._track_revoked(token_id, store.tokens[token_id])
+            self._append(put=[token_id])
+
     async def revoke_family(self, family_id: str) -> None:
         """Revoke all tokens in a family (used for replay detection)"""
-        store = await self.load()
-        token_ids = store.family_index.get(family_id, [])
-        
+        store = self._ensure_loaded()
+        token_ids = [tid for tid in store.family_index.get(family_id, []) if tid in store.tokens]
+
         now_utc = datetime.now(timezone.utc).isoformat()
         for token_id in token_ids:
-            if token_id in store.tokens:
-                store.tokens[token_id].revoked_at_utc = now_utc
-        
+            store.tokens[token_id].revoked_at_utc = now_utc
+            self._track_revoked(token_id, store.tokens[token_id])
+
         if token_ids:
             logger.warning(f"Revoked entire token family: {family_id} ({len(token_ids)} tokens)")
-            await self.save(store)
-    
+            self._append(put=token_ids)
+
     async def update_last_used(self, token_id: str) -> None:
         """Update last used timestamp"""
-        store = await self.load()
+        store = self._ensure_loaded()
         if token_id in store.tokens:
             store.tokens[token_id].last_used_at_utc = datetime.now(timezone.utc).isoformat()
-            await self.save(store)
-    
+            self._append(put=[token_id])
+
+    def _pop_due(
+        self,
+        heap: List[Tuple[float, str]],
+        due: float,
+        field: str,
+        limit: Optional[int],
+        removed: List[str],
+    ) -> None:
+        store = self._ensure_loaded()
+        while heap and heap[0][0] < due and (limit is None or len(removed) < limit):
+            at, token_id = heapq.heappop(heap)
+            record = store.tokens.get(token_id)
+            value = getattr(record, field) if record is not None else None
+            if value is None or _ts(value) != at:
+                continue  # already removed, or superseded by a newer entry
+            self._delete(store, token_id)
+            removed.append(token_id)
+
+    async def compact(self, limit: Optional[int] = None, revoked_retention_seconds: Optional[int] = None) -> int:
+        """
+        Remove expired tokens, and tokens revoked more than ``revoked_retention_seconds``
+        ago, oldest first.
+
+        Args:
+            limit: Maximum number of tokens removed by this call (None: no limit)
+            revoked_retention_seconds: Keep revoked tokens this long (None: until they expire)
+
+        Returns:
+            Number of tokens removed
+        """
+        now = datetime.now(timezone.utc).timestamp()
+        removed: List[str] = []
+        self._pop_due(self._expiry_heap, now, "expires_at_utc", limit, removed)
+        if revoked_retention_seconds is not None:
+            self._pop_due(self._revoked_heap, now - revoked_retention_seconds, "revoked_at_utc", limit, removed)
+        if removed:
+            self._append(delete=removed)
+        return len(removed)
+
     async def cleanup_expired(self) -> int:
         """
         Remove expired tokens from store.
-        
+
         Returns:
             Number of tokens removed
         """
-        store = await self.load()
-        now_utc = datetime.now(timezone.utc)
-        
-        to_remove = []
-        for token_id, record in store.tokens.items():
-            expires_at = datetime.fromisoformat(record.expires_at_utc.replace("Z", "+00:00"))
-            if expires_at < now_utc:
-                to_remove.append(token_id)
-        
-        if not to_remove:
-            return 0
-        
-        # Remove from tokens
-        for token_id in to_remove:
-            record = store.tokens[token_id]
-            del store.tokens[token_id]
-            
-            # Remove from indexes
-            if record.user_id in store.user_index:
-                store.user_index[record.user_id] = [
-                    tid for tid in store.user_index[record.user_id] if tid != token_id
-                ]
-            if record.family_id in store.family_index:
-                store.family_index[record.family_id] = [
-                    tid for tid in store.family_index[record.family_id] if tid != token_id
-                ]
-        
-        await self.save(store)
-        logger.info(f"Cleaned up {len(to_remove)} expired tokens")
-        return len(to_remove)
+        removed = await self.compact()
+        if removed:
+            logger.info(f"Cleaned up {removed} expired tokens")
+        return removed
 
 
 def generate_refresh_token() -> str:
@@ -248,11 +497,11 @@ def generate_refresh_token() -> str:
 def hash_refresh_token(token: str, server_salt: str) -> str:
     """
     Hash refresh token with server-side salt.
-    
+
     Args:
         token: Raw refresh token
         server_salt: Server-side salt
-        
+
     Returns:
         Hash string with prefix (e.g., "sha256:...")
     """
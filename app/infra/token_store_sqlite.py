@@ -0,0 +1,312 @@
+"""
+SQLite-based refresh token store.
+File: data/auth/refresh_store.sqlite3
+
+Same async interface as JsonTokenStore. Each mutation is a single indexed
+statement, so cost no longer grows with the number of active sessions. Calls are
+short and synchronous on the event loop thread, like the JSON store's file I/O.
+"""
+
+import logging
+import sqlite3
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, List, Optional
+
+from app.domain.models.tokens import RefreshStore, TokenRecord
+from app.infra.token_store_json import JsonTokenStore
+
+logger = logging.getLogger(__name__)
+
+_COLUMNS = (
+    "user_id",
+    "token_hash",
+    "family_id",
+    "prev_token_id",
+    "issued_at_utc",
+    "expires_at_utc",
+    "revoked_at_utc",
+    "replaced_by_token_id",
+    "last_used_at_utc",
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS refresh_tokens (
+    token_id TEXT PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    token_hash TEXT NOT NULL,
+    family_id TEXT NOT NULL,
+    prev_token_id TEXT,
+    issued_at_utc TEXT NOT NULL,
+    expires_at_utc TEXT NOT NULL,
+    revoked_at_utc TEXT,
+    replaced_by_token_id TEXT,
+    last_used_at_utc TEXT
+);
+CREATE UNIQUE INDEX IF NOT EXISTS ix_refresh_tokens_token_hash ON refresh_tokens (token_hash);
+CREATE INDEX IF NOT EXISTS ix_refresh_tokens_user_id ON refresh_tokens (user_id);
+CREATE INDEX IF NOT EXISTS ix_refresh_tokens_family_id ON refresh_tokens (family_id);
+CREATE INDEX IF NOT EXISTS ix_refresh_tokens_expires_at ON refresh_tokens (expires_at_utc);
+CREATE INDEX IF NOT EXISTS ix_refresh_tokens_revoked_at ON refresh_tokens (revoked_at_utc);
+"""
+
+_SELECT = f"SELECT token_id, {', '.join(_COLUMNS)} FROM refresh_tokens"
+
+
+def _utc_iso(value: Optional[str]) -> Optional[str]:
+    """
+    Canonical UTC ISO 8601 form (microseconds, +00:00 offset).
+    expires_at_utc is compared as text in SQL, so every stored value must share it.
+    """
+    if value is None:
+        return None
+    dt = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.astimezone(timezone.utc).isoformat(timespec="microseconds")
+
+
+def _now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec="microseconds")
+
+
+def _row_to_record(row: sqlite3.Row) -> tuple[str, TokenRecord]:
+    return row["token_id"], TokenRecord(**{c: row[c] for c in _COLUMNS})
+
+
+class SqliteTokenStore:
+    """Manages refresh tokens in a SQLite database"""
+
+    def __init__(self, data_dir: str):
+        """
+        Args:
+            data_dir: Base data directory
+        """
+        self.auth_dir = Path(data_dir) / "auth"
+        self.db_path = self.auth_dir / "refresh_store.sqlite3"
+
+        # Ensure directory exists
+        self.auth_dir.mkdir(parents=True, exist_ok=True)
+
+        # Autocommit; multi-statement changes use explicit transactions
+        self._conn = sqlite3.connect(self.db_path, isolation_level=None, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=FULL")
+        self._conn.executescript(_SCHEMA)
+
+    def _execute(self, sql: str, params: tuple[Any, ...] = ()) -> sqlite3.Cursor:
+        return self._conn.execute(sql, params)
+
+    async def close(self) -> None:
+        """Close the database connection"""
+        self._conn.close()
+
+    async def count(self) -> int:
+        """Number of stored token records"""
+        return self._execute("SELECT COUNT(*) FROM refresh_tokens").fetchone()[0]
+
+    def memory_roots(self) -> List[Any]:
+        """Nothing is resident (tokens live in SQLite)"""
+        return []
+
+    async def load(self) -> RefreshStore:
+        """Materialize the whole store (diagnostics and migration only)"""
+        store = RefreshStore(updated_at_utc=_now_iso())
+        for row in self._execute(f"{_SELECT} ORDER BY issued_at_utc"):
+            token_id, record = _row_to_record(row)
+            store.tokens[token_id] = record
+            store.user_index.setdefault(record.user_id, []).append(token_id)
+            store.family_index.setdefault(record.family_id, []).append(token_id)
+        return store
+
+    async def find_by_hash(self, token_hash: str) -> Optional[tuple[str, TokenRecord]]:
+        """
+        Find token record by hash.
+
+        Args:
+            token_hash: SHA256 hash of token
+
+        Returns:
+            Tuple of (token_id, TokenRecord) if found, None otherwise
+        """
+        row = self._execute(f"{_SELECT} WHERE token_hash = ?", (token_hash,)).fetchone()
+        return _row_to_record(row) if row else None
+
+    def _insert(self, token_id: str, record: TokenRecord, replace: bool = False) -> None:
+        values = record.model_dump()
+        for field in ("issued_at_utc", "expires_at_utc", "revoked_at_utc", "last_used_at_utc"):
+            values[field] = _utc_iso(values[field])
+        verb = "INSERT OR REPLACE" if replace else "INSERT"
+        self._execute(
+            f"{verb} INTO refresh_tokens (token_id, {', '.join(_COLUMNS)}) VALUES ({', '.join('?' * (len(_COLUMNS) + 1))})",
+            (token_id, *(values[c] for c in _COLUMNS)),
+        )
+
+    async def add_token(
+        self,
+        token_id: str,
+        user_id: str,
+        token_hash: str,
+        family_id: str,
+        prev_token_id: Optional[str],
+        ttl_days: int
+    ) -> None:
+        """
+        Add a new refresh token record.
+
+        Args:
+            token_id: Unique token identifier
+            user_id: User identifier
+            token_hash: SHA256 hash of token
+            family_id: Token family identifier
+            prev_token_id: Previous token in rotation chain
+            ttl_days: Time-to-live in days
+        """
+        now_utc = datetime.now(timezone.utc)
+        record = TokenRecord(
+            user_id=user_id,
+            token_hash=token_hash,
+            family_id=family_id,
+            prev_token_id=prev_token_id,
+            issued_at_utc=now_utc.isoformat(),
+            expires_at_utc=(now_utc + timedelta(days=ttl_days)).isoformat(),
+        )
+        self._insert(token_id, record)
+
+    async def rotate_token(
+        self,
+        token_id: str,
+        new_token_id: str,
+        new_token_hash: str,
+        ttl_days: int
+    ) -> None:
+        """
+        Rotation as one transaction: add the successor to the same family, mark
+        the old token replaced and stamp its last use.
+
+        Args:
+            token_id: Token being rotated
+            new_token_id: Identifier of the successor token
+            new_token_hash: SHA256 hash of the successor token
+            ttl_days: Successor time-to-live in days
+        """
+        now_utc = datetime.now(timezone.utc)
+        self._execute("BEGIN IMMEDIATE")
+        try:
+            row = self._execute("SELECT user_id, family_id FROM refresh_tokens WHERE token_id = ?", (token_id,)).fetchone()
+            if row is None:
+                raise KeyError(token_id)
+            record = TokenRecord(
+                user_id=row["user_id"],
+                token_hash=new_token_hash,
+                family_id=row["family_id"],
+                prev_token_id=token_id,
+                issued_at_utc=now_utc.isoformat(),
+                expires_at_utc=(now_utc + timedelta(days=ttl_days)).isoformat(),
+            )
+            self._insert(new_token_id, record)
+            self._execute(
+                "UPDATE refresh_tokens SET replaced_by_token_id = ?, last_used_at_utc = ? WHERE token_id = ?",
+                (new_token_id, _utc_iso(now_utc.isoformat()), token_id),
+            )
+        except Exception:
+            self._execute("ROLLBACK")
+            raise
+        self._execute("COMMIT")
+
+    async def mark_replaced(self, token_id: str, new_token_id: str) -> None:
+        """Mark token as replaced during rotation"""
+        self._execute("UPDATE refresh_tokens SET replaced_by_token_id = ? WHERE token_id = ?", (new_token_id, token_id))
+
+    async def revoke_token(self, token_id: str) -> None:
+        """Revoke a single token"""
+        self._execute("UPDATE refresh_tokens SET revoked_at_utc = ? WHERE token_id = ?", (_now_iso(), token_id))
+
+    async def revoke_family(self, family_id: str) -> None:
+        """Revoke all tokens in a family (used for replay detection)"""
+        cur = self._execute("UPDATE refresh_tokens SET revoked_at_utc = ? WHERE family_id = ?", (_now_iso(), family_id))
+        if cur.rowcount:
+            logger.warning(f"Revoked entire token family: {family_id} ({cur.rowcount} tokens)")
+
+    async def update_last_used(self, token_id: str) -> None:
+        """Update last used timestamp"""
+        self._execute("UPDATE refresh_tokens SET last_used_at_utc = ? WHERE token_id = ?", (_now_iso(), token_id))
+
+    async def compact(self, limit: Optional[int] = None, revoked_retention_seconds: Optional[int] = None) -> int:
+        """
+        Remove expired tokens, and tokens revoked more than ``revoked_retention_seconds``
+        ago, oldest first.
+
+        Args:
+            limit: Maximum number of tokens removed by this call (None: no limit)
+            revoked_retention_seconds: Keep revoked tokens this long (None: until they expire)
+
+        Returns:
+            Number of tokens removed
+        """
+        now_utc = datetime.now(timezone.utc)
+        due = [("expires_at_utc", now_utc)]
+        if revoked_retention_seconds is not None:
+            due.append(("revoked_at_utc", now_utc - timedelta(seconds=revoked_retention_seconds)))
+        removed = 0
+        for column, before in due:
+            remaining = -1 if limit is None else limit - removed
+            if remaining == 0:
+                break
+            cur = self._execute(
+                f"DELETE FROM refresh_tokens WHERE token_id IN ("
+                f"SELECT token_id FROM refresh_tokens WHERE {column} < ? ORDER BY {column} LIMIT ?)",
+                (before.isoformat(timespec="microseconds"), remaining),
+            )
+            removed += cur.rowcount
+        return removed
+
+    async def cleanup_expired(self) -> int:
+        """
+        Remove expired tokens from store.
+
+        Returns:
+            Number of tokens removed
+        """
+        cur = self._execute("DELETE FROM refresh_tokens WHERE expires_at_utc < ?", (_now_iso(),))
+        if cur.rowcount:
+            logger.info(f"Cleaned up {cur.rowcount} expired tokens")
+        return cur.rowcount
+
+    async def import_store(self, store: RefreshStore) -> int:
+        """
+        Insert every record of a RefreshStore in one transaction (existing ids are replaced).
+
+        Returns:
+            Number of records written
+        """
+        self._execute("BEGIN IMMEDIATE")
+        try:
+            for token_id, record in store.tokens.items():
+                self._insert(token_id, record, replace=True)
+        except Exception:
+            self._execute("ROLLBACK")
+            raise
+        self._execute("COMMIT")
+        return len(store.tokens)
+
+
+async def migrate_json_store(data_dir: str) -> int:
+    """
+    One-shot migration of data/auth/refresh_store.json (+ its append log) into SQLite.
+
+    Safe to re-run: records are upserted by token_id. The JSON files are left in
+    place so the switch can be rolled back by changing the backend setting.
+
+    Returns:
+        Number of migrated token records
+    """
+    source = JsonTokenStore(data_dir=data_dir)
+    target = SqliteTokenStore(data_dir=data_dir)
+    try:
+        migrated = await target.import_store(await source.load())
+    finally:
+        await target.close()
+    logger.info(f"Migrated {migrated} refresh tokens to {target.db_path}")
+    return migrated
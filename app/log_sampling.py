@@ -0,0 +1,133 @@
+# app/log_sampling.py
+"""
+Sampling policy for high-volume log lines.
+
+- http_request: errors (status >= 400) and slow requests are always logged. Fast
+  successes are logged while the per-second budget lasts, then sampled at
+  ``http_log_sample_rate``. Audit events use the app.audit logger and are never
+  sampled.
+- /api/logs/client: each client gets a token bucket of entries; entries beyond
+  it are dropped.
+
+Skipped lines are not lost from the totals: the next line that is written for the
+same stream carries ``sampled_away`` = number of lines skipped since the previous
+one, so count(lines) + sum(sampled_away) equals the real total.
+"""
+from __future__ import annotations
+
+import random
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional
+
+from .settings import settings
+
+
+class HttpLogSampler:
+    """Decides which http_request lines are written"""
+
+    def __init__(
+        self,
+        budget_per_second: Optional[int] = None,
+        sample_rate: Optional[float] = None,
+        slow_ms: Optional[int] = None,
+        rand: Callable[[], float] = random.random,
+    ) -> None:
+        self.budget_per_second = settings.http_log_budget_per_second if budget_per_second is None else budget_per_second
+        self.sample_rate = settings.http_log_sample_rate if sample_rate is None else sample_rate
+        self.slow_ms = settings.http_log_slow_ms if slow_ms is None else slow_ms
+        self._rand = rand
+        self._window = -1
+        self._in_window = 0
+        self._skipped = 0
+        self.sampled_away_total = 0
+
+    def _release(self) -> int:
+        skipped, self._skipped = self._skipped, 0
+        return skipped
+
+    def keep(self, status: int, duration_ms: int) -> Optional[int]:
+        """
+        Returns:
+            None to skip the line, otherwise the sampled_away count to attach to it
+        """
+        if status >= 400 or duration_ms >= self.slow_ms:
+            return self._release()
+
+        window = int(time.monotonic())
+        if window != self._window:
+            self._window = window
+            self._in_window = 0
+        self._in_window += 1
+        if self._in_window <= self.budget_per_second or self._rand() < self.sample_rate:
+            return self._release()
+
+        self._skipped += 1
+        self.sampled_away_total += 1
+        return None
+
+
+class _TokenBucket:
+    __slots__ = ("tokens", "updated", "skipped")
+
+    def __init__(self, tokens: float, now: float) -> None:
+        self.tokens = tokens
+        self.updated = now
+        self.skipped = 0
+
+
+class ClientLogLimiter:
+    """Per-client token buckets for /api/logs/client entries"""
+
+    def __init__(
+        self,
+        rate_per_second: Optional[float] = None,
+        burst: Optional[int] = None,
+        max_clients: int = 10000,
+    ) -> None:
+        self.rate_per_second = settings.client_log_rate_per_second if rate_per_second is None else rate_per_second
+        self.burst = settings.client_log_burst if burst is None else burst
+        self.max_clients = max_clients
+        self._buckets: "OrderedDict[str, _TokenBucket]" = OrderedDict()
+        self.sampled_away_total = 0
+
+    def _bucket(self, client: str, now: float) -> _TokenBucket:
+        bucket = self._buckets.get(client)
+        if bucket is None:
+            bucket = _TokenBucket(float(self.burst), now)
+            self._buckets[client] = bucket
+            if len(self._buckets) > self.max_clients:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(client)
+            bucket.tokens = min(float(self.burst), bucket.tokens + (now - bucket.updated) * self.rate_per_second)
+            bucket.updated = now
+        return bucket
+
+    def admit(self, client: str, entries: int) -> int:
+        """Take up to ``entries`` tokens; returns how many entries may be logged"""
+        bucket = self._bucket(client, time.monotonic())
+        allowed = min(entries, int(bucket.tokens))
+        bucket.tokens -= allowed
+        dropped = entries - allowed
+        bucket.skipped += dropped
+        self.sampled_away_total += dropped
+        return allowed
+
+    def take_sampled_away(self, client: str) -> int:
+        """Entries dropped for ``client`` since the last call (attach to the next written line)"""
+        bucket = self._buckets.get(client)
+        if bucket is None:
+            return 0
+        skipped, bucket.skipped = bucket.skipped, 0
+        return skipped
+
+    def stats(self) -> Dict[str, Any]:
+        return {"clients": len(self._buckets), "sampled_away_total": self.sampled_away_total}
+
+    def memory_roots(self) -> List[Any]:
+        """Copy of the bucket table for memory diagnostics"""
+        return [dict(self._buckets)]
+
+
+client_log_limiter = ClientLogLimiter()
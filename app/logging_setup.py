@@ -1,78 +1,211 @@
 # app/logging_setup.py
 from __future__ import annotations
 
+import atexit
+import copy
 import json
 import logging
 import os
+import queue
 import sys
 import time
-from logging.handlers import RotatingFileHandler
+from logging.handlers import QueueHandler, QueueListener
 from pathlib import Path
-from typing import Any, Dict
+from typing import Any, Dict, List, Optional, Tuple
+
+from .infra.audit_store import AuditStore, AuditStoreHandler, record_ts_utc
+from .infra.log_archive import CompressingRotatingFileHandler
+
+
+# JSON に出す extra キー（この順で出力）
+_EXTRA_KEYS = (
+    "event",
+    "request_id",
+    "method",
+    "path",
+    "status",
+    "duration_ms",
+    "timings",
+    "user_id",
+    "username",
+    "word_id",
+    "headword",
+    "rating",
+    "err_type",
+    "error_code",
+    "detail",
+    "request_body",
+    "result",
+    "word_count",
+    "mode",
+    "error_count",
+    "reclaimed",
+    "store_size",
+    "dropped",
+    "sampled_away",
+    "profile",
+    "task",
+    "stack",
+)
+_SERIALIZED_KEYS = frozenset(("detail", "request_body"))
+# これらのロガーの行には UTC マイクロ秒の ts_utc も書く（監査インデックスの再構築用）
+_PRECISE_TS_LOGGERS = frozenset(("app.audit",))
+_MISSING = object()
 
 
 class JsonFormatter(logging.Formatter):
+    """
+    1 レコード = 1 行の JSON。
+    - extra は record.__dict__ を直接引く（キーごとの hasattr をしない）
+    - ts の strftime は同じ秒の間キャッシュする
+    - 整形結果をレコードに保持し、stdout とファイルで json.dumps を二重に行わない
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._ts_second = -1
+        self._ts_text = ""
+
+    def _ts(self, created: float) -> str:
+        second = int(created)
+        if second != self._ts_second:
+            self._ts_text = time.strftime("%Y-%m-%dT%H:%M:%S%z", time.localtime(second))
+            self._ts_second = second
+        return self._ts_text
+
     def format(self, record: logging.LogRecord) -> str:
+        attrs = record.__dict__
+        cached = attrs.get("_json_line")
+        if cached is not None:
+            return cached
+
         base: Dict[str, Any] = {
-            "ts": time.strftime("%Y-%m-%dT%H:%M:%S%z", time.localtime(record.created)),
+            "ts": self._ts(record.created),
             "level": record.levelname,
             "logger": record.name,
             "msg": record.getMessage(),
         }
+        if record.name in _PRECISE_TS_LOGGERS:
+            base["ts_utc"] = record_ts_utc(record.created)
 
-        for k in (
-            "event",
-            "request_id",
-            "method",
-            "path",
-            "status",
-            "duration_ms",
-            "user_id",
-            "username",
-            "word_id",
-            "headword",
-            "rating",
-            "err_type",
-            "error_code",
-            "detail",
-            "request_body",
-            "result",
-            "word_count",
-            "mode",
-            "error_count",
-        ):
-            if hasattr(record, k):
-                v = getattr(record, k)
-
-                # detail が大きくなるのを防ぐ（運用で十分なサイズに）
-                if k in ("detail", "request_body"):
-                    s = None
-                    try:
-                        s = json.dumps(v, ensure_ascii=False)
-                    except Exception:
-                        s = str(v)
-                    # 4KB に丸める（必要なら調整）
-                    if len(s) > 4096:
-                        s = s[:4096] + "...(truncated)"
-                    base[k] = s
-                else:
-                    base[k] = v
+        for k in _EXTRA_KEYS:
+            v = attrs.get(k, _MISSING)
+            if v is _MISSING:
+                continue
+
+            # detail が大きくなるのを防ぐ（運用で十分なサイズに）
+            if k in _SERIALIZED_KEYS:
+                try:
+                    s = json.dumps(v, ensure_ascii=False)
+                except Exception:
+                    s = str(v)
+                # 4KB に丸める（必要なら調整）
+                if len(s) > 4096:
+                    s = s[:4096] + "...(truncated)"
+                base[k] = s
+            else:
+                base[k] = v
 
         if record.exc_info:
             base["exc_info"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            # QueueHandler 経由では traceback はテキスト化済み
+            base["exc_info"] = record.exc_text
+
+        line = json.dumps(base, ensure_ascii=False)
+        record._json_line = line
+        return line
+
+
+class _DroppingQueueHandler(QueueHandler):
+    """
+    有界キューに積むだけの handler。満杯なら待たずに捨てて数える。
+    捨てた件数は、次にキューに空きができたときに log_dropped レコードとして流す。
+    """
+
+    def __init__(self, q: "queue.Queue[logging.LogRecord]") -> None:
+        super().__init__(q)
+        self.dropped_total = 0
+        self._unreported = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # メッセージだけ確定させ、extra と traceback テキストは JsonFormatter 用に残す
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            if not record.exc_text:
+                record.exc_text = _TRACEBACK_FORMATTER.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        # handle() が self.lock を持った状態で呼ばれるのでカウンタ更新は安全
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped_total += 1
+            self._unreported += 1
+            return
+        if self._unreported:
+            notice = logging.LogRecord(
+                record.name, logging.WARNING, __file__, 0, "log_dropped", None, None
+            )
+            notice.event = "log_dropped"
+            notice.dropped = self._unreported
+            try:
+                self.queue.put_nowait(notice)
+                self._unreported = 0
+            except queue.Full:
+                pass
+
+
+class _Listener(QueueListener):
+    def enqueue_sentinel(self) -> None:
+        # 満杯でも stop() できるよう、sentinel は空きを待って入れる
+        self.queue.put(self._sentinel)
 
-        return json.dumps(base, ensure_ascii=False)
 
+_TRACEBACK_FORMATTER = logging.Formatter()
+_pipelines: List[Tuple[_DroppingQueueHandler, _Listener]] = []
+_audit_store: Optional[AuditStore] = None
 
-def _make_rotating_file_handler(path: Path, level: int) -> RotatingFileHandler:
+
+def _make_rotating_file_handler(path: Path, level: int) -> CompressingRotatingFileHandler:
+    """
+    ローテートしたセグメントは別スレッドで gzip し、件数・合計サイズ・経過日数で削除する
+    （書き込み側はリネーム 1 回だけ）。0 はその制限なし。
+    """
     max_bytes = int(os.getenv("VOCAB_LOG_MAX_BYTES", str(10 * 1024 * 1024)))  # 10MB
     backup_count = int(os.getenv("VOCAB_LOG_BACKUP_COUNT", "10"))
-    h = RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8")
+    archive_max_mb = float(os.getenv("VOCAB_LOG_ARCHIVE_MAX_MB", "0"))
+    retention_days = float(os.getenv("VOCAB_LOG_RETENTION_DAYS", "0"))
+    h = CompressingRotatingFileHandler(
+        path,
+        max_bytes=max_bytes,
+        backup_count=backup_count,
+        max_archive_bytes=int(archive_max_mb * 1024 * 1024),
+        retention_seconds=retention_days * 24 * 60 * 60,
+        compress=os.getenv("VOCAB_LOG_COMPRESS", "1") != "0",
+    )
     h.setLevel(level)
     h.setFormatter(JsonFormatter())
     return h
 
 
+def _make_audit_store_handler(path: Path, level: int) -> AuditStoreHandler:
+    global _audit_store
+    _audit_store = AuditStore(path)
+    h = AuditStoreHandler(_audit_store, level)
+    h.setFormatter(JsonFormatter())
+    return h
+
+
+def get_audit_store() -> Optional[AuditStore]:
+    """監査イベントの索引（VOCAB_AUDIT_INDEX=0 のときは None）"""
+    return _audit_store
+
+
 def _make_stdout_handler(level: int) -> logging.Handler:
     h = logging.StreamHandler(sys.stdout)
     h.setLevel(level)
@@ -80,11 +213,56 @@ def _make_stdout_handler(level: int) -> logging.Handler:
     return h
 
 
+def _attach_queue(logger: logging.Logger, handlers: List[logging.Handler]) -> None:
+    """logger -> 有界キュー -> リスナースレッド -> handlers（整形と I/O はリスナー側）"""
+    capacity = int(os.getenv("VOCAB_LOG_QUEUE_SIZE", "10000"))
+    q: "queue.Queue[logging.LogRecord]" = queue.Queue(maxsize=capacity)
+    queue_handler = _DroppingQueueHandler(q)
+    listener = _Listener(q, *handlers, respect_handler_level=True)
+    listener.start()
+    logger.addHandler(queue_handler)
+    _pipelines.append((queue_handler, listener))
+
+
+def flush_logging() -> None:
+    """キューに積まれたレコードを書き終えるまで待つ（シャットダウン時やテストで使う）"""
+    for queue_handler, listener in _pipelines:
+        queue_handler.queue.join()  # type: ignore[attr-defined]
+        for handler in listener.handlers:
+            handler.flush()
+
+
+def shutdown_logging() -> None:
+    """リスナーを止め（残りは書き出される）、ファイルを閉じる"""
+    global _audit_store
+    _audit_store = None
+    while _pipelines:
+        queue_handler, listener = _pipelines.pop()
+        for lg in (logging.getLogger(), logging.getLogger("app.audit")):
+            if queue_handler in lg.handlers:
+                lg.removeHandler(queue_handler)
+        listener.stop()
+        for handler in listener.handlers:
+            handler.close()
+
+
+def logging_stats() -> Dict[str, int]:
+    """キュー滞留数と、満杯で捨てたレコード数"""
+    return {
+        "queued": sum(qh.queue.qsize() for qh, _ in _pipelines),  # type: ignore[attr-defined]
+        "dropped": sum(qh.dropped_total for qh, _ in _pipelines),
+    }
+
+
 def setup_logging(*, data_dir: Path) -> None:
     """
     - root logger: app.log + stdout
     - app.audit logger: audit.log + stdout（必要なら stdout は外せる）
+      + audit.sqlite3（user_id / event / 時刻の索引。VOCAB_AUDIT_INDEX=0 で無効）
     - uvicorn loggers: root に流す（app.log に入る）
+
+    どちらもイベントループ上ではキューに積むだけで、JSON 整形・書き込み・
+    ローテーションはリスナースレッドが行う。キュー満杯時は捨てて数える。
     """
     level_name = os.getenv("VOCAB_LOG_LEVEL", "INFO").upper()
     level = getattr(logging, level_name, logging.INFO)
@@ -95,20 +273,24 @@ def setup_logging(*, data_dir: Path) -> None:
     app_log_path = log_dir / "app.log"
     audit_log_path = log_dir / "audit.log"
 
+    # 再設定時は前のリスナーを止めてから
+    shutdown_logging()
+
     # root: アプリ全般
     root = logging.getLogger()
     root.setLevel(level)
     root.handlers.clear()
-    root.addHandler(_make_stdout_handler(level))
-    root.addHandler(_make_rotating_file_handler(app_log_path, level))
+    _attach_queue(root, [_make_stdout_handler(level), _make_rotating_file_handler(app_log_path, level)])
 
     # audit: 監査専用（root に二重で流さないため propagate=False）
     audit = logging.getLogger("app.audit")
     audit.setLevel(level)
     audit.handlers.clear()
     audit.propagate = False
-    audit.addHandler(_make_stdout_handler(level))
-    audit.addHandler(_make_rotating_file_handler(audit_log_path, level))
+    audit_handlers = [_make_stdout_handler(level), _make_rotating_file_handler(audit_log_path, level)]
+    if os.getenv("VOCAB_AUDIT_INDEX", "1") != "0":
+        audit_handlers.append(_make_audit_store_handler(log_dir / "audit.sqlite3", level))
+    _attach_queue(audit, audit_handlers)
 
     # uvicorn.error は root に流す（app.logへ）
     for name in ("uvicorn", "uvicorn.error"):
@@ -120,4 +302,7 @@ def setup_logging(*, data_dir: Path) -> None:
     access = logging.getLogger("uvicorn.access")
     access.handlers.clear()
     access.propagate = False
-    access.disabled = True 
\ No newline at end of file
+    access.disabled = True
+
+
+atexit.register(shutdown_logging)
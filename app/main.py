@@ -10,7 +10,7 @@ from typing import Any
 from fastapi import FastAPI, Request
 from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.openapi.utils import get_openapi
 from starlette.exceptions import HTTPException as StarletteHTTPException
 
@@ -18,13 +18,26 @@ from app.middleware_bodylog import RequestBodyCaptureMiddleware
 
 from . import storage, deps
 from .errors import ApiErrorPayload, http_error_code, is_safe_to_echo_detail
-from .logging_setup import setup_logging
+from .logging_setup import flush_logging, setup_logging
 from .middleware import RequestLoggingMiddleware
-from .routers import auth, io, logs, study, words, vocab, examples
+from .middleware_profiling import ProfilingMiddleware
+from .middleware_usage import UsageMiddleware
+from .routers import admin, auth, io, logs, study, words, vocab, examples
 from .settings import settings
 from .infra.jwt_provider import JWTProvider
 from .infra.token_store_json import JsonTokenStore
+from .infra.token_store_sqlite import SqliteTokenStore
+from .service.token_store_port import TokenStorePort
 from .service.auth_service import AuthService
+from .service.import_jobs import ImportJobManager
+from .service.token_compaction import TokenStoreCompactor
+from .service.loop_monitor import LoopLagMonitor
+from .service.memory_diagnostics import register_runtime_structures, unregister_runtime_structures
+from .infra.password_pool import PasswordHashPool
+from .infra.client_log_sink import ClientLogSink
+from .metrics import registry as metrics_registry
+from .service.runtime_metrics import register_runtime_metrics, unregister_runtime_metrics
+from .usage import usage_accounting
 
 app_logger = logging.getLogger("app")
 
@@ -112,6 +125,10 @@ def _get_custom_openapi(app: FastAPI) -> dict[str, Any]:
             "name": "logs",
             "description": "Client-side logging and diagnostics.",
         },
+        {
+            "name": "admin",
+            "description": "Operator diagnostics (profiling and runtime inspection). Requires the admin role.",
+        },
     ]
     
     # Add servers
@@ -156,24 +173,94 @@ async def lifespan(app: FastAPI):
         algorithm=settings.jwt_algorithm,
         access_ttl_minutes=settings.access_token_ttl_minutes
     )
-    token_store = JsonTokenStore(data_dir=str(settings.data_dir))
+    # argon2 off the event loop, calibrated once per process
+    password_pool = PasswordHashPool(
+        workers=settings.password_hash_workers,
+        max_pending=settings.password_hash_max_pending,
+    )
+    await password_pool.start()
+    if settings.password_hash_target_ms > 0:
+        await password_pool.calibrate(settings.password_hash_target_ms, settings.password_hash_min_time_cost)
+
+    token_store: TokenStorePort
+    if settings.token_store_backend == "sqlite":
+        token_store = SqliteTokenStore(data_dir=str(settings.data_dir))
+    else:
+        token_store = JsonTokenStore(
+            data_dir=str(settings.data_dir),
+            snapshot_every=settings.refresh_store_snapshot_every,
+        )
     auth_service = AuthService(
         jwt_provider=jwt_provider,
         token_store=token_store,
         refresh_salt=settings.refresh_token_salt,
-        refresh_ttl_days=settings.refresh_token_ttl_days
+        refresh_ttl_days=settings.refresh_token_ttl_days,
+        reuse_grace_seconds=settings.refresh_reuse_grace_seconds,
+        password_hasher=password_pool
     )
     
     # Set auth service globally
     deps.set_auth_service(auth_service)
     auth.set_auth_service(auth_service)
 
+    # Background import workers
+    import_jobs = ImportJobManager(
+        workers=settings.import_job_workers,
+        retention_seconds=settings.import_job_retention_seconds,
+    )
+    await import_jobs.start()
+    io.set_import_job_manager(import_jobs)
+
+    # Incremental removal of expired / long-revoked refresh tokens
+    token_compactor = TokenStoreCompactor(
+        token_store,
+        interval_seconds=settings.refresh_store_compaction_interval_seconds,
+        batch_size=settings.refresh_store_compaction_batch_size,
+        revoked_retention_seconds=settings.refresh_revoked_retention_days * 24 * 60 * 60,
+    )
+    await token_compactor.start()
+
+    # /api/logs/client entries go through a bounded buffer into client.log
+    client_log_sink = ClientLogSink(
+        settings.data_dir / "logs" / "client.log",
+        capacity=settings.client_log_buffer_entries,
+    )
+    client_log_sink.start()
+    logs.set_client_log_sink(client_log_sink)
+
+    register_runtime_metrics(token_store)
+    register_runtime_structures(token_store, client_log_sink)
+
+    # Per-user usage counters, flushed to data/usage periodically
+    await usage_accounting.start()
+
+    # Scheduling lag histogram + stack of whatever blocks the loop
+    loop_monitor: LoopLagMonitor | None = None
+    if settings.loop_stall_threshold_ms > 0:
+        loop_monitor = LoopLagMonitor(
+            interval_seconds=settings.loop_monitor_interval_ms / 1000,
+            stall_threshold_seconds=settings.loop_stall_threshold_ms / 1000,
+        )
+        await loop_monitor.start()
+
     app_logger.warning("app_startup", extra={"event": "app_startup"})
 
     yield
 
     # ===== shutdown =====
+    if loop_monitor is not None:
+        await loop_monitor.stop()
+    unregister_runtime_metrics()
+    unregister_runtime_structures()
+    await import_jobs.stop()
+    await usage_accounting.stop()
+    await token_compactor.stop()
+    await token_store.close()
+    await password_pool.stop()
+    logs.set_client_log_sink(None)
+    client_log_sink.stop()
     app_logger.warning("app_shutdown", extra={"event": "app_shutdown"})
+    flush_logging()
 
 
 def create_app() -> FastAPI:
@@ -196,6 +283,12 @@ def create_app() -> FastAPI:
         allow_headers=["*"],
     )
 
+    # プロファイル対象のリクエストだけ包む（request_id を使うので RequestLogging の内側）
+    app.add_middleware(ProfilingMiddleware)
+
+    # ユーザー別の使用量（CPU・ストレージ・ロック保持・ペイロード）を集計する
+    app.add_middleware(UsageMiddleware)
+
     # request_id / duration を付ける（最初に入れる）
     app.add_middleware(RequestLoggingMiddleware)
 
@@ -208,6 +301,7 @@ def create_app() -> FastAPI:
     app.include_router(io.router, prefix="/api")
     app.include_router(vocab.router, prefix="/api")
     app.include_router(logs.router, prefix="/api")
+    app.include_router(admin.router, prefix="/api")
     app.include_router(examples.router)
 
     @app.get(
@@ -238,6 +332,23 @@ def create_app() -> FastAPI:
             "git_version": _get_git_version(),
         }
 
+    @app.get(
+        "/metrics",
+        tags=["health"],
+        summary="Prometheus metrics",
+        description="Request latency histograms, status counts, storage I/O and store sizes in the Prometheus text format. Disabled (404) when VOCAB_METRICS_ENABLED=false.",
+        response_class=PlainTextResponse,
+        responses={404: {"description": "Metrics are disabled"}},
+    )
+    async def metrics_endpoint():
+        """Prometheus scrape endpoint"""
+        if not settings.metrics_enabled:
+            raise StarletteHTTPException(status_code=404)
+        return PlainTextResponse(
+            await metrics_registry.render(),
+            media_type="text/plain; version=0.0.4; charset=utf-8",
+        )
+
     # 422 (validation error) も ApiError に統一
     @app.exception_handler(RequestValidationError)
     async def validation_exception_handler(request: Request, exc: RequestValidationError):
@@ -293,8 +404,11 @@ def create_app() -> FastAPI:
         )
 
         # If detail is a dict with error structure, use it directly
+        # Keep headers such as Retry-After set on the exception
+        headers = getattr(exc, "headers", None)
+
         if isinstance(detail_value, dict) and "error" in detail_value:
-            return JSONResponse(status_code=status_code, content=detail_value)
+            return JSONResponse(status_code=status_code, content=detail_value, headers=headers)
 
         message = str(detail_value) if is_safe_to_echo_detail(code) else "Request failed"
 
@@ -303,7 +417,7 @@ def create_app() -> FastAPI:
             message=message,
             request_id=request_id,
         )
-        return JSONResponse(status_code=status_code, content={"error": payload.__dict__})
+        return JSONResponse(status_code=status_code, content={"error": payload.__dict__}, headers=headers)
 
     # 500（未ハンドル）は stack trace を必ず残し、クライアントには固定メッセージ
     @app.exception_handler(Exception)
@@ -0,0 +1,245 @@
+# app/metrics.py
+"""
+In-process metrics registry rendered in the Prometheus text format (0.0.4).
+
+Counters and histograms are updated on the hot path (one lock, a dict lookup and
+a bisect per observation); values that are expensive or need I/O, such as token
+store size or vault sizes, come from collectors that run only when /metrics is
+scraped. Label values must have bounded cardinality (route templates, not raw
+paths or user ids).
+"""
+from __future__ import annotations
+
+import threading
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from typing import Awaitable, Callable, Dict, Iterable, List, Sequence, Tuple
+
+LabelValues = Tuple[str, ...]
+
+# Seconds; request latency and lock wait
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Seconds; fsync is usually well under a millisecond on SSD, tens of ms on network disks
+FSYNC_BUCKETS = (0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+# Bytes; words.json per user
+SIZE_BUCKETS = (1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216, 67108864)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names: Sequence[str], values: LabelValues, extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Metric(ABC):
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+    @abstractmethod
+    def render(self) -> List[str]:
+        ...
+
+    @abstractmethod
+    def series_snapshot(self) -> Dict[LabelValues, object]:
+        """Copy of the per-label-set values (for diagnostics)"""
+
+    def series_count(self) -> int:
+        return len(self.series_snapshot())
+
+
+class Counter(Metric):
+    """Monotonic count per label set"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, help, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, labels: LabelValues = ()) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, labels: LabelValues = ()) -> float:
+        return self._values.get(labels, 0)
+
+    def series_snapshot(self) -> Dict[LabelValues, object]:
+        with self._lock:
+            return dict(self._values)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return self._header() + [f"{self.name}{_labels(self.labelnames, k)} {_number(v)}" for k, v in items]
+
+
+class Gauge(Metric):
+    """Last set value per label set"""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, help, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def set(self, value: float, labels: LabelValues = ()) -> None:
+        with self._lock:
+            self._values[labels] = value
+
+    def series_snapshot(self) -> Dict[LabelValues, object]:
+        with self._lock:
+            return dict(self._values)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return self._header() + [f"{self.name}{_labels(self.labelnames, k)} {_number(v)}" for k, v in items]
+
+
+class Histogram(Metric):
+    """Bucketed observations per label set (buckets are upper bounds, +Inf is implicit)"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, buckets: Sequence[float], labelnames: Sequence[str] = ()):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # label set -> [per-bucket counts (+Inf last), sum]
+        self._series: Dict[LabelValues, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, labels: LabelValues = ()) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = ([0] * (len(self.buckets) + 1), [0.0])
+                self._series[labels] = series
+            series[0][index] += 1
+            series[1][0] += value
+
+    def count(self, labels: LabelValues = ()) -> int:
+        series = self._series.get(labels)
+        return sum(series[0]) if series is not None else 0
+
+    def series_snapshot(self) -> Dict[LabelValues, object]:
+        with self._lock:
+            return {k: (list(counts), list(total)) for k, (counts, total) in self._series.items()}
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted((k, (list(counts), total[0])) for k, (counts, total) in self._series.items())
+        lines = self._header()
+        for labels, (counts, total) in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float("inf"),), counts):
+                cumulative += n
+                le = 'le="' + _number(bound) + '"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {cumulative}")
+        return lines
+
+
+Collector = Callable[[], Awaitable[Iterable[Metric]]]
+
+
+class Registry:
+    """Process-wide metrics plus scrape-time collectors"""
+
+    def __init__(self) -> None:
+        self._metrics: Dict[str, Metric] = {}
+        self._collectors: Dict[str, Collector] = {}
+
+    def _add(self, metric: Metric) -> Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"metric already registered: {metric.name}")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._add(Counter(name, help, labelnames))  # type: ignore[return-value]
+
+    def gauge(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._add(Gauge(name, help, labelnames))  # type: ignore[return-value]
+
+    def histogram(self, name: str, help: str, buckets: Sequence[float], labelnames: Sequence[str] = ()) -> Histogram:
+        return self._add(Histogram(name, help, buckets, labelnames))  # type: ignore[return-value]
+
+    def stats(self) -> Dict[str, int]:
+        """Registered metrics and label-set series, for diagnostics"""
+        metrics = list(self._metrics.values())
+        return {"metrics": len(metrics), "series": sum(m.series_count() for m in metrics)}
+
+    def memory_roots(self) -> List[object]:
+        """Copies of every metric's series for memory diagnostics"""
+        return [m.series_snapshot() for m in list(self._metrics.values())]
+
+    def set_collector(self, key: str, collector: Collector | None) -> None:
+        """Register (or with None, remove) a collector evaluated on every scrape"""
+        if collector is None:
+            self._collectors.pop(key, None)
+        else:
+            self._collectors[key] = collector
+
+    async def render(self) -> str:
+        lines: List[str] = []
+        for metric in list(self._metrics.values()):
+            lines.extend(metric.render())
+        for collector in list(self._collectors.values()):
+            for metric in await collector():
+                lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+# ---------- HTTP ----------
+http_requests_total = registry.counter(
+    "vocab_http_requests_total", "HTTP requests by route template and status", ("method", "route", "status")
+)
+http_request_duration = registry.histogram(
+    "vocab_http_request_duration_seconds", "HTTP request latency by route template", LATENCY_BUCKETS, ("method", "route")
+)
+
+# ---------- storage ----------
+user_lock_wait = registry.histogram(
+    "vocab_storage_user_lock_wait_seconds", "Time spent waiting for storage.user_lock", LATENCY_BUCKETS
+)
+json_reads_total = registry.counter("vocab_storage_read_json_total", "storage.read_json calls")
+json_read_bytes_total = registry.counter("vocab_storage_read_json_bytes_total", "Bytes read by storage.read_json")
+json_writes_total = registry.counter("vocab_storage_write_json_total", "storage.atomic_write_json calls")
+json_write_bytes_total = registry.counter(
+    "vocab_storage_write_json_bytes_total", "Bytes written by storage.atomic_write_json"
+)
+fsync_duration = registry.histogram(
+    "vocab_storage_fsync_duration_seconds", "fsync latency in storage.atomic_write_json", FSYNC_BUCKETS
+)
+
+# ---------- event loop ----------
+event_loop_lag = registry.histogram(
+    "vocab_event_loop_lag_seconds", "Delay between a scheduled event loop wake-up and when it ran", LATENCY_BUCKETS
+)
+event_loop_stalls_total = registry.counter(
+    "vocab_event_loop_stalls_total", "Event loop stalls longer than the configured threshold"
+)
@@ -3,10 +3,12 @@ from __future__ import annotations
 import logging
 import time
 import uuid
-from typing import Callable
 
-from fastapi import Request, Response
-from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from . import metrics, timing
+from . import settings as settings_module
+from .log_sampling import HttpLogSampler
 
 http_logger = logging.getLogger("app.http")
 
@@ -14,39 +16,100 @@ http_logger = logging.getLogger("app.http")
 _NO_BODY_PATH_PREFIXES = ("/auth",)
 
 
-class RequestLoggingMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next: Callable):
-        # Skip logging for health check endpoint
-        if request.url.path == "/healthz":
-            return await call_next(request)
+def _header(scope: Scope, name: bytes) -> str | None:
+    for key, value in scope.get("headers", ()):
+        if key == name:
+            return value.decode("latin-1")
+    return None
+
+
+class RequestLoggingMiddleware:
+    """
+    Pure ASGI: request_id を scope["state"] に入れ、レスポンス完了時に http_request を 1 行出す。
+    BaseHTTPMiddleware と違い、タスク生成やレスポンスのバッファリングをしない。
+    行を出すかどうかは HttpLogSampler が決める（エラー・遅いリクエストは常に出す）。
+    フェーズ別の時間（app.timing）は timings としてログに載せ、server_timing が有効なら
+    Server-Timing ヘッダーでも返す。
+    """
+
+    def __init__(self, app: ASGIApp, sampler: HttpLogSampler | None = None, server_timing: bool | None = None) -> None:
+        self.app = app
+        self.sampler = sampler or HttpLogSampler()
+        self.server_timing = (
+            settings_module.settings.server_timing_enabled if server_timing is None else server_timing
+        )
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        # Skip logging for non-HTTP traffic and the health check endpoint
+        if scope["type"] != "http" or scope["path"] == "/healthz":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = _header(scope, b"x-request-id") or str(uuid.uuid4())
+        state = scope.setdefault("state", {})
+        state["request_id"] = request_id
 
-        request_id = request.headers.get("x-request-id") or str(uuid.uuid4())
-        request.state.request_id = request_id
+        status = 500
+        timings, timings_token = timing.begin(request_id)
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if self.server_timing:
+                    headers = list(message.get("headers", []))
+                    headers.append((b"server-timing", timings.server_timing().encode("latin-1")))
+                    message = {**message, "headers": headers}
+            await send(message)
 
         start = time.perf_counter()
-        response: Response | None = None
         try:
-            response = await call_next(request)
-            return response
+            await self.app(scope, receive, send_with_status)
         finally:
-            duration_ms = int((time.perf_counter() - start) * 1000)
-            status = response.status_code if response is not None else 500
-
-            body_text = None
-            # RequestBodyCaptureMiddleware が埋めたものを拾う
-            if request.method in ("POST", "PUT", "PATCH"):
-                if not request.url.path.startswith(_NO_BODY_PATH_PREFIXES):
-                    body_text = getattr(request.state, "request_body_text", None)
-
-            http_logger.info(
-                "http_request",
-                extra={
-                    "event": "http_request",
-                    "request_id": request_id,
-                    "method": request.method,
-                    "path": request.url.path,
-                    "status": status,
-                    "duration_ms": duration_ms,
-                    "request_body": body_text,  # ← 追加
-                },
-            )
+            timing.end(timings_token)
+            elapsed = time.perf_counter() - start
+            # ルーティング後は scope["route"] にテンプレート（/api/words/{word_id}）が入る
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            method = scope["method"]
+            metrics.http_request_duration.observe(elapsed, (method, route))
+            metrics.http_requests_total.inc(1, (method, route, str(status)))
+
+            duration_ms = int(elapsed * 1000)
+            sampled_away = self.sampler.keep(status, duration_ms)
+            if sampled_away is not None:
+                self._log(scope, state, request_id, status, duration_ms, sampled_away, timings)
+
+    @staticmethod
+    def _log(
+        scope: Scope,
+        state: dict,
+        request_id: str,
+        status: int,
+        duration_ms: int,
+        sampled_away: int,
+        timings: timing.RequestTimings,
+    ) -> None:
+        method = scope["method"]
+        path = scope["path"]
+
+        body_text = None
+        # RequestBodyCaptureMiddleware が埋めたものを拾う
+        if method in ("POST", "PUT", "PATCH"):
+            if not path.startswith(_NO_BODY_PATH_PREFIXES):
+                body_text = state.get("request_body_text")
+
+        extra = {
+            "event": "http_request",
+            "request_id": request_id,
+            "method": method,
+            "path": path,
+            "status": status,
+            "duration_ms": duration_ms,
+            "request_body": body_text,  # ← 追加
+        }
+        if timings.phases:
+            extra["timings"] = timings.as_ms()
+        # 前回の行以降にサンプリングで省いた件数（合計を復元できるように）
+        if sampled_away:
+            extra["sampled_away"] = sampled_away
+        http_logger.info("http_request", extra=extra)
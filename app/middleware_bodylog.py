@@ -3,38 +3,60 @@ from __future__ import annotations
 
 import os
 import logging
-from typing import Callable
 
-from fastapi import Request, Response
-from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 logger = logging.getLogger("app.http")
 
+_TRUNCATED = "...(truncated)"
 
-class RequestBodyCaptureMiddleware(BaseHTTPMiddleware):
+
+class RequestBodyCaptureMiddleware:
     """
-    request.body() を先読みして request.state.request_body_text に保存する。
-    Starlette/FastAPI は body() を内部でキャッシュするため、先読みしても後続の処理が壊れにくい。
+    receive ストリームを tee して、先頭 N バイトだけを request.state.request_body_text に保存する。
+    body 全体をメモリに溜めないので、数 MB の import でもコピーは N バイトだけ。
+    アプリ側は通常どおり receive から body を読む（ストリームには手を加えない）。
     """
 
-    async def dispatch(self, request: Request, call_next: Callable):
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
         enabled = os.getenv("VOCAB_LOG_REQUEST_BODY", "0") == "1"
-        if enabled:
-            if request.method in ("POST", "PUT"):
-                try:
-                    raw = await request.body()
-                    # バイナリ等は想定しない（JSON前提）
-                    text = raw.decode("utf-8", errors="replace")
-
-                    # サイズ制限（ログ肥大化防止）
-                    limit = int(os.getenv("VOCAB_LOG_REQUEST_BODY_MAX", "4096"))
-                    if len(text) > limit:
-                        text = text[:limit] + "...(truncated)"
-
-                    request.state.request_body_text = text
-                except Exception:
-                    # bodyログは補助なので失敗しても落とさない
-                    request.state.request_body_text = None
-
-        response: Response = await call_next(request)
-        return response
+        if not enabled or scope["type"] != "http" or scope["method"] not in ("POST", "PUT"):
+            await self.app(scope, receive, send)
+            return
+
+        # サイズ制限（ログ肥大化防止）
+        limit = int(os.getenv("VOCAB_LOG_REQUEST_BODY_MAX", "4096"))
+        state = scope.setdefault("state", {})
+        captured = bytearray()
+        done = False
+
+        def publish(truncated: bool) -> None:
+            # バイナリ等は想定しない（JSON前提）
+            text = bytes(captured).decode("utf-8", errors="replace")
+            state["request_body_text"] = text + _TRUNCATED if truncated else text
+
+        async def tee_receive() -> Message:
+            nonlocal done
+            message = await receive()
+            if done or message["type"] != "http.request":
+                return message
+            try:
+                chunk = message.get("body", b"")
+                room = limit - len(captured)
+                captured.extend(chunk[:room])
+                if len(chunk) > room:
+                    done = True
+                    publish(truncated=True)
+                elif not message.get("more_body", False):
+                    done = True
+                    publish(truncated=False)
+            except Exception:
+                # bodyログは補助なので失敗しても落とさない
+                done = True
+                state["request_body_text"] = None
+            return message
+
+        await self.app(scope, tee_receive, send)
@@ -0,0 +1,56 @@
+# app/middleware_profiling.py
+from __future__ import annotations
+
+import logging
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from .middleware import _header
+from .profiling import RequestProfiler, request_profiler
+
+logger = logging.getLogger("app.profiling")
+
+
+class ProfilingMiddleware:
+    """
+    X-Profile ヘッダー（トークン必須）または管理者が設定したサンプリング率に当たったリクエストを
+    プロファイルし、data/logs/profiles/ に書き出す。ファイル名は X-Profile-Id で返す。
+    request_id を使うので RequestLoggingMiddleware の内側に置く。
+    """
+
+    def __init__(self, app: ASGIApp, profiler: RequestProfiler | None = None) -> None:
+        self.app = app
+        self.profiler = profiler or request_profiler
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        mode = self.profiler.requested_mode(_header(scope, b"x-profile"), _header(scope, b"x-profile-token"))
+        if mode is None:
+            await self.app(scope, receive, send)
+            return
+
+        request_id = scope.get("state", {}).get("request_id") or "request"
+        session = self.profiler.start(mode, request_id)
+        if session is None:
+            await self.app(scope, receive, send)
+            return
+
+        # ファイル名は書き出すまで決まらないので、ヘッダーには request_id を入れる
+        async def send_with_profile_id(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"x-profile-id", request_id.encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_profile_id)
+        finally:
+            name = await self.profiler.finish(session)
+            logger.info(
+                "request_profiled",
+                extra={"event": "request_profiled", "request_id": request_id, "path": scope["path"], "profile": name},
+            )
@@ -0,0 +1,52 @@
+# app/middleware_usage.py
+from __future__ import annotations
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from . import usage
+from .usage import CpuMetered, UsageAccounting, usage_accounting
+
+# ペイロードのバイト数を数えるパス（同期とインポート/エクスポート）
+_PAYLOAD_PATH_PREFIXES = ("/api/vocab", "/api/io")
+
+
+class UsageMiddleware:
+    """
+    リクエストごとに app.usage.RequestUsage を開き、終了時にユーザー別の集計へ足す。
+    ユーザーは require_auth が usage.set_user で設定する（認証しないリクエストは数えない）。
+    /api/vocab と /api/io では receive / send を数えて payload_in_bytes / payload_out_bytes にする。
+    cpu_seconds はこのリクエストのコルーチンが実行している間だけを数える（CpuMetered）。
+    """
+
+    def __init__(self, app: ASGIApp, accounting: UsageAccounting | None = None) -> None:
+        self.app = app
+        self.accounting = accounting or usage_accounting
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        current, token = usage.begin()
+
+        if scope["path"].startswith(_PAYLOAD_PATH_PREFIXES):
+            async def counting_receive() -> Message:
+                message = await receive()
+                if message["type"] == "http.request":
+                    current.add("payload_in_bytes", len(message.get("body", b"")))
+                return message
+
+            async def counting_send(message: Message) -> None:
+                if message["type"] == "http.response.body":
+                    current.add("payload_out_bytes", len(message.get("body", b"")))
+                await send(message)
+
+            app_receive, app_send = counting_receive, counting_send
+        else:
+            app_receive, app_send = receive, send
+
+        try:
+            await CpuMetered(self.app(scope, app_receive, app_send), current)
+        finally:
+            usage.end(token)
+            self.accounting.record(current)
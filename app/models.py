@@ -191,3 +191,10 @@ class ClientLogBatch(BaseModel):
     """Batch of client-side log entries"""
     logs: List[ClientLogEntry] = Field(..., description="Array of log entries")
     extra: Optional[dict] = None
+
+
+# --- Admin Models ---
+class ProfilingConfig(BaseModel):
+    """Request body for PUT /admin/profiling"""
+    sampleRate: float = Field(..., ge=0.0, le=1.0, description="Fraction of requests to profile (0 disables)")
+    mode: Literal["cprofile", "stack"] = Field(default="stack", description="cProfile (pstats) or stack sampler (collapsed stacks)")
@@ -0,0 +1,223 @@
+# app/profiling.py
+"""
+On-demand request profiling.
+
+A request is profiled when it carries ``X-Profile: cprofile|stack`` together with
+``X-Profile-Token`` equal to VOCAB_PROFILE_TOKEN, or when it is picked by the
+sample rate an admin set through /api/admin/profiling. Output goes to
+``data/logs/profiles/<time>_<request_id>.<ext>``:
+
+- cprofile: a pstats dump (``python -m pstats <file>``). cProfile hooks the whole
+  thread, so other requests interleaved on the event loop during the profiled
+  request show up too; only one cProfile session runs at a time.
+- stack: collapsed stacks (``frame;frame;frame count``, for flamegraph.pl or
+  speedscope) from a sampler thread that reads the event loop thread's frame
+  every few milliseconds and keeps only samples taken while the profiled
+  request's task is running. Work the request pushes to other threads is not seen.
+
+At most ``max_concurrent`` sessions run at once (further requests run
+unprofiled), and after each write the oldest files are removed until the
+directory is within ``max_files`` / ``max_total_bytes``.
+"""
+from __future__ import annotations
+
+import asyncio
+import cProfile
+import hmac
+import logging
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from types import FrameType
+from typing import Any, Callable, Dict, Optional
+
+from . import settings as settings_module
+
+logger = logging.getLogger(__name__)
+
+PROFILE_MODES = ("cprofile", "stack")
+
+
+def _frame_label(frame: FrameType) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class _StackSampler:
+    """Samples one thread's stack while a given asyncio task is the running one"""
+
+    def __init__(self, thread_id: int, loop: asyncio.AbstractEventLoop, task: Optional[asyncio.Task], interval: float):
+        self.thread_id = thread_id
+        self.loop = loop
+        self.task = task
+        self.interval = interval
+        self.stacks: Counter[str] = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            if self.task is not None and asyncio.current_task(self.loop) is not self.task:
+                continue
+            frame = sys._current_frames().get(self.thread_id)
+            labels = []
+            while frame is not None:
+                labels.append(_frame_label(frame))
+                frame = frame.f_back
+            if labels:
+                self.stacks[";".join(reversed(labels))] += 1
+                self.samples += 1
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+class ProfileSession:
+    """One running profile; ``finish`` returns the serialized output"""
+
+    def __init__(self, mode: str, request_id: str, interval: float):
+        self.mode = mode
+        self.request_id = request_id
+        self._profile: Optional[cProfile.Profile] = None
+        self._sampler: Optional[_StackSampler] = None
+        if mode == "cprofile":
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+        else:
+            loop = asyncio.get_running_loop()
+            self._sampler = _StackSampler(threading.get_ident(), loop, asyncio.current_task(), interval)
+            self._sampler.start()
+
+    def stop(self) -> None:
+        if self._profile is not None:
+            self._profile.disable()
+        if self._sampler is not None:
+            self._sampler.stop()
+
+    def write(self, path: Path) -> None:
+        if self._profile is not None:
+            self._profile.dump_stats(str(path))
+        elif self._sampler is not None:
+            path.write_text(self._sampler.collapsed(), encoding="utf-8")
+
+    @property
+    def extension(self) -> str:
+        return "pstats" if self.mode == "cprofile" else "collapsed"
+
+
+class RequestProfiler:
+    """Decides which requests to profile and keeps the profile directory bounded"""
+
+    def __init__(
+        self,
+        token: Optional[str] = None,
+        sample_rate: Optional[float] = None,
+        mode: Optional[str] = None,
+        interval_ms: Optional[float] = None,
+        max_concurrent: Optional[int] = None,
+        max_files: Optional[int] = None,
+        max_total_bytes: Optional[int] = None,
+        rand: Callable[[], float] = random.random,
+    ) -> None:
+        s = settings_module.settings
+        self.token = s.profile_token if token is None else token
+        self.sample_rate = s.profile_sample_rate if sample_rate is None else sample_rate
+        self.mode = s.profile_mode if mode is None else mode
+        self.interval = (s.profile_stack_interval_ms if interval_ms is None else interval_ms) / 1000
+        self.max_concurrent = s.profile_max_concurrent if max_concurrent is None else max_concurrent
+        self.max_files = s.profile_max_files if max_files is None else max_files
+        self.max_total_bytes = s.profile_max_total_mb * 1024 * 1024 if max_total_bytes is None else max_total_bytes
+        self._rand = rand
+        self._active = 0
+        self._cprofile_active = False
+        self.profiled_total = 0
+        self.skipped_total = 0
+
+    def profile_dir(self) -> Path:
+        return settings_module.settings.data_dir / "logs" / "profiles"
+
+    def configure(self, sample_rate: float, mode: str) -> None:
+        """Admin toggle (not persisted; restart resets to the settings)"""
+        self.sample_rate = sample_rate
+        self.mode = mode
+
+    def requested_mode(self, header_mode: Optional[str], header_token: Optional[str]) -> Optional[str]:
+        """Mode to profile this request with, or None"""
+        if header_mode and self.token and header_token and hmac.compare_digest(header_token, self.token):
+            mode = header_mode.strip().lower()
+            return mode if mode in PROFILE_MODES else self.mode
+        if self.sample_rate > 0 and self._rand() < self.sample_rate:
+            return self.mode
+        return None
+
+    def start(self, mode: str, request_id: str) -> Optional[ProfileSession]:
+        """Start a session, or None when the concurrency limit is reached"""
+        if self._active >= self.max_concurrent or (mode == "cprofile" and self._cprofile_active):
+            self.skipped_total += 1
+            return None
+        self._active += 1
+        if mode == "cprofile":
+            self._cprofile_active = True
+        return ProfileSession(mode, request_id, self.interval)
+
+    async def finish(self, session: ProfileSession) -> Optional[str]:
+        """Stop the session, write it and prune old files; returns the file name"""
+        session.stop()
+        self._active -= 1
+        if session.mode == "cprofile":
+            self._cprofile_active = False
+        safe_id = "".join(c for c in session.request_id if c.isalnum() or c in "-_")[:64] or "request"
+        name = f"{time.strftime('%Y%m%dT%H%M%S')}_{safe_id}.{session.extension}"
+        try:
+            await asyncio.to_thread(self._write, session, name)
+        except OSError:
+            logger.exception("profile_write_failed")
+            return None
+        self.profiled_total += 1
+        return name
+
+    def _write(self, session: ProfileSession, name: str) -> None:
+        directory = self.profile_dir()
+        directory.mkdir(parents=True, exist_ok=True)
+        session.write(directory / name)
+        self._prune(directory)
+
+    def _prune(self, directory: Path) -> None:
+        files = []
+        for path in directory.iterdir():
+            try:
+                st = path.stat()
+            except FileNotFoundError:
+                continue
+            files.append((st.st_mtime_ns, st.st_size, path))
+        files.sort()
+        total = sum(size for _, size, _ in files)
+        while files and (len(files) > self.max_files or total > self.max_total_bytes):
+            _, size, path = files.pop(0)
+            path.unlink(missing_ok=True)
+            total -= size
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "mode": self.mode,
+            "sample_rate": self.sample_rate,
+            "header_enabled": bool(self.token),
+            "active": self._active,
+            "profiled": self.profiled_total,
+            "skipped": self.skipped_total,
+        }
+
+
+request_profiler = RequestProfiler()
@@ -0,0 +1,211 @@
+# app/routers/admin.py
+"""Operator endpoints. Every route requires a user with the "admin" role."""
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+
+from ..deps import get_request_lang, require_admin
+from ..i18n import get_message
+from ..infra.audit_store import utc_iso
+from ..logging_setup import get_audit_store
+from ..models import ProfilingConfig
+from ..profiling import request_profiler
+from ..service.memory_diagnostics import SnapshotNotFoundError, TracingNotStartedError, memory_diagnostics
+from ..timing import TimedRoute
+from ..usage import UsageCounter, usage_accounting, utc_day
+
+router = APIRouter(prefix="/admin", tags=["admin"], route_class=TimedRoute, dependencies=[Depends(require_admin)])
+
+_ADMIN_ERRORS = {
+    401: {"description": "Unauthorized"},
+    403: {"description": "Admin role required"},
+}
+
+GroupBy = Literal["filename", "lineno", "traceback"]
+
+
+def _admin_error(status_code: int, error_code: str, message_key: str, lang: str) -> HTTPException:
+    return HTTPException(
+        status_code=status_code,
+        detail={
+            "error": {
+                "error_code": error_code,
+                "message": get_message(message_key, lang),
+                "message_key": message_key
+            }
+        },
+    )
+
+
+def _diagnostics_error(exc: Exception, lang: str) -> HTTPException:
+    """404 for an unknown snapshot, 409 when tracemalloc is not tracing."""
+    if isinstance(exc, SnapshotNotFoundError):
+        return _admin_error(404, "SNAPSHOT_NOT_FOUND", "diagnostics.snapshot_not_found", lang)
+    return _admin_error(409, "TRACING_NOT_STARTED", "diagnostics.not_tracing", lang)
+
+
+@router.get(
+    "/profiling",
+    summary="Get request profiling settings",
+    description="Current profiling mode and sample rate, and how many requests were profiled or skipped (concurrency limit).",
+    responses=_ADMIN_ERRORS,
+)
+async def get_profiling():
+    return {"ok": True, "profiling": request_profiler.stats()}
+
+
+@router.put(
+    "/profiling",
+    summary="Set request profiling sample rate",
+    description="Profile a fraction of all requests with cProfile or the stack sampler. Output is written to data/logs/profiles/. The setting lasts until restart.",
+    responses=_ADMIN_ERRORS,
+)
+async def set_profiling(body: ProfilingConfig):
+    request_profiler.configure(body.sampleRate, body.mode)
+    return {"ok": True, "profiling": request_profiler.stats()}
+
+
+@router.get(
+    "/memory",
+    summary="Memory overview",
+    description="tracemalloc status and the size of known in-process structures (locks, caches, indexes, token store). With deep=true an approximate byte size is added per structure.",
+    responses=_ADMIN_ERRORS,
+)
+async def memory_overview(deep: bool = Query(False, description="Also walk each structure for an approximate byte size")):
+    return {
+        "ok": True,
+        "tracemalloc": memory_diagnostics.status(),
+        "structures": await memory_diagnostics.structure_sizes(deep=deep),
+    }
+
+
+@router.post(
+    "/memory/tracemalloc/start",
+    summary="Start tracemalloc",
+    description="Start tracing allocations, keeping the given number of frames per allocation. Tracing slows the process down and uses extra memory; stop it when done.",
+    responses=_ADMIN_ERRORS,
+)
+async def start_tracemalloc(frames: int = Query(25, ge=1, le=100)):
+    return {"ok": True, "tracemalloc": memory_diagnostics.start(frames)}
+
+
+@router.post(
+    "/memory/tracemalloc/stop",
+    summary="Stop tracemalloc",
+    description="Stop tracing. Snapshots already taken stay available.",
+    responses=_ADMIN_ERRORS,
+)
+async def stop_tracemalloc():
+    return {"ok": True, "tracemalloc": memory_diagnostics.stop()}
+
+
+@router.post(
+    "/memory/snapshots",
+    summary="Take a heap snapshot",
+    description="Take a tracemalloc snapshot and keep it in memory under a returned id (the oldest is dropped beyond the limit).",
+    responses={**_ADMIN_ERRORS, 409: {"description": "tracemalloc is not tracing"}},
+)
+async def take_snapshot(request: Request):
+    try:
+        snapshot = await memory_diagnostics.take_snapshot()
+    except TracingNotStartedError as exc:
+        raise _diagnostics_error(exc, get_request_lang(request))
+    return {"ok": True, "snapshot": snapshot}
+
+
+@router.get(
+    "/memory/snapshots/{snapshot_id}",
+    summary="Top allocations of a snapshot",
+    description="Largest allocation sites of a snapshot, grouped by file, line or traceback.",
+    responses={**_ADMIN_ERRORS, 404: {"description": "Snapshot not found"}},
+)
+async def snapshot_top(
+    snapshot_id: str,
+    request: Request,
+    group_by: GroupBy = Query("lineno", alias="groupBy"),
+    limit: int = Query(20, ge=1, le=500),
+):
+    try:
+        stats = await memory_diagnostics.top(snapshot_id, group_by, limit)
+    except SnapshotNotFoundError as exc:
+        raise _diagnostics_error(exc, get_request_lang(request))
+    return {"ok": True, "snapshot": snapshot_id, "groupBy": group_by, "stats": stats}
+
+
+@router.get(
+    "/memory/diff",
+    summary="Diff two snapshots",
+    description="Allocation sites ordered by how much they grew between two snapshots (size_diff / count_diff).",
+    responses={**_ADMIN_ERRORS, 404: {"description": "Snapshot not found"}},
+)
+async def snapshot_diff(
+    request: Request,
+    from_id: str = Query(..., alias="from"),
+    to_id: str = Query(..., alias="to"),
+    group_by: GroupBy = Query("lineno", alias="groupBy"),
+    limit: int = Query(20, ge=1, le=500),
+):
+    try:
+        stats = await memory_diagnostics.diff(from_id, to_id, group_by, limit)
+    except SnapshotNotFoundError as exc:
+        raise _diagnostics_error(exc, get_request_lang(request))
+    return {"ok": True, "from": from_id, "to": to_id, "groupBy": group_by, "stats": stats}
+
+
+@router.get(
+    "/usage",
+    summary="Top users by resource usage",
+    description="Per-user counters for one UTC day (default today), ordered by the given counter. Includes counts not yet flushed to data/usage.",
+    responses=_ADMIN_ERRORS,
+)
+async def usage_top(
+    metric: UsageCounter = Query("requests"),
+    limit: int = Query(10, ge=1, le=1000),
+    day: Optional[str] = Query(None, pattern=r"^\d{4}-\d{2}-\d{2}$", description="UTC day (YYYY-MM-DD)"),
+):
+    day = day or utc_day()
+    return {"ok": True, "day": day, "metric": metric, "users": await usage_accounting.top(metric, limit, day)}
+
+
+@router.get(
+    "/audit",
+    summary="Query audit events",
+    description="Audit events (as written to audit.log), newest first, from the indexed audit store. Filter by user, event (exact, or a prefix ending in '*' such as 'vocab.sync.*') and time range [since, until); only matching rows are read. Pass nextCursor back as cursor for the next page.",
+    responses={
+        **_ADMIN_ERRORS,
+        400: {"description": "Invalid cursor"},
+        503: {"description": "Audit index disabled (VOCAB_AUDIT_INDEX=0)"},
+    },
+)
+async def query_audit(
+    request: Request,
+    user_id: Optional[str] = Query(None, alias="userId"),
+    event: Optional[str] = Query(None, max_length=200),
+    since: Optional[datetime] = Query(None, description="Inclusive; without a timezone, UTC"),
+    until: Optional[datetime] = Query(None, description="Exclusive; without a timezone, UTC"),
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(None),
+):
+    lang = get_request_lang(request)
+    store = get_audit_store()
+    if store is None:
+        raise _admin_error(503, "AUDIT_INDEX_DISABLED", "audit.index_disabled", lang)
+    if cursor is not None:
+        try:
+            store.parse_cursor(cursor)
+        except ValueError:
+            raise _admin_error(400, "INVALID_CURSOR", "audit.invalid_cursor", lang)
+    events, next_cursor = await asyncio.to_thread(
+        store.query,
+        user_id,
+        event,
+        utc_iso(since) if since else None,
+        utc_iso(until) if until else None,
+        cursor,
+        limit,
+    )
+    return {"ok": True, "events": events, "nextCursor": next_cursor}
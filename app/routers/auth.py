@@ -8,14 +8,20 @@ import logging
 from datetime import datetime, timezone
 from fastapi import APIRouter, HTTPException, Response, status, Depends, Cookie, Request
 from ..models import RegisterRequest, LoginRequest, MeResponse
-from ..services import register_user, delete_user, find_user_by_id, find_user_by_username
+from ..services import register_user, delete_user, find_user_by_username
 from ..deps import require_auth, get_request_lang
 from ..i18n import get_message
-from ..domain.exceptions import RefreshTokenReusedError
+from ..domain.exceptions import (
+    PasswordHashingBusyError,
+    PasswordHashingUnavailableError,
+    RefreshTokenReusedError,
+)
 from ..service.auth_service_port import AuthServicePort
+from ..service.principal_cache import principal_cache
 from ..settings import settings
+from ..timing import TimedRoute
 
-router = APIRouter(prefix="/auth", tags=["auth"])
+router = APIRouter(prefix="/auth", tags=["auth"], route_class=TimedRoute)
 logger = logging.getLogger(__name__)
 audit_logger = logging.getLogger("app.audit")
 
@@ -37,6 +43,26 @@ def _require_auth_service() -> AuthServicePort:
 
 REFRESH_COOKIE_NAME = "refresh_token"
 
+# Seconds a client should wait after the password hashing pool turned it away
+HASHING_RETRY_AFTER_SECONDS = 1
+
+
+def _hashing_unavailable(exc: Exception, lang: str) -> HTTPException:
+    """429 when the hashing queue is full, 503 when the hashing pool is down."""
+    busy = isinstance(exc, PasswordHashingBusyError)
+    message_key = "auth.busy" if busy else "auth.unavailable"
+    return HTTPException(
+        status_code=429 if busy else 503,
+        detail={
+            "error": {
+                "error_code": "AUTH_BUSY" if busy else "AUTH_UNAVAILABLE",
+                "message": get_message(message_key, lang),
+                "message_key": message_key
+            }
+        },
+        headers={"Retry-After": str(HASHING_RETRY_AFTER_SECONDS)},
+    )
+
 
 def _calculate_expires_in_seconds(expires_at: datetime) -> int:
     """Return remaining seconds until expiration in UTC."""
@@ -62,6 +88,8 @@ def _calculate_expires_in_seconds(expires_at: datetime) -> int:
             }
         },
         400: {"description": "User already exists or invalid input"},
+        429: {"description": "Too many password hashing requests queued; retry after Retry-After seconds"},
+        503: {"description": "Password hashing unavailable"},
     }
 )
 async def register(req: RegisterRequest, request: Request):
@@ -70,7 +98,12 @@ async def register(req: RegisterRequest, request: Request):
     request_id = getattr(request.state, "request_id", None)
     
     try:
-        u = register_user(req.username, req.password)
+        # Reject a taken username before spending an argon2 hash on it
+        # (register_user checks again under the users.json write)
+        if find_user_by_username(req.username):
+            raise ValueError("username already exists")
+        password_hash = await _require_auth_service().hash_password(req.password)
+        u = register_user(req.username, req.password, password_hash=password_hash)
         
         # Audit log
         audit_logger.info(
@@ -108,6 +141,8 @@ async def register(req: RegisterRequest, request: Request):
                 }
             }
         )
+    except (PasswordHashingBusyError, PasswordHashingUnavailableError) as exc:
+        raise _hashing_unavailable(exc, lang)
 
 
 @router.post(
@@ -129,6 +164,8 @@ async def register(req: RegisterRequest, request: Request):
             }
         },
         401: {"description": "Invalid credentials"},
+        429: {"description": "Too many password hashing requests queued; retry after Retry-After seconds"},
+        503: {"description": "Password hashing unavailable"},
     }
 )
 async def login(req: LoginRequest, response: Response, request: Request):
@@ -141,7 +178,10 @@ async def login(req: LoginRequest, response: Response, request: Request):
     
     auth_service = _require_auth_service()
 
-    result = await auth_service.login(req.username, req.password)
+    try:
+        result = await auth_service.login(req.username, req.password)
+    except (PasswordHashingBusyError, PasswordHashingUnavailableError) as exc:
+        raise _hashing_unavailable(exc, lang)
     if not result:
         # Audit log for failure
         audit_logger.warning(
@@ -443,8 +483,8 @@ async def auth_status(request: Request):
         if not authenticated:
             return {"ok": True, "authenticated": False, "canRefresh": can_refresh}
 
-        # Get username from storage
-        user = find_user_by_id(user_id) if user_id else None
+        # Get username from the principal cache
+        user = principal_cache.user(user_id) if user_id else None
         username = user["username"] if user else None
 
         return {
@@ -3,81 +3,59 @@
 
 from fastapi import APIRouter, Depends, Query
 from typing import List, Optional, Dict, Any
-import random
 
+from .. import storage
 from ..deps import require_auth
-from ..models import WordEntry, ExampleSentence
 from ..services import load_words
+from ..service.example_pool import next_example
+from ..service.example_search import search_examples
+from ..timing import TimedRoute
 
-router = APIRouter(prefix="/api/examples", tags=["examples"])
+router = APIRouter(prefix="/api/examples", tags=["examples"], route_class=TimedRoute)
 
 
 @router.get("/next")
 async def get_next_example(
     tags: Optional[List[str]] = Query(None),
     last_example_id: Optional[str] = Query(None, alias="lastExampleId"),
+    weighted: bool = Query(False, description="Prefer examples of words with a low memoryLevel"),
     u: dict = Depends(require_auth)
 ) -> Dict[str, Any]:
     """
     Get a random example sentence for testing.
     
     Returns an example with the target word removed for fill-in-the-blank testing.
-    Supports tag filtering and avoids returning the same example consecutively.
+    Supports tag filtering and avoids repeating recently shown examples.
     
     Args:
         tags: Optional list of tags to filter words
         last_example_id: Optional ID of the last shown example to avoid repetition
+        weighted: Weight picks by the word's memoryLevel (lower level, more often)
     """
     user_id = u["userId"]
-    words_file = load_words(user_id)
-    
-    # Filter by tags if specified
-    if tags:
-        words = [w for w in words_file.words if any(t in w.tags for t in tags)]
-    else:
-        words = words_file.words
-    
-    # Collect all examples from all words
-    examples_pool: List[Dict[str, Any]] = []
-    for word in words:
-        if word.examples:
-            for example in word.examples:
-                examples_pool.append({
-                    "word": word,
-                    "example": example
-                })
-    
-    if not examples_pool:
-        return {"example": None}
-    
-    # Filter out last example if there are alternatives
-    available_examples = examples_pool
-    if last_example_id and len(examples_pool) > 1:
-        filtered = [item for item in examples_pool if item["example"].id != last_example_id]
-        if filtered:
-            available_examples = filtered
-    
-    # Pick random example
-    selected = random.choice(available_examples)
-    selected_word: WordEntry = selected["word"]
-    selected_example: ExampleSentence = selected["example"]
+    async with storage.user_lock(user_id):
+        example = next_example(user_id, tags=tags, weighted=weighted, last_example_id=last_example_id)
 
     # Return example with word info
-    return {
-        "example": {
-            "id": selected_example.id,
-            "en": selected_example.en,
-            "ja": selected_example.ja,
-            "source": selected_example.source,
-            "word": {
-                "id": selected_word.id,
-                "headword": selected_word.headword,
-                "pos": selected_word.pos,
-                "meaningJa": selected_word.meaningJa,
-                "tags": selected_word.tags
-            }
-        }
-    }
+    return {"example": example}
+
+
+@router.get("/search")
+async def search_examples_api(
+    q: str = Query(..., min_length=1, max_length=200, description="Search text (English or Japanese)"),
+    limit: int = Query(20, ge=1, le=100),
+    u: dict = Depends(require_auth)
+) -> Dict[str, Any]:
+    """
+    Full-text search over example sentences, ranked by BM25.
+
+    Each result carries the matched example and the word it belongs to, so the
+    client can link straight to the word.
+    """
+    user_id = u["userId"]
+    async with storage.user_lock(user_id):
+        results = search_examples(user_id, q, limit)
+    return {"ok": True, "results": results}
 
 
 @router.get("/tags")
@@ -2,15 +2,33 @@
 from __future__ import annotations
 import logging
 from fastapi import APIRouter, Depends, Query, HTTPException, Request
+from fastapi.responses import JSONResponse
 from ..deps import require_auth
 from ..models import AppData, AppDataForImport
 from .. import storage
-from ..services import export_appdata, import_appdata
+from ..services import export_appdata, validate_and_import
+from ..service.import_jobs import ImportJobManager
+from ..timing import TimedRoute
 
-router = APIRouter(prefix="/io", tags=["io"])
+router = APIRouter(prefix="/io", tags=["io"], route_class=TimedRoute)
 logger = logging.getLogger("app.routers.io")
 audit_logger = logging.getLogger("app.audit")
 
+# Background import job manager (set by main.py)
+_import_jobs: ImportJobManager | None = None
+
+def set_import_job_manager(manager: ImportJobManager):
+    """Set import job manager for this router"""
+    global _import_jobs
+    _import_jobs = manager
+
+
+def _require_import_jobs() -> ImportJobManager:
+    """Return initialized import job manager or raise 500."""
+    if _import_jobs is None:
+        raise HTTPException(status_code=500, detail="Import job manager not initialized")
+    return _import_jobs
+
 @router.get(
     "/export",
     response_model=AppData,
@@ -48,9 +66,10 @@ async def export_api(request: Request, u: dict = Depends(require_auth)):
 @router.post(
     "/import",
     summary="Import vocabulary data",
-    description="Import vocabulary data from a exported JSON file or manually-created JSON file. Supports 'merge' (add new items) or 'overwrite' (replace all data) modes. Optional fields like ID and timestamps will be auto-generated if missing.",
+    description="Import vocabulary data from a exported JSON file or manually-created JSON file. Supports 'merge' (add new items) or 'overwrite' (replace all data) modes. Optional fields like ID and timestamps will be auto-generated if missing. With async=true the upload is queued as a background job and a job id is returned (poll GET /io/jobs/{jobId}).",
     responses={
         200: {"description": "Data imported successfully"},
+        202: {"description": "Import queued as a background job (async=true)"},
         400: {"description": "Invalid data format or validation error"},
         401: {"description": "Unauthorized"},
         422: {"description": "Validation error"},
@@ -64,71 +83,88 @@ async def import_api(
         pattern="^(overwrite|merge)$",
         description="Import mode: 'merge' adds new items, 'overwrite' replaces all data"
     ),
+    run_async: bool = Query(
+        default=False,
+        alias="async",
+        description="Queue the import as a background job and return its job id"
+    ),
     u: dict = Depends(require_auth),
 ):
     """Import vocabulary data (merge or overwrite). Supports both exported data and manually-created files."""
-    from ..services import validate_import_data
     request_id = getattr(request.state, "request_id", None)
     
-    logger.debug(f"import_api: mode={mode}, app={app}, userId={u['userId']}")
-    
-    # Validate import data
-    validation_result = validate_import_data(app)
-    
-    if not validation_result["valid"]:
-        logger.warning(
-            f"Import validation failed for userId={u['userId']}: "
-            f"{len(validation_result['errors'])} errors"
-        )
-        
-        # Audit log for validation failure
-        audit_logger.warning(
-            "Data import validation failed",
+    logger.debug("import_api: mode=%s, words=%d, memory=%d, userId=%s", mode, len(app.words), len(app.memory), u["userId"])
+
+    if run_async:
+        job = await _require_import_jobs().submit(u["userId"], u["username"], app, mode)
+
+        audit_logger.info(
+            f"Data import queued in {mode} mode",
             extra={
                 "event": f"data.import.{mode}",
                 "user_id": u["userId"],
                 "username": u["username"],
                 "request_id": request_id,
-                "error_count": len(validation_result["errors"]),
-                "result": "validation_failure"
+                "word_count": len(app.words),
+                "mode": mode,
+                "result": "queued"
             }
         )
-        
-        # Format error message
-        error_messages = validation_result["errors"][:5]  # First 5 errors
-        if len(validation_result["errors"]) > 5:
-            error_messages.append(f"... and {len(validation_result['errors']) - 5} more errors")
-        
-        error_details = {
-            "error_code": "IMPORT_VALIDATION_ERROR",
-            "message": "インポートファイルに問題があります",
-            "message_key": "import.validation_error",
-            "details": {
-                "errors": error_messages,
-                "error_count": len(validation_result["errors"]),
-                "summary": validation_result["details"]
-            }
-        }
-        
-        raise HTTPException(
-            status_code=400,
-            detail=str(error_details)
-        )
-    
-    # Log warnings
-    if validation_result["warnings"]:
-        logger.info(
-            f"Import warnings for userId={u['userId']}: "
-            f"{', '.join(validation_result['warnings'][:3])}"
-        )
+
+        return JSONResponse(status_code=202, content={"ok": True, "job": job.to_dict()})
     
     async with storage.user_lock(u["userId"]):
-        if app.schemaVersion != 1:
-            logger.error(f"Invalid schemaVersion: {app.schemaVersion}")
-            raise HTTPException(status_code=400, detail="Unsupported schemaVersion")
-        logger.debug(f"Calling import_appdata with {len(app.words)} words")
-        import_appdata(u["userId"], app, mode)
-        logger.info(f"Import completed successfully for userId={u['userId']}")
+        # Validate, normalize and merge in a single pass (writes only when valid)
+        validation_result, counts = validate_and_import(u["userId"], app, mode)
+    
+        if not validation_result["valid"]:
+            logger.warning(
+                "Import validation failed for userId=%s: %d errors",
+                u["userId"], len(validation_result["errors"]),
+            )
+            
+            # Audit log for validation failure
+            audit_logger.warning(
+                "Data import validation failed",
+                extra={
+                    "event": f"data.import.{mode}",
+                    "user_id": u["userId"],
+                    "username": u["username"],
+                    "request_id": request_id,
+                    "error_count": len(validation_result["errors"]),
+                    "result": "validation_failure"
+                }
+            )
+            
+            # Format error message
+            error_messages = validation_result["errors"][:5]  # First 5 errors
+            if len(validation_result["errors"]) > 5:
+                error_messages.append(f"... and {len(validation_result['errors']) - 5} more errors")
+            
+            error_details = {
+                "error_code": "IMPORT_VALIDATION_ERROR",
+                "message": "インポートファイルに問題があります",
+                "message_key": "import.validation_error",
+                "details": {
+                    "errors": error_messages,
+                    "error_count": len(validation_result["errors"]),
+                    "summary": validation_result["details"]
+                }
+            }
+            
+            raise HTTPException(
+                status_code=400,
+                detail=str(error_details)
+            )
+        
+        # Log warnings
+        if validation_result["warnings"]:
+            logger.info(
+                "Import warnings for userId=%s: %s",
+                u["userId"], ", ".join(validation_result["warnings"][:3]),
+            )
+
+        logger.info("Import completed successfully for userId=%s: %s", u["userId"], counts)
         
         # Audit log for success
         audit_logger.info(
@@ -145,3 +181,57 @@ async def import_api(
         )
         
         return {"ok": True}
+
+
+@router.get(
+    "/jobs/{job_id}",
+    summary="Get import job status",
+    description="Poll progress of a background import (records validated/merged) and its final merge counts.",
+    responses={
+        200: {"description": "Job status"},
+        401: {"description": "Unauthorized"},
+        404: {"description": "Job not found"},
+    }
+)
+async def get_import_job(job_id: str, u: dict = Depends(require_auth)):
+    """Return status of one of the user's import jobs"""
+    job = _require_import_jobs().get(u["userId"], job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Import job not found")
+    return {"ok": True, "job": job.to_dict()}
+
+
+@router.delete(
+    "/jobs/{job_id}",
+    summary="Cancel import job",
+    description="Cancel a queued or running import. A running import is aborted before it writes to the vault.",
+    responses={
+        200: {"description": "Cancellation requested"},
+        401: {"description": "Unauthorized"},
+        404: {"description": "Job not found"},
+        409: {"description": "Job already finished"},
+    }
+)
+async def cancel_import_job(job_id: str, request: Request, u: dict = Depends(require_auth)):
+    """Cancel one of the user's import jobs"""
+    request_id = getattr(request.state, "request_id", None)
+
+    job = _require_import_jobs().cancel(u["userId"], job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Import job not found")
+    if not job.cancel_requested:
+        raise HTTPException(status_code=409, detail=f"Import job already {job.status}")
+
+    audit_logger.info(
+        "Data import job cancel requested",
+        extra={
+            "event": f"data.import.{job.mode}",
+            "user_id": u["userId"],
+            "username": u["username"],
+            "request_id": request_id,
+            "mode": job.mode,
+            "result": "cancel_requested"
+        }
+    )
+
+    return {"ok": True, "job": job.to_dict()}
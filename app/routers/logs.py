@@ -1,16 +1,116 @@
 # app/routers/logs.py
 
+import json
 import logging
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.exceptions import RequestValidationError
+from pydantic import ValidationError
+from app import storage
+from app.deps import get_client_address, get_optional_user_id, get_request_lang
+from app.i18n import get_message
+from app.infra.client_log_sink import ClientLogSink
+from app.log_sampling import client_log_limiter
 from app.models import ClientLogBatch
+from app.settings import settings
+from app.timing import TimedRoute
 
-router = APIRouter(prefix="/logs", tags=["logs"])
+router = APIRouter(prefix="/logs", tags=["logs"], route_class=TimedRoute)
 logger = logging.getLogger(__name__)
 
+CLIENT_LOG_RETRY_AFTER_SECONDS = 2
+
+# Client log buffer + writer (set by main.py)
+_client_log_sink: ClientLogSink | None = None
+
+
+def set_client_log_sink(sink: ClientLogSink | None):
+    """Set client log sink for this router"""
+    global _client_log_sink
+    _client_log_sink = sink
+
+
+def _require_client_log_sink() -> ClientLogSink:
+    """Return initialized client log sink or raise 500."""
+    if _client_log_sink is None:
+        raise HTTPException(status_code=500, detail="Client log sink not initialized")
+    return _client_log_sink
+
+
+def _body_schema(model) -> dict:
+    """JSON schema of a body model with its $defs inlined (documented via openapi_extra)."""
+    schema = model.model_json_schema()
+    defs = schema.pop("$defs", {})
+
+    def resolve(node):
+        if isinstance(node, dict):
+            ref = node.get("$ref", "")
+            if ref.startswith("#/$defs/"):
+                return resolve(defs[ref[len("#/$defs/"):]])
+            return {k: resolve(v) for k, v in node.items()}
+        if isinstance(node, list):
+            return [resolve(v) for v in node]
+        return node
+
+    return resolve(schema)
+
+
+def _rejected(status_code: int, error_code: str, message_key: str, lang: str) -> HTTPException:
+    return HTTPException(
+        status_code=status_code,
+        detail={
+            "error": {
+                "error_code": error_code,
+                "message": get_message(message_key, lang),
+                "message_key": message_key
+            }
+        },
+        headers={"Retry-After": str(CLIENT_LOG_RETRY_AFTER_SECONDS)} if status_code == 429 else None,
+    )
+
+
+async def _read_batch(request: Request, lang: str) -> ClientLogBatch:
+    """Read the body up to client_log_max_bytes (stops streaming as soon as it is exceeded) and validate it."""
+    max_bytes = settings.client_log_max_bytes
+    too_large = _rejected(413, "CLIENT_LOGS_TOO_LARGE", "logs.too_large", lang)
+
+    content_length = request.headers.get("content-length", "")
+    if content_length.isdigit() and int(content_length) > max_bytes:
+        raise too_large
+
+    body = bytearray()
+    async for chunk in request.stream():
+        body.extend(chunk)
+        if len(body) > max_bytes:
+            raise too_large
+
+    try:
+        data = json.loads(body)
+    except ValueError:
+        raise RequestValidationError([
+            {"type": "json_invalid", "loc": ("body",), "msg": "JSON decode error", "input": {}}
+        ])
+    try:
+        batch = ClientLogBatch.model_validate(data)
+    except ValidationError as exc:
+        raise RequestValidationError(
+            [{**e, "loc": ("body", *e["loc"])} for e in exc.errors(include_url=False)]
+        )
+
+    if len(batch.logs) > settings.client_log_max_entries:
+        raise too_large
+    return batch
+
+
 @router.post(
     "/client",
     summary="Receive client-side logs",
-    description="Accept and aggregate client-side logs for centralized logging and monitoring. No authentication required.",
+    description="Accept and aggregate client-side logs for centralized logging and monitoring. No authentication required. Batches are limited in size and entry count; entries are written asynchronously to client.log.",
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {"application/json": {"schema": _body_schema(ClientLogBatch)}},
+        }
+    },
     responses={
         200: {
             "description": "Logs received successfully",
@@ -18,42 +118,62 @@ logger = logging.getLogger(__name__)
                 "application/json": {
                     "example": {
                         "ok": True,
-                        "received": 5
+                        "received": 5,
+                        "dropped": 0
                     }
                 }
             }
         },
+        413: {"description": "Batch exceeds the byte or entry limit"},
         422: {"description": "Validation error"},
+        429: {"description": "Log buffer is full; retry after the Retry-After seconds"},
     }
 )
 async def receive_client_logs(
-    batch: ClientLogBatch,
+    request: Request,
+    lang: str = Depends(get_request_lang),
+    user_id: str | None = Depends(get_optional_user_id),
 ):
     """
-    Receive frontend logs and write them to the server-side logger.
+    Receive frontend logs and queue them for client.log.
     
     This endpoint allows the client-side logger to send buffered logs
     to the backend for centralized logging and monitoring.
+    Each caller has a token bucket of entries: the user when the request carries
+    a valid access token, otherwise the client address (behind a trusted proxy,
+    from X-Forwarded-For). Entries beyond it are dropped and reported as "dropped". The handler only appends to a bounded
+    buffer; a background writer formats and writes the entries.
     """
-    # Batch-level extra fields (shared by all entries)
-    batch_extra = batch.extra or {}
-    
-    for entry in batch.logs:
-        level_name = entry.level.upper()
-        log_level = getattr(logging, level_name, logging.INFO)
-        
-        # Build structured log message
-        log_msg = f"[CLIENT] {entry.message}"
-        extra_fields = {
+    batch = await _read_batch(request, lang)
+    sink = _require_client_log_sink()
+    if sink.available() < len(batch.logs):
+        raise _rejected(429, "CLIENT_LOGS_BUSY", "logs.busy", lang)
+
+    client = get_client_address(request)
+    limiter_key = f"user:{user_id}" if user_id else client
+    allowed = client_log_limiter.admit(limiter_key, len(batch.logs))
+    received_at = storage.now_iso()
+
+    entries = []
+    for entry in batch.logs[:allowed]:
+        record = {
+            "ts": received_at,
+            "level": entry.level.upper(),
+            "client": client,
             "timestamp": entry.timestamp,
             "userId": entry.userId,
+            "msg": entry.message,
         }
-        
-        # Add batch-level extra fields
-        if batch_extra:
-            extra_fields.update(batch_extra)
-        
-        # Log to server logger with appropriate level
-        logger.log(log_level, log_msg, extra=extra_fields)
+        # Batch-level extra fields (shared by all entries)
+        if batch.extra:
+            record["extra"] = batch.extra
+        entries.append(record)
+
+    # Entries this client had dropped before, so totals stay reconstructable
+    if entries:
+        sampled_away = client_log_limiter.take_sampled_away(limiter_key)
+        if sampled_away:
+            entries[0]["sampled_away"] = sampled_away
+        sink.offer(entries)
     
-    return {"ok": True, "received": len(batch.logs)}
+    return {"ok": True, "received": len(batch.logs), "dropped": len(batch.logs) - allowed}
@@ -6,8 +6,9 @@ from ..deps import require_auth
 from ..models import GradeRequest, MemoryState
 from .. import storage
 from ..services import get_next_card, grade_card, reset_memory, get_all_tags
+from ..timing import TimedRoute
 
-router = APIRouter(prefix="/study", tags=["study"])
+router = APIRouter(prefix="/study", tags=["study"], route_class=TimedRoute)
 
 @router.get(
     "/next",
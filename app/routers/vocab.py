@@ -22,8 +22,9 @@ from ..models import (
     VocabFile,
 )
 from .. import storage
+from ..timing import TimedRoute
 
-router = APIRouter(prefix="/vocab", tags=["vocab"])
+router = APIRouter(prefix="/vocab", tags=["vocab"], route_class=TimedRoute)
 logger = logging.getLogger(__name__)
 audit_logger = logging.getLogger("app.audit")
 
@@ -9,6 +9,9 @@ from ..deps import require_auth
 from ..models import WordEntry, WordUpsert, ExampleSentence
 from .. import storage
 from ..services import load_words, save_words, delete_word, load_memory
+from ..service.word_indexes import notify_words_changed, words_revision
+from ..service.headword_index import complete_headwords, find_near_duplicates, suggest_headwords
+from ..timing import TimedRoute
 
 logger = logging.getLogger(__name__)
 audit_logger = logging.getLogger("app.audit")
@@ -26,7 +29,7 @@ def _normalize_examples(examples: List[ExampleSentence]) -> List[ExampleSentence
         for ex in examples
     ]
 
-router = APIRouter(prefix="/words", tags=["words"])
+router = APIRouter(prefix="/words", tags=["words"], route_class=TimedRoute)
 
 @router.get(
     "",
@@ -84,6 +87,72 @@ async def list_words_api(
         
         return {"ok": True, "words": words, "memoryMap": memory_map}
 
+@router.get(
+    "/suggest",
+    summary="Suggest headwords for a misspelled query",
+    description="Typo-tolerant headword lookup (edit distance 1 for short queries, 2 otherwise), closest first.",
+    responses={
+        200: {
+            "description": "Suggestions retrieved successfully",
+            "content": {
+                "application/json": {
+                    "example": {
+                        "ok": True,
+                        "suggestions": [
+                            {
+                                "id": "550e8400-e29b-41d4-a716-446655440000",
+                                "headword": "serendipity",
+                                "pos": "noun",
+                                "meaningJa": "幸運な偶然",
+                                "distance": 1,
+                            }
+                        ],
+                    }
+                }
+            }
+        },
+        401: {"description": "Unauthorized"},
+    }
+)
+async def suggest_words_api(
+    q: str = Query(..., min_length=1, max_length=100, description="Possibly misspelled headword"),
+    limit: int = Query(default=10, ge=1, le=50),
+    u: dict = Depends(require_auth),
+):
+    async with storage.user_lock(u["userId"]):
+        suggestions = suggest_headwords(u["userId"], q, limit)
+    return {"ok": True, "suggestions": suggestions}
+
+@router.get(
+    "/complete",
+    summary="Autocomplete headwords",
+    description="Words whose headword or reading starts with the given prefix (case-insensitive).",
+    responses={
+        200: {
+            "description": "Completions retrieved successfully",
+            "content": {
+                "application/json": {
+                    "example": {
+                        "ok": True,
+                        "completions": [
+                            {"id": "550e8400-e29b-41d4-a716-446655440000", "headword": "serendipity", "pos": "noun"}
+                        ],
+                    }
+                }
+            }
+        },
+        401: {"description": "Unauthorized"},
+    }
+)
+async def complete_words_api(
+    prefix: str = Query(..., min_length=1, max_length=100, description="Typed prefix of a headword or reading"),
+    limit: int = Query(default=10, ge=1, le=50),
+    u: dict = Depends(require_auth),
+):
+    async with storage.user_lock(u["userId"]):
+        completions = complete_headwords(u["userId"], prefix, limit)
+    return {"ok": True, "completions": completions}
+
 @router.post(
     "",
     response_model=dict,
@@ -116,9 +185,12 @@ async def create_word_api(word: WordUpsert, request: Request, u: dict = Depends(
             tags=word.tags,
             memo=word.memo,
         )
+        near_duplicates = find_near_duplicates(u["userId"], w.headword)
         wf = load_words(u["userId"])
         wf.words.append(w)
+        before = words_revision(u["userId"])
         save_words(u["userId"], wf)
+        notify_words_changed(u["userId"], before, upserted=[w])
         
         # Audit log
         audit_logger.info(
@@ -134,7 +206,7 @@ async def create_word_api(word: WordUpsert, request: Request, u: dict = Depends(
             }
         )
         
-        return {"ok": True, "word": w}
+        return {"ok": True, "word": w, "nearDuplicates": near_duplicates}
 
 @router.put(
     "/{wordId}",
@@ -189,8 +261,10 @@ async def update_word_api(
             raise HTTPException(status_code=404, detail="Word not found")
 
         wf.words = new_list
+        before = words_revision(u["userId"])
         save_words(u["userId"], wf)
         updated_word = next(w for w in wf.words if w.id == wordId)
+        notify_words_changed(u["userId"], before, upserted=[updated_word])
         
         # Audit log
         audit_logger.info(
@@ -229,7 +303,9 @@ async def delete_word_api(wordId: str, request: Request, u: dict = Depends(requi
         if not word:
             raise HTTPException(status_code=404, detail="Word not found")
         
+        before = words_revision(u["userId"])
         delete_word(u["userId"], wordId)
+        notify_words_changed(u["userId"], before, deleted=[wordId])
         
         # Audit log
         audit_logger.info(
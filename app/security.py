@@ -1,22 +1,78 @@
 # app/security.py
 from __future__ import annotations
+import time
+from functools import lru_cache
+from typing import Dict
 from argon2 import PasswordHasher
 from argon2.exceptions import VerifyMismatchError
 from .settings import settings
 
-_ph = PasswordHasher()
+# argon2 コストパラメータ（configure_hasher / calibrate_hasher で変更される）
+HasherParams = Dict[str, int]
 
-def _pepper(password: str) -> str:
+_default = PasswordHasher()
+_params: HasherParams = {
+    "time_cost": _default.time_cost,
+    "memory_cost": _default.memory_cost,
+    "parallelism": _default.parallelism,
+}
+
+@lru_cache(maxsize=8)
+def _hasher(time_cost: int, memory_cost: int, parallelism: int) -> PasswordHasher:
+    return PasswordHasher(time_cost=time_cost, memory_cost=memory_cost, parallelism=parallelism)
+
+def pepper_password(password: str) -> str:
     # pepper は漏れても良いわけではないので env 管理推奨
     if settings.password_pepper:
         return password + settings.password_pepper
     return password
 
+def hasher_params() -> HasherParams:
+    return dict(_params)
+
+def configure_hasher(params: HasherParams) -> None:
+    """以降の hash_password / needs_rehash が使うパラメータを設定する"""
+    _params.update(params)
+
 def hash_password(password: str) -> str:
-    return _ph.hash(_pepper(password))
+    return hash_peppered(_params, pepper_password(password))
 
 def verify_password(password: str, password_hash: str) -> bool:
+    return verify_peppered(_params, pepper_password(password), password_hash)
+
+def needs_rehash(password_hash: str) -> bool:
+    """ハッシュが現在のパラメータで作られていなければ True（ログイン成功時に再ハッシュする）"""
+    return _hasher(**_params).check_needs_rehash(password_hash)
+
+# ---- プロセスプールのワーカーで実行される関数（pepper 済みの値とパラメータを受け取る）----
+
+def hash_peppered(params: HasherParams, peppered: str) -> str:
+    return _hasher(**params).hash(peppered)
+
+def verify_peppered(params: HasherParams, peppered: str, password_hash: str) -> bool:
+    # verify はハッシュ文字列に埋め込まれたパラメータを使うので params は既定値のみに影響
     try:
-        return _ph.verify(password_hash, _pepper(password))
+        return _hasher(**params).verify(password_hash, peppered)
     except VerifyMismatchError:
         return False
+
+def calibrate_hasher(
+    target_ms: float,
+    memory_cost: int,
+    parallelism: int,
+    min_time_cost: int,
+    max_time_cost: int = 16,
+) -> HasherParams:
+    """
+    1 回のハッシュが target_ms 以上かかる最小の time_cost を探す。
+    min_time_cost より弱くはしない（既定値 = argon2 の推奨値）。
+    """
+    time_cost = min_time_cost
+    while True:
+        params = {"time_cost": time_cost, "memory_cost": memory_cost, "parallelism": parallelism}
+        started = time.perf_counter()
+        hash_peppered(params, "calibration-password")
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        if elapsed_ms >= target_ms or time_cost >= max_time_cost:
+            return params
+        time_cost += 1
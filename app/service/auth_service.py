@@ -2,22 +2,37 @@
 """
 Authentication service handling login, token refresh, and logout.
 Implements refresh token rotation and replay detection.
+
+Rotation of one token family is serialized by a per-family lock, so two
+concurrent refreshes of the same token cannot both rotate it, and is persisted
+with a single token store write (TokenStorePort.rotate_token).
+
+A replaced token presented again inside the reuse grace window gets the
+successor it was rotated to (remembered in memory for the window), so parallel
+tabs converge on one live token. When the successor is unknown (e.g. after a
+restart) or already rotated, one sibling is minted and remembered in its place.
 """
 
+import asyncio
 import logging
 import secrets
-from datetime import datetime, timezone
-from typing import Any, Optional
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
+from typing import Any, AsyncIterator, Dict, Optional
 
-from app import security, storage
+from app import security, services, storage
 from app.domain.exceptions import RefreshTokenReusedError
 from app.domain.models.tokens import TokenRecord
 from app.infra.jwt_provider import JWTProvider
 from app.infra.token_store_json import (
-    JsonTokenStore,
     generate_refresh_token,
     hash_refresh_token
 )
+from app.service.password_hasher_port import PasswordHasherPort
+from app.service.principal_cache import principal_cache
+from app.service.token_store_port import TokenStorePort
 
 logger = logging.getLogger(__name__)
 
@@ -28,9 +43,11 @@ class AuthService:
     def __init__(
         self,
         jwt_provider: JWTProvider,
-        token_store: JsonTokenStore,
+        token_store: TokenStorePort,
         refresh_salt: str,
-        refresh_ttl_days: int = 30
+        refresh_ttl_days: int = 30,
+        reuse_grace_seconds: int = 0,
+        password_hasher: Optional[PasswordHasherPort] = None
     ):
         """
         Args:
@@ -38,12 +55,63 @@ class AuthService:
             token_store: Refresh token storage
             refresh_salt: Server-side salt for hashing refresh tokens
             refresh_ttl_days: Refresh token TTL in days (default 30)
+            reuse_grace_seconds: How long after rotation a replaced token may
+                still be presented (e.g. by a second browser tab) without being
+                treated as a replay; 0 disables the grace window
+            password_hasher: Off-loop argon2 hashing (PasswordHashPool); when
+                None, passwords are hashed inline on the event loop
         """
         self.jwt_provider = jwt_provider
         self.token_store = token_store
         self.refresh_salt = refresh_salt
         self.refresh_ttl_days = refresh_ttl_days
+        self.reuse_grace_seconds = reuse_grace_seconds
+        self.password_hasher = password_hasher
+        # family_id -> (lock, number of holders/waiters); entries are dropped when unused
+        self._family_locks: Dict[str, tuple[asyncio.Lock, int]] = {}
+        # replaced token_id -> (raw successor refresh token, monotonic rotation time),
+        # oldest first; kept only for the reuse grace window
+        self._grace_successors: "OrderedDict[str, tuple[str, float]]" = OrderedDict()
+
+    @asynccontextmanager
+    async def _family_lock(self, family_id: str) -> AsyncIterator[None]:
+        """Serialize refreshes within one token family"""
+        lock, users = self._family_locks.get(family_id, (None, 0))
+        if lock is None:
+            lock = asyncio.Lock()
+        self._family_locks[family_id] = (lock, users + 1)
+        try:
+            async with lock:
+                yield
+        finally:
+            lock, users = self._family_locks[family_id]
+            if users <= 1:
+                del self._family_locks[family_id]
+            else:
+                self._family_locks[family_id] = (lock, users - 1)
     
+    async def hash_password(self, password: str) -> str:
+        """Hash a password for storage"""
+        if self.password_hasher is None:
+            return security.hash_password(password)
+        return await self.password_hasher.hash(password)
+
+    async def _verify_password(self, password: str, password_hash: str) -> bool:
+        if self.password_hasher is None:
+            return security.verify_password(password, password_hash)
+        return await self.password_hasher.verify(password, password_hash)
+
+    async def _rehash_if_needed(self, user: dict[str, Any], password: str) -> None:
+        """Re-hash with the current argon2 parameters after they were changed"""
+        needs_rehash = (
+            self.password_hasher.needs_rehash if self.password_hasher is not None else security.needs_rehash
+        )
+        if not needs_rehash(user["passwordHash"]):
+            return
+        user["passwordHash"] = await self.hash_password(password)
+        services.update_password_hash(user["userId"], user["passwordHash"])
+        logger.info("Password rehashed with current parameters", extra={"user_id": user["userId"]})
+
     async def authenticate_user(self, username: str, password: str) -> Optional[dict[str, Any]]:
         """
         Authenticate user with username and password.
@@ -64,7 +132,8 @@ class AuthService:
                     logger.warning(f"Attempt to login with disabled user: {username}")
                     return None
                 
-                if security.verify_password(password, user["passwordHash"]):
+                if await self._verify_password(password, user["passwordHash"]):
+                    await self._rehash_if_needed(user, password)
                     return user
                 else:
                     return None
@@ -137,6 +206,26 @@ class AuthService:
         _, record = result
         return self._is_token_record_active(record)
 
+    def _within_reuse_grace(self, record: TokenRecord) -> bool:
+        """Return True when a replaced token was rotated less than the grace window ago."""
+        if self.reuse_grace_seconds <= 0 or not record.last_used_at_utc:
+            return False
+        rotated_at = datetime.fromisoformat(record.last_used_at_utc.replace("Z", "+00:00"))
+        return datetime.now(timezone.utc) - rotated_at <= timedelta(seconds=self.reuse_grace_seconds)
+
+    def _remember_successor(self, token_id: str, refresh_token: str) -> None:
+        """Remember the token a replaced token was rotated to, for the grace window."""
+        if self.reuse_grace_seconds <= 0:
+            return
+        now = time.monotonic()
+        while self._grace_successors:
+            _, (_, rotated_at) = next(iter(self._grace_successors.items()))
+            if now - rotated_at <= self.reuse_grace_seconds:
+                break
+            self._grace_successors.popitem(last=False)
+        self._grace_successors.pop(token_id, None)
+        self._grace_successors[token_id] = (refresh_token, now)
+
     async def refresh(self, refresh_token: str) -> Optional[tuple[str, str, datetime]]:
         """
         Refresh access token using refresh token (with rotation).
@@ -156,8 +245,16 @@ class AuthService:
             logger.warning("Refresh token not found")
             return None
         
-        token_id, record = result
-        
+        async with self._family_lock(result[1].family_id):
+            # Re-read under the lock: a concurrent refresh may have rotated it
+            result = await self._find_token_record(refresh_token)
+            if not result:
+                logger.warning("Refresh token not found")
+                return None
+            return await self._rotate(*result)
+
+    async def _rotate(self, token_id: str, record: TokenRecord) -> Optional[tuple[str, str, datetime]]:
+        """Rotate one token; the caller holds the family lock."""
         if not self._is_token_record_active(record):
             logger.warning(
                 "Attempt to use inactive token",
@@ -166,7 +263,22 @@ class AuthService:
             return None
         
         # Check for replay attack (token already replaced)
-        if record.replaced_by_token_id:
+        reused_in_grace = False
+        if record.replaced_by_token_id and self._within_reuse_grace(record):
+            # Benign race (parallel tabs/retries): hand out the successor again
+            logger.info(
+                "Replaced token reused within grace window",
+                extra={"token_id": token_id, "family_id": record.family_id}
+            )
+            successor = self._grace_successors.get(token_id)
+            current = await self._find_token_record(successor[0]) if successor is not None else None
+            if current and self._is_token_record_active(current[1]) and not current[1].replaced_by_token_id:
+                access_token, access_expires_at = self.jwt_provider.create_access_token(record.user_id)
+                return access_token, successor[0], access_expires_at
+            # Successor unknown or already rotated: mint one sibling in the same
+            # family (leaving the old record untouched) and remember it instead
+            reused_in_grace = True
+        elif record.replaced_by_token_id:
             logger.error(
                 f"REPLAY ATTACK DETECTED: Token already replaced",
                 extra={"token_id": token_id, "family_id": record.family_id}
@@ -186,21 +298,24 @@ class AuthService:
         new_token_hash = hash_refresh_token(new_refresh_token, self.refresh_salt)
         new_token_id = f"tok_{secrets.token_urlsafe(16)}"
         
-        # Add new token to store
-        await self.token_store.add_token(
-            token_id=new_token_id,
-            user_id=user_id,
-            token_hash=new_token_hash,
-            family_id=record.family_id,  # Same family
-            prev_token_id=token_id,
-            ttl_days=self.refresh_ttl_days
-        )
-        
-        # Mark old token as replaced
-        await self.token_store.mark_replaced(token_id, new_token_id)
-        
-        # Update last used
-        await self.token_store.update_last_used(token_id)
+        if reused_in_grace:
+            await self.token_store.add_token(
+                token_id=new_token_id,
+                user_id=user_id,
+                token_hash=new_token_hash,
+                family_id=record.family_id,  # Same family
+                prev_token_id=token_id,
+                ttl_days=self.refresh_ttl_days
+            )
+        else:
+            # Add new token, mark old as replaced and update last used in one write
+            await self.token_store.rotate_token(
+                token_id=token_id,
+                new_token_id=new_token_id,
+                new_token_hash=new_token_hash,
+                ttl_days=self.refresh_ttl_days
+            )
+        self._remember_successor(token_id, new_refresh_token)
         
         logger.info(
             f"Token rotated successfully",
@@ -262,8 +377,11 @@ class AuthService:
         Returns:
             user_id if valid, None otherwise
         """
-        payload = self.jwt_provider.verify_access_token(token)
-        if not payload:
-            return None
+        payload = principal_cache.claims(token)
+        if payload is None:
+            payload = self.jwt_provider.verify_access_token(token)
+            if not payload:
+                return None
+            principal_cache.put_claims(token, payload)
         
         return payload.get("sub")  # user_id
@@ -9,6 +9,9 @@ from typing import Protocol
 class AuthServicePort(Protocol):
     """Port for auth use-cases consumed by API routers."""
 
+    async def hash_password(self, password: str) -> str:
+        ...
+
     async def login(self, username: str, password: str) -> tuple[str, str, datetime] | None:
         ...
 
@@ -0,0 +1,207 @@
+"""
+Cached example-sentence pools for /api/examples/next.
+
+Each (user, tag filter, weighting) pool is built once from the vault and reused
+until words.json (and memory.json for weighted pools) changes on disk. Picks use
+an alias table, so each call is O(1) regardless of how many examples the vault
+holds. A per-user ring buffer of recently shown ids keeps picks from repeating;
+buffers of the least recently active users are dropped past
+``example_history_users``. Account deletion drops the user's pools and buffer.
+"""
+
+from __future__ import annotations
+
+import random
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+from typing import Any, Deque, Dict, List, Optional, Sequence, Tuple
+
+from app import storage
+from app.services import add_users_listener, load_memory, load_words
+from app.settings import settings
+
+# Highest memoryLevel produced by grade_card; weighted pools favour low levels.
+_MAX_MEMORY_LEVEL = 5
+_MAX_REJECTIONS = 16
+
+
+class AliasTable:
+    """Walker/Vose alias table: O(n) build, O(1) weighted sampling"""
+
+    def __init__(self, weights: Sequence[float]):
+        n = len(weights)
+        if n == 0:
+            raise ValueError("AliasTable requires at least one weight")
+        total = float(sum(weights))
+        if total <= 0:
+            raise ValueError("AliasTable requires a positive total weight")
+
+        self._prob = [0.0] * n
+        self._alias = list(range(n))
+        scaled = [w * n / total for w in weights]
+        small = [i for i, p in enumerate(scaled) if p < 1.0]
+        large = [i for i, p in enumerate(scaled) if p >= 1.0]
+
+        while small and large:
+            s = small.pop()
+            g = large.pop()
+            self._prob[s] = scaled[s]
+            self._alias[s] = g
+            scaled[g] = (scaled[g] + scaled[s]) - 1.0
+            (small if scaled[g] < 1.0 else large).append(g)
+
+        # Leftovers are 1.0 up to float rounding
+        for i in large + small:
+            self._prob[i] = 1.0
+
+    def __len__(self) -> int:
+        return len(self._prob)
+
+    def sample(self, rng: random.Random) -> int:
+        i = int(rng.random() * len(self._prob))
+        return i if rng.random() < self._prob[i] else self._alias[i]
+
+
+@dataclass
+class ExamplePool:
+    """Flattened examples of one tag filter plus their sampling table"""
+
+    revision: Tuple[Any, ...]
+    entries: List[Dict[str, Any]]  # API-shaped example dicts (with nested word info)
+    table: Optional[AliasTable]
+
+
+_PoolKey = Tuple[str, Tuple[str, ...], bool]
+
+_pools: "OrderedDict[_PoolKey, ExamplePool]" = OrderedDict()
+_recent: "OrderedDict[str, Deque[str]]" = OrderedDict()
+_rng = random.Random()
+
+
+def _vault_revision(user_id: str, weighted: bool) -> Tuple[Any, ...]:
+    ud = storage.user_dir(user_id)
+    words_rev = storage.file_revision(ud / "words.json")
+    if not weighted:
+        return (words_rev,)
+    return (words_rev, storage.file_revision(ud / "memory.json"))
+
+
+def _build_pool(user_id: str, tags: Tuple[str, ...], weighted: bool, revision: Tuple[Any, ...]) -> ExamplePool:
+    words = load_words(user_id).words
+    levels: Dict[str, int] = {}
+    if weighted:
+        levels = {m.wordId: m.memoryLevel for m in load_memory(user_id).memory}
+
+    entries: List[Dict[str, Any]] = []
+    weights: List[float] = []
+    for word in words:
+        if not word.examples:
+            continue
+        if tags and not any(t in word.tags for t in tags):
+            continue
+        word_info = {
+            "id": word.id,
+            "headword": word.headword,
+            "pos": word.pos,
+            "meaningJa": word.meaningJa,
+            "tags": word.tags,
+        }
+        # Less-known words (low memoryLevel) are picked more often
+        weight = float(_MAX_MEMORY_LEVEL + 1 - min(levels.get(word.id, 0), _MAX_MEMORY_LEVEL))
+        for example in word.examples:
+            entries.append({
+                "id": example.id,
+                "en": example.en,
+                "ja": example.ja,
+                "source": example.source,
+                "word": word_info,
+            })
+            weights.append(weight)
+
+    table = AliasTable(weights) if entries else None
+    return ExamplePool(revision=revision, entries=entries, table=table)
+
+
+def get_pool(user_id: str, tags: Optional[List[str]] = None, weighted: bool = False) -> ExamplePool:
+    """
+    Return the cached pool for a tag filter, rebuilding it only when the vault
+    files changed. Callers should hold storage.user_lock(user_id).
+    """
+    tag_key = tuple(sorted(set(tags))) if tags else ()
+    key: _PoolKey = (user_id, tag_key, weighted)
+    revision = _vault_revision(user_id, weighted)
+
+    pool = _pools.get(key)
+    if pool is None or pool.revision != revision:
+        pool = _build_pool(user_id, tag_key, weighted, revision)
+        _pools[key] = pool
+    _pools.move_to_end(key)
+    while len(_pools) > settings.example_pool_cache_size:
+        _pools.popitem(last=False)
+    return pool
+
+
+def forget_user(user_id: str) -> None:
+    """Drop the cached pools and recent-example history of a user (account deletion)"""
+    for key in [k for k in list(_pools) if k[0] == user_id]:
+        _pools.pop(key, None)
+    _recent.pop(user_id, None)
+
+
+add_users_listener(forget_user)
+
+
+def stats() -> Dict[str, int]:
+    return {"pools": len(_pools), "recent_users": len(_recent)}
+
+
+def memory_roots() -> List[Any]:
+    """Copies of the pool cache and recent-id buffers for memory diagnostics"""
+    return [OrderedDict(_pools), OrderedDict(_recent)]
+
+
+def next_example(
+    user_id: str,
+    tags: Optional[List[str]] = None,
+    weighted: bool = False,
+    last_example_id: Optional[str] = None,
+) -> Optional[Dict[str, Any]]:
+    """
+    Pick an example for the fill-in-the-blank test, or None if the filter has none.
+
+    Recently shown examples (per-user ring buffer, plus ``last_example_id`` from
+    the client) are skipped whenever the pool has alternatives.
+    """
+    pool = get_pool(user_id, tags, weighted)
+    if pool.table is None:
+        return None
+
+    recent = _recent.get(user_id)
+    if recent is None:
+        recent = deque(maxlen=max(1, settings.example_history_size))
+        _recent[user_id] = recent
+    _recent.move_to_end(user_id)
+    while len(_recent) > max(1, settings.example_history_users):
+        _recent.popitem(last=False)
+
+    # Never exclude the whole pool: keep at most len(pool) - 1 recent ids
+    window = min(len(recent), len(pool.entries) - 1)
+    excluded = set(list(recent)[len(recent) - window:]) if window > 0 else set()
+    if last_example_id and len(pool.entries) > 1:
+        excluded.add(last_example_id)
+
+    picked: Optional[Dict[str, Any]] = None
+    for _ in range(_MAX_REJECTIONS):
+        candidate = pool.entries[pool.table.sample(_rng)]
+        if candidate["id"] not in excluded:
+            picked = candidate
+            break
+    if picked is None:
+        # Excluded entries carry most of the weight; fall back to a uniform pick
+        # over the rest (rare, and only reachable with small pools)
+        remaining = [e for e in pool.entries if e["id"] not in excluded] or pool.entries
+        picked = _rng.choice(remaining)
+
+    if picked["id"]:
+        recent.append(picked["id"])
+    return picked
@@ -0,0 +1,152 @@
+"""
+Full-text search over example sentences.
+
+Every example (English and Japanese text) is a document in a per-user inverted
+index ranked with Okapi BM25. English is split into lower-cased word tokens;
+Japanese has no spaces, so runs of kana/kanji are indexed as overlapping
+character bigrams plus every single character. A query run of two or more
+characters is matched by its bigrams; a one-character query (犬) by the
+unigrams, so it finds every example containing that character. The index is kept
+in sync with word mutations through app.service.word_indexes.
+"""
+
+from __future__ import annotations
+
+import heapq
+import math
+import re
+from collections import Counter
+from typing import Any, Dict, List, Tuple
+
+from app.models import WordEntry
+from app.service.word_indexes import WordIndex, WordIndexRegistry
+
+# Standard BM25 parameters
+_K1 = 1.2
+_B = 0.75
+
+# Latin words (with an optional 's / 't suffix) or runs of kana, kanji and
+# half-width katakana
+_LATIN = r"0-9A-Za-z\u00c0-\u024f"
+_TOKEN_RE = re.compile(
+    rf"[{_LATIN}]+(?:'[A-Za-z]+)?"
+    r"|[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff\uff66-\uff9f]+"
+)
+
+
+def _is_cjk(run: str) -> bool:
+    return run[0] > "\u024f"
+
+
+def tokenize(text: str, query: bool = False) -> List[str]:
+    """
+    Split text into index terms (English words, Japanese char bigrams and unigrams).
+
+    Args:
+        query: Tokenize a search query: Japanese runs longer than one character
+            give only their bigrams (unigrams would match nearly every example)
+    """
+    terms: List[str] = []
+    for match in _TOKEN_RE.finditer(text or ""):
+        run = match.group(0)
+        if not _is_cjk(run):
+            terms.append(run.lower())
+        elif len(run) == 1:
+            terms.append(run)
+        else:
+            terms.extend(run[i:i + 2] for i in range(len(run) - 1))
+            if not query:
+                terms.extend(run)
+    return terms
+
+
+class ExampleSearchIndex(WordIndex):
+    """Inverted index of one user's example sentences"""
+
+    def __init__(self) -> None:
+        self._postings: Dict[str, Dict[str, int]] = {}   # term -> {doc_key: tf}
+        self._doc_terms: Dict[str, Counter] = {}          # doc_key -> term counts
+        self._doc_len: Dict[str, int] = {}
+        self._docs: Dict[str, Dict[str, Any]] = {}        # doc_key -> API-shaped result
+        self._word_docs: Dict[str, List[str]] = {}        # word_id -> doc_keys
+        self._total_len = 0
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def entry_count(self) -> int:
+        return len(self._docs)
+
+    def add_word(self, word: WordEntry) -> None:
+        if not word.examples:
+            return
+        word_info = {
+            "id": word.id,
+            "headword": word.headword,
+            "pos": word.pos,
+            "meaningJa": word.meaningJa,
+        }
+        keys: List[str] = []
+        for i, example in enumerate(word.examples):
+            # Keyed by position: example ids may be missing (legacy) or repeated
+            key = f"{word.id}:{i}"
+            terms = Counter(tokenize(example.en) + tokenize(example.ja))
+            self._doc_terms[key] = terms
+            length = sum(terms.values())
+            self._doc_len[key] = length
+            self._total_len += length
+            for term, tf in terms.items():
+                self._postings.setdefault(term, {})[key] = tf
+            self._docs[key] = {
+                "example": {"id": example.id, "en": example.en, "ja": example.ja, "source": example.source},
+                "word": word_info,
+            }
+            keys.append(key)
+        self._word_docs[word.id] = keys
+
+    def remove_word(self, word_id: str) -> None:
+        for key in self._word_docs.pop(word_id, ()):
+            for term in self._doc_terms.pop(key, ()):
+                posting = self._postings.get(term)
+                if posting is None:
+                    continue
+                posting.pop(key, None)
+                if not posting:
+                    del self._postings[term]
+            self._total_len -= self._doc_len.pop(key, 0)
+            self._docs.pop(key, None)
+
+    def search(self, query: str, limit: int = 20) -> List[Dict[str, Any]]:
+        """
+        Rank examples against the query with BM25.
+
+        Returns:
+            Up to ``limit`` results ({"score", "example", "word"}), best first
+        """
+        n_docs = len(self._docs)
+        terms = set(tokenize(query, query=True))
+        if not n_docs or not terms:
+            return []
+
+        avg_len = self._total_len / n_docs or 1.0
+        scores: Dict[str, float] = {}
+        for term in terms:
+            posting = self._postings.get(term)
+            if not posting:
+                continue
+            df = len(posting)
+            idf = math.log(1.0 + (n_docs - df + 0.5) / (df + 0.5))
+            for key, tf in posting.items():
+                norm = _K1 * (1.0 - _B + _B * self._doc_len[key] / avg_len)
+                scores[key] = scores.get(key, 0.0) + idf * tf * (_K1 + 1.0) / (tf + norm)
+
+        top: List[Tuple[float, str]] = heapq.nlargest(limit, ((s, k) for k, s in scores.items()))
+        return [{"score": round(score, 4), **self._docs[key]} for score, key in top]
+
+
+registry: WordIndexRegistry[ExampleSearchIndex] = WordIndexRegistry("example_search", ExampleSearchIndex)
+
+
+def search_examples(user_id: str, query: str, limit: int = 20) -> List[Dict[str, Any]]:
+    """Search a user's example sentences. Callers should hold storage.user_lock(user_id)."""
+    return registry.get(user_id).search(query, limit)
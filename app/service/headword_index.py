@@ -0,0 +1,163 @@
+"""
+Per-user headword indexes for typo-tolerant lookup and autocomplete.
+
+HeadwordFuzzyIndex keeps a SymSpell index of normalized headwords so that
+/words/suggest and the near-duplicate check on word create answer with a few
+dict probes instead of an edit-distance scan over the whole vault.
+HeadwordPrefixIndex keeps normalized headwords and readings in a sorted array;
+/words/complete bisects to the prefix and reads the next k entries.
+"""
+
+from __future__ import annotations
+
+from bisect import bisect_left, insort
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from app.models import WordEntry
+from app.service.symspell import SymSpellIndex, near_duplicate_distance, normalize_term, suggest_distance
+from app.service.word_indexes import WordIndex, WordIndexRegistry
+from app.settings import settings
+
+# IPA stress/length marks and transcription delimiters, ignored when completing readings
+_READING_MARKS = str.maketrans("", "", "ˈˌː/[]")
+
+
+def _word_info(word: WordEntry) -> Dict[str, Any]:
+    return {
+        "id": word.id,
+        "headword": word.headword,
+        "pos": word.pos,
+        "meaningJa": word.meaningJa,
+    }
+
+
+class HeadwordFuzzyIndex(WordIndex):
+    """SymSpell index of one user's headwords"""
+
+    def __init__(self) -> None:
+        self._spell = SymSpellIndex(max_distance=2)
+        self._by_key: Dict[str, Dict[str, Dict[str, Any]]] = {}  # key -> {word_id: info}
+        self._key_of: Dict[str, str] = {}                         # word_id -> key
+
+    def entry_count(self) -> int:
+        return len(self._key_of)
+
+    def add_word(self, word: WordEntry) -> None:
+        key = normalize_term(word.headword)
+        if not key:
+            return
+        self._key_of[word.id] = key
+        self._by_key.setdefault(key, {})[word.id] = _word_info(word)
+        self._spell.add(key)
+
+    def remove_word(self, word_id: str) -> None:
+        key = self._key_of.pop(word_id, None)
+        if key is None:
+            return
+        words = self._by_key.get(key)
+        if words is None:
+            return
+        words.pop(word_id, None)
+        if not words:
+            del self._by_key[key]
+            self._spell.remove(key)
+
+    def _matches(self, key: str, max_distance: int, limit: Optional[int], exclude_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        results: List[Dict[str, Any]] = []
+        for match, distance in self._spell.lookup(key, max_distance):
+            for word_id, info in self._by_key.get(match, {}).items():
+                if word_id == exclude_id:
+                    continue
+                results.append({**info, "distance": distance})
+                if limit is not None and len(results) >= limit:
+                    return results
+        return results
+
+    def suggest(self, query: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """Headwords within a length-dependent edit distance of the query, closest first"""
+        key = normalize_term(query)
+        if not key:
+            return []
+        return self._matches(key, suggest_distance(key), limit)
+
+    def near_duplicates(self, headword: str, exclude_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Existing words whose headword equals or nearly equals ``headword``"""
+        key = normalize_term(headword)
+        if not key:
+            return []
+        return self._matches(key, near_duplicate_distance(key), settings.near_duplicate_limit, exclude_id)
+
+
+fuzzy_registry: WordIndexRegistry[HeadwordFuzzyIndex] = WordIndexRegistry("headword_fuzzy", HeadwordFuzzyIndex)
+
+
+def suggest_headwords(user_id: str, query: str, limit: int = 10) -> List[Dict[str, Any]]:
+    """Typo-tolerant headword lookup. Callers should hold storage.user_lock(user_id)."""
+    return fuzzy_registry.get(user_id).suggest(query, limit)
+
+
+def find_near_duplicates(user_id: str, headword: str, exclude_id: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Near-duplicate check for word create. Callers should hold storage.user_lock(user_id)."""
+    return fuzzy_registry.get(user_id).near_duplicates(headword, exclude_id)
+
+
+class HeadwordPrefixIndex(WordIndex):
+    """Sorted (term, word_id) array over one user's headwords and readings"""
+
+    def __init__(self) -> None:
+        self._entries: List[Tuple[str, str]] = []
+        self._terms_of: Dict[str, List[str]] = {}  # word_id -> indexed terms
+        self._info: Dict[str, Dict[str, Any]] = {}
+
+    def entry_count(self) -> int:
+        return len(self._entries)
+
+    def _index_word(self, word: WordEntry) -> List[str]:
+        reading = normalize_term((word.pronunciation or "").translate(_READING_MARKS))
+        terms = [t for t in dict.fromkeys((normalize_term(word.headword), reading)) if t]
+        self._terms_of[word.id] = terms
+        self._info[word.id] = {"id": word.id, "headword": word.headword, "pos": word.pos}
+        return terms
+
+    def add_word(self, word: WordEntry) -> None:
+        for term in self._index_word(word):
+            insort(self._entries, (term, word.id))
+
+    def add_words(self, words: Iterable[WordEntry]) -> None:
+        for word in words:
+            self._entries.extend((term, word.id) for term in self._index_word(word))
+        self._entries.sort()
+
+    def remove_word(self, word_id: str) -> None:
+        self._info.pop(word_id, None)
+        for term in self._terms_of.pop(word_id, ()):
+            i = bisect_left(self._entries, (term, word_id))
+            if i < len(self._entries) and self._entries[i] == (term, word_id):
+                del self._entries[i]
+
+    def complete(self, prefix: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """Words whose headword or reading starts with ``prefix``, in term order"""
+        key = normalize_term(prefix)
+        if not key:
+            return []
+        results: List[Dict[str, Any]] = []
+        seen = set()
+        for i in range(bisect_left(self._entries, (key, "")), len(self._entries)):
+            term, word_id = self._entries[i]
+            if not term.startswith(key):
+                break
+            if word_id in seen:
+                continue
+            seen.add(word_id)
+            results.append(self._info[word_id])
+            if len(results) >= limit:
+                break
+        return results
+
+
+prefix_registry: WordIndexRegistry[HeadwordPrefixIndex] = WordIndexRegistry("headword_prefix", HeadwordPrefixIndex)
+
+
+def complete_headwords(user_id: str, prefix: str, limit: int = 10) -> List[Dict[str, Any]]:
+    """Prefix autocomplete. Callers should hold storage.user_lock(user_id)."""
+    return prefix_registry.get(user_id).complete(prefix, limit)
@@ -0,0 +1,321 @@
+"""
+Background import jobs.
+
+Large imports are stored on disk and executed by a small pool of asyncio workers
+instead of inside the request. Each job runs the blocking import in a thread while
+holding the user's vault lock, reports progress (records validated/merged) and can
+be cancelled until it starts writing.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from uuid import uuid4
+
+from app import storage, usage
+from app.models import AppDataForImport
+from app.services import ImportProgress, validate_and_import
+from app.usage import usage_accounting
+
+logger = logging.getLogger(__name__)
+audit_logger = logging.getLogger("app.audit")
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_SUCCEEDED = "succeeded"
+JOB_FAILED = "failed"
+JOB_CANCELLED = "cancelled"
+
+_ACTIVE_STATES = (JOB_QUEUED, JOB_RUNNING)
+
+
+class ImportJobCancelled(Exception):
+    """Raised from the progress hook to abort a running import before it writes."""
+
+
+@dataclass
+class ImportJob:
+    """State of a single background import"""
+
+    job_id: str
+    user_id: str
+    username: str
+    mode: str
+    digest: str
+    upload_path: Path
+    word_count: int
+    total_records: int
+    status: str = JOB_QUEUED
+    validated: int = 0
+    merged: int = 0
+    result: Optional[Dict[str, int]] = None
+    errors: List[str] = field(default_factory=list)
+    cancel_requested: bool = False
+    created_at: str = field(default_factory=storage.now_iso)
+    started_at: Optional[str] = None
+    finished_at: Optional[str] = None
+    finished_monotonic: Optional[float] = None
+
+    @property
+    def is_active(self) -> bool:
+        return self.status in _ACTIVE_STATES
+
+    def to_dict(self) -> Dict[str, Any]:
+        """API representation (camelCase, matches the rest of the vault API)"""
+        return {
+            "jobId": self.job_id,
+            "status": self.status,
+            "mode": self.mode,
+            "totalRecords": self.total_records,
+            "validated": self.validated,
+            "merged": self.merged,
+            "result": self.result,
+            "errors": self.errors,
+            "cancelRequested": self.cancel_requested,
+            "createdAt": self.created_at,
+            "startedAt": self.started_at,
+            "finishedAt": self.finished_at,
+        }
+
+
+def _imports_dir(user_id: str) -> Path:
+    return storage.user_dir(user_id) / "imports"
+
+
+def _payload_digest(payload: Dict[str, Any], mode: str) -> str:
+    raw = json.dumps(payload, sort_keys=True, ensure_ascii=False).encode("utf-8")
+    return hashlib.sha256(mode.encode("utf-8") + b":" + raw).hexdigest()
+
+
+def _dump_and_digest(app: AppDataForImport, mode: str) -> Tuple[Dict[str, Any], str]:
+    payload = app.model_dump()
+    return payload, _payload_digest(payload, mode)
+
+
+class ImportJobManager:
+    """Queues import uploads and runs them on a fixed-size worker pool"""
+
+    def __init__(self, workers: int = 2, retention_seconds: int = 3600):
+        """
+        Args:
+            workers: Number of concurrent import workers
+            retention_seconds: How long finished jobs stay queryable
+        """
+        self.workers = max(1, workers)
+        self.retention_seconds = retention_seconds
+        self._jobs: Dict[str, ImportJob] = {}
+        self._queue: asyncio.Queue[str] = asyncio.Queue()
+        self._tasks: List[asyncio.Task] = []
+
+    async def start(self) -> None:
+        """Spawn worker tasks on the running loop"""
+        if self._tasks:
+            return
+        self._tasks = [
+            asyncio.create_task(self._worker(), name=f"import-worker-{i}")
+            for i in range(self.workers)
+        ]
+
+    async def stop(self) -> None:
+        """
+        Cancel workers and their jobs; queued jobs are marked cancelled.
+
+        A running job's thread cannot be interrupted: it aborts at its next
+        progress check, or finishes if it is already writing, and stop() waits
+        for it so the reported status matches the vault.
+        """
+        for job in self._jobs.values():
+            if job.is_active:
+                job.cancel_requested = True
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        for job in self._jobs.values():
+            if job.is_active:
+                self._finish(job, JOB_CANCELLED)
+
+    async def submit(self, user_id: str, username: str, app: AppDataForImport, mode: str) -> ImportJob:
+        """
+        Store the upload and enqueue a job.
+
+        An identical upload (same user, mode and payload) that is still queued or
+        running is returned instead of creating a duplicate job, so client retries
+        after a timeout do not pile imports onto the same vault. Serializing,
+        hashing and writing the upload run in a thread, off the event loop.
+        """
+        self._purge_finished()
+
+        payload, digest = await asyncio.to_thread(_dump_and_digest, app, mode)
+        for job in self._jobs.values():
+            if job.user_id == user_id and job.digest == digest and job.is_active:
+                logger.info(
+                    "Duplicate import upload joined existing job",
+                    extra={"user_id": user_id, "mode": mode},
+                )
+                return job
+
+        job_id = str(uuid4())
+        upload_path = _imports_dir(user_id) / f"{job_id}.json"
+        job = ImportJob(
+            job_id=job_id,
+            user_id=user_id,
+            username=username,
+            mode=mode,
+            digest=digest,
+            upload_path=upload_path,
+            word_count=len(app.words),
+            total_records=len(app.words) + len(app.memory),
+        )
+        # Registered before the write so a concurrent identical upload joins it;
+        # queued only once the upload is on disk
+        self._jobs[job_id] = job
+        try:
+            await asyncio.to_thread(storage.atomic_write_json, upload_path, payload)
+        except BaseException:
+            del self._jobs[job_id]
+            raise
+        if job.status == JOB_QUEUED:
+            self._queue.put_nowait(job_id)
+        else:
+            # Cancelled while the upload was being written
+            upload_path.unlink(missing_ok=True)
+        return job
+
+    def get(self, user_id: str, job_id: str) -> Optional[ImportJob]:
+        """Return the job if it exists and belongs to the user"""
+        job = self._jobs.get(job_id)
+        if not job or job.user_id != user_id:
+            return None
+        return job
+
+    def cancel(self, user_id: str, job_id: str) -> Optional[ImportJob]:
+        """Request cancellation; queued jobs are cancelled immediately"""
+        job = self.get(user_id, job_id)
+        if not job or not job.is_active:
+            return job
+        job.cancel_requested = True
+        if job.status == JOB_QUEUED:
+            self._finish(job, JOB_CANCELLED)
+        return job
+
+    # ---------- internals ----------
+
+    def _purge_finished(self) -> None:
+        now = time.monotonic()
+        expired = [
+            job_id
+            for job_id, job in self._jobs.items()
+            if job.finished_monotonic is not None
+            and now - job.finished_monotonic > self.retention_seconds
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    def _finish(self, job: ImportJob, status: str) -> None:
+        job.status = status
+        job.finished_at = storage.now_iso()
+        job.finished_monotonic = time.monotonic()
+        try:
+            job.upload_path.unlink(missing_ok=True)
+        except OSError:
+            logger.warning("Failed to remove import upload", extra={"user_id": job.user_id})
+
+    async def _worker(self) -> None:
+        while True:
+            job_id = await self._queue.get()
+            try:
+                job = self._jobs.get(job_id)
+                if job and job.status == JOB_QUEUED:
+                    # Storage, lock and CPU use of the job count toward the job's user
+                    job_usage, usage_token = usage.begin(job.user_id)
+                    try:
+                        await self._run(job)
+                    finally:
+                        usage.end(usage_token)
+                        usage_accounting.record(job_usage)
+            except Exception:
+                logger.exception("Import worker crashed on job", extra={"event": "import_job"})
+            finally:
+                self._queue.task_done()
+
+    def _progress_hook(self, job: ImportJob) -> ImportProgress:
+        def _hook(stage: str, done: int) -> None:
+            if job.cancel_requested:
+                raise ImportJobCancelled()
+            if stage == "validated":
+                job.validated = done
+            else:
+                job.merged = done
+
+        return _hook
+
+    def _execute(self, job: ImportJob) -> None:
+        """Blocking part of the job (runs in a worker thread)"""
+        with usage.cpu_span():
+            app = AppDataForImport(**storage.read_json(job.upload_path))
+            validation, counts = validate_and_import(job.user_id, app, job.mode, progress=self._progress_hook(job))
+        if counts is None:
+            job.errors = validation["errors"][:20]
+            self._finish(job, JOB_FAILED)
+            return
+
+        job.result = counts
+        self._finish(job, JOB_SUCCEEDED)
+
+    async def _run(self, job: ImportJob) -> None:
+        async with storage.user_lock(job.user_id):
+            # Cancelled while waiting for the vault lock
+            if job.cancel_requested:
+                if job.is_active:
+                    self._finish(job, JOB_CANCELLED)
+                return
+
+            job.status = JOB_RUNNING
+            job.started_at = storage.now_iso()
+            thread = asyncio.ensure_future(asyncio.to_thread(self._execute, job))
+            try:
+                await asyncio.shield(thread)
+            except asyncio.CancelledError:
+                # stop(): keep the vault lock until the thread is done with the vault
+                job.cancel_requested = True
+                await asyncio.wait([thread])
+                self._settle(job, thread)
+                self._audit(job)
+                raise
+            self._settle(job, thread)
+
+        self._audit(job)
+
+    def _settle(self, job: ImportJob, thread: "asyncio.Future[None]") -> None:
+        """Record the outcome of a finished _execute thread (success already recorded)"""
+        error = thread.exception()
+        if error is None:
+            return
+        if isinstance(error, ImportJobCancelled):
+            self._finish(job, JOB_CANCELLED)
+            return
+        logger.error("Import job failed", extra={"user_id": job.user_id}, exc_info=error)
+        job.errors = [f"{type(error).__name__}: {error}"]
+        self._finish(job, JOB_FAILED)
+
+    def _audit(self, job: ImportJob) -> None:
+        audit_logger.info(
+            f"Data import job {job.status}",
+            extra={
+                "event": f"data.import.{job.mode}",
+                "user_id": job.user_id,
+                "username": job.username,
+                "word_count": job.word_count,
+                "mode": job.mode,
+                "error_count": len(job.errors),
+                "result": "success" if job.status == JOB_SUCCEEDED else job.status,
+            },
+        )
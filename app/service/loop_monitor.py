@@ -0,0 +1,115 @@
+"""
+Event loop lag monitor and blocking-call detector.
+
+A task on the loop sleeps for ``interval`` and records how late it woke up in
+the event_loop_lag histogram; each wake-up is also a heartbeat. A watchdog
+thread checks the heartbeat: when the loop has not come back for longer than
+``stall_threshold`` it is still stuck in the blocking call, so the watchdog
+captures the loop thread's stack at that moment and logs it together with the
+request id of the task that is running (once per stall).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from typing import Any, Dict, Optional
+
+from app import metrics, timing
+
+logger = logging.getLogger(__name__)
+
+# Innermost frames kept in the stall log
+_STACK_LIMIT = 30
+
+
+class LoopLagMonitor:
+    """Measures event loop scheduling lag and reports stalls with their stack"""
+
+    def __init__(self, interval_seconds: float = 0.1, stall_threshold_seconds: float = 0.5):
+        """
+        Args:
+            interval_seconds: Sleep between two lag measurements
+            stall_threshold_seconds: Loop unresponsive this long -> log the blocking stack
+        """
+        self.interval_seconds = interval_seconds
+        self.stall_threshold_seconds = stall_threshold_seconds
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread_id: Optional[int] = None
+        self._heartbeat = 0.0
+        self._reported_heartbeat = -1.0
+        self._watchdog: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._max_lag = 0.0
+        self._stalls = 0
+
+    async def start(self) -> None:
+        """Spawn the lag task on the running loop and the watchdog thread"""
+        if self._task is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._heartbeat = time.perf_counter()
+        self._stop.clear()
+        self._task = asyncio.create_task(self._run(), name="loop-lag-monitor")
+        self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._watchdog.start()
+
+    async def stop(self) -> None:
+        """Cancel the lag task and join the watchdog"""
+        if self._task is None:
+            return
+        self._stop.set()
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+        if self._watchdog is not None:
+            await asyncio.to_thread(self._watchdog.join)
+            self._watchdog = None
+
+    async def _run(self) -> None:
+        while True:
+            scheduled = time.perf_counter()
+            await asyncio.sleep(self.interval_seconds)
+            now = time.perf_counter()
+            lag = max(0.0, now - scheduled - self.interval_seconds)
+            metrics.event_loop_lag.observe(lag)
+            self._max_lag = max(self._max_lag, lag)
+            self._heartbeat = now
+
+    def _watch(self) -> None:
+        check_every = min(self.interval_seconds, self.stall_threshold_seconds / 2)
+        while not self._stop.wait(check_every):
+            heartbeat = self._heartbeat
+            stalled_for = time.perf_counter() - heartbeat - self.interval_seconds
+            if stalled_for < self.stall_threshold_seconds or heartbeat == self._reported_heartbeat:
+                continue
+            self._reported_heartbeat = heartbeat
+            self._report(stalled_for)
+
+    def _report(self, stalled_for: float) -> None:
+        frame = sys._current_frames().get(self._loop_thread_id) if self._loop_thread_id else None
+        stack = traceback.format_stack(frame, limit=_STACK_LIMIT) if frame is not None else []
+        task = asyncio.current_task(self._loop) if self._loop is not None else None
+        self._stalls += 1
+        metrics.event_loop_stalls_total.inc()
+        logger.warning(
+            "Event loop blocked for %d ms",
+            int(stalled_for * 1000),
+            extra={
+                "event": "event_loop_stall",
+                "request_id": timing.request_id_of(task),
+                "duration_ms": int(stalled_for * 1000),
+                "task": task.get_name() if task is not None else None,
+                "stack": "".join(stack),
+            },
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        """Max lag seen and number of reported stalls"""
+        return {"max_lag_ms": round(self._max_lag * 1000, 2), "stalls": self._stalls}
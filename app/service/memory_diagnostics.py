@@ -0,0 +1,243 @@
+"""
+Heap diagnostics for the admin API.
+
+Wraps tracemalloc (start/stop, named snapshots kept in memory, top allocations
+and snapshot diffs grouped by file, line or traceback) and reports the size of
+the process's known in-memory structures: per-user locks, the principal cache,
+per-user word indexes, example pools, client log buckets, metric series, the
+refresh token store and so on. Sizes are entry counts; with ``deep`` an
+approximate byte size is added by walking each structure in a worker thread.
+Owners hand out shallow copies (memory_roots()) taken under their own locks,
+and the walk is capped and gives up on containers that change under it, so
+other threads keep mutating the live structures meanwhile.
+
+Snapshots and statistics are computed in a thread; tracemalloc itself is
+thread-safe. Only ``max_snapshots`` snapshots are kept, oldest dropped first.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import inspect
+import itertools
+import sys
+import tracemalloc
+from collections import OrderedDict, deque
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple, Union
+
+from app import i18n, metrics, storage, timing
+from app.usage import usage_accounting
+from app.log_sampling import client_log_limiter
+from app.logging_setup import logging_stats
+from app.service import example_pool, word_indexes
+from app.service.principal_cache import principal_cache
+
+GROUP_BY = ("filename", "lineno", "traceback")
+
+# Objects visited per structure when computing deep sizes
+_DEEP_SIZE_LIMIT = 200_000
+
+StatsProvider = Callable[[], Union[Dict[str, Any], Awaitable[Dict[str, Any]]]]
+
+
+class SnapshotNotFoundError(LookupError):
+    """Unknown snapshot id"""
+
+
+class TracingNotStartedError(RuntimeError):
+    """tracemalloc is not tracing"""
+
+
+def deep_sizeof(root: Any, limit: int = _DEEP_SIZE_LIMIT) -> Tuple[int, bool]:
+    """
+    Approximate bytes reachable from ``root`` through containers and instance dicts.
+
+    Returns:
+        (bytes, truncated) where truncated means ``limit`` objects were visited
+        or a nested container was resized by another thread during the walk
+    """
+    seen = set()
+    stack = [root]
+    total = 0
+    truncated = False
+    while stack:
+        if len(seen) >= limit:
+            return total, True
+        obj = stack.pop()
+        if id(obj) in seen or isinstance(obj, (type, type(sys), type(deep_sizeof))):
+            continue
+        seen.add(id(obj))
+        total += sys.getsizeof(obj, 0)
+        if isinstance(obj, dict):
+            try:
+                items = list(obj.items())
+            except RuntimeError:  # changed size during iteration
+                truncated = True
+                continue
+            for key, value in items:
+                stack.append(key)
+                stack.append(value)
+        elif isinstance(obj, (list, tuple, set, frozenset, deque)):
+            try:
+                stack.extend(list(obj))
+            except RuntimeError:
+                truncated = True
+        else:
+            attrs = getattr(obj, "__dict__", None)
+            if attrs is not None:
+                stack.append(attrs)
+            for slot in getattr(type(obj), "__slots__", ()):
+                if hasattr(obj, slot):
+                    stack.append(getattr(obj, slot))
+    return total, truncated
+
+
+def _stat_dict(stat: Any, group_by: str) -> Dict[str, Any]:
+    frame = stat.traceback[0]
+    item: Dict[str, Any] = {"file": frame.filename, "size": stat.size, "count": stat.count}
+    if group_by != "filename":
+        item["line"] = frame.lineno
+    if group_by == "traceback":
+        item["traceback"] = [f"{f.filename}:{f.lineno}" for f in stat.traceback]
+    if hasattr(stat, "size_diff"):
+        item["size_diff"] = stat.size_diff
+        item["count_diff"] = stat.count_diff
+    return item
+
+
+class MemoryDiagnostics:
+    """tracemalloc control plus sizes of registered in-process structures"""
+
+    def __init__(self, max_snapshots: int = 5):
+        self.max_snapshots = max_snapshots
+        self._snapshots: "OrderedDict[str, Tuple[str, tracemalloc.Snapshot]]" = OrderedDict()
+        self._ids = itertools.count(1)
+        self._structures: Dict[str, Tuple[StatsProvider, Optional[Callable[[], Any]]]] = {}
+
+    # ---------- tracemalloc ----------
+    def start(self, frames: int = 25) -> Dict[str, Any]:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+        return self.status()
+
+    def stop(self) -> Dict[str, Any]:
+        """Stop tracing (already taken snapshots stay available)"""
+        tracemalloc.stop()
+        return self.status()
+
+    def status(self) -> Dict[str, Any]:
+        tracing = tracemalloc.is_tracing()
+        current, peak = tracemalloc.get_traced_memory() if tracing else (0, 0)
+        return {
+            "tracing": tracing,
+            "frames": tracemalloc.get_traceback_limit() if tracing else None,
+            "traced_bytes": current,
+            "traced_peak_bytes": peak,
+            "tracemalloc_overhead_bytes": tracemalloc.get_tracemalloc_memory() if tracing else 0,
+            "snapshots": [
+                {"id": sid, "taken_at": taken_at} for sid, (taken_at, _) in self._snapshots.items()
+            ],
+        }
+
+    async def take_snapshot(self) -> Dict[str, Any]:
+        if not tracemalloc.is_tracing():
+            raise TracingNotStartedError()
+        snapshot = await asyncio.to_thread(self._filtered_snapshot)
+        snapshot_id = f"s{next(self._ids)}"
+        taken_at = storage.now_iso()
+        self._snapshots[snapshot_id] = (taken_at, snapshot)
+        while len(self._snapshots) > self.max_snapshots:
+            self._snapshots.popitem(last=False)
+        return {
+            "id": snapshot_id,
+            "taken_at": taken_at,
+            "traced_bytes": sum(t.size for t in snapshot.traces),
+            "blocks": len(snapshot.traces),
+        }
+
+    @staticmethod
+    def _filtered_snapshot() -> tracemalloc.Snapshot:
+        return tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+            tracemalloc.Filter(False, "<unknown>"),
+        ))
+
+    def _snapshot(self, snapshot_id: str) -> tracemalloc.Snapshot:
+        entry = self._snapshots.get(snapshot_id)
+        if entry is None:
+            raise SnapshotNotFoundError(snapshot_id)
+        return entry[1]
+
+    async def top(self, snapshot_id: str, group_by: str = "lineno", limit: int = 20) -> List[Dict[str, Any]]:
+        """Largest allocation sites of one snapshot"""
+        snapshot = self._snapshot(snapshot_id)
+        stats = await asyncio.to_thread(snapshot.statistics, group_by)
+        return [_stat_dict(s, group_by) for s in stats[:limit]]
+
+    async def diff(
+        self, from_id: str, to_id: str, group_by: str = "lineno", limit: int = 20
+    ) -> List[Dict[str, Any]]:
+        """Allocation sites that grew (or shrank) the most between two snapshots"""
+        before = self._snapshot(from_id)
+        after = self._snapshot(to_id)
+        stats = await asyncio.to_thread(after.compare_to, before, group_by)
+        return [_stat_dict(s, group_by) for s in stats[:limit]]
+
+    # ---------- known structures ----------
+    def register_structure(
+        self, name: str, stats: Optional[StatsProvider], root: Optional[Callable[[], Any]] = None
+    ) -> None:
+        """
+        Register (or with None, remove) a structure to report.
+
+        Args:
+            stats: Returns a dict of counts (may be async)
+            root: Returns a copy of the structure whose deep size is reported when
+                asked (called on the loop; the copy is walked in a thread)
+        """
+        if stats is None:
+            self._structures.pop(name, None)
+        else:
+            self._structures[name] = (stats, root)
+
+    async def structure_sizes(self, deep: bool = False) -> Dict[str, Dict[str, Any]]:
+        sizes: Dict[str, Dict[str, Any]] = {}
+        for name, (stats, root) in list(self._structures.items()):
+            value = stats()
+            if inspect.isawaitable(value):
+                value = await value
+            entry = dict(value)
+            if deep and root is not None:
+                entry["approx_bytes"], entry["approx_truncated"] = await asyncio.to_thread(deep_sizeof, root())
+            sizes[name] = entry
+        return sizes
+
+
+def register_runtime_structures(token_store: Any, client_log_sink: Any) -> None:
+    """Report the structures owned by the running app instance (lifespan)"""
+
+    async def token_store_stats() -> Dict[str, Any]:
+        return {"tokens": await token_store.count()}
+
+    memory_diagnostics.register_structure("refresh_token_store", token_store_stats, token_store.memory_roots)
+    memory_diagnostics.register_structure("client_log_sink", client_log_sink.stats, client_log_sink.memory_roots)
+
+
+def unregister_runtime_structures() -> None:
+    memory_diagnostics.register_structure("refresh_token_store", None)
+    memory_diagnostics.register_structure("client_log_sink", None)
+
+
+memory_diagnostics = MemoryDiagnostics()
+memory_diagnostics.register_structure("user_locks", storage.user_lock_stats, storage.memory_roots)
+memory_diagnostics.register_structure("principal_cache", principal_cache.stats, principal_cache.memory_roots)
+memory_diagnostics.register_structure("word_indexes", word_indexes.stats, word_indexes.memory_roots)
+memory_diagnostics.register_structure("example_pools", example_pool.stats, example_pool.memory_roots)
+memory_diagnostics.register_structure("client_log_limiter", client_log_limiter.stats, client_log_limiter.memory_roots)
+memory_diagnostics.register_structure("metrics", metrics.registry.stats, metrics.registry.memory_roots)
+memory_diagnostics.register_structure("request_timings", timing.stats, timing.memory_roots)
+memory_diagnostics.register_structure("usage_accounting", usage_accounting.stats, usage_accounting.memory_roots)
+memory_diagnostics.register_structure("log_queues", logging_stats)
+memory_diagnostics.register_structure("i18n_resources", i18n.stats, i18n.memory_roots)
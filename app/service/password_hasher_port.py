@@ -0,0 +1,18 @@
+"""Password hashing contract used by AuthService."""
+
+from __future__ import annotations
+
+from typing import Protocol
+
+
+class PasswordHasherPort(Protocol):
+    """Port implemented by PasswordHashPool."""
+
+    async def hash(self, password: str) -> str:
+        ...
+
+    async def verify(self, password: str, password_hash: str) -> bool:
+        ...
+
+    def needs_rehash(self, password_hash: str) -> bool:
+        ...
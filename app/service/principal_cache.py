@@ -0,0 +1,101 @@
+"""
+Authenticated-principal cache used by require_auth and /auth/status.
+
+Decoded access token claims are kept per token until the token's ``exp``, so a
+request carrying an already-seen token skips signature verification. Users are
+served from a compact userId -> record snapshot of users.json that is rebuilt
+only when the file's revision changes (one stat per lookup instead of a read
+and scan). delete_user invalidates immediately through the services users
+listener; any other write to users.json, such as disabling an account or a
+password rehash, is picked up by the revision check on the next request.
+"""
+
+from __future__ import annotations
+
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from app import storage
+from app.services import add_users_listener
+from app.settings import settings
+
+# Fields of a users.json record that request handlers need (never the password hash)
+_USER_FIELDS = ("userId", "username", "roles", "disabled")
+
+
+class PrincipalCache:
+    """Caches access token claims and a compact user table"""
+
+    def __init__(self, max_tokens: Optional[int] = None):
+        """
+        Args:
+            max_tokens: Cached access tokens, least recently used evicted first
+                (default settings.principal_cache_tokens)
+        """
+        self.max_tokens = max_tokens
+        self._claims: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._users: Dict[str, Dict[str, Any]] = {}
+        self._users_key: Optional[Tuple[Path, Any]] = None
+        self._hits = 0
+        self._misses = 0
+
+    def claims(self, token: str) -> Optional[Dict[str, Any]]:
+        """Cached claims of a previously verified, still unexpired token"""
+        entry = self._claims.get(token)
+        if entry is None:
+            self._misses += 1
+            return None
+        expires_at, claims = entry
+        if expires_at <= time.time():
+            del self._claims[token]
+            self._misses += 1
+            return None
+        self._claims.move_to_end(token)
+        self._hits += 1
+        return claims
+
+    def put_claims(self, token: str, claims: Dict[str, Any]) -> None:
+        """Remember verified claims until the token's ``exp``"""
+        expires_at = claims.get("exp")
+        if not isinstance(expires_at, (int, float)):
+            return
+        self._claims[token] = (float(expires_at), claims)
+        self._claims.move_to_end(token)
+        limit = self.max_tokens or settings.principal_cache_tokens
+        while len(self._claims) > limit:
+            self._claims.popitem(last=False)
+
+    def user(self, user_id: str) -> Optional[Dict[str, Any]]:
+        """Compact user record (a copy) or None when the user does not exist"""
+        path = storage.users_file_path()
+        key = (path, storage.file_revision(path))
+        if key != self._users_key:
+            data = storage.read_json(path)
+            self._users = {
+                u["userId"]: {k: u[k] for k in _USER_FIELDS if k in u}
+                for u in data.get("users", [])
+                if "userId" in u
+            }
+            self._users_key = key
+        user = self._users.get(user_id)
+        return dict(user) if user is not None else None
+
+    def invalidate_user(self, user_id: str) -> None:
+        """Forget a user's cached tokens and the user snapshot"""
+        for token in [t for t, (_, claims) in self._claims.items() if claims.get("sub") == user_id]:
+            del self._claims[token]
+        self._users_key = None
+
+    def stats(self) -> Dict[str, Any]:
+        """Cache counters for diagnostics"""
+        return {"tokens": len(self._claims), "users": len(self._users), "hits": self._hits, "misses": self._misses}
+
+    def memory_roots(self) -> List[Any]:
+        """Copies of the cached tables for memory diagnostics"""
+        return [dict(self._claims), dict(self._users)]
+
+
+principal_cache = PrincipalCache()
+add_users_listener(principal_cache.invalidate_user)
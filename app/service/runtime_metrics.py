@@ -0,0 +1,54 @@
+"""
+Scrape-time metrics that need I/O or live objects.
+
+These are evaluated only when /metrics is scraped, never on the request path:
+refresh token store size, number of per-user locks, and the distribution of
+vault sizes (words.json bytes per user, from one stat per user in a thread).
+"""
+
+from __future__ import annotations
+
+import asyncio
+from typing import List
+
+from app import metrics, storage
+from app.service.token_store_port import TokenStorePort
+
+_COLLECTOR_KEY = "runtime"
+
+
+def _vault_sizes() -> List[int]:
+    sizes = []
+    vault = storage.vault_dir()
+    if not vault.exists():
+        return sizes
+    for user_dir in vault.iterdir():
+        try:
+            sizes.append((user_dir / "words.json").stat().st_size)
+        except (FileNotFoundError, NotADirectoryError):
+            continue
+    return sizes
+
+
+def register_runtime_metrics(token_store: TokenStorePort) -> None:
+    """Expose token store / lock / vault metrics for this app instance"""
+
+    async def collect() -> List[metrics.Metric]:
+        store_size = metrics.Gauge("vocab_refresh_token_store_size", "Refresh tokens held by the token store")
+        store_size.set(await token_store.count())
+
+        locks = metrics.Gauge("vocab_storage_user_locks", "Per-user locks held in memory")
+        locks.set(storage.user_lock_stats()["entries"])
+
+        vaults = metrics.Histogram(
+            "vocab_vault_words_file_bytes", "Size of each user's words.json", metrics.SIZE_BUCKETS
+        )
+        for size in await asyncio.to_thread(_vault_sizes):
+            vaults.observe(size)
+        return [store_size, locks, vaults]
+
+    metrics.registry.set_collector(_COLLECTOR_KEY, collect)
+
+
+def unregister_runtime_metrics() -> None:
+    metrics.registry.set_collector(_COLLECTOR_KEY, None)
@@ -0,0 +1,209 @@
+"""
+Symmetric-delete (SymSpell) index for typo-tolerant lookups.
+
+Every key is stored under all strings obtainable by deleting up to
+``max_distance`` characters from its first ``prefix_length`` characters. A query
+generates the same deletes and only the keys sharing one of them are verified
+with a real edit distance, so lookups cost a few dict probes instead of an O(n)
+scan. No app imports: services.py uses it directly for import validation.
+"""
+
+from __future__ import annotations
+
+import unicodedata
+from typing import Dict, Iterator, List, Optional, Set, Tuple, Union
+
+# Near-duplicate checks ignore keys shorter than this: run/ran, cat/cut and
+# friends are distinct words, not typos
+NEAR_DUPLICATE_MIN_LENGTH = 5
+
+
+def normalize_term(text: str) -> str:
+    """Canonical form used as index key (NFKC, case-folded, trimmed)"""
+    return unicodedata.normalize("NFKC", text or "").casefold().strip()
+
+
+def suggest_distance(term: str) -> int:
+    """Edit distance tolerated when suggesting corrections for a query"""
+    return 1 if len(term) <= 4 else 2
+
+
+def near_duplicate_distance(term: str) -> int:
+    """Edit distance at which two headwords are reported as near-duplicates (0: exact only)"""
+    return 1 if len(term) >= NEAR_DUPLICATE_MIN_LENGTH else 0
+
+
+def edit_distance(a: str, b: str, max_distance: int) -> int:
+    """
+    Optimal string alignment distance (Levenshtein plus adjacent transpositions).
+
+    Returns max_distance + 1 as soon as the distance is known to exceed it.
+    """
+    if a == b:
+        return 0
+    la, lb = len(a), len(b)
+    if abs(la - lb) > max_distance:
+        return max_distance + 1
+    if la > lb:
+        a, b, la, lb = b, a, lb, la
+
+    # Only the differing middle needs the DP: strip common prefix and suffix
+    start = 0
+    while start < la and a[start] == b[start]:
+        start += 1
+    while la > start and a[la - 1] == b[lb - 1]:
+        la -= 1
+        lb -= 1
+    a = a[start:la]
+    b = b[start:lb]
+    la -= start
+    lb -= start
+    if la == 0:
+        return lb if lb <= max_distance else max_distance + 1
+
+    prev_prev: List[int] = []
+    prev = list(range(lb + 1))
+    for i in range(1, la + 1):
+        cur = [i] + [0] * lb
+        ca = a[i - 1]
+        row_min = i
+        for j in range(1, lb + 1):
+            cost = 0 if ca == b[j - 1] else 1
+            v = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + cost)
+            if i > 1 and j > 1 and ca == b[j - 2] and a[i - 2] == b[j - 1]:
+                v = min(v, prev_prev[j - 2] + 1)
+            cur[j] = v
+            if v < row_min:
+                row_min = v
+        if row_min > max_distance:
+            return max_distance + 1
+        prev_prev, prev = prev, cur
+    return prev[lb] if prev[lb] <= max_distance else max_distance + 1
+
+
+def _deletes(word: str, max_distance: int) -> Set[str]:
+    """All strings reachable from ``word`` by deleting 0..max_distance characters"""
+    result = {word}
+    frontier = result
+    for _ in range(max_distance):
+        nxt = {w[:i] + w[i + 1:] for w in frontier for i in range(len(w))}
+        nxt -= result
+        result |= nxt
+        frontier = nxt
+    return result
+
+
+class SymSpellIndex:
+    """Set of keys searchable by edit distance"""
+
+    def __init__(self, max_distance: int = 2, prefix_length: int = 7):
+        self.max_distance = max_distance
+        self.prefix_length = prefix_length
+        # delete -> key, or list of keys when shared (most deletes are unique)
+        self._deletes: Dict[str, Union[str, List[str]]] = {}
+        self._keys: Set[str] = set()
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._keys
+
+    def add(self, key: str) -> None:
+        if not key or key in self._keys:
+            return
+        self._keys.add(key)
+        for d in _deletes(key[: self.prefix_length], self.max_distance):
+            slot = self._deletes.get(d)
+            if slot is None:
+                self._deletes[d] = key
+            elif isinstance(slot, str):
+                self._deletes[d] = [slot, key]
+            else:
+                slot.append(key)
+
+    def remove(self, key: str) -> None:
+        if key not in self._keys:
+            return
+        self._keys.discard(key)
+        for d in _deletes(key[: self.prefix_length], self.max_distance):
+            slot = self._deletes.get(d)
+            if slot is None:
+                continue
+            if isinstance(slot, str):
+                if slot == key:
+                    del self._deletes[d]
+                continue
+            try:
+                slot.remove(key)
+            except ValueError:
+                continue
+            if len(slot) == 1:
+                self._deletes[d] = slot[0]
+
+    def _candidates(self, query: str, max_distance: int) -> Iterator[str]:
+        for d in _deletes(query[: self.prefix_length], max_distance):
+            slot = self._deletes.get(d)
+            if slot is None:
+                continue
+            if isinstance(slot, str):
+                yield slot
+            else:
+                yield from slot
+
+    def add_and_match(self, key: str) -> Optional[str]:
+        """
+        Add a key and return some existing key within max_distance of it (not
+        necessarily the closest), or None. Cheaper than lookup() + add() since
+        the deletes are generated once; meant for streaming duplicate checks.
+        """
+        if not key or key in self._keys:
+            return key or None
+        self._keys.add(key)
+        match: Optional[str] = None
+        max_distance = self.max_distance
+        klen = len(key)
+        for d in _deletes(key[: self.prefix_length], max_distance):
+            slot = self._deletes.get(d)
+            if slot is None:
+                self._deletes[d] = key
+                continue
+            if match is None:
+                for other in ((slot,) if isinstance(slot, str) else slot):
+                    if abs(len(other) - klen) <= max_distance and edit_distance(key, other, max_distance) <= max_distance:
+                        match = other
+                        break
+            if isinstance(slot, str):
+                self._deletes[d] = [slot, key]
+            else:
+                slot.append(key)
+        return match
+
+    def lookup(self, query: str, max_distance: Optional[int] = None, limit: Optional[int] = None) -> List[Tuple[str, int]]:
+        """
+        Keys within ``max_distance`` of the query, closest first.
+
+        Returns:
+            (key, distance) pairs sorted by distance, then key
+        """
+        if not query:
+            return []
+        if max_distance is None or max_distance > self.max_distance:
+            max_distance = self.max_distance
+        if max_distance <= 0:
+            return [(query, 0)] if query in self._keys else []
+
+        found: Dict[str, int] = {}
+        checked: Set[str] = set()
+        qlen = len(query)
+        for key in self._candidates(query, max_distance):
+            if key in checked:
+                continue
+            checked.add(key)
+            if abs(len(key) - qlen) > max_distance:
+                continue
+            dist = edit_distance(query, key, max_distance)
+            if dist <= max_distance:
+                found[key] = dist
+        ranked = sorted(found.items(), key=lambda kv: (kv[1], kv[0]))
+        return ranked[:limit] if limit is not None else ranked
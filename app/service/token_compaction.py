@@ -0,0 +1,103 @@
+"""
+Background compaction of the refresh token store.
+
+Expired tokens, and tokens revoked longer ago than the retention period, are
+removed oldest first in small batches, yielding to the event loop between
+batches so request handling never waits on a full sweep. Each pass logs the
+store size and the number of reclaimed tokens.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Any, Dict, Optional
+
+from app.service.token_store_port import TokenStorePort
+
+logger = logging.getLogger(__name__)
+
+
+class TokenStoreCompactor:
+    """Periodically reclaims dead refresh tokens"""
+
+    def __init__(
+        self,
+        token_store: TokenStorePort,
+        interval_seconds: float = 300,
+        batch_size: int = 200,
+        revoked_retention_seconds: Optional[int] = None,
+    ):
+        """
+        Args:
+            token_store: Refresh token storage
+            interval_seconds: Pause between two compaction passes
+            batch_size: Tokens removed per batch
+            revoked_retention_seconds: Keep revoked tokens this long (None: until they expire)
+        """
+        self.token_store = token_store
+        self.interval_seconds = interval_seconds
+        self.batch_size = max(1, batch_size)
+        self.revoked_retention_seconds = revoked_retention_seconds
+        self._task: Optional[asyncio.Task] = None
+        self._passes = 0
+        self._reclaimed_total = 0
+        self._last_reclaimed = 0
+        self._store_size: Optional[int] = None
+
+    async def start(self) -> None:
+        """Spawn the compaction task on the running loop"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="token-store-compactor")
+
+    async def stop(self) -> None:
+        """Cancel the compaction task"""
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.run_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Refresh token store compaction failed")
+            await asyncio.sleep(self.interval_seconds)
+
+    async def run_once(self) -> int:
+        """
+        Run one compaction pass.
+
+        Returns:
+            Number of tokens removed
+        """
+        reclaimed = 0
+        while True:
+            removed = await self.token_store.compact(self.batch_size, self.revoked_retention_seconds)
+            reclaimed += removed
+            if removed < self.batch_size:
+                break
+            await asyncio.sleep(0)
+
+        self._passes += 1
+        self._last_reclaimed = reclaimed
+        self._reclaimed_total += reclaimed
+        self._store_size = await self.token_store.count()
+        logger.info(
+            f"Refresh token store compacted: {reclaimed} reclaimed, {self._store_size} remaining",
+            extra={"event": "refresh_store_compaction", "reclaimed": reclaimed, "store_size": self._store_size},
+        )
+        return reclaimed
+
+    def stats(self) -> Dict[str, Any]:
+        """Compaction counters for diagnostics"""
+        return {
+            "passes": self._passes,
+            "store_size": self._store_size,
+            "last_reclaimed": self._last_reclaimed,
+            "reclaimed_total": self._reclaimed_total,
+        }
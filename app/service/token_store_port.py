@@ -0,0 +1,62 @@
+"""Persistence contract for refresh tokens used by AuthService."""
+
+from __future__ import annotations
+
+from typing import Any, List, Optional, Protocol
+
+from app.domain.models.tokens import TokenRecord
+
+
+class TokenStorePort(Protocol):
+    """Port implemented by JsonTokenStore and SqliteTokenStore."""
+
+    async def find_by_hash(self, token_hash: str) -> Optional[tuple[str, TokenRecord]]:
+        ...
+
+    async def add_token(
+        self,
+        token_id: str,
+        user_id: str,
+        token_hash: str,
+        family_id: str,
+        prev_token_id: Optional[str],
+        ttl_days: int,
+    ) -> None:
+        ...
+
+    async def rotate_token(
+        self,
+        token_id: str,
+        new_token_id: str,
+        new_token_hash: str,
+        ttl_days: int,
+    ) -> None:
+        ...
+
+    async def mark_replaced(self, token_id: str, new_token_id: str) -> None:
+        ...
+
+    async def revoke_token(self, token_id: str) -> None:
+        ...
+
+    async def revoke_family(self, family_id: str) -> None:
+        ...
+
+    async def update_last_used(self, token_id: str) -> None:
+        ...
+
+    async def cleanup_expired(self) -> int:
+        ...
+
+    async def compact(self, limit: Optional[int] = None, revoked_retention_seconds: Optional[int] = None) -> int:
+        ...
+
+    async def count(self) -> int:
+        ...
+
+    def memory_roots(self) -> List[Any]:
+        """Copies of resident structures for memory diagnostics (empty when nothing is resident)"""
+        ...
+
+    async def close(self) -> None:
+        ...
@@ -0,0 +1,181 @@
+"""
+Per-user in-memory indexes derived from words.json.
+
+A WordIndexRegistry keeps one index per user (LRU-bounded) together with the
+words.json revision it was built from. Routers that mutate words report the
+change through notify_words_changed(); when the index was in sync with the file
+before the write it is updated incrementally, otherwise it is rebuilt lazily on
+next use. Merge imports report their upserted words through a services
+listener; other writes (overwrite imports, manual edits) are still picked up,
+just with a full rebuild.
+"""
+
+from __future__ import annotations
+
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Callable, Generic, Iterable, List, Optional, Tuple, TypeVar
+
+from app import storage
+from app.models import WordEntry
+from app.services import add_users_listener, add_words_listener, load_words
+from app.settings import settings
+
+Revision = Optional[Tuple[int, int, int]]
+
+
+class WordIndex(ABC):
+    """Base class for indexes that can be maintained word by word"""
+
+    @abstractmethod
+    def add_word(self, word: WordEntry) -> None:
+        ...
+
+    @abstractmethod
+    def remove_word(self, word_id: str) -> None:
+        ...
+
+    def add_words(self, words: Iterable[WordEntry]) -> None:
+        """Bulk load used on rebuild; override when a batch is cheaper than add_word()"""
+        for word in words:
+            self.add_word(word)
+
+    def entry_count(self) -> int:
+        """Number of indexed entries, used for diagnostics only"""
+        return 0
+
+
+IndexT = TypeVar("IndexT", bound=WordIndex)
+
+
+def words_revision(user_id: str) -> Revision:
+    """Current revision token of the user's words.json"""
+    return storage.file_revision(storage.user_dir(user_id) / "words.json")
+
+
+class WordIndexRegistry(Generic[IndexT]):
+    """Caches one index per user and keeps it in sync with words.json"""
+
+    def __init__(self, name: str, factory: Callable[[], IndexT], max_users: Optional[int] = None):
+        self.name = name
+        self._factory = factory
+        self.max_users = max_users or settings.word_index_cache_users
+        self._entries: "OrderedDict[str, Tuple[Revision, IndexT]]" = OrderedDict()
+        # get() runs on the event loop while imports report changes from worker
+        # threads; the lock covers the table (an index itself is only touched
+        # under the user's storage.user_lock)
+        self._lock = threading.Lock()
+        _registries.append(self)
+
+    def get(self, user_id: str) -> IndexT:
+        """
+        Return the user's index, rebuilding it if words.json changed.
+        Callers should hold storage.user_lock(user_id).
+        """
+        revision = words_revision(user_id)
+        with self._lock:
+            entry = self._entries.get(user_id)
+        if entry is None or entry[0] != revision:
+            index = self._factory()
+            index.add_words(load_words(user_id).words)
+            entry = (words_revision(user_id), index)
+        with self._lock:
+            self._entries[user_id] = entry
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_users:
+                self._entries.popitem(last=False)
+        return entry[1]
+
+    def apply(
+        self,
+        user_id: str,
+        before: Revision,
+        after: Revision,
+        upserted: Iterable[WordEntry],
+        deleted: Iterable[str],
+    ) -> None:
+        with self._lock:
+            entry = self._entries.pop(user_id, None)
+        if entry is None or entry[0] != before:
+            # Not cached, or already stale: the next get() rebuilds it
+            return
+        index = entry[1]
+        for word_id in deleted:
+            index.remove_word(word_id)
+        for word in upserted:
+            index.remove_word(word.id)
+            index.add_word(word)
+        with self._lock:
+            self._entries[user_id] = (after, index)
+            while len(self._entries) > self.max_users:
+                self._entries.popitem(last=False)
+
+    def __contains__(self, user_id: str) -> bool:
+        """Whether an index of the user is cached"""
+        with self._lock:
+            return user_id in self._entries
+
+    def forget(self, user_id: str) -> None:
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            entries = list(self._entries.values())
+        return {
+            "users": len(entries),
+            "entries": sum(idx.entry_count() for _, idx in entries),
+        }
+
+    def memory_roots(self) -> List[Any]:
+        """Copy of the cached (revision, index) entries for memory diagnostics"""
+        with self._lock:
+            return [dict(self._entries)]
+
+
+_registries: List[WordIndexRegistry[Any]] = []
+
+
+def notify_words_changed(
+    user_id: str,
+    before: Revision,
+    upserted: Iterable[WordEntry] = (),
+    deleted: Iterable[str] = (),
+) -> None:
+    """
+    Report a words.json write to every registry.
+
+    Args:
+        user_id: Owner of the vault
+        before: words_revision() captured before the write
+        upserted: Words created or replaced by the write
+        deleted: Ids of words removed by the write
+    """
+    after = words_revision(user_id)
+    upserted = list(upserted)
+    deleted = list(deleted)
+    for registry in _registries:
+        registry.apply(user_id, before, after, upserted, deleted)
+
+
+add_words_listener(notify_words_changed)
+
+
+def forget_user(user_id: str) -> None:
+    """Drop every cached index of a user (account deletion)"""
+    for registry in _registries:
+        registry.forget(user_id)
+
+
+add_users_listener(forget_user)
+
+
+def stats() -> dict[str, Any]:
+    """stats() of every registry by name"""
+    return {registry.name: registry.stats() for registry in list(_registries)}
+
+
+def memory_roots() -> List[Any]:
+    """memory_roots() of every registry"""
+    return [root for registry in list(_registries) for root in registry.memory_roots()]
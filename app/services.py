@@ -1,6 +1,6 @@
 # app/services.py
 from __future__ import annotations
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Callable
 from uuid import uuid4
 from datetime import datetime, timedelta, timezone
 import shutil
@@ -8,11 +8,35 @@ import logging
 from . import storage
 from .models import WordEntry, WordsFile, MemoryState, MemoryFile, Rating, AppData, AppDataForImport, ExampleSentence, Pos
 from .security import hash_password, verify_password
+from .service.symspell import SymSpellIndex, near_duplicate_distance, normalize_term
 
 logger = logging.getLogger("app.service.import")
 
 UTC = timezone.utc
 
+# Progress hook used by long-running imports: (stage, records_done) where stage is
+# "validated" or "merged". The hook may raise to abort the import before any write.
+ImportProgress = Callable[[str, int], None]
+_PROGRESS_EVERY = 500
+
+# Listeners told when an import patched words.json: (userId, revision_before_write,
+# upserted_words). Used to keep in-memory word indexes in sync without a rebuild.
+WordsListener = Callable[[str, Any, List[WordEntry]], None]
+_words_listeners: List[WordsListener] = []
+
+
+def add_words_listener(listener: WordsListener) -> None:
+    _words_listeners.append(listener)
+
+# Listeners told when a user was removed (userId). Used to drop cached principals
+# and per-user in-memory indexes.
+UsersListener = Callable[[str], None]
+_users_listeners: List[UsersListener] = []
+
+
+def add_users_listener(listener: UsersListener) -> None:
+    _users_listeners.append(listener)
+
 # ---------- Users ----------
 def _init_users_if_missing() -> None:
     p = storage.users_file_path()
@@ -38,7 +62,8 @@ def find_user_by_id(userId: str) -> Optional[Dict[str, Any]]:
             return u
     return None
 
-def register_user(username: str, password: str) -> dict:
+def register_user(username: str, password: str, password_hash: Optional[str] = None) -> dict:
+    """password_hash: hash already computed off the event loop by the caller (computed here when omitted)"""
     _init_users_if_missing()
     if find_user_by_username(username):
         raise ValueError("username already exists")
@@ -47,7 +72,7 @@ def register_user(username: str, password: str) -> dict:
     u = {
         "userId": userId,
         "username": username,
-        "passwordHash": hash_password(password),
+        "passwordHash": password_hash or hash_password(password),
         "roles": ["user"],
         "createdAt": storage.now_iso(),
         "disabled": False,
@@ -69,6 +94,17 @@ def authenticate(username: str, password: str) -> Optional[dict]:
         return u
     return None
 
+def update_password_hash(userId: str, password_hash: str) -> None:
+    """Replace a user's stored password hash (rehash after argon2 parameter changes)."""
+    _init_users_if_missing()
+    p = storage.users_file_path()
+    data = storage.read_json(p)
+    for u in data.get("users", []):
+        if u.get("userId") == userId:
+            u["passwordHash"] = password_hash
+            storage.atomic_write_json(p, data)
+            return
+
 def delete_user(userId: str) -> None:
     """Delete user from users.json and remove user vault directory."""
     _init_users_if_missing()
@@ -77,6 +113,8 @@ def delete_user(userId: str) -> None:
     users = data.get("users", [])
     data["users"] = [u for u in users if u.get("userId") != userId]
     storage.atomic_write_json(p, data)
+    for listener in _users_listeners:
+        listener(userId)
     
     # Remove user vault directory
     ud = storage.user_dir(userId)
@@ -299,159 +337,337 @@ def grade_card(userId: str, wordId: str, rating: Rating) -> MemoryState:
 
 # ---------- Import / Export ----------
 
-def validate_import_data(app_data: AppDataForImport) -> Dict[str, Any]:
+_VALID_POS_VALUES = {"noun", "verb", "adj", "adv", "prep", "conj", "pron", "det", "interj", "other"}
+
+
+def _epoch(s: Optional[str]) -> Optional[float]:
+    """Epoch seconds for an ISO timestamp, or None when missing/unparseable."""
+    if not s:
+        return None
+    try:
+        return _parse_iso(s).timestamp()
+    except ValueError:
+        return None
+
+
+class _ImportPlan:
     """
-    Validate import data and collect warnings/errors.
-    Returns a dict with 'valid', 'errors', 'warnings', and 'details'.
+    Target state of an import, filled record by record during the single pass.
+
+    Records are kept as plain dicts in the on-disk shape, so the existing vault is
+    read without pydantic validation and written back without model_dump().
+    overwrite keeps the uploaded lists as-is; merge keys records by id and keeps
+    the newer one (updatedAt for words, dueAt for memory). Each timestamp is parsed
+    at most once and cached as epoch seconds.
+    """
+
+    def __init__(self, mode: str, words: List[Dict[str, Any]], memory: List[Dict[str, Any]]):
+        self.mode = mode
+        self.word_list: List[Dict[str, Any]] = []
+        self.memory_list: List[Dict[str, Any]] = []
+        self.words: Dict[str, Dict[str, Any]] = {w["id"]: w for w in words}
+        self.memory: Dict[str, Dict[str, Any]] = {m["wordId"]: m for m in memory}
+        self._word_epochs: Dict[str, Optional[float]] = {}
+        self._memory_epochs: Dict[str, Optional[float]] = {}
+        self.counts = {"added_words": 0, "updated_words": 0, "added_memory": 0, "updated_memory": 0}
+        self.changed_word_ids: List[str] = []
+        self._debug = logger.isEnabledFor(logging.DEBUG)
+
+    @classmethod
+    def for_user(cls, userId: str, mode: str) -> "_ImportPlan":
+        if mode == "overwrite":
+            return cls(mode, [], [])
+        _ensure_user_files(userId)
+        ud = storage.user_dir(userId)
+        words = storage.read_json(ud / "words.json").get("words", [])
+        memory = storage.read_json(ud / "memory.json").get("memory", [])
+        return cls(mode, words, memory)
+
+    def _merge(
+        self,
+        kind: str,
+        table: Dict[str, Dict[str, Any]],
+        epochs: Dict[str, Optional[float]],
+        key: str,
+        record: Dict[str, Any],
+        stamp_field: str,
+    ) -> None:
+        new_epoch = _epoch(record[stamp_field])
+        cur = table.get(key)
+        if cur is None:
+            if self._debug:
+                logger.debug("Adding new %s: %s", kind, key)
+            self.counts[f"added_{kind}"] += 1
+        else:
+            cur_epoch = epochs[key] if key in epochs else _epoch(cur.get(stamp_field))
+            # Unparseable timestamps fall back to "import wins"
+            if new_epoch is not None and cur_epoch is not None and new_epoch < cur_epoch:
+                epochs[key] = cur_epoch
+                if self._debug:
+                    logger.debug("Skipping %s %s (existing is newer)", kind, key)
+                return
+            if self._debug:
+                logger.debug("Updating %s %s (import is newer or equal)", kind, key)
+            self.counts[f"updated_{kind}"] += 1
+        table[key] = record
+        epochs[key] = new_epoch
+        if kind == "words":
+            self.changed_word_ids.append(key)
+
+    def add_word(self, w: Dict[str, Any]) -> None:
+        if self.mode == "overwrite":
+            self.word_list.append(w)
+            self.counts["added_words"] += 1
+            return
+        self._merge("words", self.words, self._word_epochs, w["id"], w, "updatedAt")
+
+    def add_memory(self, m: Dict[str, Any]) -> None:
+        if self.mode == "overwrite":
+            self.memory_list.append(m)
+            self.counts["added_memory"] += 1
+            return
+        self._merge("memory", self.memory, self._memory_epochs, m["wordId"], m, "dueAt")
+
+    def commit(self, userId: str) -> Dict[str, int]:
+        if self.mode == "overwrite":
+            logger.info("Overwrite mode: saving %d words and %d memory states", len(self.word_list), len(self.memory_list))
+            words, memory = self.word_list, self.memory_list
+        else:
+            c = self.counts
+            logger.info(
+                "Merge results: added %d words, updated %d words, added %d memory states, updated %d memory states",
+                c["added_words"], c["updated_words"], c["added_memory"], c["updated_memory"],
+            )
+            words, memory = list(self.words.values()), list(self.memory.values())
+
+        logger.debug("Saving %d words and %d memory states", len(words), len(memory))
+        # Same shape as WordsFile/MemoryFile.model_dump()
+        ud = storage.user_dir(userId)
+        words_before = storage.file_revision(ud / "words.json")
+        storage.atomic_write_json(ud / "words.json", {"updatedAt": storage.now_iso(), "words": words})
+        storage.atomic_write_json(ud / "memory.json", {"updatedAt": storage.now_iso(), "memory": memory})
+        self._notify_words_listeners(userId, words_before)
+        return self.counts
+
+    def _notify_words_listeners(self, userId: str, words_before: Any) -> None:
+        # Patching only pays off for small merges; overwrites and large merges
+        # leave the indexes stale so they rebuild from disk on next use
+        if not _words_listeners or self.mode == "overwrite":
+            return
+        changed = list(dict.fromkeys(self.changed_word_ids))
+        if not changed or len(changed) * 2 > len(self.words):
+            return
+        upserted = [WordEntry.model_validate(self.words[wid]) for wid in changed]
+        for listener in _words_listeners:
+            listener(userId, words_before, upserted)
+
+
+def _normalize_word(w: Any, now: str) -> Dict[str, Any]:
+    """WordEntryForImport -> stored word dict, generating missing IDs and timestamps.
+
+    The upload was already validated by pydantic when the request was parsed, so
+    the record is assembled directly instead of being validated a second time.
+    """
+    if isinstance(w, WordEntry):
+        return w.model_dump()
+    return {
+        "headword": w.headword,
+        "pronunciation": w.pronunciation,
+        "pos": w.pos,
+        "meaningJa": w.meaningJa,
+        "examples": [
+            {"id": ex.id or str(uuid4()), "en": ex.en, "ja": ex.ja, "source": ex.source}
+            for ex in w.examples
+        ],
+        "tags": list(w.tags),
+        "memo": w.memo,
+        "id": w.id or str(uuid4()),
+        "createdAt": w.createdAt or now,
+        "updatedAt": w.updatedAt or now,
+    }
+
+
+def _normalize_memory(m: Any) -> Dict[str, Any]:
+    """MemoryStateForImport -> stored memory dict (identical fields, already validated)"""
+    return {
+        "wordId": m.wordId,
+        "dueAt": m.dueAt,
+        "lastRating": m.lastRating,
+        "lastReviewedAt": m.lastReviewedAt,
+        "memoryLevel": m.memoryLevel,
+        "ease": m.ease,
+        "intervalDays": m.intervalDays,
+        "reviewCount": m.reviewCount,
+        "lapseCount": m.lapseCount,
+    }
+
+
+def _import_pass(
+    app: AppData | AppDataForImport,
+    plan: Optional[_ImportPlan],
+    validate: bool,
+    progress: Optional[ImportProgress] = None,
+) -> Dict[str, Any]:
+    """
+    Single pass over the upload: validate, normalize and merge each record.
+
+    Returns the validation result ('valid', 'errors', 'warnings', 'details').
+    Records stop being merged into ``plan`` once a validation error is found,
+    since an invalid upload is never committed.
     """
-    valid_pos_values = {"noun", "verb", "adj", "adv", "prep", "conj", "pron", "det", "interj", "other"}
     errors: List[str] = []
     warnings: List[str] = []
     details: Dict[str, Any] = {}
-    
+
     # Check schemaVersion
-    if app_data.schemaVersion != 1:
-        errors.append(f"Invalid schemaVersion: {app_data.schemaVersion} (expected 1)")
-    
-    words = app_data.words
-    if not words:
-        warnings.append("No words to import")
-        return {
-            "valid": len(errors) == 0,
-            "errors": errors,
-            "warnings": warnings,
-            "details": details
-        }
-    
+    if validate and app.schemaVersion != 1:
+        errors.append(f"Invalid schemaVersion: {app.schemaVersion} (expected 1)")
+
+    now = storage.now_iso()
+    words = app.words
+
+    def _report(done: int) -> None:
+        if progress is None:
+            return
+        if validate:
+            progress("validated", min(done, len(words)))
+        if plan is not None:
+            progress("merged", done)
+
     # Track headwords and IDs
     headwords_seen: Dict[str, int] = {}
     ids_seen: Dict[str, int] = {}
+    # Normalized headword -> first spelling, plus a typo index over them
+    near_seen: Dict[str, str] = {}
+    # Full keys (no prefix truncation): at distance 1 that is only len+1 deletes
+    # per headword, and numbered headwords do not collapse into one bucket
+    near_index = SymSpellIndex(max_distance=1, prefix_length=64)
+    near_duplicates: Dict[str, str] = {}
     invalid_pos_words: List[Dict[str, Any]] = []
-    
+
     for idx, word in enumerate(words):
-        # Check required fields
-        if not word.headword:
-            errors.append(f"Word at index {idx}: missing or empty headword")
-            continue
-        
-        if not word.meaningJa:
-            errors.append(f"Word '{word.headword}': missing or empty meaningJa")
-            continue
-        
-        if not word.pos:  # type: ignore[unreachable]
-            errors.append(f"Word '{word.headword}': missing pos")  # type: ignore[unreachable]
-            continue  # type: ignore[unreachable]
-        
-        # Check pos is valid
-        if word.pos not in valid_pos_values:
-            invalid_pos_words.append({
-                "index": idx,
-                "headword": word.headword,
-                "invalid_pos": word.pos,
-                "valid_options": list(valid_pos_values)
-            })
-            errors.append(
-                f"Word '{word.headword}' at index {idx}: "
-                f"invalid pos='{word.pos}' (valid: {', '.join(sorted(valid_pos_values))})"
-            )
-        
-        # Check for duplicate headwords
-        headwords_seen[word.headword] = headwords_seen.get(word.headword, 0) + 1
-        if headwords_seen[word.headword] > 1:
-            warnings.append(
-                f"Word '{word.headword}' appears {headwords_seen[word.headword]} times in import file"
-            )
-        
-        # Check for duplicate IDs
-        if word.id:
-            ids_seen[word.id] = ids_seen.get(word.id, 0) + 1
-            if ids_seen[word.id] > 1:
-                warnings.append(
-                    f"ID '{word.id}' is duplicated in import file"
+        if idx % _PROGRESS_EVERY == 0:
+            _report(idx)
+
+        if validate:
+            # Check required fields
+            if not word.headword:
+                errors.append(f"Word at index {idx}: missing or empty headword")
+                continue
+
+            if not word.meaningJa:
+                errors.append(f"Word '{word.headword}': missing or empty meaningJa")
+                continue
+
+            if not word.pos:  # type: ignore[unreachable]
+                errors.append(f"Word '{word.headword}': missing pos")  # type: ignore[unreachable]
+                continue  # type: ignore[unreachable]
+
+            # Check pos is valid
+            if word.pos not in _VALID_POS_VALUES:
+                invalid_pos_words.append({
+                    "index": idx,
+                    "headword": word.headword,
+                    "invalid_pos": word.pos,
+                    "valid_options": list(_VALID_POS_VALUES)
+                })
+                errors.append(
+                    f"Word '{word.headword}' at index {idx}: "
+                    f"invalid pos='{word.pos}' (valid: {', '.join(sorted(_VALID_POS_VALUES))})"
                 )
-        
-        # Validate example sentences
-        if word.examples:
+
+            # Check for duplicate headwords
+            seen = headwords_seen.get(word.headword, 0) + 1
+            headwords_seen[word.headword] = seen
+            if seen > 1:
+                warnings.append(f"Word '{word.headword}' appears {seen} times in import file")
+
+            # Check for duplicate IDs
+            if word.id:
+                seen = ids_seen.get(word.id, 0) + 1
+                ids_seen[word.id] = seen
+                if seen > 1:
+                    warnings.append(f"ID '{word.id}' is duplicated in import file")
+
+            # Check for near-duplicate headwords (case variants, one-letter typos)
+            key = normalize_term(word.headword)
+            first = near_seen.get(key)
+            if first is None:
+                similar = None
+                if near_duplicate_distance(key):
+                    match = near_index.add_and_match(key)
+                    similar = near_seen[match] if match is not None else None
+                near_seen[key] = word.headword
+            else:
+                similar = first if first != word.headword else None
+            if similar is not None and word.headword not in near_duplicates:
+                near_duplicates[word.headword] = similar
+                warnings.append(f"Word '{word.headword}' looks like a near-duplicate of '{similar}' in import file")
+
+            # Validate example sentences
             for ex_idx, example in enumerate(word.examples):
                 if not example.en:
-                    errors.append(
-                        f"Word '{word.headword}' example {ex_idx}: missing en (English)"
-                    )
-    
-    # Summary details
-    details["total_words"] = len(words)
-    details["invalid_pos_count"] = len(invalid_pos_words)
-    details["duplicate_headwords"] = {hw: count for hw, count in headwords_seen.items() if count > 1}
-    details["duplicate_ids"] = {id: count for id, count in ids_seen.items() if count > 1}
-    
-    if invalid_pos_words:
-        details["invalid_pos_examples"] = invalid_pos_words[:3]  # First 3 examples
-    
+                    errors.append(f"Word '{word.headword}' example {ex_idx}: missing en (English)")
+
+        if plan is not None and not errors:
+            plan.add_word(_normalize_word(word, now))
+
+    if plan is not None and not errors:
+        for idx, m in enumerate(app.memory):
+            if idx % _PROGRESS_EVERY == 0:
+                _report(len(words) + idx)
+            plan.add_memory(_normalize_memory(m))
+
+    _report(len(words) if plan is None else len(words) + len(app.memory))
+
+    if not words:
+        warnings.append("No words to import")
+    else:
+        # Summary details
+        details["total_words"] = len(words)
+        details["invalid_pos_count"] = len(invalid_pos_words)
+        details["duplicate_headwords"] = {hw: count for hw, count in headwords_seen.items() if count > 1}
+        details["duplicate_ids"] = {id: count for id, count in ids_seen.items() if count > 1}
+        details["near_duplicate_headwords"] = near_duplicates
+
+        if invalid_pos_words:
+            details["invalid_pos_examples"] = invalid_pos_words[:3]  # First 3 examples
+
     return {
         "valid": len(errors) == 0,
         "errors": errors,
         "warnings": warnings,
         "details": details
     }
-def _normalize_app_data_for_import(app_data: AppDataForImport) -> AppData:
-    """Convert AppDataForImport to AppData, generating missing IDs and timestamps"""
-    now = storage.now_iso()
 
-    # Normalize words
-    normalized_words: List[WordEntry] = []
-    for w in app_data.words:
-        # Generate ID if missing
-        word_id = w.id or str(uuid4())
-
-        # Generate timestamps if missing
-        created_at = w.createdAt or now
-        updated_at = w.updatedAt or now
-
-        # Normalize examples
-        normalized_examples: List[ExampleSentence] = []
-        for ex in w.examples:
-            example_id = ex.id or str(uuid4())
-            normalized_examples.append(ExampleSentence(
-                id=example_id,
-                en=ex.en,
-                ja=ex.ja,
-                source=ex.source
-            ))
 
-        normalized_words.append(WordEntry(
-            id=word_id,
-            headword=w.headword,
-            pronunciation=w.pronunciation,
-            pos=w.pos,
-            meaningJa=w.meaningJa,
-            examples=normalized_examples,
-            tags=w.tags,
-            memo=w.memo,
-            createdAt=created_at,
-            updatedAt=updated_at
-        ))
+def validate_import_data(app_data: AppDataForImport, progress: Optional[ImportProgress] = None) -> Dict[str, Any]:
+    """
+    Validate import data and collect warnings/errors.
+    Returns a dict with 'valid', 'errors', 'warnings', and 'details'.
+    """
+    return _import_pass(app_data, None, validate=True, progress=progress)
 
-    # Convert memory states (MemoryStateForImport -> MemoryState)
-    normalized_memory: List[MemoryState] = []
-    for m in app_data.memory:
-        normalized_memory.append(MemoryState(
-            wordId=m.wordId,
-            dueAt=m.dueAt,
-            lastRating=m.lastRating,
-            lastReviewedAt=m.lastReviewedAt,
-            memoryLevel=m.memoryLevel,
-            ease=m.ease,
-            intervalDays=m.intervalDays,
-            reviewCount=m.reviewCount,
-            lapseCount=m.lapseCount
-        ))
 
-    return AppData(
-        schemaVersion=app_data.schemaVersion,
-        exportedAt=app_data.exportedAt or now,
-        words=normalized_words,
-        memory=normalized_memory
-    )
+def validate_and_import(
+    userId: str,
+    app: AppDataForImport,
+    mode: str,
+    progress: Optional[ImportProgress] = None,
+) -> tuple[Dict[str, Any], Optional[Dict[str, int]]]:
+    """
+    Validate, normalize and merge an upload in one pass (mode: overwrite | merge).
+
+    Returns (validation_result, merge_counts). Nothing is written and merge_counts
+    is None when validation fails. ``progress`` receives ("validated"/"merged",
+    records_done) and may raise to abort before the vault is written.
+    """
+    logger.debug("validate_and_import: userId=%s, mode=%s, words=%d, memory=%d", userId, mode, len(app.words), len(app.memory))
+    plan = _ImportPlan.for_user(userId, mode)
+    validation = _import_pass(app, plan, validate=True, progress=progress)
+    if not validation["valid"]:
+        return validation, None
+    return validation, plan.commit(userId)
 
 
 def export_appdata(userId: str) -> AppData:
@@ -459,89 +675,24 @@ def export_appdata(userId: str) -> AppData:
     mf = load_memory(userId)
     return AppData(exportedAt=storage.now_iso(), words=wf.words, memory=mf.memory)
 
-def import_appdata(userId: str, app: AppData | AppDataForImport, mode: str) -> None:
-    """Import application data, supporting both full export format and manually-created files"""
-    import logging
-    logger = logging.getLogger("app.service.import")
-    
-    logger.debug(f"import_appdata: userId={userId}, mode={mode}, app={app}")
-    
-    # Normalize AppDataForImport to AppData
-    if isinstance(app, AppDataForImport):
-        logger.debug(f"Normalizing AppDataForImport with {len(app.words)} words")
-        app = _normalize_app_data_for_import(app)
-        logger.debug(f"After normalization: {len(app.words)} words")
-
-    # mode: overwrite | merge
-    if mode == "overwrite":
-        logger.info(f"Overwrite mode: saving {len(app.words)} words and {len(app.memory)} memory states")
-        save_words(userId, WordsFile(updatedAt=storage.now_iso(), words=app.words))
-        save_memory(userId, MemoryFile(updatedAt=storage.now_iso(), memory=app.memory))
-        logger.info("Overwrite completed successfully")
-        return
+def import_appdata(
+    userId: str,
+    app: AppData | AppDataForImport,
+    mode: str,
+    progress: Optional[ImportProgress] = None,
+) -> Dict[str, int]:
+    """
+    Import application data without validation, supporting both full export
+    format and manually-created files.
 
-    # merge: idベースで更新（updatedAtが新しい方を採用）
-    import logging
-    logger = logging.getLogger("app.service.import")
-    
-    logger.debug(f"Merge mode: starting with imported {len(app.words)} words and {len(app.memory)} memory states")
-    wf = load_words(userId)
-    mf = load_memory(userId)
-    logger.debug(f"Existing data: {len(wf.words)} words and {len(mf.memory)} memory states")
-
-    existing_words = {w.id: w for w in wf.words}
-    added_words = 0
-    updated_words = 0
-    for w in app.words:
-        cur = existing_words.get(w.id)
-        if not cur:
-            logger.debug(f"Adding new word: {w.id}")
-            existing_words[w.id] = w
-            added_words += 1
-        else:
-            # updatedAt 比較（無い場合は上書き）
-            try:
-                if _parse_iso(w.updatedAt) >= _parse_iso(cur.updatedAt):
-                    logger.debug(f"Updating word {w.id} (new timestamp >= old timestamp)")
-                    existing_words[w.id] = w
-                    updated_words += 1
-                else:
-                    logger.debug(f"Skipping word {w.id} (existing is newer)")
-            except Exception as e:
-                logger.debug(f"Error comparing timestamps for {w.id}: {e}, updating anyway")
-                existing_words[w.id] = w
-                updated_words += 1
-
-    existing_mem = {m.wordId: m for m in mf.memory}
-    added_mem = 0
-    updated_mem = 0
-    for m in app.memory:
-        cur_mem = existing_mem.get(m.wordId)
-        if not cur_mem:
-            logger.debug(f"Adding new memory state: {m.wordId}")
-            existing_mem[m.wordId] = m
-            added_mem += 1
-        else:
-            # dueAtが新しい方を採用（簡易）
-            try:
-                if _parse_iso(m.dueAt) >= _parse_iso(cur_mem.dueAt):
-                    logger.debug(f"Updating memory state {m.wordId} (new due date >= old due date)")
-                    existing_mem[m.wordId] = m
-                    updated_mem += 1
-                else:
-                    logger.debug(f"Skipping memory state {m.wordId} (existing is newer)")
-            except Exception as e:
-                logger.debug(f"Error comparing due dates for {m.wordId}: {e}, updating anyway")
-                existing_mem[m.wordId] = m
-                updated_mem += 1
-
-    logger.info(f"Merge results: added {added_words} words, updated {updated_words} words, added {added_mem} memory states, updated {updated_mem} memory states")
-    
-    wf.words = list(existing_words.values())
-    mf.memory = list(existing_mem.values())
-    logger.debug(f"Saving {len(wf.words)} words and {len(mf.memory)} memory states")
-    save_words(userId, wf)
-    save_memory(userId, mf)
+    Returns merge counts (added/updated words and memory states). ``progress`` is
+    called periodically with the number of merged records; it is always invoked
+    before anything is written, so raising from it leaves the vault untouched.
+    """
+    logger.debug("import_appdata: userId=%s, mode=%s, words=%d, memory=%d", userId, mode, len(app.words), len(app.memory))
+    plan = _ImportPlan.for_user(userId, mode)
+    _import_pass(app, plan, validate=False, progress=progress)
+    return plan.commit(userId)
 
 
 def reset_memory(userId: str, wordId: str) -> None:
@@ -8,6 +8,8 @@ from pydantic import Field, field_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 CookieSameSite = Literal["lax", "strict", "none"]
+TokenStoreBackend = Literal["json", "sqlite"]
+ProfileMode = Literal["cprofile", "stack"]
 
 
 class Settings(BaseSettings):
@@ -38,6 +40,62 @@ class Settings(BaseSettings):
 
     session_ttl_seconds: int = 60 * 60 * 24
     password_pepper: str = ""
+    # argon2 runs in a process pool; more than max_pending queued jobs -> 429
+    password_hash_workers: int = 2
+    password_hash_max_pending: int = 32
+    # Startup calibration: smallest time_cost whose hash takes this long, never below
+    # argon2's default time_cost. Off (0) by default: the result varies between
+    # machines and restarts, and every change makes needs_rehash rewrite the stored
+    # hashes on the next logins. Enable only on a fixed host.
+    password_hash_target_ms: int = 0
+    password_hash_min_time_cost: int = 3
+    principal_cache_tokens: int = 10000  # verified access tokens cached until their exp
+
+    # http_request log sampling: errors and slow requests are always logged; fast
+    # successes beyond the per-second budget are logged at the sample rate
+    http_log_budget_per_second: int = 50
+    http_log_sample_rate: float = 0.05
+    http_log_slow_ms: int = 1000
+    # /api/logs/client token bucket per caller (entries): per userId when the batch
+    # carries a valid access token, otherwise per client address
+    client_log_rate_per_second: float = 5
+    client_log_burst: int = 100
+    # /api/logs/client ingestion bounds: request size while streaming, entries per
+    # batch, and entries buffered for the client.log writer (429 beyond it)
+    client_log_max_bytes: int = 256 * 1024
+    client_log_max_entries: int = 500
+    client_log_buffer_entries: int = 10000
+    # Reverse proxies (IPs or CIDR networks, comma-separated; "*" trusts any peer)
+    # whose X-Forwarded-For names the client address. Requests from other peers
+    # use the peer address.
+    trusted_proxies: str = "127.0.0.1"
+
+    # GET /metrics (Prometheus text format)
+    metrics_enabled: bool = True
+    # Add a Server-Timing header (lock/read/parse/encode/write/validate/handler/render)
+    # to every response; the same breakdown is always on the http_request log line
+    server_timing_enabled: bool = False
+
+    # On-demand request profiling (data/logs/profiles/). X-Profile needs X-Profile-Token
+    # equal to profile_token (empty disables the header); the sample rate can also be
+    # changed at runtime through /api/admin/profiling
+    profile_token: str = ""
+    profile_sample_rate: float = 0.0
+    profile_mode: ProfileMode = "stack"
+    profile_stack_interval_ms: float = 5
+    profile_max_concurrent: int = 2
+    profile_max_files: int = 200
+    profile_max_total_mb: int = 100
+
+    # Event loop lag monitor: measure every interval; when the loop is unresponsive
+    # longer than the threshold, log the blocking stack (0 disables the monitor)
+    loop_monitor_interval_ms: int = 100
+    loop_stall_threshold_ms: int = 500
+
+    # Per-user usage counters (app.usage): aggregated in memory, flushed to
+    # data/usage/<day>.json every interval (0: only at shutdown), kept this many days
+    usage_flush_interval_seconds: float = 60
+    usage_retention_days: int = 90
 
     # JWT settings
     jwt_secret_key: str = Field(default="development-secret-key-change-in-production")
@@ -47,6 +105,30 @@ class Settings(BaseSettings):
     # Refresh token settings
     refresh_token_salt: str = Field(default="development-refresh-salt-change-in-production")
     refresh_token_ttl_days: int = 30
+    # A replaced refresh token presented again within this many seconds of its
+    # rotation gets a sibling token instead of revoking the family (0 disables)
+    refresh_reuse_grace_seconds: int = 0
+    # "json": refresh_store.json + append log; "sqlite": refresh_store.sqlite3
+    # (migrate existing tokens once with scripts/migrate_refresh_store.py)
+    token_store_backend: TokenStoreBackend = "json"
+    refresh_store_snapshot_every: int = 500  # append-log entries between refresh store snapshots
+    # Background removal of expired tokens and tokens revoked longer than the retention
+    refresh_store_compaction_interval_seconds: float = 300
+    refresh_store_compaction_batch_size: int = 200
+    refresh_revoked_retention_days: int = 7
+
+    # Background import jobs (POST /io/import?async=true)
+    import_job_workers: int = 2
+    import_job_retention_seconds: int = 60 * 60
+
+    # Example test (/api/examples/next)
+    example_history_size: int = 5  # recently shown examples skipped per user
+    example_pool_cache_size: int = 256  # cached (user, tag filter) pools
+    example_history_users: int = 1024  # users whose recent-example history stays in memory
+
+    # In-memory word indexes (example search, headword lookup)
+    word_index_cache_users: int = 64  # users whose indexes stay cached, per index type
+    near_duplicate_limit: int = 5  # near-duplicate headwords reported on word create
 
 
 settings = Settings()
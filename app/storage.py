@@ -3,20 +3,50 @@ from __future__ import annotations
 import asyncio
 import json
 import os
+import time
 from pathlib import Path
-from typing import Any, Dict
+from typing import Any, Dict, Optional, Tuple
 from datetime import datetime, timezone
+from . import metrics, timing, usage
 from .settings import settings
 
 UTC = timezone.utc
 
+class _TimedLock(asyncio.Lock):
+    """
+    asyncio.Lock that records acquisition wait in the user_lock_wait histogram
+    and charges the hold time to the holder's usage (lock_hold_seconds)
+    """
+
+    _acquired_at = 0.0
+
+    async def acquire(self) -> bool:
+        start = time.perf_counter()
+        result = await super().acquire()
+        self._acquired_at = time.perf_counter()
+        waited = self._acquired_at - start
+        metrics.user_lock_wait.observe(waited)
+        timing.add("lock", waited)
+        return result
+
+    def release(self) -> None:
+        usage.add("lock_hold_seconds", time.perf_counter() - self._acquired_at)
+        super().release()
+
 _user_locks: dict[str, asyncio.Lock] = {}
 
 def user_lock(userId: str) -> asyncio.Lock:
     if userId not in _user_locks:
-        _user_locks[userId] = asyncio.Lock()
+        _user_locks[userId] = _TimedLock()
     return _user_locks[userId]
 
+def user_lock_stats() -> Dict[str, int]:
+    return {"entries": len(_user_locks)}
+
+def memory_roots() -> list:
+    """Copies of the per-user lock table for memory diagnostics"""
+    return [dict(_user_locks)]
+
 def now_iso() -> str:
     return datetime.now(UTC).isoformat()
 
@@ -27,22 +57,55 @@ def ensure_dirs() -> None:
 def users_file_path() -> Path:
     return settings.data_dir / "users" / "users.json"
 
+def vault_dir() -> Path:
+    return settings.data_dir / "vault"
+
 def user_dir(userId: str) -> Path:
     # usernameは使わず userId だけでパス決定（パストラバーサル防止）
-    return settings.data_dir / "vault" / f"u_{userId}"
+    return vault_dir() / f"u_{userId}"
+
+def file_revision(path: Path) -> Optional[Tuple[int, int, int]]:
+    """
+    Cheap change token for a file: (inode, mtime_ns, size), or None if missing.
+    atomic_write_json replaces the file, so every write yields a new token. Used to
+    invalidate in-memory caches derived from vault files without re-reading them.
+    """
+    try:
+        st = path.stat()
+    except FileNotFoundError:
+        return None
+    return (st.st_ino, st.st_mtime_ns, st.st_size)
 
 def read_json(path: Path) -> Dict[str, Any]:
     if not path.exists():
         return {}
-    result: Dict[str, Any] = json.loads(path.read_text(encoding="utf-8"))
+    start = time.perf_counter()
+    raw = path.read_bytes()
+    read_done = time.perf_counter()
+    metrics.json_reads_total.inc()
+    metrics.json_read_bytes_total.inc(len(raw))
+    usage.add("bytes_read", len(raw))
+    result: Dict[str, Any] = json.loads(raw.decode("utf-8"))
+    timing.add("read", read_done - start)
+    timing.add("parse", time.perf_counter() - read_done)
     return result
 
 def atomic_write_json(path: Path, data: Dict[str, Any]) -> None:
     path.parent.mkdir(parents=True, exist_ok=True)
     tmp = path.with_suffix(path.suffix + ".tmp")
-    payload = json.dumps(data, ensure_ascii=False, indent=2)
-    with open(tmp, "w", encoding="utf-8") as f:
+    start = time.perf_counter()
+    payload = json.dumps(data, ensure_ascii=False, indent=2).encode("utf-8")
+    encoded = time.perf_counter()
+    with open(tmp, "wb") as f:
         f.write(payload)
         f.flush()
+        fsync_start = time.perf_counter()
         os.fsync(f.fileno())
+        metrics.fsync_duration.observe(time.perf_counter() - fsync_start)
     os.replace(tmp, path)
+    timing.add("encode", encoded - start)
+    timing.add("write", time.perf_counter() - encoded)
+    metrics.json_writes_total.inc()
+    metrics.json_write_bytes_total.inc(len(payload))
+    usage.add("bytes_written", len(payload))
+    usage.add("fsyncs", 1)
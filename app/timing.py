@@ -0,0 +1,198 @@
+# app/timing.py
+"""
+Per-request phase timing.
+
+RequestLoggingMiddleware opens a RequestTimings for each request in a context
+variable; instrumented code adds the time it spent to a named phase while that
+request is current (asyncio.to_thread and the threadpool copy the context, so
+work done in threads is attributed too). Outside a request the calls are no-ops.
+
+Phases:
+    lock      waiting for storage.user_lock
+    read      reading vault/user files (storage.read_json)
+    parse     json.loads in storage.read_json
+    encode    json.dumps in storage.atomic_write_json
+    write     write + fsync + replace in storage.atomic_write_json
+    validate  route start -> endpoint call: body parsing, dependencies, pydantic validation
+    handler   the endpoint function itself
+    render    endpoint return -> Response: response_model validation and serialization
+
+Phases may overlap (a handler's reads are also part of ``handler``).
+"""
+from __future__ import annotations
+
+import asyncio
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from fastapi.routing import APIRoute
+from starlette.requests import Request
+from starlette.responses import Response
+
+from app import usage
+
+
+class RequestTimings:
+    """Seconds spent per phase for one request"""
+
+    __slots__ = ("request_id", "started", "phases", "handler_started", "handler_ended")
+
+    def __init__(self, request_id: Optional[str] = None) -> None:
+        self.request_id = request_id
+        self.started = time.perf_counter()
+        self.phases: Dict[str, float] = {}
+        self.handler_started: Optional[float] = None
+        self.handler_ended: Optional[float] = None
+
+    def add(self, phase: str, seconds: float) -> None:
+        self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+
+    def as_ms(self) -> Dict[str, float]:
+        """Phase -> milliseconds (for the http_request log line)"""
+        return {phase: round(seconds * 1000, 2) for phase, seconds in self.phases.items()}
+
+    def server_timing(self) -> str:
+        """Server-Timing header value, including the elapsed total so far"""
+        parts = [f"{phase};dur={seconds * 1000:.2f}" for phase, seconds in self.phases.items()]
+        parts.append(f"total;dur={(time.perf_counter() - self.started) * 1000:.2f}")
+        return ", ".join(parts)
+
+
+_current: ContextVar[Optional[RequestTimings]] = ContextVar("request_timings", default=None)
+
+
+# Task serving each in-flight request, so other threads (the loop watchdog) can
+# find the request a task belongs to; contextvars are not readable across threads
+_by_task: Dict[Any, RequestTimings] = {}
+
+
+def begin(request_id: Optional[str] = None) -> tuple[RequestTimings, Token]:
+    """Make a new RequestTimings current (the middleware resets it with the token)"""
+    timings = RequestTimings(request_id)
+    try:
+        _by_task[asyncio.current_task()] = timings
+    except RuntimeError:
+        pass
+    return timings, _current.set(timings)
+
+
+def end(token: Token) -> None:
+    timings = _current.get()
+    _current.reset(token)
+    try:
+        task = asyncio.current_task()
+    except RuntimeError:
+        return
+    if _by_task.get(task) is timings:
+        # Restore an outer request's timings on the same task, if any
+        outer = _current.get()
+        if outer is not None:
+            _by_task[task] = outer
+        else:
+            del _by_task[task]
+
+
+def current() -> Optional[RequestTimings]:
+    return _current.get()
+
+
+def request_id_of(task: Optional[asyncio.Task]) -> Optional[str]:
+    """Request id of the request ``task`` is serving (readable from another thread)"""
+    timings = _by_task.get(task) if task is not None else None
+    return timings.request_id if timings is not None else None
+
+
+def stats() -> Dict[str, int]:
+    return {"in_flight": len(_by_task)}
+
+
+def memory_roots() -> List[Any]:
+    """Copy of the in-flight request table for memory diagnostics"""
+    return [dict(_by_task)]
+
+
+def add(phase: str, seconds: float) -> None:
+    """Attribute ``seconds`` to ``phase`` of the current request, if any"""
+    timings = _current.get()
+    if timings is not None:
+        timings.add(phase, seconds)
+
+
+@contextmanager
+def span(phase: str) -> Iterator[None]:
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        add(phase, time.perf_counter() - start)
+
+
+class TimedRoute(APIRoute):
+    """
+    APIRoute that splits the route's time into validate / handler / render.
+
+    The endpoint is wrapped after FastAPI has analysed its signature, so
+    dependency injection and OpenAPI still see the original function.
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.dependant.call = _timed_endpoint(self.dependant.call)
+
+    def get_route_handler(self) -> Callable[[Request], Any]:
+        handler = super().get_route_handler()
+
+        async def timed_handler(request: Request) -> Response:
+            timings = _current.get()
+            if timings is None:
+                return await handler(request)
+            start = time.perf_counter()
+            timings.handler_started = timings.handler_ended = None
+            try:
+                return await handler(request)
+            finally:
+                finished = time.perf_counter()
+                if timings.handler_started is not None:
+                    timings.add("validate", timings.handler_started - start)
+                if timings.handler_ended is not None:
+                    timings.add("render", finished - timings.handler_ended)
+
+        return timed_handler
+
+
+def _timed_endpoint(call: Any) -> Any:
+    # Keep sync endpoints sync: FastAPI decided at build time to run them in the threadpool
+    if asyncio.iscoroutinefunction(call):
+        async def timed_async(**values: Any) -> Any:
+            timings = _current.get()
+            if timings is None:
+                return await call(**values)
+            timings.handler_started = time.perf_counter()
+            try:
+                return await call(**values)
+            finally:
+                timings.handler_ended = time.perf_counter()
+                timings.add("handler", timings.handler_ended - timings.handler_started)
+
+        return timed_async
+
+    def timed_sync(**values: Any) -> Any:
+        # Runs in a threadpool thread, outside the request coroutine's metered steps
+        with usage.cpu_span():
+            return _timed_sync_call(call, values)
+
+    return timed_sync
+
+
+def _timed_sync_call(call: Any, values: Dict[str, Any]) -> Any:
+    timings = _current.get()
+    if timings is None:
+        return call(**values)
+    timings.handler_started = time.perf_counter()
+    try:
+        return call(**values)
+    finally:
+        timings.handler_ended = time.perf_counter()
+        timings.add("handler", timings.handler_ended - timings.handler_started)
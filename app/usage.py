@@ -0,0 +1,290 @@
+# app/usage.py
+"""
+Per-user resource accounting (for quotas).
+
+UsageMiddleware opens a RequestUsage for each request in a context variable,
+require_auth names the user it belongs to, and instrumented code adds to it
+while it is current (like app.timing, work pushed to threads with
+asyncio.to_thread is attributed too). Import jobs open their own RequestUsage
+for the job's user. When a request ends its counters are added to the
+in-memory aggregate; a background task flushes the aggregate every
+``flush_interval`` seconds into ``data/usage/<YYYY-MM-DD>.json`` (one file per
+UTC day, user -> counters), and files older than ``retention_days`` are removed.
+
+Counters:
+    requests           authenticated requests (and import jobs)
+    cpu_seconds        thread CPU time of the request's own code: each step of its
+                       coroutine on the event loop (other requests interleaved
+                       between steps are not charged) and sync endpoints in the
+                       threadpool; import jobs count their worker thread
+    bytes_read         storage.read_json
+    bytes_written      storage.atomic_write_json
+    fsyncs             storage.atomic_write_json
+    lock_hold_seconds  time storage.user_lock was held
+    payload_in_bytes   request body bytes   (/api/vocab and /api/io only)
+    payload_out_bytes  response body bytes  (/api/vocab and /api/io only)
+
+Requests that never authenticate are not counted.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Coroutine, Dict, Generator, Iterator, List, Literal, Optional, Tuple, get_args
+
+from . import settings as settings_module
+
+logger = logging.getLogger(__name__)
+
+UsageCounter = Literal[
+    "requests",
+    "cpu_seconds",
+    "bytes_read",
+    "bytes_written",
+    "fsyncs",
+    "lock_hold_seconds",
+    "payload_in_bytes",
+    "payload_out_bytes",
+]
+COUNTERS: Tuple[str, ...] = get_args(UsageCounter)
+
+# Counters kept as float seconds (rounded in files and reports)
+_SECONDS = ("cpu_seconds", "lock_hold_seconds")
+
+
+class RequestUsage:
+    """Resources used by one request or job"""
+
+    __slots__ = ("user_id", "counters")
+
+    def __init__(self, user_id: Optional[str] = None) -> None:
+        self.user_id = user_id
+        self.counters: Dict[str, float] = {}
+
+    def add(self, name: str, amount: float) -> None:
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+
+_current: ContextVar[Optional[RequestUsage]] = ContextVar("request_usage", default=None)
+
+
+def begin(user_id: Optional[str] = None) -> Tuple[RequestUsage, Token]:
+    usage = RequestUsage(user_id)
+    return usage, _current.set(usage)
+
+
+def end(token: Token) -> None:
+    _current.reset(token)
+
+
+def current() -> Optional[RequestUsage]:
+    return _current.get()
+
+
+def set_user(user_id: str) -> None:
+    """Attribute the current request to ``user_id`` (called once authenticated)"""
+    usage = _current.get()
+    if usage is not None:
+        usage.user_id = user_id
+
+
+def add(name: str, amount: float) -> None:
+    """Add to a counter of the current request, if any"""
+    usage = _current.get()
+    if usage is not None:
+        usage.add(name, amount)
+
+
+@contextmanager
+def cpu_span() -> Iterator[None]:
+    """Charge the calling thread's CPU time inside the block to the current request"""
+    start = time.thread_time()
+    try:
+        yield
+    finally:
+        add("cpu_seconds", time.thread_time() - start)
+
+
+class CpuMetered:
+    """
+    Awaitable that runs ``coro`` and charges the thread CPU time of each of its
+    steps (one resumption up to its next suspension) to ``usage``.
+
+    Time the loop spends on other tasks while ``coro`` is suspended is not counted.
+    """
+
+    __slots__ = ("_coro", "_usage")
+
+    def __init__(self, coro: Coroutine[Any, Any, Any], usage: RequestUsage) -> None:
+        self._coro = coro
+        self._usage = usage
+
+    def __await__(self) -> Generator[Any, Any, Any]:
+        coro = self._coro
+        step, arg = coro.send, None
+        while True:
+            start = time.thread_time()
+            try:
+                yielded = step(arg)
+            except StopIteration as stop:
+                return stop.value
+            finally:
+                self._usage.add("cpu_seconds", time.thread_time() - start)
+            try:
+                arg = yield yielded
+                step = coro.send
+            except GeneratorExit:
+                coro.close()
+                raise
+            except BaseException as exc:  # cancellation, thrown into the coroutine
+                step, arg = coro.throw, exc
+
+
+def utc_day() -> str:
+    """Current UTC day (YYYY-MM-DD), the unit usage is aggregated by"""
+    return datetime.now(timezone.utc).strftime("%Y-%m-%d")
+
+
+def _rounded(counters: Dict[str, float]) -> Dict[str, float]:
+    return {k: round(v, 6) if k in _SECONDS else int(v) for k, v in counters.items()}
+
+
+class UsageAccounting:
+    """In-memory per-user aggregate, flushed to one JSON file per day"""
+
+    def __init__(self, flush_interval: Optional[float] = None, retention_days: Optional[int] = None) -> None:
+        s = settings_module.settings
+        self.flush_interval = s.usage_flush_interval_seconds if flush_interval is None else flush_interval
+        self.retention_days = s.usage_retention_days if retention_days is None else retention_days
+        # (day, user_id) -> counters not yet written
+        self._pending: Dict[Tuple[str, str], Dict[str, float]] = {}
+        # Batch being written right now (still included in reports)
+        self._flushing: Dict[Tuple[str, str], Dict[str, float]] = {}
+        # Serializes the read-modify-write of the day files (flushes run in threads)
+        self._write_lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self.flushes = 0
+        self.flush_failures = 0
+
+    def usage_dir(self) -> Path:
+        return settings_module.settings.data_dir / "usage"
+
+    def record(self, usage: RequestUsage) -> None:
+        """Add a finished request's counters to its user's aggregate"""
+        if usage.user_id is None:
+            return
+        totals = self._pending.setdefault((utc_day(), usage.user_id), {})
+        totals["requests"] = totals.get("requests", 0) + 1
+        for name, amount in usage.counters.items():
+            totals[name] = totals.get(name, 0) + amount
+
+    # ---------- background flush ----------
+    async def start(self) -> None:
+        if self._task is None and self.flush_interval > 0:
+            self._task = asyncio.create_task(self._run(), name="usage-flusher")
+
+    async def stop(self) -> None:
+        """Cancel the flush task and write what is still pending"""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await self.flush()
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    async def flush(self) -> None:
+        pending, self._pending = self._pending, {}
+        if not pending:
+            return
+        self._flushing = pending
+        try:
+            await asyncio.to_thread(self._write, pending)
+            self.flushes += 1
+        except Exception:
+            # Put the counters back so the next flush retries them
+            self.flush_failures += 1
+            for key, counters in pending.items():
+                totals = self._pending.setdefault(key, {})
+                for name, amount in counters.items():
+                    totals[name] = totals.get(name, 0) + amount
+            logger.exception("usage_flush_failed")
+        finally:
+            self._flushing = {}
+
+    def _write(self, pending: Dict[Tuple[str, str], Dict[str, float]]) -> None:
+        by_day: Dict[str, Dict[str, Dict[str, float]]] = {}
+        for (day, user_id), counters in pending.items():
+            by_day.setdefault(day, {})[user_id] = counters
+        directory = self.usage_dir()
+        with self._write_lock:
+            self._write_days(directory, by_day)
+            self._prune(directory)
+
+    @staticmethod
+    def _write_days(directory: Path, by_day: Dict[str, Dict[str, Dict[str, float]]]) -> None:
+        from . import storage
+
+        for day, users in by_day.items():
+            path = directory / f"{day}.json"
+            data = storage.read_json(path)
+            stored = data.setdefault("users", {})
+            for user_id, counters in users.items():
+                totals = stored.setdefault(user_id, {})
+                for name, amount in counters.items():
+                    totals[name] = totals.get(name, 0) + amount
+                stored[user_id] = _rounded(totals)
+            data["day"] = day
+            data["updatedAt"] = storage.now_iso()
+            storage.atomic_write_json(path, data)
+
+    def _prune(self, directory: Path) -> None:
+        cutoff = (datetime.now(timezone.utc) - timedelta(days=self.retention_days)).strftime("%Y-%m-%d")
+        for path in directory.glob("*.json"):
+            if path.stem < cutoff:
+                path.unlink(missing_ok=True)
+
+    # ---------- reports ----------
+    async def day_totals(self, day: Optional[str] = None) -> Dict[str, Dict[str, float]]:
+        """user_id -> counters for one UTC day, including what is not flushed yet"""
+        from . import storage
+
+        day = day or utc_day()
+        data = await asyncio.to_thread(storage.read_json, self.usage_dir() / f"{day}.json")
+        users: Dict[str, Dict[str, float]] = {u: dict(c) for u, c in data.get("users", {}).items()}
+        unwritten = list(self._flushing.items()) + list(self._pending.items())
+        for (pending_day, user_id), counters in unwritten:
+            if pending_day != day:
+                continue
+            totals = users.setdefault(user_id, {})
+            for name, amount in counters.items():
+                totals[name] = totals.get(name, 0) + amount
+        return users
+
+    async def top(self, metric: str, limit: int = 10, day: Optional[str] = None) -> List[Dict[str, Any]]:
+        """The ``limit`` users with the highest ``metric`` on ``day`` (default today)"""
+        users = await self.day_totals(day)
+        ranked = sorted(users.items(), key=lambda item: item[1].get(metric, 0), reverse=True)
+        return [
+            {"userId": user_id, **{name: 0 for name in COUNTERS}, **_rounded(counters)}
+            for user_id, counters in ranked[:limit]
+        ]
+
+    def stats(self) -> Dict[str, Any]:
+        return {"pending_users": len(self._pending), "flushes": self.flushes, "flush_failures": self.flush_failures}
+
+    def memory_roots(self) -> List[Any]:
+        """Copies of the unflushed counters for memory diagnostics"""
+        return [dict(self._pending), dict(self._flushing)]
+
+
+usage_accounting = UsageAccounting()
@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+Deterministic synthetic data for the endpoint benchmarks.
+
+The same seed and size always give the same vault: headwords, meanings,
+examples, tags and memory states, plus a refresh token store with many
+sessions. Timestamps are offsets from ``now`` (so the share of due cards is
+the same on every run) and ids come from the seeded generator.
+
+Headwords are pronounceable pseudo-words assembled from random syllables.
+``word0 .. wordN`` is avoided on purpose: every pair of those is a single edit
+apart and they all share one prefix, which is the worst case for the SymSpell
+index and prefix completion and says nothing about real vaults.
+
+Usage (write a vault for manual profiling):
+    python scripts/bench_data.py /path/data USER_ID 10000 [seed]
+"""
+from __future__ import annotations
+
+import hashlib
+import random
+import sys
+import uuid
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+_ONSETS = ["", "b", "br", "c", "ch", "cl", "d", "dr", "f", "fl", "g", "gr", "h", "j", "k", "l", "m", "n", "p",
+           "pl", "pr", "qu", "r", "s", "sh", "sl", "st", "str", "t", "th", "tr", "v", "w", "y", "z"]
+_VOWELS = ["a", "e", "i", "o", "u", "ai", "ea", "ee", "io", "oo", "ou", "y"]
+_CODAS = ["", "", "", "b", "ck", "d", "ft", "g", "l", "ll", "m", "n", "nd", "ng", "nt", "p", "r", "rd", "s",
+          "sh", "st", "t", "th", "x"]
+_KANA = "あいうえおかきくけこさしすせそたちつてとなにぬねのはひふへほまみむめもやゆよらりるれろわん"
+_POS = ["noun"] * 5 + ["verb"] * 3 + ["adj"] * 2 + ["adv", "prep", "conj", "pron", "det", "interj", "other"]
+_RATINGS = ["again", "hard", "good", "easy"]
+_SOURCES = [None, None, "book", "web", "news"]
+
+VAULT_SIZES = (100, 1_000, 10_000, 100_000)
+
+
+def _uuid(rng: random.Random) -> str:
+    return str(uuid.UUID(int=rng.getrandbits(128), version=4))
+
+
+def _iso(dt: datetime) -> str:
+    return dt.isoformat()
+
+
+def headwords(n: int, rng: random.Random) -> List[str]:
+    """``n`` distinct pseudo-words of 1-4 syllables"""
+    seen = set()
+    words: List[str] = []
+    while len(words) < n:
+        syllables = rng.choices((1, 2, 3, 4), weights=(2, 5, 3, 1))[0]
+        word = "".join(rng.choice(_ONSETS) + rng.choice(_VOWELS) + rng.choice(_CODAS) for _ in range(syllables))
+        if len(word) < 2 or word in seen:
+            continue
+        seen.add(word)
+        words.append(word)
+    return words
+
+
+def _kana(rng: random.Random, low: int, high: int) -> str:
+    return "".join(rng.choice(_KANA) for _ in range(rng.randint(low, high)))
+
+
+def _tag_pool(rng: random.Random, size: int = 60) -> List[str]:
+    return [f"{w}-{i}" for i, w in enumerate(headwords(size, rng))]
+
+
+def make_vault(n: int, seed: int = 0, now: Optional[datetime] = None) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """
+    words.json and memory.json contents (as WordsFile / MemoryFile dumps) for ``n`` words.
+
+    About 1.5 examples and 1.2 tags per word (tags skewed toward a few popular
+    ones), and a memory state for ~80% of the words with due dates spread from a
+    month ago to two months ahead.
+    """
+    rng = random.Random(f"vault:{n}:{seed}")
+    now = now or datetime.now(timezone.utc)
+    tags = _tag_pool(rng)
+    tag_weights = [1 / (i + 1) for i in range(len(tags))]
+    heads = headwords(n, rng)
+
+    words: List[Dict[str, Any]] = []
+    memory: List[Dict[str, Any]] = []
+    for headword in heads:
+        created = now - timedelta(days=rng.uniform(0, 720))
+        updated = created + timedelta(days=rng.uniform(0, (now - created).days or 1))
+        examples = []
+        for _ in range(rng.choices((0, 1, 2, 3), weights=(2, 4, 3, 1))[0]):
+            filler = " ".join(rng.sample(heads, 4)) if n >= 4 else headword
+            examples.append({
+                "id": _uuid(rng),
+                "en": f"The {headword} {filler}.",
+                "ja": _kana(rng, 8, 20) + "。" if rng.random() < 0.8 else None,
+                "source": rng.choice(_SOURCES),
+            })
+        word_id = _uuid(rng)
+        words.append({
+            "id": word_id,
+            "headword": headword,
+            "pronunciation": None,
+            "pos": rng.choice(_POS),
+            "meaningJa": _kana(rng, 2, 8),
+            "examples": examples,
+            "tags": sorted(set(rng.choices(tags, weights=tag_weights, k=rng.choices((0, 1, 2, 3), weights=(2, 4, 3, 1))[0]))),
+            "memo": _kana(rng, 5, 30) if rng.random() < 0.1 else None,
+            "createdAt": _iso(created),
+            "updatedAt": _iso(updated),
+        })
+        if rng.random() < 0.8:
+            reviews = rng.randint(0, 30)
+            reviewed = now - timedelta(days=rng.uniform(0, 60)) if reviews else None
+            memory.append({
+                "wordId": word_id,
+                "dueAt": _iso(now + timedelta(days=rng.uniform(-30, 60))),
+                "lastRating": rng.choice(_RATINGS) if reviews else None,
+                "lastReviewedAt": _iso(reviewed) if reviewed else None,
+                "memoryLevel": rng.randint(0, 5),
+                "ease": round(rng.uniform(1.3, 3.0), 2),
+                "intervalDays": rng.randint(0, 180),
+                "reviewCount": reviews,
+                "lapseCount": rng.randint(0, reviews // 3) if reviews else 0,
+            })
+
+    stamp = _iso(now)
+    return (
+        {"schemaVersion": 1, "updatedAt": stamp, "words": words},
+        {"schemaVersion": 1, "updatedAt": stamp, "memory": memory},
+    )
+
+
+def write_vault(user_id: str, words_file: Dict[str, Any], memory_file: Dict[str, Any]) -> int:
+    """
+    Write the vault files of ``user_id`` (words, memory, and the /vocab sync copy).
+
+    Returns:
+        Total bytes written
+    """
+    from app import storage
+
+    ud = storage.user_dir(user_id)
+    vocab = {
+        "schemaVersion": 1,
+        "words": words_file["words"],
+        "memory": memory_file["memory"],
+        "updatedAt": words_file["updatedAt"],
+    }
+    meta = {"serverRev": 1, "updatedAt": words_file["updatedAt"], "updatedByClientId": "bench-seed"}
+    written = 0
+    for name, data in (("words.json", words_file), ("memory.json", memory_file), ("vocab.json", vocab), ("vocab_meta.json", meta)):
+        storage.atomic_write_json(ud / name, data)
+        written += (ud / name).stat().st_size
+    return written
+
+
+def make_refresh_store(sessions: int, users: int = 1000, seed: int = 0, now: Optional[datetime] = None):
+    """
+    RefreshStore with ``sessions`` tokens spread over ``users`` users.
+
+    Families rotate 1-5 times (older generations replaced), ~10% of families are
+    revoked and ~10% of tokens are already expired, like a store that has been
+    running for a while between compactions.
+    """
+    from app.domain.models.tokens import RefreshStore, TokenRecord
+
+    rng = random.Random(f"tokens:{sessions}:{seed}")
+    now = now or datetime.now(timezone.utc)
+    user_ids = [_uuid(rng) for _ in range(max(1, users))]
+    store = RefreshStore(updated_at_utc=_iso(now))
+    while len(store.tokens) < sessions:
+        user_id = rng.choice(user_ids)
+        family_id = _uuid(rng)
+        revoked = rng.random() < 0.1
+        issued = now - timedelta(days=rng.uniform(0, 40))
+        prev_id: Optional[str] = None
+        generations = min(rng.randint(1, 5), sessions - len(store.tokens))
+        for generation in range(generations):
+            token_id = _uuid(rng)
+            issued += timedelta(hours=rng.uniform(1, 48))
+            last = generation == generations - 1
+            record = TokenRecord(
+                user_id=user_id,
+                token_hash="sha256:" + hashlib.sha256(token_id.encode()).hexdigest(),
+                family_id=family_id,
+                prev_token_id=prev_id,
+                issued_at_utc=_iso(issued),
+                expires_at_utc=_iso(issued + timedelta(days=30)),
+                revoked_at_utc=_iso(issued) if revoked or not last else None,
+                last_used_at_utc=_iso(issued),
+            )
+            if prev_id is not None:
+                store.tokens[prev_id].replaced_by_token_id = token_id
+            store.tokens[token_id] = record
+            store.user_index.setdefault(user_id, []).append(token_id)
+            store.family_index.setdefault(family_id, []).append(token_id)
+            prev_id = token_id
+    return store
+
+
+async def seed_token_store(data_dir: Path, sessions: int, backend: str = "json", seed: int = 0) -> int:
+    """Write a synthetic refresh token store for the configured backend (before app startup)"""
+    store = make_refresh_store(sessions, seed=seed)
+    if backend == "sqlite":
+        from app.infra.token_store_sqlite import SqliteTokenStore
+
+        sqlite_store = SqliteTokenStore(data_dir=str(data_dir))
+        try:
+            await sqlite_store.import_store(store)
+        finally:
+            await sqlite_store.close()
+    else:
+        from app.infra.token_store_json import JsonTokenStore
+
+        await JsonTokenStore(data_dir=str(data_dir)).save(store)
+    return len(store.tokens)
+
+
+def main(args: List[str]) -> None:
+    import os
+
+    if len(args) < 3:
+        print(__doc__)
+        raise SystemExit(2)
+    data_dir, user_id, n = args[0], args[1], int(args[2])
+    seed = int(args[3]) if len(args) > 3 else 0
+    os.environ["VOCAB_DATA_DIR"] = data_dir
+    words_file, memory_file = make_vault(n, seed)
+    written = write_vault(user_id, words_file, memory_file)
+    print(f"Wrote {n} words ({written / 1024 / 1024:.1f} MiB) for {user_id} under {data_dir}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,636 @@
+#!/usr/bin/env python3
+"""
+Benchmark every router endpoint over synthetic vaults of increasing size.
+
+For each vault size a child process gets a fresh data directory, seeds a
+refresh token store with many sessions (scripts/bench_data.py), starts the app
+(lifespan included) and drives it in-process through httpx's ASGITransport as
+one registered admin user whose vault is replaced by the synthetic one. Each
+endpoint gets one cold call (first_ms: caches and indexes are built here) and
+then warm calls until --iterations or --max-seconds, whichever comes first (at
+least 3). A second pass runs each endpoint once under tracemalloc for the peak
+bytes allocated by that request. Separate processes keep sizes from sharing
+caches, interned strings or the allocator's high-water mark.
+
+The results (latency percentiles, status codes, peak memory, process RSS) are
+written to a JSON baseline. --compare checks a run against an earlier baseline
+and exits with 1 when an endpoint's p50 or peak memory grew by more than
+--threshold (and by more than --min-ms / --min-kib, so noise on trivial
+endpoints does not count).
+
+Usage:
+    python scripts/bench_endpoints.py                                   # 100, 1k, 10k, 100k words
+    python scripts/bench_endpoints.py --sizes 100 1000 --out base.json
+    python scripts/bench_endpoints.py --sizes 1000 --compare base.json --out new.json
+    python scripts/bench_endpoints.py --compare base.json new.json      # compare two files only
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import gc
+import json
+import os
+import platform
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+PASSWORD = "bench-password-123"
+_JSON = {"Content-Type": "application/json"}
+
+
+# ---------- measurement ----------
+
+@dataclass
+class Call:
+    """One prepared request (bodies are encoded before the clock starts)"""
+    client: Any
+    method: str
+    url: str
+    headers: Dict[str, str]
+    params: Optional[Dict[str, Any]] = None
+    content: Optional[bytes] = None
+    after: Optional[Callable[[Any], Awaitable[None]]] = None
+
+
+@dataclass
+class Case:
+    name: str
+    prepare: Callable[["Context"], Awaitable[Call]]
+    # Run in the tracemalloc pass (False for the endpoints that drive tracemalloc themselves)
+    trace: bool = True
+
+
+async def _send(call: Call) -> Any:
+    return await call.client.request(
+        call.method, call.url, params=call.params, headers=call.headers, content=call.content
+    )
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    """Linear interpolation between closest ranks (q in 0..100)"""
+    if not sorted_values:
+        return 0.0
+    k = (len(sorted_values) - 1) * q / 100
+    low = int(k)
+    high = min(low + 1, len(sorted_values) - 1)
+    return sorted_values[low] + (sorted_values[high] - sorted_values[low]) * (k - low)
+
+
+async def measure(ctx: "Context", case: Case, iterations: int, max_seconds: float) -> Dict[str, Any]:
+    first_ms: Optional[float] = None
+    samples: List[float] = []
+    statuses: Dict[str, int] = {}
+    response_bytes = 0
+    deadline = time.perf_counter() + max_seconds
+    while True:
+        call = await case.prepare(ctx)
+        start = time.perf_counter()
+        response = await _send(call)
+        elapsed = (time.perf_counter() - start) * 1000
+        if call.after is not None:
+            await call.after(response)
+        statuses[str(response.status_code)] = statuses.get(str(response.status_code), 0) + 1
+        response_bytes = len(response.content)
+        if first_ms is None:
+            first_ms = elapsed
+        else:
+            samples.append(elapsed)
+        if len(samples) >= iterations or (len(samples) >= 3 and time.perf_counter() > deadline):
+            break
+    samples.sort()
+    return {
+        "n": len(samples),
+        "first_ms": round(first_ms, 3),
+        "p50_ms": round(percentile(samples, 50), 3),
+        "p90_ms": round(percentile(samples, 90), 3),
+        "p99_ms": round(percentile(samples, 99), 3),
+        "max_ms": round(samples[-1], 3),
+        "mean_ms": round(sum(samples) / len(samples), 3),
+        "statuses": statuses,
+        "response_bytes": response_bytes,
+    }
+
+
+async def measure_peak(ctx: "Context", case: Case) -> float:
+    """Peak KiB traced while one request of ``case`` runs (tracemalloc must be tracing)"""
+    call = await case.prepare(ctx)
+    gc.collect()
+    tracemalloc.reset_peak()
+    base, _ = tracemalloc.get_traced_memory()
+    response = await _send(call)
+    _, peak = tracemalloc.get_traced_memory()
+    if call.after is not None:
+        await call.after(response)
+    return round(max(0, peak - base) / 1024, 1)
+
+
+def rss_kib() -> Dict[str, int]:
+    """Current RSS (Linux /proc) and the process high-water mark"""
+    current = 0
+    try:
+        with open("/proc/self/statm") as f:
+            current = int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") // 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == "darwin":
+        peak //= 1024
+    return {"rss_kib": current, "max_rss_kib": peak}
+
+
+# ---------- benchmark user and data ----------
+
+class Context:
+    """The benchmark user, its seeded vault and what cases need between calls"""
+
+    def __init__(self, transport: Any, size: int, seed: int):
+        self.transport = transport
+        self.size = size
+        self.rng = random.Random(f"bench:{size}:{seed}")
+        self.client: Any = None
+        self.headers: Dict[str, str] = {}
+        self.username = ""
+        self.user_id = ""
+        self.word_ids: List[str] = []
+        self.headwords: List[str] = []
+        self.tags: List[str] = []
+        # A few full entries for PUT /words/{id}
+        self.sample_words: List[Dict[str, Any]] = []
+        self.vocab_file = b""
+        self.vocab_rev = 1
+        self.snapshot_ids: List[str] = []
+
+    def new_client(self) -> Any:
+        from httpx import AsyncClient, Cookies
+
+        return AsyncClient(transport=self.transport, base_url="http://testserver", cookies=Cookies())
+
+    async def register(self, client: Any) -> tuple:
+        """Register and log in a new user on ``client``; returns (username, userId, headers)"""
+        username = f"bench_{uuid.UUID(int=self.rng.getrandbits(128)).hex[:12]}"
+        body = {"username": username, "password": PASSWORD}
+        r = await client.post("/api/auth/register", json=body)
+        r.raise_for_status()
+        user_id = r.json()["userId"]
+        return username, user_id, await self.login(client, username)
+
+    async def login(self, client: Any, username: str) -> Dict[str, str]:
+        r = await client.post("/api/auth/login", json={"username": username, "password": PASSWORD})
+        r.raise_for_status()
+        return {"Authorization": f"Bearer {r.json()['access_token']}"}
+
+    async def setup(self, seed: int) -> Dict[str, Any]:
+        """Create the admin user and replace its vault with the synthetic one"""
+        from app import storage
+        from bench_data import make_vault, write_vault
+
+        self.client = self.new_client()
+        self.username, self.user_id, self.headers = await self.register(self.client)
+        users = storage.read_json(storage.users_file_path())
+        for u in users["users"]:
+            if u["userId"] == self.user_id:
+                u["roles"] = ["user", "admin"]
+        storage.atomic_write_json(storage.users_file_path(), users)
+
+        started = time.perf_counter()
+        words_file, memory_file = make_vault(self.size, seed)
+        written = write_vault(self.user_id, words_file, memory_file)
+        words = words_file["words"]
+        self.word_ids = [w["id"] for w in words]
+        self.headwords = [w["headword"] for w in words]
+        counts: Dict[str, int] = {}
+        for w in words:
+            for tag in w["tags"]:
+                counts[tag] = counts.get(tag, 0) + 1
+        self.tags = sorted(counts, key=counts.get, reverse=True)
+        self.sample_words = [
+            {k: v for k, v in w.items() if k not in ("id", "createdAt", "updatedAt")} | {"id": w["id"]}
+            for w in self.rng.sample(words, min(50, len(words)))
+        ]
+        file = {"schemaVersion": 1, "words": words, "memory": memory_file["memory"], "updatedAt": words_file["updatedAt"]}
+        self.vocab_file = json.dumps(file, ensure_ascii=False).encode("utf-8")
+        info = {
+            "words": len(words),
+            "memory_states": len(memory_file["memory"]),
+            "examples": sum(len(w["examples"]) for w in words),
+            "vault_bytes": written,
+            "seed_seconds": round(time.perf_counter() - started, 3),
+        }
+        del words_file, memory_file, words, file
+        gc.collect()
+        return info
+
+    # Helpers for cases
+    def call(self, method: str, url: str, params: Optional[Dict[str, Any]] = None, body: Any = None, **kw: Any) -> Call:
+        headers = dict(self.headers)
+        content = None
+        if body is not None:
+            headers.update(_JSON)
+            content = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        return Call(client=kw.pop("client", self.client), method=method, url=url, headers=headers,
+                    params=params, content=content, **kw)
+
+    def headword(self) -> str:
+        return self.rng.choice(self.headwords)
+
+    def typo(self) -> str:
+        word = self.headword()
+        i = self.rng.randrange(len(word))
+        return word[:i] + word[i + 1:] if len(word) > 3 else word + "e"
+
+    def new_word(self) -> Dict[str, Any]:
+        tag = self.tags[0] if self.tags else "bench"
+        return {
+            "headword": f"{self.headword()}{self.rng.randrange(10**6)}",
+            "pos": "noun",
+            "meaningJa": "ベンチ",
+            "examples": [{"id": str(uuid.uuid4()), "en": "A bench example.", "ja": None, "source": None}],
+            "tags": [tag],
+        }
+
+    def import_body(self, n: int = 10) -> Dict[str, Any]:
+        return {"schemaVersion": 1, "words": [self.new_word() for _ in range(n)], "memory": []}
+
+
+def _cases() -> List[Case]:
+    """Every router endpoint, read-only ones first; the tracemalloc sequence last"""
+
+    def get(name: str, url: str, params: Optional[Callable[[Context], Dict[str, Any]]] = None) -> Case:
+        async def prepare(ctx: Context) -> Call:
+            return ctx.call("GET", url, params(ctx) if params else None)
+        return Case(name, prepare)
+
+    async def auth_refresh(ctx: Context) -> Call:
+        # Rotates the refresh cookie kept in the client's jar
+        return ctx.call("POST", "/api/auth/refresh")
+
+    async def auth_login(ctx: Context) -> Call:
+        return ctx.call("POST", "/api/auth/login", body={"username": ctx.username, "password": PASSWORD},
+                        client=ctx.new_client())
+
+    async def auth_logout(ctx: Context) -> Call:
+        client = ctx.new_client()
+        headers = await ctx.login(client, ctx.username)
+        return Call(client=client, method="POST", url="/api/auth/logout", headers=headers)
+
+    async def auth_register(ctx: Context) -> Call:
+        username = f"bench_{uuid.uuid4().hex[:12]}"
+        return ctx.call("POST", "/api/auth/register", body={"username": username, "password": PASSWORD})
+
+    async def auth_delete_me(ctx: Context) -> Call:
+        client = ctx.new_client()
+        _, _, headers = await ctx.register(client)
+        return Call(client=client, method="DELETE", url="/api/auth/me", headers=headers)
+
+    async def words_create(ctx: Context) -> Call:
+        return ctx.call("POST", "/api/words", body=ctx.new_word())
+
+    async def words_update(ctx: Context) -> Call:
+        word = dict(ctx.rng.choice(ctx.sample_words))
+        word_id = word.pop("id")
+        word["meaningJa"] = "更新" + str(ctx.rng.randrange(1000))
+        return ctx.call("PUT", f"/api/words/{word_id}", body=word)
+
+    async def words_delete(ctx: Context) -> Call:
+        r = await ctx.client.post("/api/words", headers={**ctx.headers, **_JSON}, content=json.dumps(ctx.new_word()))
+        return ctx.call("DELETE", f"/api/words/{r.json()['word']['id']}")
+
+    async def study_grade(ctx: Context) -> Call:
+        rating = ctx.rng.choice(["again", "hard", "good", "easy"])
+        return ctx.call("POST", "/api/study/grade", body={"wordId": ctx.rng.choice(ctx.word_ids), "rating": rating})
+
+    async def study_reset(ctx: Context) -> Call:
+        return ctx.call("POST", f"/api/study/reset/{ctx.rng.choice(ctx.word_ids)}")
+
+    async def io_import(ctx: Context) -> Call:
+        return ctx.call("POST", "/api/io/import", {"mode": "merge"}, body=ctx.import_body())
+
+    async def io_import_async(ctx: Context) -> Call:
+        return ctx.call("POST", "/api/io/import", {"mode": "merge", "async": "true"}, body=ctx.import_body())
+
+    async def _submit_job(ctx: Context) -> str:
+        r = await ctx.client.post("/api/io/import", params={"mode": "merge", "async": "true"},
+                                  headers={**ctx.headers, **_JSON}, content=json.dumps(ctx.import_body()))
+        return r.json()["job"]["jobId"]
+
+    async def io_job_get(ctx: Context) -> Call:
+        return ctx.call("GET", f"/api/io/jobs/{await _submit_job(ctx)}")
+
+    async def io_job_cancel(ctx: Context) -> Call:
+        return ctx.call("DELETE", f"/api/io/jobs/{await _submit_job(ctx)}")
+
+    async def _track_rev(ctx: Context, response: Any) -> None:
+        if response.status_code == 200:
+            ctx.vocab_rev = response.json()["serverRev"]
+
+    async def vocab_put(ctx: Context) -> Call:
+        content = b'{"serverRev": %d, "clientId": "bench", "file": %s}' % (ctx.vocab_rev, ctx.vocab_file)
+        return Call(client=ctx.client, method="PUT", url="/api/vocab", headers={**ctx.headers, **_JSON},
+                    content=content, after=lambda r: _track_rev(ctx, r))
+
+    async def vocab_put_force(ctx: Context) -> Call:
+        content = b'{"clientId": "bench", "file": %s}' % ctx.vocab_file
+        return Call(client=ctx.client, method="PUT", url="/api/vocab", params={"force": "true"},
+                    headers={**ctx.headers, **_JSON}, content=content, after=lambda r: _track_rev(ctx, r))
+
+    async def logs_client(ctx: Context) -> Call:
+        now = datetime.now(timezone.utc).isoformat()
+        logs = [{"timestamp": now, "level": "INFO", "message": f"bench {i}", "userId": ctx.user_id} for i in range(10)]
+        return ctx.call("POST", "/api/logs/client", body={"logs": logs})
+
+    async def admin_profiling_put(ctx: Context) -> Call:
+        return ctx.call("PUT", "/api/admin/profiling", body={"sampleRate": 0.0, "mode": "stack"})
+
+    async def tracemalloc_start(ctx: Context) -> Call:
+        return ctx.call("POST", "/api/admin/memory/tracemalloc/start", {"frames": 5})
+
+    async def _remember_snapshot(ctx: Context, response: Any) -> None:
+        if response.status_code == 200:
+            ctx.snapshot_ids.append(response.json()["snapshot"]["id"])
+
+    async def snapshot_take(ctx: Context) -> Call:
+        return ctx.call("POST", "/api/admin/memory/snapshots", after=lambda r: _remember_snapshot(ctx, r))
+
+    async def snapshot_top(ctx: Context) -> Call:
+        return ctx.call("GET", f"/api/admin/memory/snapshots/{ctx.snapshot_ids[-1]}", {"limit": 20})
+
+    async def snapshot_diff(ctx: Context) -> Call:
+        return ctx.call("GET", "/api/admin/memory/diff", {"from": ctx.snapshot_ids[-2], "to": ctx.snapshot_ids[-1]})
+
+    async def tracemalloc_stop(ctx: Context) -> Call:
+        return ctx.call("POST", "/api/admin/memory/tracemalloc/stop")
+
+    def case(name: str, prepare: Callable[[Context], Awaitable[Call]], trace: bool = True) -> Case:
+        return Case(name, prepare, trace)
+
+    return [
+        get("healthz", "/healthz"),
+        get("metrics", "/metrics"),
+        get("openapi", "/openapi.json"),
+        get("auth.status", "/api/auth/status"),
+        get("auth.me", "/api/auth/me"),
+        get("words.list", "/api/words"),
+        get("words.list_q", "/api/words", lambda c: {"q": c.headword()[:3]}),
+        get("words.list_pos", "/api/words", lambda c: {"pos": "verb"}),
+        get("words.suggest", "/api/words/suggest", lambda c: {"q": c.typo()}),
+        get("words.complete", "/api/words/complete", lambda c: {"prefix": c.headword()[:2]}),
+        get("study.next", "/api/study/next"),
+        get("study.next_tags", "/api/study/next", lambda c: {"tags": c.tags[:2]}),
+        get("study.tags", "/api/study/tags"),
+        get("examples.next", "/api/examples/next"),
+        get("examples.next_weighted", "/api/examples/next", lambda c: {"weighted": "true"}),
+        get("examples.next_tags", "/api/examples/next", lambda c: {"tags": c.tags[:1]}),
+        get("examples.search", "/api/examples/search", lambda c: {"q": c.headword()}),
+        get("examples.tags", "/api/examples/tags"),
+        get("io.export", "/api/io/export"),
+        get("vocab.get", "/api/vocab"),
+        get("admin.profiling", "/api/admin/profiling"),
+        get("admin.memory", "/api/admin/memory"),
+        get("admin.memory_deep", "/api/admin/memory", lambda c: {"deep": "true"}),
+        get("admin.usage", "/api/admin/usage"),
+        get("admin.audit", "/api/admin/audit", lambda c: {"limit": 100}),
+        get("admin.audit_user", "/api/admin/audit", lambda c: {"userId": c.user_id, "limit": 100}),
+        get("admin.audit_event_prefix", "/api/admin/audit", lambda c: {"event": "vocab.*", "limit": 100}),
+        case("auth.refresh", auth_refresh),
+        case("auth.login", auth_login),
+        case("auth.logout", auth_logout),
+        case("auth.register", auth_register),
+        case("auth.delete_me", auth_delete_me),
+        case("words.create", words_create),
+        case("words.update", words_update),
+        case("words.delete", words_delete),
+        case("study.grade", study_grade),
+        case("study.reset", study_reset),
+        case("io.import", io_import),
+        case("io.import_async", io_import_async),
+        case("io.job_get", io_job_get),
+        case("io.job_cancel", io_job_cancel),
+        case("vocab.put", vocab_put),
+        case("vocab.put_force", vocab_put_force),
+        case("logs.client", logs_client),
+        case("admin.profiling_put", admin_profiling_put),
+        case("admin.tracemalloc_start", tracemalloc_start, trace=False),
+        case("admin.snapshot", snapshot_take, trace=False),
+        case("admin.snapshot_top", snapshot_top, trace=False),
+        case("admin.snapshot_diff", snapshot_diff, trace=False),
+        case("admin.tracemalloc_stop", tracemalloc_stop, trace=False),
+    ]
+
+
+# ---------- child: one vault size ----------
+
+async def run_size(size: int, opts: argparse.Namespace) -> Dict[str, Any]:
+    """Seed the data directory (VOCAB_DATA_DIR) and benchmark every endpoint against it"""
+    from httpx import ASGITransport
+
+    from app import settings as settings_module
+    from bench_data import seed_token_store
+
+    settings = settings_module.settings
+    sessions = await seed_token_store(settings.data_dir, opts.sessions, settings.token_store_backend, opts.seed)
+
+    from app.main import create_app, lifespan
+
+    app = create_app()
+    result: Dict[str, Any] = {"size": size, "sessions": sessions}
+    cases = [c for c in _cases() if not opts.only or any(c.name.startswith(p) for p in opts.only)]
+    async with lifespan(app):
+        ctx = Context(ASGITransport(app=app), size, opts.seed)
+        result["seed"] = await ctx.setup(opts.seed)
+        result["memory_after_seed"] = rss_kib()
+        endpoints: Dict[str, Dict[str, Any]] = {}
+        for case in cases:
+            endpoints[case.name] = await measure(ctx, case, opts.iterations, opts.max_seconds)
+            _progress(f"  {size:>7} {case.name:<28} p50 {endpoints[case.name]['p50_ms']:>10.2f} ms")
+        result["memory_after_latency"] = rss_kib()
+        if not opts.no_tracemalloc:
+            tracemalloc.start()
+            try:
+                for case in cases:
+                    if case.trace:
+                        endpoints[case.name]["peak_kib"] = await measure_peak(ctx, case)
+            finally:
+                tracemalloc.stop()
+        result["endpoints"] = endpoints
+        result["memory_end"] = rss_kib()
+    return result
+
+
+def _progress(line: str) -> None:
+    print(line, file=sys.stderr, flush=True)
+
+
+# ---------- parent: sizes, baseline file, comparison ----------
+
+def _git_commit() -> Optional[str]:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, timeout=10)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return out.stdout.strip() or None
+
+
+def _child_env(data_dir: str, opts: argparse.Namespace) -> Dict[str, str]:
+    env = dict(os.environ)
+    env["VOCAB_DATA_DIR"] = data_dir
+    env.setdefault("VOCAB_LOG_LEVEL", opts.log_level)
+    # Client log rate limiting would turn most logs.client calls into 429s
+    env["VOCAB_CLIENT_LOG_RATE_PER_SECOND"] = "1000000"
+    env["VOCAB_CLIENT_LOG_BURST"] = "1000000"
+    return env
+
+
+def run_all(opts: argparse.Namespace) -> Dict[str, Any]:
+    baseline: Dict[str, Any] = {
+        "meta": {
+            "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "seed": opts.seed,
+            "iterations": opts.iterations,
+            "max_seconds": opts.max_seconds,
+            "sessions": opts.sessions,
+            "token_store_backend": os.environ.get("VOCAB_TOKEN_STORE_BACKEND", "json"),
+        },
+        "results": {},
+    }
+    for size in opts.sizes:
+        with tempfile.TemporaryDirectory(prefix=f"bench-{size}-") as tmp:
+            result_path = Path(tmp) / "result.json"
+            data_dir = Path(tmp) / "data"
+            data_dir.mkdir()
+            cmd = [
+                sys.executable, str(Path(__file__).resolve()), "--child", str(size), "--result", str(result_path),
+                "--iterations", str(opts.iterations), "--max-seconds", str(opts.max_seconds),
+                "--sessions", str(opts.sessions), "--seed", str(opts.seed),
+            ]
+            if opts.no_tracemalloc:
+                cmd.append("--no-tracemalloc")
+            if opts.only:
+                cmd += ["--only", *opts.only]
+            _progress(f"vault of {size} words")
+            started = time.perf_counter()
+            proc = subprocess.run(cmd, env=_child_env(str(data_dir), opts), stdout=subprocess.DEVNULL)
+            if proc.returncode != 0 or not result_path.exists():
+                raise SystemExit(f"benchmark of size {size} failed (exit {proc.returncode})")
+            result = json.loads(result_path.read_text(encoding="utf-8"))
+            result["wall_seconds"] = round(time.perf_counter() - started, 1)
+            baseline["results"][str(size)] = result
+    return baseline
+
+
+def print_results(baseline: Dict[str, Any]) -> None:
+    for size, result in baseline["results"].items():
+        seed = result["seed"]
+        print(f"\n== {size} words ({seed['examples']} examples, {seed['memory_states']} memory states, "
+              f"{result['sessions']} sessions) max RSS {result['memory_end']['max_rss_kib'] / 1024:.0f} MiB")
+        print(f"{'endpoint':<28}{'n':>5}{'first':>10}{'p50':>10}{'p90':>10}{'p99':>10}{'max':>10}{'peak KiB':>11}  status")
+        for name, r in result["endpoints"].items():
+            peak = r.get("peak_kib")
+            statuses = ",".join(f"{k}x{v}" for k, v in sorted(r["statuses"].items()))
+            print(f"{name:<28}{r['n']:>5}{r['first_ms']:>10.2f}{r['p50_ms']:>10.2f}{r['p90_ms']:>10.2f}"
+                  f"{r['p99_ms']:>10.2f}{r['max_ms']:>10.2f}{'-' if peak is None else f'{peak:.0f}':>11}  {statuses}")
+
+
+def compare(old: Dict[str, Any], new: Dict[str, Any], threshold: float, min_ms: float, min_kib: float) -> List[str]:
+    """
+    Print p50 / peak memory changes for every (size, endpoint) in both baselines.
+
+    Returns:
+        Regressions, as "size endpoint metric old -> new" lines
+    """
+    regressions: List[str] = []
+    print(f"\ncompare {old['meta'].get('commit')} -> {new['meta'].get('commit')} (threshold {threshold:.0%})")
+    for size, new_result in new["results"].items():
+        old_result = old["results"].get(size)
+        if old_result is None:
+            continue
+        print(f"\n== {size} words")
+        print(f"{'endpoint':<28}{'p50 old':>10}{'p50 new':>10}{'change':>9}{'peak old':>11}{'peak new':>11}{'change':>9}")
+        for name, n in new_result["endpoints"].items():
+            o = old_result["endpoints"].get(name)
+            if o is None:
+                continue
+            flags = []
+            cells = []
+            for metric, floor in (("p50_ms", min_ms), ("peak_kib", min_kib)):
+                before, after = o.get(metric), n.get(metric)
+                if before is None or after is None:
+                    cells.append(("-", "-", ""))
+                    continue
+                change = (after - before) / before if before else 0.0
+                if after > before * (1 + threshold) and after - before > floor:
+                    flags.append(metric)
+                    regressions.append(f"{size} {name} {metric} {before} -> {after}")
+                cells.append((f"{before:.1f}", f"{after:.1f}", f"{change:+.0%}"))
+            row = "".join(f"{b:>10}{a:>10}{c:>9}" if i == 0 else f"{b:>11}{a:>11}{c:>9}" for i, (b, a, c) in enumerate(cells))
+            print(f"{name:<28}{row}  {'REGRESSION ' + ','.join(flags) if flags else ''}")
+    return regressions
+
+
+def _parse_args(argv: List[str]) -> argparse.Namespace:
+    from bench_data import VAULT_SIZES
+
+    p = argparse.ArgumentParser(description="Benchmark every endpoint over synthetic vaults")
+    p.add_argument("--sizes", type=int, nargs="+", default=list(VAULT_SIZES), help="Vault sizes (words)")
+    p.add_argument("--iterations", type=int, default=50, help="Warm calls per endpoint (at most)")
+    p.add_argument("--max-seconds", type=float, default=5.0, help="Time budget per endpoint (at least 3 warm calls)")
+    p.add_argument("--sessions", type=int, default=20000, help="Refresh tokens in the seeded token store")
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--only", nargs="+", help="Only endpoints whose name starts with one of these")
+    p.add_argument("--no-tracemalloc", action="store_true", help="Skip the peak memory pass")
+    p.add_argument("--log-level", default="WARNING", help="VOCAB_LOG_LEVEL for the app (unless already set)")
+    p.add_argument("--out", type=Path, default=ROOT / "bench_baseline.json", help="Baseline JSON to write")
+    p.add_argument("--compare", type=Path, nargs="+", metavar="BASELINE",
+                   help="Earlier baseline to compare with (two files: compare them without running)")
+    p.add_argument("--threshold", type=float, default=0.2, help="Allowed relative growth before a regression")
+    p.add_argument("--min-ms", type=float, default=1.0, help="Ignore p50 growth below this many ms")
+    p.add_argument("--min-kib", type=float, default=64.0, help="Ignore peak memory growth below this many KiB")
+    p.add_argument("--child", type=int, help=argparse.SUPPRESS)
+    p.add_argument("--result", type=Path, help=argparse.SUPPRESS)
+    return p.parse_args(argv)
+
+
+def main(argv: List[str]) -> int:
+    opts = _parse_args(argv)
+    if opts.child is not None:
+        result = asyncio.run(run_size(opts.child, opts))
+        opts.result.write_text(json.dumps(result, indent=2), encoding="utf-8")
+        return 0
+
+    if opts.compare and len(opts.compare) == 2:
+        old, new = (json.loads(p.read_text(encoding="utf-8")) for p in opts.compare)
+    else:
+        new = run_all(opts)
+        opts.out.write_text(json.dumps(new, indent=2) + "\n", encoding="utf-8")
+        print_results(new)
+        print(f"\nbaseline written to {opts.out}")
+        if not opts.compare:
+            return 0
+        old = json.loads(opts.compare[0].read_text(encoding="utf-8"))
+    regressions = compare(old, new, opts.threshold, opts.min_ms, opts.min_kib)
+    if regressions:
+        print(f"\n{len(regressions)} regression(s):")
+        for line in regressions:
+            print(f"  {line}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
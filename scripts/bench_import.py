@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Benchmark the import path: legacy two-pass import vs the fused single pass.
+
+The legacy path is reproduced here as it was before the fused rewrite
+(validate, rebuild pydantic models, merge with _parse_iso twice per conflict and
+eager f-string debug logging) so both can be timed against the same vault.
+
+Usage:
+    python scripts/bench_import.py            # 10k and 100k words
+    python scripts/bench_import.py 1000 5000  # custom sizes
+"""
+from __future__ import annotations
+
+import logging
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import List
+from uuid import uuid4
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+# Real storage writer, kept so seeding still works while writes are stubbed out
+_write_json = None
+
+
+def _make_upload(n: int):
+    from app.models import AppDataForImport
+
+    words = []
+    memory = []
+    for i in range(n):
+        # Half the ids collide with the existing vault so merge compares timestamps
+        wid = f"w{i}" if i % 2 == 0 else None
+        words.append({
+            "id": wid,
+            "headword": f"word{i}",
+            "pos": "noun",
+            "meaningJa": f"意味{i}",
+            "examples": [{"en": f"Example {i}.", "ja": f"例文{i}。"}],
+            "tags": [f"tag{i % 20}"],
+            "updatedAt": "2026-06-01T00:00:00Z" if wid else None,
+        })
+        if wid:
+            memory.append({"wordId": wid, "dueAt": "2026-06-01T00:00:00+00:00", "memoryLevel": i % 6})
+    return AppDataForImport(schemaVersion=1, words=words, memory=memory)
+
+
+def _seed_vault(user_id: str, n: int) -> None:
+    from app import storage
+    from app.models import MemoryFile, MemoryState, WordEntry, WordsFile
+
+    now = storage.now_iso()
+    words = [
+        WordEntry(id=f"w{i}", headword=f"word{i}", pos="noun", meaningJa=f"意味{i}", createdAt=now, updatedAt="2026-01-01T00:00:00Z")
+        for i in range(0, n, 2)
+    ]
+    memory = [MemoryState(wordId=w.id, dueAt="2026-01-01T00:00:00+00:00") for w in words]
+    ud = storage.user_dir(user_id)
+    _write_json(ud / "words.json", WordsFile(updatedAt=now, words=words).model_dump())
+    _write_json(ud / "memory.json", MemoryFile(updatedAt=now, memory=memory).model_dump())
+
+
+def _legacy_import(user_id: str, app, mode: str) -> None:
+    """Pre-fused implementation (validate -> normalize -> merge)."""
+    from app import services, storage
+    from app.models import AppData, ExampleSentence, MemoryState, WordEntry
+
+    logger = logging.getLogger("app.service.import")
+    services.validate_import_data(app)
+    logger.debug(f"import_appdata: userId={user_id}, mode={mode}, app={app}")
+
+    now = storage.now_iso()
+    words: List[WordEntry] = []
+    for w in app.words:
+        examples = [ExampleSentence(id=ex.id or str(uuid4()), en=ex.en, ja=ex.ja, source=ex.source) for ex in w.examples]
+        words.append(WordEntry(
+            id=w.id or str(uuid4()), headword=w.headword, pronunciation=w.pronunciation, pos=w.pos,
+            meaningJa=w.meaningJa, examples=examples, tags=w.tags, memo=w.memo,
+            createdAt=w.createdAt or now, updatedAt=w.updatedAt or now,
+        ))
+    memory = [MemoryState(**m.model_dump()) for m in app.memory]
+    app = AppData(exportedAt=now, words=words, memory=memory)
+
+    wf = services.load_words(user_id)
+    mf = services.load_memory(user_id)
+    existing_words = {w.id: w for w in wf.words}
+    for w in app.words:
+        cur = existing_words.get(w.id)
+        if not cur:
+            logger.debug(f"Adding new word: {w.id}")
+            existing_words[w.id] = w
+        elif services._parse_iso(w.updatedAt) >= services._parse_iso(cur.updatedAt):
+            logger.debug(f"Updating word {w.id} (new timestamp >= old timestamp)")
+            existing_words[w.id] = w
+    existing_mem = {m.wordId: m for m in mf.memory}
+    for m in app.memory:
+        cur_mem = existing_mem.get(m.wordId)
+        if not cur_mem:
+            logger.debug(f"Adding new memory state: {m.wordId}")
+            existing_mem[m.wordId] = m
+        elif services._parse_iso(m.dueAt) >= services._parse_iso(cur_mem.dueAt):
+            logger.debug(f"Updating memory state {m.wordId} (new due date >= old due date)")
+            existing_mem[m.wordId] = m
+    wf.words = list(existing_words.values())
+    mf.memory = list(existing_mem.values())
+    services.save_words(user_id, wf)
+    services.save_memory(user_id, mf)
+
+
+def _time(setup, fn, repeat: int) -> float:
+    """Best-of-N wall time of fn(); setup() runs untimed before each round."""
+    best = float("inf")
+    for _ in range(repeat):
+        setup()
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main(sizes: List[int]) -> None:
+    with tempfile.TemporaryDirectory() as tmpdir:
+        os.environ["VOCAB_DATA_DIR"] = tmpdir
+        from app import services, storage
+
+        global _write_json
+        _write_json = storage.atomic_write_json
+        logging.getLogger("app.service.import").setLevel(logging.INFO)
+
+        print(f"{'words':>8} {'phase':>10} {'legacy (s)':>12} {'fused (s)':>12} {'speedup':>8}")
+        for n in sizes:
+            upload = _make_upload(n)
+            repeat = 3 if n <= 20_000 else 1
+
+            def seed() -> None:
+                _seed_vault("bench", n)
+
+            def legacy() -> None:
+                _legacy_import("bench", upload, "merge")
+
+            def fused() -> None:
+                services.validate_and_import("bench", upload, "merge")
+
+            t_legacy = _time(seed, legacy, repeat)
+            t_fused = _time(seed, fused, repeat)
+            print(f"{n:>8} {'total':>10} {t_legacy:>12.3f} {t_fused:>12.3f} {t_legacy / t_fused:>7.1f}x")
+
+            # Same run with the final file writes stubbed out (seeding keeps the real writer)
+            storage.atomic_write_json = lambda *_: None  # type: ignore[assignment]
+            try:
+                t_legacy = _time(seed, legacy, repeat)
+                t_fused = _time(seed, fused, repeat)
+            finally:
+                storage.atomic_write_json = _write_json  # type: ignore[assignment]
+            print(f"{n:>8} {'in-memory':>10} {t_legacy:>12.3f} {t_fused:>12.3f} {t_legacy / t_fused:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main([int(a) for a in sys.argv[1:]] or [10_000, 100_000])
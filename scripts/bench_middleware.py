@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Benchmark per-request middleware overhead: BaseHTTPMiddleware vs pure ASGI.
+
+The BaseHTTPMiddleware versions of RequestLoggingMiddleware and
+RequestBodyCaptureMiddleware are reproduced here as they were before the ASGI
+rewrite, so both stacks can be timed around the same trivial endpoint. Requests
+are driven straight through the ASGI callable (no HTTP client) so the numbers
+are middleware cost only. Peak traced memory is reported for a large POST to
+show that the body capture no longer buffers the whole body.
+
+Usage:
+    python scripts/bench_middleware.py              # 2000 requests, 4 MB POST
+    python scripts/bench_middleware.py 5000 8       # requests, POST size in MB
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import sys
+import time
+import tracemalloc
+import uuid
+from pathlib import Path
+from typing import Callable, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from fastapi import FastAPI, Request, Response  # noqa: E402
+from starlette.middleware.base import BaseHTTPMiddleware  # noqa: E402
+
+_CHUNK = 64 * 1024
+
+
+class LegacyRequestLoggingMiddleware(BaseHTTPMiddleware):
+    """Pre-rewrite implementation (trimmed to what affects timing)."""
+
+    async def dispatch(self, request: Request, call_next: Callable):
+        request_id = request.headers.get("x-request-id") or str(uuid.uuid4())
+        request.state.request_id = request_id
+        start = time.perf_counter()
+        response: Response | None = None
+        try:
+            response = await call_next(request)
+            return response
+        finally:
+            logging.getLogger("app.http").info(
+                "http_request",
+                extra={
+                    "event": "http_request",
+                    "request_id": request_id,
+                    "method": request.method,
+                    "path": request.url.path,
+                    "status": response.status_code if response is not None else 500,
+                    "duration_ms": int((time.perf_counter() - start) * 1000),
+                    "request_body": getattr(request.state, "request_body_text", None),
+                },
+            )
+
+
+class LegacyRequestBodyCaptureMiddleware(BaseHTTPMiddleware):
+    """Pre-rewrite implementation: reads the whole body, keeps the first 4 KB."""
+
+    async def dispatch(self, request: Request, call_next: Callable):
+        if request.method in ("POST", "PUT"):
+            text = (await request.body()).decode("utf-8", errors="replace")
+            if len(text) > 4096:
+                text = text[:4096] + "...(truncated)"
+            request.state.request_body_text = text
+        return await call_next(request)
+
+
+def _build(logging_mw, body_mw) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/ping")
+    async def ping():
+        return {"ok": True}
+
+    @app.post("/upload")
+    async def upload(request: Request):
+        # Consume the stream without holding it, like a streaming import would
+        size = 0
+        async for chunk in request.stream():
+            size += len(chunk)
+        return {"size": size}
+
+    app.add_middleware(logging_mw)
+    app.add_middleware(body_mw)
+    return app
+
+
+def _chunks(body: bytes) -> List[bytes]:
+    return [body[i:i + _CHUNK] for i in range(0, len(body), _CHUNK)] or [b""]
+
+
+async def _request(app, method: str, path: str, chunks: List[bytes]) -> None:
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": method, "scheme": "http", "path": path, "raw_path": path.encode(),
+        "root_path": "", "query_string": b"", "headers": [(b"content-type", b"application/json")],
+        "client": ("127.0.0.1", 1), "server": ("testserver", 80),
+    }
+    index = 0
+
+    async def receive():
+        nonlocal index
+        if index < len(chunks):
+            index += 1
+            return {"type": "http.request", "body": chunks[index - 1], "more_body": index < len(chunks)}
+        await asyncio.sleep(3600)
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        pass
+
+    await app(scope, receive, send)
+
+
+async def _per_request_us(app, n: int, method: str, path: str, body: bytes) -> float:
+    chunks = _chunks(body)
+    for _ in range(50):  # warm-up
+        await _request(app, method, path, chunks)
+    start = time.perf_counter()
+    for _ in range(n):
+        await _request(app, method, path, chunks)
+    return (time.perf_counter() - start) / n * 1e6
+
+
+async def _peak_kib(app, body: bytes) -> float:
+    chunks = _chunks(body)
+    tracemalloc.start()
+    await _request(app, "POST", "/upload", chunks)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak / 1024
+
+
+async def main(args: List[str]) -> None:
+    n = int(args[0]) if args else 2000
+    mb = int(args[1]) if len(args) > 1 else 4
+    os.environ["VOCAB_LOG_REQUEST_BODY"] = "1"
+    logging.getLogger("app.http").setLevel(logging.WARNING)  # time the middleware, not log I/O
+
+    from app.middleware import RequestLoggingMiddleware
+    from app.middleware_bodylog import RequestBodyCaptureMiddleware
+
+    legacy = _build(LegacyRequestLoggingMiddleware, LegacyRequestBodyCaptureMiddleware)
+    asgi = _build(RequestLoggingMiddleware, RequestBodyCaptureMiddleware)
+    small = b'{"headword": "bench"}'
+    large = b"[" + b'{"headword": "bench"},' * (mb * 1024 * 1024 // 22) + b"{}]"
+
+    print(f"{'case':>22} {'legacy':>12} {'asgi':>12} {'speedup':>8}")
+    for label, method, path, body, count in (
+        ("GET /ping (us/req)", "GET", "/ping", b"", n),
+        ("POST small (us/req)", "POST", "/upload", small, n),
+        (f"POST {mb} MB (us/req)", "POST", "/upload", large, max(5, n // 200)),
+    ):
+        t_legacy = await _per_request_us(legacy, count, method, path, body)
+        t_asgi = await _per_request_us(asgi, count, method, path, body)
+        print(f"{label:>22} {t_legacy:>12.1f} {t_asgi:>12.1f} {t_legacy / t_asgi:>7.1f}x")
+
+    p_legacy = await _peak_kib(legacy, large)
+    p_asgi = await _peak_kib(asgi, large)
+    print(f"{f'POST {mb} MB peak (KiB)':>22} {p_legacy:>12.0f} {p_asgi:>12.0f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(sys.argv[1:]))
@@ -0,0 +1,31 @@
+#!/usr/bin/env python3
+"""
+One-shot migration of refresh tokens from data/auth/refresh_store.json to SQLite.
+
+Run once with the server stopped, then set VOCAB_TOKEN_STORE_BACKEND=sqlite.
+Re-running is safe (records are upserted by token id); the JSON files are kept.
+
+Usage:
+    python scripts/migrate_refresh_store.py            # uses VOCAB_DATA_DIR / settings
+    python scripts/migrate_refresh_store.py /path/data
+"""
+from __future__ import annotations
+
+import asyncio
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+
+def main(data_dir: str | None) -> None:
+    from app.infra.token_store_sqlite import migrate_json_store
+    from app.settings import settings
+
+    target = data_dir or str(settings.data_dir)
+    migrated = asyncio.run(migrate_json_store(target))
+    print(f"Migrated {migrated} refresh tokens into {Path(target) / 'auth' / 'refresh_store.sqlite3'}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1] if len(sys.argv) > 1 else None)
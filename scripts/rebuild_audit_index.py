@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+"""
+Rebuild data/logs/audit.sqlite3 from audit.log and its rotated segments.
+
+Use it to index history written before the audit store existed, or after
+deleting a damaged index. Run with the server stopped: the index is replaced
+in one transaction.
+
+Usage:
+    python scripts/rebuild_audit_index.py            # uses VOCAB_DATA_DIR / settings
+    python scripts/rebuild_audit_index.py /path/data
+"""
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+
+def main(data_dir: str | None) -> None:
+    from app.infra.audit_store import AuditStore, audit_log_segments, read_segment_lines
+    from app.settings import settings
+
+    log_dir = Path(data_dir or settings.data_dir) / "logs"
+    segments = audit_log_segments(log_dir)
+    store = AuditStore(log_dir / "audit.sqlite3")
+    try:
+        indexed = store.rebuild(read_segment_lines(segments))
+    finally:
+        store.close()
+    print(f"Indexed {indexed} audit events from {len(segments)} segments into {store.db_path}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1] if len(sys.argv) > 1 else None)
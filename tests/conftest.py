@@ -108,3 +108,19 @@ async def authenticated_client(client: AsyncClient, unique_username) -> AsyncGen
     except Exception:
         # Ignore cleanup errors (user may have been deleted by test)
         pass
+
+
+@pytest.fixture(scope="function")
+async def admin_client(authenticated_client) -> AsyncGenerator[tuple[AsyncClient, dict, str], None]:
+    """
+    Authenticated client whose user has the "admin" role.
+    Returns (client, user_data, access_token).
+    """
+    client, user_data, access_token = authenticated_client
+    path = storage.users_file_path()
+    data = storage.read_json(path)
+    for u in data["users"]:
+        if u["userId"] == user_data["userId"]:
+            u["roles"] = ["user", "admin"]
+    storage.atomic_write_json(path, data)
+    yield client, user_data, access_token
@@ -7,6 +7,7 @@ import json
 from pathlib import Path
 from typing import Optional
 from app import storage
+from app.logging_setup import flush_logging
 from app.settings import settings
 
 
@@ -18,6 +19,8 @@ def audit_log_path():
 
 def read_audit_events(audit_log_path: Path, event_type: Optional[str] = None):
     """Read audit log and return parsed events, optionally filtered by event type"""
+    # Audit records are written by the logging listener thread
+    flush_logging()
     if not audit_log_path.exists():
         return []
     
@@ -0,0 +1,159 @@
+# tests/test_audit_store.py
+"""Tests for the indexed audit store and the admin audit query endpoint."""
+from __future__ import annotations
+
+import json
+
+import pytest
+from httpx import AsyncClient
+
+from app.infra.audit_store import AuditStore, audit_log_segments, read_segment_lines
+from app.logging_setup import flush_logging
+
+
+def _line(ts: str, event: str, user_id: str) -> str:
+    return json.dumps({"ts": ts, "level": "INFO", "logger": "app.audit", "msg": event, "event": event, "user_id": user_id})
+
+
+@pytest.fixture
+def store(tmp_path):
+    audit_store = AuditStore(tmp_path / "audit.sqlite3")
+    for day, event, user_id in (
+        (1, "user.register", "u1"),
+        (2, "vocab.sync.put", "u1"),
+        (3, "vocab.sync.get", "u2"),
+        (4, "vocab.synchronize", "u1"),
+        (5, "word.delete", "u1"),
+    ):
+        ts = f"2026-01-0{day}T00:00:00.000000+00:00"
+        audit_store.append(ts, event, user_id, None, _line(ts, event, user_id))
+    yield audit_store
+    audit_store.close()
+
+
+def test_query_filters_by_user_event_prefix_and_time(store: AuditStore):
+    """Test user, exact/prefix event and [since, until) filters, newest first"""
+    events, cursor = store.query(user_id="u1")
+    assert [e["event"] for e in events] == ["word.delete", "vocab.synchronize", "vocab.sync.put", "user.register"]
+    assert cursor is None
+
+    events, _ = store.query(event="vocab.sync.*")
+    assert [e["event"] for e in events] == ["vocab.sync.get", "vocab.sync.put"]
+
+    events, _ = store.query(user_id="u1", since="2026-01-02T00:00:00.000000+00:00", until="2026-01-05T00:00:00.000000+00:00")
+    assert [e["event"] for e in events] == ["vocab.synchronize", "vocab.sync.put"]
+
+
+def test_pagination_cursor_walks_all_rows(store: AuditStore):
+    """Test pages of 2 cover every row exactly once"""
+    seen = []
+    cursor = None
+    while True:
+        events, cursor = store.query(limit=2, cursor=cursor)
+        seen.extend(e["event"] for e in events)
+        if cursor is None:
+            break
+    assert len(seen) == 5 and len(set(seen)) == 5
+    with pytest.raises(ValueError):
+        store.parse_cursor("garbage")
+
+
+def test_filtered_queries_use_an_index(store: AuditStore):
+    """Test user and event queries search an index instead of scanning the table"""
+    for args, presorted in (
+        (dict(user_id="u1", since="2026-01-02T00:00:00.000000+00:00"), True),
+        (dict(event="vocab.sync.put", until="2026-01-03T00:00:00.000000+00:00"), True),
+        (dict(since="2026-01-02T00:00:00.000000+00:00"), True),
+        # A prefix spans several events: matching rows are read through the index, then sorted
+        (dict(event="vocab.sync.*"), False),
+    ):
+        sql, params = AuditStore.select_sql(**args)
+        plan = " ".join(row[3] for row in store._conn.execute("EXPLAIN QUERY PLAN " + sql, params))
+        assert "USING INDEX" in plan, plan
+        assert ("USE TEMP B-TREE" not in plan) == presorted, plan
+
+
+def test_rebuild_from_rotated_segments(tmp_path):
+    """Test segments are read oldest first and local timestamps are converted to UTC"""
+    (tmp_path / "audit.log.2").write_text(_line("2026-01-01T09:00:00+0900", "user.register", "u1") + "\n", encoding="utf-8")
+    (tmp_path / "audit.log.1").write_text("not json\n" + _line("2026-01-02T00:00:00+0000", "word.create", "u1") + "\n", encoding="utf-8")
+    (tmp_path / "audit.log").write_text(_line("2026-01-03T00:00:00+0000", "word.delete", "u2") + "\n", encoding="utf-8")
+
+    segments = audit_log_segments(tmp_path)
+    assert [p.name for p in segments] == ["audit.log.2", "audit.log.1", "audit.log"]
+    store = AuditStore(tmp_path / "audit.sqlite3")
+    try:
+        assert store.rebuild(read_segment_lines(segments)) == 3
+        events, _ = store.query(user_id="u1", until="2026-01-01T00:00:01.000000+00:00")
+        assert [e["event"] for e in events] == ["user.register"]
+    finally:
+        store.close()
+
+
+def test_rebuilt_index_matches_live_timestamps(tmp_path):
+    """Test a rebuild indexes the same microsecond ts_utc as the live handler, so cursors survive"""
+    import logging
+
+    from app.infra.audit_store import AuditStoreHandler
+    from app.logging_setup import JsonFormatter
+
+    live = AuditStore(tmp_path / "live.sqlite3")
+    handler = AuditStoreHandler(live)
+    handler.setFormatter(JsonFormatter())
+    lines = []
+    for i, created in enumerate((1767225600.250001, 1767225600.750002)):
+        record = logging.LogRecord("app.audit", logging.INFO, __file__, 0, "event", None, None)
+        record.created = created
+        record.event = f"word.create.{i}"
+        record.user_id = "u1"
+        handler.emit(record)
+        lines.append(handler.format(record))
+
+    rebuilt = AuditStore(tmp_path / "rebuilt.sqlite3")
+    try:
+        assert rebuilt.rebuild(lines) == 2
+        live_rows = live._conn.execute("SELECT id, ts_utc FROM audit_events ORDER BY id").fetchall()
+        rebuilt_rows = rebuilt._conn.execute("SELECT id, ts_utc FROM audit_events ORDER BY id").fetchall()
+        assert [tuple(r) for r in rebuilt_rows] == [tuple(r) for r in live_rows]
+        assert live_rows[0][1] == "2026-01-01T00:00:00.250001+00:00"
+
+        _, cursor = live.query(user_id="u1", limit=1)
+        events, _ = rebuilt.query(user_id="u1", limit=1, cursor=cursor)
+        assert [e["event"] for e in events] == ["word.create.0"]
+    finally:
+        handler.close()
+        rebuilt.close()
+
+
+@pytest.mark.asyncio
+async def test_admin_audit_query(admin_client: tuple[AsyncClient, dict, str]):
+    """Test audit events written through app.audit can be queried by admins"""
+    client, user_data, access_token = admin_client
+    headers = {"Authorization": f"Bearer {access_token}"}
+    await client.post("/api/words", json={"headword": "audit", "pos": "noun", "meaningJa": "監査"}, headers=headers)
+    flush_logging()
+
+    response = await client.get(f"/api/admin/audit?userId={user_data['userId']}", headers=headers)
+    assert response.status_code == 200
+    events = response.json()["events"]
+    assert events and all(e["user_id"] == user_data["userId"] for e in events)
+    assert "user.register" in [e["event"] for e in events]
+
+    query = f"/api/admin/audit?userId={user_data['userId']}&event=user.*&since=2000-01-01T00:00:00&limit=1"
+    body = (await client.get(query, headers=headers)).json()
+    assert [e["event"] for e in body["events"]] == ["user.login"]
+    body = (await client.get(f"{query}&cursor={body['nextCursor']}", headers=headers)).json()
+    assert [e["event"] for e in body["events"]] == ["user.register"]
+    assert body["nextCursor"] is None
+
+    response = await client.get("/api/admin/audit?cursor=bad", headers=headers)
+    assert response.status_code == 400
+    assert response.json()["error"]["error_code"] == "INVALID_CURSOR"
+
+
+@pytest.mark.asyncio
+async def test_audit_query_requires_admin(authenticated_client: tuple[AsyncClient, dict, str]):
+    """Test non-admin users get 403"""
+    client, _, access_token = authenticated_client
+    response = await client.get("/api/admin/audit", headers={"Authorization": f"Bearer {access_token}"})
+    assert response.status_code == 403
@@ -268,6 +268,41 @@ async def test_duplicate_username_registration(client: AsyncClient, unique_usern
     assert error["error_code"] == "USER_EXISTS"
 
 
+@pytest.mark.asyncio
+async def test_duplicate_username_rejected_before_hashing(client: AsyncClient, unique_username, monkeypatch):
+    """Test a taken username is rejected without computing a password hash"""
+    from app.service.auth_service import AuthService
+
+    username = unique_username()
+    resp = await client.post("/api/auth/register", json={"username": username, "password": "testpass123"})
+    assert resp.status_code == 200
+
+    async def fail(*args, **kwargs):
+        raise AssertionError("duplicate username should be rejected before hashing")
+
+    monkeypatch.setattr(AuthService, "hash_password", fail)
+    resp = await client.post("/api/auth/register", json={"username": username, "password": "other_pass"})
+    assert resp.status_code == 400
+    assert resp.json()["error"]["error_code"] == "USER_EXISTS"
+
+
+@pytest.mark.asyncio
+async def test_register_reports_hashing_pool_down(client: AsyncClient, unique_username, monkeypatch):
+    """Test an unavailable hashing pool gets its own 503 message, distinct from busy"""
+    from app.domain.exceptions import PasswordHashingUnavailableError
+    from app.service.auth_service import AuthService
+
+    async def unavailable(*args, **kwargs):
+        raise PasswordHashingUnavailableError()
+
+    monkeypatch.setattr(AuthService, "hash_password", unavailable)
+    resp = await client.post("/api/auth/register", json={"username": unique_username(), "password": "testpass123"})
+    assert resp.status_code == 503
+    error = resp.json()["error"]
+    assert error["error_code"] == "AUTH_UNAVAILABLE"
+    assert error["message_key"] == "auth.unavailable"
+
+
 @pytest.mark.asyncio
 async def test_login_with_wrong_password(client: AsyncClient, unique_username):
     """Test that login fails with wrong password"""
@@ -505,3 +540,71 @@ async def test_auth_status_with_invalid_access_but_valid_refresh(client: AsyncCl
     assert data["ok"] is True
     assert data["authenticated"] is False
     assert data["canRefresh"] is True
+
+
+@pytest.mark.asyncio
+async def test_principal_cache_serves_repeat_requests(client: AsyncClient, unique_username, monkeypatch):
+    """Test repeat requests skip JWT verification and the users.json scan"""
+    from app import services
+    from app.infra.jwt_provider import JWTProvider
+
+    username = unique_username()
+    await client.post("/api/auth/register", json={"username": username, "password": "testpass123"})
+    login_resp = await client.post("/api/auth/login", json={"username": username, "password": "testpass123"})
+    headers = {"Authorization": f"Bearer {login_resp.json()['access_token']}"}
+    assert (await client.get("/api/auth/me", headers=headers)).status_code == 200
+
+    def fail(*args, **kwargs):
+        raise AssertionError("principal should be served from the cache")
+
+    monkeypatch.setattr(JWTProvider, "verify_access_token", fail)
+    monkeypatch.setattr(services, "find_user_by_id", fail)
+
+    resp = await client.get("/api/auth/me", headers=headers)
+    assert resp.status_code == 200
+    assert resp.json()["username"] == username
+    resp = await client.get("/api/auth/status", headers=headers)
+    assert resp.json()["authenticated"] is True
+    assert resp.json()["username"] == username
+
+
+@pytest.mark.asyncio
+async def test_disabling_account_invalidates_cached_principal(client: AsyncClient, unique_username):
+    """Test a disabled account is rejected right away despite a cached token"""
+    from app import storage
+
+    username = unique_username()
+    await client.post("/api/auth/register", json={"username": username, "password": "testpass123"})
+    login_resp = await client.post("/api/auth/login", json={"username": username, "password": "testpass123"})
+    headers = {"Authorization": f"Bearer {login_resp.json()['access_token']}"}
+    assert (await client.get("/api/auth/me", headers=headers)).status_code == 200
+
+    path = storage.users_file_path()
+    data = storage.read_json(path)
+    for user in data["users"]:
+        if user["username"] == username:
+            user["disabled"] = True
+    storage.atomic_write_json(path, data)
+
+    resp = await client.get("/api/auth/me", headers=headers)
+    assert resp.status_code == 401
+    assert resp.json()["error"]["error_code"] == "USER_DISABLED"
+
+
+@pytest.mark.asyncio
+async def test_deleted_account_drops_cached_principal(client: AsyncClient, unique_username):
+    """Test deleting an account evicts its cached tokens"""
+    from app.service.principal_cache import principal_cache
+
+    username = unique_username()
+    await client.post("/api/auth/register", json={"username": username, "password": "testpass123"})
+    login_resp = await client.post("/api/auth/login", json={"username": username, "password": "testpass123"})
+    access_token = login_resp.json()["access_token"]
+    headers = {"Authorization": f"Bearer {access_token}"}
+    assert (await client.get("/api/auth/me", headers=headers)).status_code == 200
+    assert principal_cache.claims(access_token) is not None
+
+    assert (await client.delete("/api/auth/me", headers=headers)).status_code == 200
+
+    assert principal_cache.claims(access_token) is None
+    assert (await client.get("/api/auth/me", headers=headers)).status_code == 401
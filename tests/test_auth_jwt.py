@@ -144,6 +144,105 @@ class TestTokenStore:
             token_id, record = result
             assert record.revoked_at_utc is not None
 
+    async def test_state_survives_restart_via_append_log(self, tmp_path):
+        """Test mutations are replayed from the append log by a fresh store"""
+        store = JsonTokenStore(data_dir=str(tmp_path))
+        for i in range(3):
+            await store.add_token(
+                token_id=f"tok_{i}",
+                user_id="user_123",
+                token_hash=hash_refresh_token(f"token-{i}", "test-salt"),
+                family_id="fam_log",
+                prev_token_id=None,
+                ttl_days=30 if i else -1,
+            )
+        await store.mark_replaced("tok_1", "tok_2")
+        await store.cleanup_expired()
+        # Simulate a crash mid-append
+        with open(store.log_path, "a", encoding="utf-8") as f:
+            f.write('{"put": {"tok_')
+
+        assert not store.store_path.exists()  # nothing snapshotted yet
+        reopened = JsonTokenStore(data_dir=str(tmp_path))
+        assert await reopened.find_by_hash(hash_refresh_token("token-0", "test-salt")) is None
+        _, record = await reopened.find_by_hash(hash_refresh_token("token-1", "test-salt"))
+        assert record.replaced_by_token_id == "tok_2"
+        assert (await reopened.load()).family_index == {"fam_log": ["tok_1", "tok_2"]}
+
+    async def test_log_is_folded_into_snapshot(self, tmp_path):
+        """Test periodic snapshots truncate the append log"""
+        store = JsonTokenStore(data_dir=str(tmp_path), snapshot_every=2)
+        for i in range(3):
+            await store.add_token(
+                token_id=f"tok_{i}",
+                user_id="user_123",
+                token_hash=hash_refresh_token(f"token-{i}", "test-salt"),
+                family_id=f"fam_{i}",
+                prev_token_id=None,
+                ttl_days=30,
+            )
+
+        assert len(store.log_path.read_text(encoding="utf-8").splitlines()) == 1
+        await store.close()
+        assert store.log_path.read_text(encoding="utf-8") == ""
+
+        reopened = JsonTokenStore(data_dir=str(tmp_path))
+        assert len((await reopened.load()).tokens) == 3
+
+    async def test_snapshot_is_written_off_loop_and_keeps_later_changes(self, tmp_path):
+        """Test a background snapshot plus both logs replay to the live state"""
+        store = JsonTokenStore(data_dir=str(tmp_path), snapshot_every=2)
+        for i in range(2):
+            await store.add_token(
+                token_id=f"tok_{i}",
+                user_id="user_123",
+                token_hash=hash_refresh_token(f"token-{i}", "test-salt"),
+                family_id="fam_bg",
+                prev_token_id=None,
+                ttl_days=30,
+            )
+        # The log was moved aside; the snapshot is still being written
+        assert store.old_log_path.exists()
+        await store.revoke_token("tok_0")
+
+        reopened = JsonTokenStore(data_dir=str(tmp_path))
+        _, record = await reopened.find_by_hash(hash_refresh_token("token-0", "test-salt"))
+        assert record.revoked_at_utc is not None
+
+        await store._wait_snapshot()
+        assert store.store_path.exists()
+        assert not store.old_log_path.exists()
+        reopened = JsonTokenStore(data_dir=str(tmp_path))
+        assert len((await reopened.load()).tokens) == 2
+        _, record = await reopened.find_by_hash(hash_refresh_token("token-0", "test-salt"))
+        assert record.revoked_at_utc is not None
+
+    async def test_compact_removes_oldest_first_in_batches(self, tmp_path):
+        """Test compaction removes expired, then long-revoked tokens, batch by batch"""
+        store = JsonTokenStore(data_dir=str(tmp_path))
+        for i, ttl_days in enumerate([-1, -3, 30, -2, 30]):
+            await store.add_token(
+                token_id=f"tok_{i}",
+                user_id="user_123",
+                token_hash=hash_refresh_token(f"token-{i}", "test-salt"),
+                family_id=f"fam_{i}",
+                prev_token_id=None,
+                ttl_days=ttl_days,
+            )
+        await store.revoke_family("fam_4")
+
+        assert await store.compact(limit=2) == 2
+        assert set((await store.load()).tokens) == {"tok_0", "tok_2", "tok_4"}
+        # Revoked tokens stay until the retention period has passed
+        assert await store.compact(limit=2, revoked_retention_seconds=3600) == 1
+        assert await store.compact(limit=2, revoked_retention_seconds=0) == 1
+        assert await store.compact(limit=2, revoked_retention_seconds=0) == 0
+        assert await store.count() == 1
+
+        reopened = JsonTokenStore(data_dir=str(tmp_path))
+        assert set((await reopened.load()).tokens) == {"tok_2"}
+        assert (await reopened.load()).family_index == {"fam_2": ["tok_2"]}
+
 
 class TestAuthService:
     """Test authentication service"""
@@ -331,3 +430,142 @@ class TestAuthService:
         for token_id in token_ids:
             if token_id in store.tokens:
                 assert store.tokens[token_id].revoked_at_utc is not None
+
+    async def test_rotation_is_one_log_append(self, auth_service, token_store):
+        """Test rotation persists successor, replaced marker and last use in one write"""
+        from app.infra.token_store_json import generate_refresh_token
+
+        refresh_token = generate_refresh_token()
+        await token_store.add_token(
+            token_id="tok_initial",
+            user_id="test-user",
+            token_hash=hash_refresh_token(refresh_token, "test-salt"),
+            family_id="fam_single_write",
+            prev_token_id=None,
+            ttl_days=30
+        )
+        lines_before = token_store.log_path.read_text(encoding="utf-8").count("\n")
+
+        assert await auth_service.refresh(refresh_token) is not None
+
+        assert token_store.log_path.read_text(encoding="utf-8").count("\n") == lines_before + 1
+        _, old_record = await token_store.find_by_hash(hash_refresh_token(refresh_token, "test-salt"))
+        assert old_record.replaced_by_token_id is not None
+        assert old_record.last_used_at_utc is not None
+
+    async def test_concurrent_refresh_rotates_once(self, auth_service, token_store):
+        """Test parallel refreshes of one token cannot both rotate it"""
+        import asyncio
+        from app.infra.token_store_json import generate_refresh_token
+
+        refresh_token = generate_refresh_token()
+        await token_store.add_token(
+            token_id="tok_initial",
+            user_id="test-user",
+            token_hash=hash_refresh_token(refresh_token, "test-salt"),
+            family_id="fam_parallel",
+            prev_token_id=None,
+            ttl_days=30
+        )
+
+        results = await asyncio.gather(
+            auth_service.refresh(refresh_token),
+            auth_service.refresh(refresh_token),
+            return_exceptions=True,
+        )
+
+        assert sum(1 for r in results if isinstance(r, tuple)) == 1
+        assert sum(1 for r in results if isinstance(r, RefreshTokenReusedError)) == 1
+        assert auth_service._family_locks == {}
+
+    async def test_reuse_within_grace_window(self, jwt_provider, token_store):
+        """Test a replaced token reused inside the grace window gets its successor again"""
+        from app.infra.token_store_json import generate_refresh_token
+
+        auth_service = AuthService(
+            jwt_provider=jwt_provider,
+            token_store=token_store,
+            refresh_salt="test-salt",
+            reuse_grace_seconds=60
+        )
+        refresh_token = generate_refresh_token()
+        await token_store.add_token(
+            token_id="tok_initial",
+            user_id="test-user",
+            token_hash=hash_refresh_token(refresh_token, "test-salt"),
+            family_id="fam_grace",
+            prev_token_id=None,
+            ttl_days=30
+        )
+
+        _, first_token, _ = await auth_service.refresh(refresh_token)
+        for _ in range(3):
+            access_token, second_token, _ = await auth_service.refresh(refresh_token)
+            assert access_token
+            assert second_token == first_token
+
+        assert await auth_service.has_active_refresh_token(first_token)
+        store = await token_store.load()
+        assert len(store.family_index["fam_grace"]) == 2
+
+    async def test_repeated_reuse_within_grace_window_mints_one_sibling(self, jwt_provider, token_store):
+        """Test a replaced token whose successor is gone gets one sibling, not one per reuse"""
+        from app.infra.token_store_json import generate_refresh_token
+
+        auth_service = AuthService(
+            jwt_provider=jwt_provider,
+            token_store=token_store,
+            refresh_salt="test-salt",
+            reuse_grace_seconds=60
+        )
+        refresh_token = generate_refresh_token()
+        await token_store.add_token(
+            token_id="tok_initial",
+            user_id="test-user",
+            token_hash=hash_refresh_token(refresh_token, "test-salt"),
+            family_id="fam_repeat",
+            prev_token_id=None,
+            ttl_days=30
+        )
+
+        _, first_token, _ = await auth_service.refresh(refresh_token)
+        # The successor moves on (its owner rotated it), then the old token is replayed
+        _, rotated_token, _ = await auth_service.refresh(first_token)
+        _, sibling_token, _ = await auth_service.refresh(refresh_token)
+        for _ in range(3):
+            _, again, _ = await auth_service.refresh(refresh_token)
+            assert again == sibling_token
+
+        assert sibling_token not in (first_token, rotated_token)
+        assert await auth_service.has_active_refresh_token(sibling_token)
+        store = await token_store.load()
+        assert len(store.family_index["fam_repeat"]) == 4
+
+    async def test_reuse_after_grace_window(self, jwt_provider, token_store):
+        """Test a replaced token reused after the grace window still revokes the family"""
+        from app.infra.token_store_json import generate_refresh_token
+
+        auth_service = AuthService(
+            jwt_provider=jwt_provider,
+            token_store=token_store,
+            refresh_salt="test-salt",
+            reuse_grace_seconds=60
+        )
+        refresh_token = generate_refresh_token()
+        await token_store.add_token(
+            token_id="tok_initial",
+            user_id="test-user",
+            token_hash=hash_refresh_token(refresh_token, "test-salt"),
+            family_id="fam_late",
+            prev_token_id=None,
+            ttl_days=30
+        )
+        assert await auth_service.refresh(refresh_token) is not None
+        store = await token_store.load()
+        store.tokens["tok_initial"].last_used_at_utc = "2000-01-01T00:00:00+00:00"
+
+        with pytest.raises(RefreshTokenReusedError):
+            await auth_service.refresh(refresh_token)
+
+        store = await token_store.load()
+        assert all(store.tokens[t].revoked_at_utc for t in store.family_index["fam_late"])
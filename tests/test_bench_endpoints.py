@@ -0,0 +1,68 @@
+# tests/test_bench_endpoints.py
+"""Synthetic vault generator and the endpoint benchmark (smoke run at the smallest size)."""
+from __future__ import annotations
+
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+SCRIPTS = Path(__file__).resolve().parents[1] / "scripts"
+sys.path.insert(0, str(SCRIPTS))
+
+import bench_data  # noqa: E402
+from app.models import MemoryFile, WordsFile  # noqa: E402
+
+
+def test_vault_is_deterministic_and_valid():
+    words_a, memory_a = bench_data.make_vault(300, seed=7)
+    words_b, memory_b = bench_data.make_vault(300, seed=7)
+    assert [w["id"] for w in words_a["words"]] == [w["id"] for w in words_b["words"]]
+    assert [w["headword"] for w in words_a["words"]] == [w["headword"] for w in words_b["words"]]
+    assert bench_data.make_vault(300, seed=8)[0]["words"][0]["id"] != words_a["words"][0]["id"]
+
+    words = WordsFile(**words_a).words
+    memory = MemoryFile(**memory_a).memory
+    assert len({w.headword for w in words}) == 300
+    assert any(w.examples for w in words) and any(w.tags for w in words)
+    ids = {w.id for w in words}
+    assert 0 < len(memory) < 300 and all(m.wordId in ids for m in memory)
+
+    store = bench_data.make_refresh_store(500, users=20, seed=7)
+    assert len(store.tokens) == 500
+    assert sum(len(ids) for ids in store.family_index.values()) == 500
+
+
+@pytest.mark.slow
+def test_bench_endpoints_smoke(tmp_path):
+    out = tmp_path / "baseline.json"
+    proc = subprocess.run(
+        [sys.executable, str(SCRIPTS / "bench_endpoints.py"), "--sizes", "100", "--iterations", "2",
+         "--max-seconds", "0.1", "--sessions", "200", "--out", str(out)],
+        capture_output=True, text=True, timeout=300,
+    )
+    assert proc.returncode == 0, proc.stderr[-2000:]
+
+    baseline = json.loads(out.read_text(encoding="utf-8"))
+    result = baseline["results"]["100"]
+    assert result["seed"]["words"] == 100
+    assert result["sessions"] == 200
+    endpoints = result["endpoints"]
+    for name in ("words.list", "study.next", "vocab.put", "auth.refresh", "admin.audit", "admin.snapshot_diff"):
+        assert name in endpoints
+    for name, r in endpoints.items():
+        assert all(int(status) < 400 for status in r["statuses"]), (name, r["statuses"])
+        assert r["n"] >= 2 and r["p50_ms"] <= r["p99_ms"] <= r["max_ms"]
+    assert endpoints["words.list"]["peak_kib"] > 0
+
+    # Unchanged baseline: no regression; p50 tripled: exit 1
+    compare = [sys.executable, str(SCRIPTS / "bench_endpoints.py"), "--compare", str(out)]
+    assert subprocess.run(compare + [str(out)], capture_output=True, timeout=60).returncode == 0
+    endpoints["words.list"]["p50_ms"] = endpoints["words.list"]["p50_ms"] * 3 + 10
+    slower = tmp_path / "slower.json"
+    slower.write_text(json.dumps(baseline), encoding="utf-8")
+    proc = subprocess.run(compare + [str(slower)], capture_output=True, text=True, timeout=60)
+    assert proc.returncode == 1
+    assert "100 words.list p50_ms" in proc.stdout
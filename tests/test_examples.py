@@ -342,3 +342,224 @@ async def test_get_tags_requires_auth(client: AsyncClient):
     """Test that authentication is required for tags endpoint"""
     response = await client.get("/api/examples/tags")
     assert response.status_code == 401
+
+
+def test_alias_table_respects_weights():
+    """Test alias table never picks zero-weight entries and follows weights"""
+    import random
+    from app.service.example_pool import AliasTable
+
+    rng = random.Random(42)
+    table = AliasTable([0.0, 1.0, 3.0])
+    counts = [0, 0, 0]
+    for _ in range(4000):
+        counts[table.sample(rng)] += 1
+
+    assert counts[0] == 0
+    assert 2.5 < counts[2] / counts[1] < 3.5
+
+
+@pytest.mark.asyncio
+async def test_next_example_avoids_recent_history(authenticated_client: tuple[AsyncClient, dict, str]):
+    """Test consecutive picks do not repeat recently shown examples"""
+    client, _, access_token = authenticated_client
+    headers = {"Authorization": f"Bearer {access_token}"}
+
+    await client.post(
+        "/api/words",
+        json={
+            "headword": "go",
+            "pos": "verb",
+            "meaningJa": "行く",
+            "examples": [{"en": f"Sentence {i}."} for i in range(3)],
+        },
+        headers=headers
+    )
+
+    seen = []
+    for _ in range(9):
+        response = await client.get("/api/examples/next?weighted=true", headers=headers)
+        assert response.status_code == 200
+        seen.append(response.json()["example"]["id"])
+
+    # With 3 examples the history window is 2, so every 3 consecutive picks are distinct
+    for i in range(len(seen) - 2):
+        assert len(set(seen[i:i + 3])) == 3
+
+
+@pytest.mark.asyncio
+async def test_next_example_pool_refreshes_after_word_update(authenticated_client: tuple[AsyncClient, dict, str]):
+    """Test cached example pool is rebuilt when the vault changes"""
+    client, _, access_token = authenticated_client
+    headers = {"Authorization": f"Bearer {access_token}"}
+
+    create = await client.post(
+        "/api/words",
+        json={"headword": "eat", "pos": "verb", "meaningJa": "食べる", "examples": [{"en": "I eat rice."}]},
+        headers=headers
+    )
+    word_id = create.json()["word"]["id"]
+
+    response = await client.get("/api/examples/next", headers=headers)
+    assert response.json()["example"]["en"] == "I eat rice."
+
+    await client.put(
+        f"/api/words/{word_id}",
+        json={"headword": "eat", "pos": "verb", "meaningJa": "食べる", "examples": [{"en": "She eats bread."}]},
+        headers=headers
+    )
+
+    response = await client.get("/api/examples/next", headers=headers)
+    assert response.json()["example"]["en"] == "She eats bread."
+
+
+@pytest.mark.asyncio
+async def test_search_examples_ranks_and_links_word(authenticated_client: tuple[AsyncClient, dict, str]):
+    """Test BM25 search over English and Japanese example text"""
+    client, _, access_token = authenticated_client
+    headers = {"Authorization": f"Bearer {access_token}"}
+
+    run = await client.post(
+        "/api/words",
+        json={
+            "headword": "run",
+            "pos": "verb",
+            "meaningJa": "走る",
+            "examples": [
+                {"en": "I run every morning before breakfast.", "ja": "毎朝朝食の前に走ります。"},
+                {"en": "Run, run, run to the station!", "ja": "駅まで走れ！"},
+            ],
+        },
+        headers=headers
+    )
+    run_id = run.json()["word"]["id"]
+    await client.post(
+        "/api/words",
+        json={"headword": "eat", "pos": "verb", "meaningJa": "食べる", "examples": [{"en": "I eat breakfast.", "ja": "朝食を食べる。"}]},
+        headers=headers
+    )
+
+    response = await client.get("/api/examples/search", params={"q": "run"}, headers=headers)
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [r["word"]["id"] for r in results] == [run_id, run_id]
+    # Higher term frequency ranks first
+    assert results[0]["example"]["en"] == "Run, run, run to the station!"
+
+    response = await client.get("/api/examples/search", params={"q": "朝食"}, headers=headers)
+    assert {r["word"]["headword"] for r in response.json()["results"]} == {"run", "eat"}
+
+    response = await client.get("/api/examples/search", params={"q": "breakfast"}, headers=headers)
+    assert len(response.json()["results"]) == 2
+
+    response = await client.get("/api/examples/search", params={"q": "swim"}, headers=headers)
+    assert response.json()["results"] == []
+
+
+@pytest.mark.asyncio
+async def test_search_examples_follows_word_mutations(authenticated_client: tuple[AsyncClient, dict, str]):
+    """Test the search index tracks word update and delete"""
+    client, _, access_token = authenticated_client
+    headers = {"Authorization": f"Bearer {access_token}"}
+
+    create = await client.post(
+        "/api/words",
+        json={"headword": "eat", "pos": "verb", "meaningJa": "食べる", "examples": [{"en": "I eat rice."}]},
+        headers=headers
+    )
+    word_id = create.json()["word"]["id"]
+    response = await client.get("/api/examples/search", params={"q": "rice"}, headers=headers)
+    assert len(response.json()["results"]) == 1
+
+    await client.put(
+        f"/api/words/{word_id}",
+        json={"headword": "eat", "pos": "verb", "meaningJa": "食べる", "examples": [{"en": "She eats bread."}]},
+        headers=headers
+    )
+    response = await client.get("/api/examples/search", params={"q": "rice"}, headers=headers)
+    assert response.json()["results"] == []
+    response = await client.get("/api/examples/search", params={"q": "bread"}, headers=headers)
+    assert response.json()["results"][0]["example"]["en"] == "She eats bread."
+
+    await client.delete(f"/api/words/{word_id}", headers=headers)
+    response = await client.get("/api/examples/search", params={"q": "bread"}, headers=headers)
+    assert response.json()["results"] == []
+
+
+@pytest.mark.asyncio
+async def test_search_examples_single_kanji_query(authenticated_client: tuple[AsyncClient, dict, str]):
+    """Test a one-character Japanese query finds the examples containing it"""
+    client, _, access_token = authenticated_client
+    headers = {"Authorization": f"Bearer {access_token}"}
+
+    await client.post(
+        "/api/words",
+        json={"headword": "dog", "pos": "noun", "meaningJa": "犬", "examples": [{"en": "The dog runs.", "ja": "犬が走る。"}]},
+        headers=headers
+    )
+    await client.post(
+        "/api/words",
+        json={"headword": "cat", "pos": "noun", "meaningJa": "猫", "examples": [{"en": "The cat sleeps.", "ja": "猫が寝る。"}]},
+        headers=headers
+    )
+
+    response = await client.get("/api/examples/search", params={"q": "犬"}, headers=headers)
+    assert [r["word"]["headword"] for r in response.json()["results"]] == ["dog"]
+    response = await client.get("/api/examples/search", params={"q": "猫"}, headers=headers)
+    assert [r["word"]["headword"] for r in response.json()["results"]] == ["cat"]
+    # Longer queries still match by bigram, not by any shared character
+    response = await client.get("/api/examples/search", params={"q": "犬が"}, headers=headers)
+    assert [r["word"]["headword"] for r in response.json()["results"]] == ["dog"]
+
+
+@pytest.mark.asyncio
+async def test_next_example_history_is_bounded_and_dropped_on_delete(
+    authenticated_client: tuple[AsyncClient, dict, str], monkeypatch
+):
+    """Test recent-example history is capped per user count and dropped with the account"""
+    from app.service import example_pool
+
+    client, user_data, access_token = authenticated_client
+    headers = {"Authorization": f"Bearer {access_token}"}
+    user_id = user_data["userId"]
+    await client.post(
+        "/api/words",
+        json={"headword": "go", "pos": "verb", "meaningJa": "行く", "examples": [{"en": "Go home."}]},
+        headers=headers,
+    )
+    response = await client.get("/api/examples/next", headers=headers)
+    assert response.status_code == 200
+    assert user_id in example_pool._recent
+    assert any(key[0] == user_id for key in example_pool._pools)
+
+    monkeypatch.setattr(example_pool.settings, "example_history_users", 1)
+    example_pool._recent["other-user"] = example_pool.deque()
+    await client.get("/api/examples/next", headers=headers)
+    assert list(example_pool._recent) == [user_id]
+
+    response = await client.delete("/api/auth/me", headers=headers)
+    assert response.status_code == 200
+    assert user_id not in example_pool._recent
+    assert not any(key[0] == user_id for key in example_pool._pools)
+
+
+def test_search_index_keeps_examples_with_duplicate_ids():
+    """Test examples sharing an id are indexed separately and fully removed"""
+    from app.models import ExampleSentence, WordEntry
+    from app.service.example_search import ExampleSearchIndex
+
+    word = WordEntry(
+        id="w1", headword="river", pos="noun", meaningJa="川",
+        examples=[ExampleSentence(id="dup", en="A long river."), ExampleSentence(id="dup", en="The river bank.")],
+        createdAt="2024-01-01T00:00:00+00:00", updatedAt="2024-01-01T00:00:00+00:00",
+    )
+    index = ExampleSearchIndex()
+    index.add_word(word)
+
+    assert len(index) == 2
+    assert len(index.search("river")) == 2
+    assert index._total_len == sum(index._doc_len.values())
+
+    index.remove_word("w1")
+    assert len(index) == 0
+    assert index._total_len == 0
@@ -724,4 +724,130 @@ async def test_import_merge_with_timestamp_comparison(authenticated_client: tupl
     words = words_response.json()["words"]
     assert len(words) == 1
     assert words[0]["headword"] == "updated"
-    assert words[0]["meaningJa"] == "最新版"
\ No newline at end of file
+    assert words[0]["meaningJa"] == "最新版"
+
+async def _wait_for_job(client: AsyncClient, headers: dict, job_id: str) -> dict:
+    """Poll an import job until it leaves the queued/running states."""
+    import asyncio
+
+    for _ in range(200):
+        response = await client.get(f"/api/io/jobs/{job_id}", headers=headers)
+        assert response.status_code == 200
+        job = response.json()["job"]
+        if job["status"] not in ("queued", "running"):
+            return job
+        await asyncio.sleep(0.01)
+    raise AssertionError(f"import job {job_id} did not finish")
+
+
+@pytest.mark.asyncio
+async def test_import_async_job_records_merge_counts(authenticated_client: tuple[AsyncClient, dict, str]):
+    """Test async import returns a job id and the finished job records merge counts."""
+    client, _, access_token = authenticated_client
+    headers = {"Authorization": f"Bearer {access_token}"}
+
+    import_data = {
+        "schemaVersion": 1,
+        "words": [
+            {"id": f"w{i}", "headword": f"word{i}", "pos": "noun", "meaningJa": f"単語{i}"}
+            for i in range(3)
+        ],
+        "memory": [{"wordId": "w0", "dueAt": "2026-01-01T00:00:00Z"}],
+    }
+
+    response = await client.post("/api/io/import?mode=merge&async=true", json=import_data, headers=headers)
+    assert response.status_code == 202
+    job_id = response.json()["job"]["jobId"]
+
+    job = await _wait_for_job(client, headers, job_id)
+    assert job["status"] == "succeeded"
+    assert job["validated"] == 3
+    assert job["merged"] == 4
+    assert job["result"] == {"added_words": 3, "updated_words": 0, "added_memory": 1, "updated_memory": 0}
+
+    words = (await client.get("/api/words", headers=headers)).json()["words"]
+    assert sorted(w["headword"] for w in words) == ["word0", "word1", "word2"]
+
+
+@pytest.mark.asyncio
+async def test_import_async_job_validation_failure(authenticated_client: tuple[AsyncClient, dict, str]):
+    """Test async import with invalid data ends as a failed job with errors."""
+    client, _, access_token = authenticated_client
+    headers = {"Authorization": f"Bearer {access_token}"}
+
+    response = await client.post(
+        "/api/io/import?async=true",
+        json={"schemaVersion": 2, "words": [{"headword": "x", "pos": "noun", "meaningJa": "x"}]},
+        headers=headers,
+    )
+    assert response.status_code == 202
+
+    job = await _wait_for_job(client, headers, response.json()["job"]["jobId"])
+    assert job["status"] == "failed"
+    assert any("schemaVersion" in e for e in job["errors"])
+
+
+@pytest.mark.asyncio
+async def test_import_async_job_cancel_and_dedupe(authenticated_client: tuple[AsyncClient, dict, str]):
+    """Test a queued job is de-duplicated on retry and can be cancelled before it runs."""
+    from app import storage
+
+    client, user_data, access_token = authenticated_client
+    headers = {"Authorization": f"Bearer {access_token}"}
+    import_data = {"words": [{"headword": "later", "pos": "noun", "meaningJa": "後で"}]}
+
+    # Hold the vault lock so the job stays queued
+    async with storage.user_lock(user_data["userId"]):
+        first = await client.post("/api/io/import?async=true", json=import_data, headers=headers)
+        retry = await client.post("/api/io/import?async=true", json=import_data, headers=headers)
+        job_id = first.json()["job"]["jobId"]
+        assert retry.json()["job"]["jobId"] == job_id
+
+        cancel = await client.delete(f"/api/io/jobs/{job_id}", headers=headers)
+        assert cancel.status_code == 200
+        assert cancel.json()["job"]["status"] == "cancelled"
+
+    job = await _wait_for_job(client, headers, job_id)
+    assert job["status"] == "cancelled"
+    words = (await client.get("/api/words", headers=headers)).json()["words"]
+    assert words == []
+
+    # Cancelling again is idempotent; unknown ids are 404
+    assert (await client.delete(f"/api/io/jobs/{job_id}", headers=headers)).status_code == 200
+    assert (await client.get("/api/io/jobs/unknown", headers=headers)).status_code == 404
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("writing, expected", [(False, "cancelled"), (True, "succeeded")])
+async def test_import_job_stop_waits_for_running_thread(
+    authenticated_client: tuple[AsyncClient, dict, str], monkeypatch, writing, expected
+):
+    """Test stop() waits for a running import thread and reports what it did to the vault."""
+    import asyncio
+    import threading
+
+    from app.models import AppDataForImport
+    from app.service import import_jobs
+
+    _, user_data, _ = authenticated_client
+    started, release = threading.Event(), threading.Event()
+
+    def slow_import(user_id, app, mode, progress=None):
+        started.set()
+        release.wait(5)
+        if not writing:
+            progress("merged", 1)  # last cancellation check before the vault is written
+        return {"valid": True}, {"added_words": 1}
+
+    monkeypatch.setattr(import_jobs, "validate_and_import", slow_import)
+    manager = import_jobs.ImportJobManager(workers=1)
+    await manager.start()
+    job = await manager.submit(user_data["userId"], user_data["username"], AppDataForImport(), "merge")
+    assert await asyncio.to_thread(started.wait, 5)
+
+    stopping = asyncio.create_task(manager.stop())
+    await asyncio.sleep(0.05)
+    assert not stopping.done()
+    release.set()
+    await stopping
+    assert job.status == expected
@@ -0,0 +1,90 @@
+# tests/test_log_archive.py
+"""Tests for background compression and retention of rotated log segments."""
+from __future__ import annotations
+
+import gzip
+import json
+import logging
+import os
+import time
+
+from app.infra.audit_store import AuditStore, audit_log_segments, read_segment_lines
+from app.infra.log_archive import CompressingRotatingFileHandler, SegmentArchiver, log_segments, open_segment
+
+
+def _read(path) -> list[str]:
+    with open_segment(path) as f:
+        return f.read().splitlines()
+
+
+def test_rollover_compresses_segments_in_background(tmp_path):
+    """Test rotated segments end up gzipped, bounded in count and readable in order"""
+    base = tmp_path / "app.log"
+    handler = CompressingRotatingFileHandler(base, max_bytes=300, backup_count=3)
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    try:
+        for i in range(60):
+            handler.emit(logging.LogRecord("t", logging.INFO, __file__, 1, f"line {i:03d}", None, None))
+        handler.archiver.wait_idle()
+        segments = log_segments(base)
+        assert 0 < len(segments) <= 3
+        assert all(p.name.endswith(".gz") for p in segments)
+
+        lines = [line for p in segments for line in _read(p)] + _read(base)
+        numbers = [int(line.split()[1]) for line in lines]
+        assert numbers == sorted(numbers) and numbers[-1] == 59
+        assert numbers == list(range(numbers[0], 60))
+    finally:
+        handler.close()
+
+
+def test_retention_by_size_and_age_and_legacy_segments(tmp_path):
+    """Test legacy numbered segments sort first, get compressed, and old/oversized ones are removed"""
+    base = tmp_path / "audit.log"
+    now = time.time()
+    for name, age_days in (("audit.log.2", 40), ("audit.log.1", 20), ("audit.log.20260101T000000000000", 10),
+                           ("audit.log.20260102T000000000000", 1)):
+        path = tmp_path / name
+        path.write_text(f"{name}\n" * 1000, encoding="utf-8")
+        os.utime(path, (now - age_days * 86400, now - age_days * 86400))
+    (tmp_path / "audit.log.20260102T000000000000.gz.tmp").write_bytes(b"partial")
+
+    assert [p.name for p in log_segments(base)][:2] == ["audit.log.2", "audit.log.1"]
+
+    SegmentArchiver(base, max_segments=0, max_age_seconds=30 * 86400).run_once()
+    names = [p.name for p in log_segments(base)]
+    assert names == ["audit.log.1.gz", "audit.log.20260101T000000000000.gz", "audit.log.20260102T000000000000.gz"]
+    assert not list(tmp_path.glob("*.tmp"))
+    # compression keeps the segment's own mtime for age checks
+    assert (tmp_path / "audit.log.1.gz").stat().st_mtime < now - 19 * 86400
+
+    newest = tmp_path / "audit.log.20260102T000000000000.gz"
+    SegmentArchiver(base, max_segments=0, max_bytes=newest.stat().st_size).run_once()
+    assert log_segments(base) == [newest]
+
+
+def test_segment_mid_compression_is_listed_once(tmp_path):
+    """Test a segment present under both names is read from the finished .gz"""
+    base = tmp_path / "app.log"
+    (tmp_path / "app.log.20260101T000000000000").write_text("a\n", encoding="utf-8")
+    with gzip.open(tmp_path / "app.log.20260101T000000000000.gz", "wt", encoding="utf-8") as f:
+        f.write("a\n")
+    assert [p.name for p in log_segments(base)] == ["app.log.20260101T000000000000.gz"]
+
+
+def test_audit_rebuild_reads_compressed_segments(tmp_path):
+    """Test the audit index can be rebuilt from gzipped segments"""
+    def line(ts: str, event: str) -> str:
+        return json.dumps({"ts": ts, "event": event, "user_id": "u1"}) + "\n"
+
+    with gzip.open(tmp_path / "audit.log.20260101T000000000000.gz", "wt", encoding="utf-8") as f:
+        f.write(line("2026-01-01T00:00:00+0000", "user.register"))
+    (tmp_path / "audit.log").write_text(line("2026-01-02T00:00:00+0000", "word.create"), encoding="utf-8")
+
+    store = AuditStore(tmp_path / "audit.sqlite3")
+    try:
+        assert store.rebuild(read_segment_lines(audit_log_segments(tmp_path))) == 2
+        events, _ = store.query(user_id="u1")
+        assert [e["event"] for e in events] == ["word.create", "user.register"]
+    finally:
+        store.close()
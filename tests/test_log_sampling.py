@@ -0,0 +1,51 @@
+# tests/test_log_sampling.py
+"""
+Tests for the http_request sampling policy and the client log token buckets.
+"""
+
+from app import log_sampling
+from app.log_sampling import ClientLogLimiter, HttpLogSampler
+
+
+def test_sampler_keeps_budget_errors_and_slow_and_reports_the_rest():
+    """Test fast successes past the budget are skipped and counted on the next kept line"""
+    sampler = HttpLogSampler(budget_per_second=2, sample_rate=0.0, slow_ms=500)
+
+    decisions = [sampler.keep(200, 5) for _ in range(5)]
+    assert decisions == [0, 0, None, None, None]
+
+    # Errors and slow requests are always written and carry the skipped count
+    assert sampler.keep(500, 5) == 3
+    assert sampler.keep(200, 900) == 0
+    assert sampler.sampled_away_total == 3
+
+
+def test_sampler_totals_are_reconstructable():
+    """Test written lines plus sampled_away add up to every request"""
+    sampler = HttpLogSampler(budget_per_second=10, sample_rate=0.25, slow_ms=1000)
+    written = sampled_away = 0
+    for i in range(1000):
+        kept = sampler.keep(404 if i % 97 == 0 else 200, 1)
+        if kept is not None:
+            written += 1
+            sampled_away += kept
+    # Count still pending until the next written line
+    pending = sampler.keep(500, 1)
+    assert written + 1 + sampled_away + pending == 1001
+
+
+def test_client_limiter_bucket_drains_and_refills(monkeypatch):
+    """Test entries beyond the burst are dropped, reported once, and tokens refill over time"""
+    now = [1000.0]
+    monkeypatch.setattr(log_sampling.time, "monotonic", lambda: now[0])
+    limiter = ClientLogLimiter(rate_per_second=2, burst=5)
+
+    assert limiter.admit("1.2.3.4", 4) == 4
+    assert limiter.admit("1.2.3.4", 4) == 1
+    assert limiter.admit("5.6.7.8", 5) == 5  # buckets are per client
+    assert limiter.take_sampled_away("1.2.3.4") == 3
+    assert limiter.take_sampled_away("1.2.3.4") == 0
+
+    now[0] += 1.5
+    assert limiter.admit("1.2.3.4", 10) == 3
+    assert limiter.stats() == {"clients": 2, "sampled_away_total": 10}
@@ -0,0 +1,77 @@
+# tests/test_logging_setup.py
+"""
+Tests for the queue-based logging pipeline and JsonFormatter.
+"""
+
+import json
+import logging
+import queue
+
+from app.logging_setup import (
+    JsonFormatter,
+    _DroppingQueueHandler,
+    flush_logging,
+    logging_stats,
+    setup_logging,
+    shutdown_logging,
+)
+
+
+def _record(msg: str = "hello %s", args=("world",), **extra) -> logging.LogRecord:
+    record = logging.LogRecord("app.test", logging.INFO, __file__, 1, msg, args, None)
+    record.__dict__.update(extra)
+    return record
+
+
+def test_formatter_emits_whitelisted_extras_once():
+    """Test extras are picked from the record and the line is reused across handlers"""
+    record = _record(event="http_request", status=200, detail={"a": 1}, not_listed="x")
+    formatter = JsonFormatter()
+
+    line = formatter.format(record)
+    entry = json.loads(line)
+
+    assert entry["msg"] == "hello world"
+    assert (entry["event"], entry["status"], entry["detail"]) == ("http_request", 200, '{"a": 1}')
+    assert "not_listed" not in entry
+    assert JsonFormatter().format(record) is line
+
+
+def test_full_queue_drops_and_reports():
+    """Test a full queue drops records without blocking and reports the count later"""
+    q = queue.Queue(maxsize=2)
+    handler = _DroppingQueueHandler(q)
+
+    for i in range(5):
+        handler.handle(_record(f"msg {i}", None))
+    assert handler.dropped_total == 3
+
+    q.get_nowait()
+    q.get_nowait()
+    handler.handle(_record("after", None))
+
+    assert q.get_nowait().getMessage() == "after"
+    notice = q.get_nowait()
+    assert (notice.event, notice.dropped) == ("log_dropped", 3)
+
+
+def test_pipeline_writes_through_listener(tmp_path):
+    """Test records, extras and tracebacks reach the files via the listener thread"""
+    setup_logging(data_dir=tmp_path)
+    try:
+        try:
+            raise ValueError("boom")
+        except ValueError:
+            logging.getLogger("app.test").exception("failed", extra={"event": "unit_test", "user_id": "u1"})
+        logging.getLogger("app.audit").info("audited", extra={"event": "user.login"})
+        flush_logging()
+
+        app_lines = [json.loads(l) for l in (tmp_path / "logs" / "app.log").read_text(encoding="utf-8").splitlines()]
+        audit_lines = [json.loads(l) for l in (tmp_path / "logs" / "audit.log").read_text(encoding="utf-8").splitlines()]
+        entry = next(e for e in app_lines if e.get("event") == "unit_test")
+        assert entry["user_id"] == "u1"
+        assert "ValueError: boom" in entry["exc_info"]
+        assert [e["event"] for e in audit_lines] == ["user.login"]
+        assert logging_stats() == {"queued": 0, "dropped": 0}
+    finally:
+        shutdown_logging()
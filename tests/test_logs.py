@@ -2,6 +2,8 @@
 """Tests for client-side logging endpoint."""
 from __future__ import annotations
 
+import json
+
 import pytest
 from httpx import AsyncClient
 
@@ -210,3 +212,119 @@ async def test_client_logs_with_authenticated_user(authenticated_client):
     data = response.json()
     assert data["ok"] is True
     assert data["received"] == 1
+
+
+def _read_client_log() -> list:
+    from app.routers import logs as logs_router
+
+    sink = logs_router._require_client_log_sink()
+    assert sink.flush()
+    if not sink.path.exists():
+        return []
+    return [json.loads(line) for line in sink.path.read_text(encoding="utf-8").splitlines()]
+
+
+@pytest.mark.asyncio
+async def test_client_logs_written_to_client_log(client: AsyncClient):
+    """Test entries are written by the background writer into client.log."""
+    payload = {
+        "logs": [{"timestamp": "2026-02-19T10:00:00Z", "level": "warn", "message": "hello", "userId": "u1"}],
+        "extra": {"appVersion": "1.2.3"},
+    }
+
+    response = await client.post("/api/logs/client", json=payload)
+    assert response.status_code == 200
+
+    line = _read_client_log()[-1]
+    assert (line["level"], line["msg"], line["userId"]) == ("WARN", "hello", "u1")
+    assert line["extra"] == {"appVersion": "1.2.3"}
+
+
+@pytest.mark.asyncio
+async def test_client_logs_over_limit_are_dropped(client: AsyncClient, monkeypatch):
+    """Test entries beyond the client's token bucket are dropped and counted."""
+    from app import log_sampling
+    from app.routers import logs as logs_router
+
+    limiter = log_sampling.ClientLogLimiter(rate_per_second=0, burst=2)
+    monkeypatch.setattr(logs_router, "client_log_limiter", limiter)
+    entry = {"timestamp": "2026-02-19T10:00:00Z", "level": "INFO", "message": "m"}
+    before = len(_read_client_log())
+
+    response = await client.post("/api/logs/client", json={"logs": [entry] * 3})
+    assert response.status_code == 200
+    assert response.json() == {"ok": True, "received": 3, "dropped": 1}
+
+    # The first written entry reports the dropped count
+    written = _read_client_log()[before:]
+    assert len(written) == 2
+    assert written[0]["sampled_away"] == 1
+
+
+@pytest.mark.asyncio
+async def test_client_logs_limited_per_caller_behind_proxy(authenticated_client, monkeypatch):
+    """Test clients arriving through the same proxy address get separate buckets."""
+    from app import log_sampling
+    from app import settings as settings_module
+    from app.routers import logs as logs_router
+
+    client, _, access_token = authenticated_client
+    limiter = log_sampling.ClientLogLimiter(rate_per_second=0, burst=2)
+    monkeypatch.setattr(logs_router, "client_log_limiter", limiter)
+    entry = {"timestamp": "2026-02-19T10:00:00Z", "level": "INFO", "message": "m"}
+    batch = {"logs": [entry] * 2}
+
+    # The test transport's peer (127.0.0.1) is a trusted proxy: X-Forwarded-For decides
+    first = await client.post("/api/logs/client", json=batch, headers={"X-Forwarded-For": "203.0.113.1"})
+    second = await client.post("/api/logs/client", json=batch, headers={"X-Forwarded-For": "203.0.113.2"})
+    assert first.json()["dropped"] == 0
+    assert second.json()["dropped"] == 0
+    again = await client.post("/api/logs/client", json=batch, headers={"X-Forwarded-For": "203.0.113.1"})
+    assert again.json()["dropped"] == 2
+
+    # An authenticated caller has its own bucket whatever its address
+    auth = {"X-Forwarded-For": "203.0.113.1", "Authorization": f"Bearer {access_token}"}
+    response = await client.post("/api/logs/client", json=batch, headers=auth)
+    assert response.json()["dropped"] == 0
+
+    # From an untrusted peer X-Forwarded-For is ignored: both share the peer's bucket
+    monkeypatch.setattr(settings_module.settings, "trusted_proxies", "10.0.0.0/8")
+    spoofed = await client.post("/api/logs/client", json=batch, headers={"X-Forwarded-For": "198.51.100.7"})
+    assert spoofed.json()["dropped"] == 0
+    spoofed = await client.post("/api/logs/client", json=batch, headers={"X-Forwarded-For": "198.51.100.8"})
+    assert spoofed.json()["dropped"] == 2
+
+
+@pytest.mark.asyncio
+async def test_client_logs_batch_limits(client: AsyncClient, monkeypatch):
+    """Test oversized bodies and batches with too many entries are rejected with 413."""
+    from app.routers import logs as logs_router
+
+    monkeypatch.setattr(logs_router.settings, "client_log_max_bytes", 200)
+    monkeypatch.setattr(logs_router.settings, "client_log_max_entries", 2)
+    entry = {"timestamp": "2026-02-19T10:00:00Z", "level": "INFO", "message": "m"}
+
+    response = await client.post("/api/logs/client", json={"logs": [{**entry, "message": "x" * 500}]})
+    assert response.status_code == 413
+    assert response.json()["error"]["error_code"] == "CLIENT_LOGS_TOO_LARGE"
+
+    response = await client.post("/api/logs/client", json={"logs": [entry] * 3})
+    assert response.status_code == 413
+
+    response = await client.post("/api/logs/client", json={"entries": []})
+    assert response.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_client_logs_busy_when_buffer_full(client: AsyncClient, monkeypatch):
+    """Test 429 with Retry-After when the writer buffer has no room for the batch."""
+    from app.routers import logs as logs_router
+
+    sink = logs_router._require_client_log_sink()
+    monkeypatch.setattr(sink, "capacity", 1)
+    entry = {"timestamp": "2026-02-19T10:00:00Z", "level": "INFO", "message": "m"}
+
+    response = await client.post("/api/logs/client", json={"logs": [entry] * 2})
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == str(logs_router.CLIENT_LOG_RETRY_AFTER_SECONDS)
+    assert response.json()["error"]["error_code"] == "CLIENT_LOGS_BUSY"
@@ -0,0 +1,52 @@
+"""
+Tests for the event loop lag monitor / blocking-call detector.
+"""
+
+import asyncio
+import logging
+import time
+
+from app import metrics, timing
+from app.service.loop_monitor import LoopLagMonitor
+
+
+def _blocking_handler():
+    time.sleep(0.3)
+
+
+async def test_stall_is_logged_with_stack_and_request_id(caplog):
+    """Test a blocking call is reported once, with its stack and the active request id"""
+    monitor = LoopLagMonitor(interval_seconds=0.01, stall_threshold_seconds=0.1)
+    lag_before = metrics.event_loop_lag.count()
+    await monitor.start()
+    await asyncio.sleep(0.05)
+
+    _, token = timing.begin("rid-stall")
+    try:
+        with caplog.at_level(logging.WARNING, logger="app.service.loop_monitor"):
+            _blocking_handler()
+            await asyncio.sleep(0.05)
+    finally:
+        timing.end(token)
+        await monitor.stop()
+
+    stalls = [r for r in caplog.records if getattr(r, "event", None) == "event_loop_stall"]
+    assert len(stalls) == 1
+    assert stalls[0].request_id == "rid-stall"
+    assert "_blocking_handler" in stalls[0].stack
+    assert stalls[0].duration_ms >= 100
+    assert monitor.stats()["stalls"] == 1
+    assert monitor.stats()["max_lag_ms"] >= 100
+    assert metrics.event_loop_lag.count() > lag_before
+
+
+async def test_idle_loop_reports_no_stall(caplog):
+    """Test a responsive loop only records lag samples"""
+    monitor = LoopLagMonitor(interval_seconds=0.01, stall_threshold_seconds=0.2)
+    with caplog.at_level(logging.WARNING, logger="app.service.loop_monitor"):
+        await monitor.start()
+        await asyncio.sleep(0.1)
+        await monitor.stop()
+
+    assert not [r for r in caplog.records if getattr(r, "event", None) == "event_loop_stall"]
+    assert monitor.stats()["stalls"] == 0
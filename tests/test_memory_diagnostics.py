@@ -0,0 +1,101 @@
+# tests/test_memory_diagnostics.py
+"""Tests for the admin memory diagnostics (tracemalloc snapshots and structure sizes)."""
+from __future__ import annotations
+
+import tracemalloc
+
+import pytest
+from httpx import AsyncClient
+
+from app.service.memory_diagnostics import MemoryDiagnostics, deep_sizeof, memory_diagnostics
+
+
+@pytest.fixture(autouse=True)
+def _stop_tracing():
+    yield
+    tracemalloc.stop()
+
+
+def test_deep_sizeof_counts_nested_containers_and_truncates():
+    """Test deep sizes grow with contents and stop at the object limit"""
+    small, truncated = deep_sizeof({"a": [1, 2]})
+    large, _ = deep_sizeof({"a": [str(i) * 10 for i in range(1000)]})
+    assert not truncated and large > small
+    _, truncated = deep_sizeof(list(range(100)), limit=10)
+    assert truncated
+
+
+async def test_structure_registration_supports_async_stats():
+    """Test sync and async providers are reported, and None unregisters"""
+    diagnostics = MemoryDiagnostics()
+
+    async def async_stats():
+        return {"tokens": 3}
+
+    diagnostics.register_structure("sync", lambda: {"entries": 1}, lambda: [1, 2, 3])
+    diagnostics.register_structure("async", async_stats)
+    sizes = await diagnostics.structure_sizes(deep=True)
+    assert sizes["sync"]["entries"] == 1 and sizes["sync"]["approx_bytes"] > 0
+    assert sizes["async"] == {"tokens": 3}
+
+    diagnostics.register_structure("sync", None)
+    assert "sync" not in await diagnostics.structure_sizes()
+
+
+@pytest.mark.asyncio
+async def test_snapshot_diff_reports_new_allocations(admin_client: tuple[AsyncClient, dict, str]):
+    """Test start -> snapshot -> allocate -> snapshot -> diff shows the allocating line"""
+    client, _, access_token = admin_client
+    headers = {"Authorization": f"Bearer {access_token}"}
+
+    response = await client.post("/api/admin/memory/snapshots", headers=headers)
+    assert response.status_code == 409
+    assert response.json()["error"]["error_code"] == "TRACING_NOT_STARTED"
+
+    response = await client.post("/api/admin/memory/tracemalloc/start?frames=5", headers=headers)
+    assert response.json()["tracemalloc"]["tracing"] is True
+
+    before = (await client.post("/api/admin/memory/snapshots", headers=headers)).json()["snapshot"]["id"]
+    retained = [bytearray(1024) for _ in range(2000)]  # noqa: F841
+    after = (await client.post("/api/admin/memory/snapshots", headers=headers)).json()["snapshot"]["id"]
+
+    response = await client.get(f"/api/admin/memory/diff?from={before}&to={after}&limit=5", headers=headers)
+    assert response.status_code == 200
+    top = response.json()["stats"][0]
+    assert top["file"].endswith("test_memory_diagnostics.py")
+    assert top["size_diff"] >= 2000 * 1024
+
+    response = await client.get(f"/api/admin/memory/snapshots/{after}?groupBy=filename&limit=3", headers=headers)
+    assert response.status_code == 200
+    assert len(response.json()["stats"]) <= 3
+
+    response = await client.get("/api/admin/memory/snapshots/nope", headers=headers)
+    assert response.status_code == 404
+    assert response.json()["error"]["error_code"] == "SNAPSHOT_NOT_FOUND"
+
+    response = await client.post("/api/admin/memory/tracemalloc/stop", headers=headers)
+    assert response.json()["tracemalloc"]["tracing"] is False
+    memory_diagnostics._snapshots.clear()
+
+
+@pytest.mark.asyncio
+async def test_memory_overview_lists_known_structures(admin_client: tuple[AsyncClient, dict, str]):
+    """Test the overview reports locks, caches and the token store, deep sizes on request"""
+    client, _, access_token = admin_client
+    headers = {"Authorization": f"Bearer {access_token}"}
+
+    response = await client.get("/api/admin/memory?deep=true", headers=headers)
+    assert response.status_code == 200
+    structures = response.json()["structures"]
+    for name in ("user_locks", "principal_cache", "word_indexes", "refresh_token_store", "client_log_sink"):
+        assert name in structures
+    assert structures["refresh_token_store"]["tokens"] >= 1
+    assert structures["user_locks"]["approx_bytes"] > 0
+
+
+@pytest.mark.asyncio
+async def test_memory_endpoints_require_admin(authenticated_client: tuple[AsyncClient, dict, str]):
+    """Test non-admin users get 403"""
+    client, _, access_token = authenticated_client
+    response = await client.get("/api/admin/memory", headers={"Authorization": f"Bearer {access_token}"})
+    assert response.status_code == 403
@@ -0,0 +1,58 @@
+# tests/test_metrics.py
+"""Tests for the metrics registry and the /metrics endpoint."""
+from __future__ import annotations
+
+import pytest
+from httpx import AsyncClient
+
+from app import metrics
+
+
+async def test_registry_renders_prometheus_text():
+    """Test counters, cumulative histogram buckets and label escaping."""
+    registry = metrics.Registry()
+    requests = registry.counter("t_requests_total", "Requests", ("route",))
+    latency = registry.histogram("t_latency_seconds", "Latency", (0.1, 1.0))
+
+    requests.inc(1, ('/a"b',))
+    requests.inc(2, ('/a"b',))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        latency.observe(value)
+
+    text = await registry.render()
+    assert "# TYPE t_requests_total counter" in text
+    assert 't_requests_total{route="/a\\"b"} 3' in text
+    assert 't_latency_seconds_bucket{le="0.1"} 2' in text
+    assert 't_latency_seconds_bucket{le="1"} 3' in text
+    assert 't_latency_seconds_bucket{le="+Inf"} 4' in text
+    assert "t_latency_seconds_count 4" in text
+    assert "t_latency_seconds_sum 3.65" in text
+
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint_reports_routes_storage_and_sizes(authenticated_client: tuple[AsyncClient, dict, str]):
+    """Test /metrics exposes route templates, storage I/O and scrape-time sizes."""
+    client, _, access_token = authenticated_client
+    headers = {"Authorization": f"Bearer {access_token}"}
+    created = await client.post("/api/words", json={"headword": "metric", "pos": "noun", "meaningJa": "x"}, headers=headers)
+    word_id = created.json()["word"]["id"]
+    await client.delete(f"/api/words/{word_id}", headers=headers)
+
+    response = await client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    text = response.text
+
+    # Route template, not the raw path with the id
+    assert 'vocab_http_requests_total{method="DELETE",route="/api/words/{wordId}",status="200"}' in text
+    assert word_id not in text
+    assert 'vocab_http_request_duration_seconds_bucket{method="POST",route="/api/words",le="+Inf"}' in text
+    assert metrics.json_writes_total.value() > 0
+    assert metrics.user_lock_wait.count() > 0
+    for name in (
+        "vocab_storage_fsync_duration_seconds_count",
+        "vocab_storage_read_json_bytes_total",
+        "vocab_refresh_token_store_size",
+        "vocab_vault_words_file_bytes_count",
+    ):
+        assert name in text
@@ -0,0 +1,79 @@
+# tests/test_middleware.py
+"""
+Tests for the pure-ASGI request logging and body capture middleware.
+"""
+
+import logging
+
+from app.middleware import RequestLoggingMiddleware
+from app.middleware_bodylog import RequestBodyCaptureMiddleware
+
+
+def _scope(method: str = "POST", path: str = "/api/io/import") -> dict:
+    return {"type": "http", "method": method, "path": path, "headers": [(b"x-request-id", b"rid-1")]}
+
+
+def _receiver(chunks):
+    messages = [
+        {"type": "http.request", "body": c, "more_body": i < len(chunks) - 1}
+        for i, c in enumerate(chunks)
+    ]
+
+    async def receive():
+        return messages.pop(0)
+
+    return receive
+
+
+async def _drain_app(scope, receive, send):
+    """Reads the whole body like a route would, then answers 201"""
+    body = b""
+    while True:
+        message = await receive()
+        body += message.get("body", b"")
+        if not message.get("more_body"):
+            break
+    scope.setdefault("state", {})["received"] = body
+    await send({"type": "http.response.start", "status": 201, "headers": []})
+    await send({"type": "http.response.body", "body": b""})
+
+
+async def _noop_send(message):
+    pass
+
+
+async def test_body_capture_tees_only_the_first_bytes(monkeypatch):
+    """Test the app still receives the full body while only N bytes are kept"""
+    monkeypatch.setenv("VOCAB_LOG_REQUEST_BODY", "1")
+    monkeypatch.setenv("VOCAB_LOG_REQUEST_BODY_MAX", "8")
+    scope = _scope()
+
+    await RequestBodyCaptureMiddleware(_drain_app)(scope, _receiver([b"0123", b"4567", b"89ab"]), _noop_send)
+
+    assert scope["state"]["received"] == b"0123456789ab"
+    assert scope["state"]["request_body_text"] == "01234567...(truncated)"
+
+
+async def test_body_capture_short_body_and_disabled(monkeypatch):
+    """Test short bodies are kept whole, and nothing is captured when disabled"""
+    monkeypatch.setenv("VOCAB_LOG_REQUEST_BODY", "1")
+    scope = _scope()
+    await RequestBodyCaptureMiddleware(_drain_app)(scope, _receiver([b'{"a":', b" 1}"]), _noop_send)
+    assert scope["state"]["request_body_text"] == '{"a": 1}'
+
+    monkeypatch.setenv("VOCAB_LOG_REQUEST_BODY", "0")
+    scope = _scope()
+    await RequestBodyCaptureMiddleware(_drain_app)(scope, _receiver([b"{}"]), _noop_send)
+    assert "request_body_text" not in scope["state"]
+
+
+async def test_request_logging_records_status_and_request_id(caplog):
+    """Test one http_request line with the response status and incoming request id"""
+    scope = _scope(path="/api/words")
+
+    with caplog.at_level(logging.INFO, logger="app.http"):
+        await RequestLoggingMiddleware(_drain_app)(scope, _receiver([b"{}"]), _noop_send)
+
+    record = next(r for r in caplog.records if getattr(r, "event", None) == "http_request")
+    assert (record.request_id, record.status, record.method, record.path) == ("rid-1", 201, "POST", "/api/words")
+    assert scope["state"]["request_id"] == "rid-1"
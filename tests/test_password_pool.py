@@ -0,0 +1,98 @@
+# tests/test_password_pool.py
+"""
+Tests for argon2 hashing in the process pool, admission control and rehash on login.
+"""
+
+import asyncio
+
+import pytest
+
+from app import security, services
+from app.domain.exceptions import PasswordHashingBusyError, PasswordHashingUnavailableError
+from app.infra.jwt_provider import JWTProvider
+from app.infra.password_pool import PasswordHashPool
+from app.infra.token_store_json import JsonTokenStore
+from app.service.auth_service import AuthService
+
+
+@pytest.fixture
+async def pool():
+    """Running pool with one worker"""
+    pool = PasswordHashPool(workers=1, max_pending=2)
+    await pool.start()
+    yield pool
+    await pool.stop()
+
+
+@pytest.fixture
+def restore_hasher_params():
+    """Undo parameter changes made by a test"""
+    params = security.hasher_params()
+    yield
+    security.configure_hasher(params)
+
+
+async def test_hash_and_verify_on_workers(pool):
+    """Test pool hashes are interchangeable with inline ones"""
+    password_hash = await pool.hash("s3cret")
+
+    assert security.verify_password("s3cret", password_hash)
+    assert await pool.verify("s3cret", security.hash_password("s3cret"))
+    assert not await pool.verify("wrong", password_hash)
+    assert pool.stats()["completed"] == 3
+
+
+async def test_failed_jobs_are_not_counted_as_completed(pool):
+    """Test a job that raises counts as failed, not completed"""
+    with pytest.raises(ValueError):
+        await pool._submit(int, "not a number")
+
+    assert pool.stats()["completed"] == 0
+    assert pool.stats()["failed"] == 1
+    assert pool.stats()["pending"] == 0
+
+
+async def test_saturated_pool_rejects_new_jobs(pool):
+    """Test jobs beyond max_pending fail fast instead of queueing"""
+    results = await asyncio.gather(*(pool.hash(f"pw-{i}") for i in range(4)), return_exceptions=True)
+
+    assert sum(isinstance(r, str) for r in results) == 2
+    assert sum(isinstance(r, PasswordHashingBusyError) for r in results) == 2
+    assert pool.stats()["rejected"] == 2
+    assert pool.stats()["pending"] == 0
+
+
+async def test_stopped_pool_is_unavailable():
+    """Test a pool that is not running reports unavailability"""
+    with pytest.raises(PasswordHashingUnavailableError):
+        await PasswordHashPool().hash("s3cret")
+
+
+async def test_calibration_never_goes_below_minimum(pool, restore_hasher_params):
+    """Test calibration keeps at least the minimum time_cost and is applied"""
+    params = await pool.calibrate(target_ms=1, min_time_cost=2)
+
+    assert params["time_cost"] == 2
+    assert security.hasher_params() == params
+    assert pool.needs_rehash(security.hash_peppered({**params, "time_cost": 1}, "x"))
+    assert not pool.needs_rehash(await pool.hash("x"))
+
+
+async def test_login_rehashes_when_parameters_changed(temp_data_dir, restore_hasher_params):
+    """Test a successful login upgrades a hash made with old parameters"""
+    security.configure_hasher({"time_cost": 1})
+    user = services.register_user("rehash_user", "s3cret")
+    old_hash = user["passwordHash"]
+    security.configure_hasher({"time_cost": 2})
+
+    auth_service = AuthService(
+        jwt_provider=JWTProvider(secret_key="test-secret-key", algorithm="HS256", access_ttl_minutes=15),
+        token_store=JsonTokenStore(data_dir=str(temp_data_dir)),
+        refresh_salt="test-salt",
+    )
+    assert await auth_service.login("rehash_user", "s3cret") is not None
+
+    new_hash = services.find_user_by_username("rehash_user")["passwordHash"]
+    assert new_hash != old_hash
+    assert not security.needs_rehash(new_hash)
+    assert security.verify_password("s3cret", new_hash)
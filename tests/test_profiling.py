@@ -0,0 +1,82 @@
+# tests/test_profiling.py
+"""Tests for on-demand request profiling and the admin profiling toggle."""
+from __future__ import annotations
+
+import os
+import pstats
+
+import pytest
+from httpx import AsyncClient
+
+from app import profiling
+from app.profiling import RequestProfiler
+
+
+def _profiler(**kwargs) -> RequestProfiler:
+    defaults = dict(token="secret", sample_rate=0.0, mode="stack", interval_ms=1, max_concurrent=2,
+                    max_files=10, max_total_bytes=10 * 1024 * 1024)
+    defaults.update(kwargs)
+    return RequestProfiler(**defaults)
+
+
+def test_header_trigger_requires_token():
+    """Test X-Profile only works with the configured token, and never without one"""
+    profiler = _profiler()
+    assert profiler.requested_mode("cprofile", "secret") == "cprofile"
+    assert profiler.requested_mode("cprofile", "wrong") is None
+    assert profiler.requested_mode("cprofile", None) is None
+    assert _profiler(token="").requested_mode("stack", "") is None
+    assert _profiler(sample_rate=1.0, mode="cprofile").requested_mode(None, None) == "cprofile"
+
+
+async def test_cprofile_output_concurrency_and_pruning(tmp_path, monkeypatch):
+    """Test one cProfile at a time, readable pstats output and bounded file count"""
+    monkeypatch.setattr(RequestProfiler, "profile_dir", lambda self: tmp_path)
+    profiler = _profiler(max_files=2)
+
+    first = profiler.start("cprofile", "rid-1")
+    assert profiler.start("cprofile", "rid-2") is None
+    sum(i * i for i in range(1000))
+    name = await profiler.finish(first)
+    assert name.endswith("_rid-1.pstats")
+    pstats.Stats(str(tmp_path / name))
+
+    for i in range(3):
+        session = profiler.start("stack", f"rid-s{i}")
+        await profiler.finish(session)
+        os.utime(tmp_path / sorted(os.listdir(tmp_path))[-1], ns=(i + 10**18, i + 10**18))
+    assert len(os.listdir(tmp_path)) == 2
+    assert profiler.stats()["skipped"] == 1
+
+
+@pytest.mark.asyncio
+async def test_admin_sample_rate_profiles_requests(admin_client: tuple[AsyncClient, dict, str], monkeypatch):
+    """Test the admin toggle makes requests write collapsed stacks under data/logs/profiles"""
+    client, _, access_token = admin_client
+    headers = {"Authorization": f"Bearer {access_token}"}
+    monkeypatch.setattr(profiling.request_profiler, "sample_rate", 0.0)
+    monkeypatch.setattr(profiling.request_profiler, "mode", "stack")
+
+    response = await client.put("/api/admin/profiling", json={"sampleRate": 1.0, "mode": "stack"}, headers=headers)
+    assert response.status_code == 200
+    assert response.json()["profiling"]["sample_rate"] == 1.0
+
+    response = await client.get("/api/words", headers=headers)
+    assert response.status_code == 200
+    request_id = response.headers["x-profile-id"]
+
+    profile_dir = profiling.request_profiler.profile_dir()
+    assert any(request_id in name and name.endswith(".collapsed") for name in os.listdir(profile_dir))
+
+
+@pytest.mark.asyncio
+async def test_admin_endpoints_require_admin_role(authenticated_client: tuple[AsyncClient, dict, str]):
+    """Test non-admin users get 403 and anonymous requests 401"""
+    client, _, access_token = authenticated_client
+
+    response = await client.get("/api/admin/profiling", headers={"Authorization": f"Bearer {access_token}"})
+    assert response.status_code == 403
+    assert response.json()["error"]["error_code"] == "ADMIN_REQUIRED"
+
+    response = await client.get("/api/admin/profiling")
+    assert response.status_code == 401
@@ -205,3 +205,96 @@ async def test_delete_word(temp_data_dir: Path):
     
     services.delete_word(user_id, "1")
     assert len(services.list_words(user_id)) == 0
+
+
+@pytest.mark.asyncio
+async def test_validate_and_import_merges_in_single_pass(temp_data_dir: Path):
+    """Test fused import keeps the newer record and reports merge counts"""
+    from app.models import AppDataForImport
+
+    user = services.register_user("testuser", "testpass123")
+    user_id = user["userId"]
+
+    services.import_appdata(user_id, AppDataForImport(words=[
+        {"id": "w1", "headword": "old", "pos": "noun", "meaningJa": "古い", "updatedAt": "2026-01-02T00:00:00Z"},
+        {"id": "w2", "headword": "keep", "pos": "noun", "meaningJa": "保持", "updatedAt": "2026-01-02T00:00:00Z"},
+    ]), "merge")
+
+    app = AppDataForImport(
+        words=[
+            {"id": "w1", "headword": "new", "pos": "noun", "meaningJa": "新しい", "updatedAt": "2026-01-03T00:00:00+00:00"},
+            {"id": "w2", "headword": "stale", "pos": "noun", "meaningJa": "古い", "updatedAt": "2026-01-01T00:00:00Z"},
+            {"headword": "added", "pos": "verb", "meaningJa": "追加", "examples": [{"en": "Added."}]},
+        ],
+        memory=[{"wordId": "w1", "dueAt": "2026-01-05T00:00:00Z"}],
+    )
+    validation, counts = services.validate_and_import(user_id, app, "merge")
+
+    assert validation["valid"] is True
+    assert counts == {"added_words": 1, "updated_words": 1, "added_memory": 1, "updated_memory": 0}
+    words = {w.headword: w for w in services.list_words(user_id)}
+    assert set(words) == {"new", "keep", "added"}
+    assert words["added"].id and words["added"].examples[0].id
+    assert services.load_memory(user_id).memory[0].wordId == "w1"
+
+
+@pytest.mark.asyncio
+async def test_validate_and_import_invalid_upload_writes_nothing(temp_data_dir: Path):
+    """Test fused import does not touch the vault when validation fails"""
+    from app.models import AppDataForImport
+
+    user = services.register_user("testuser", "testpass123")
+    user_id = user["userId"]
+
+    app = AppDataForImport(schemaVersion=2, words=[{"headword": "x", "pos": "noun", "meaningJa": "x"}])
+    validation, counts = services.validate_and_import(user_id, app, "overwrite")
+
+    assert validation["valid"] is False
+    assert counts is None
+    assert services.list_words(user_id) == []
+
+
+def test_validate_import_data_warns_on_near_duplicate_headwords():
+    """Test case variants and one-letter typos are reported as near-duplicates"""
+    from app.models import AppDataForImport
+
+    app = AppDataForImport(
+        schemaVersion=1,
+        words=[
+            {"headword": "receive", "pos": "verb", "meaningJa": "受け取る"},
+            {"headword": "recieve", "pos": "verb", "meaningJa": "受け取る"},
+            {"headword": "Apple", "pos": "noun", "meaningJa": "りんご"},
+            {"headword": "apple", "pos": "noun", "meaningJa": "りんご"},
+            {"headword": "run", "pos": "verb", "meaningJa": "走る"},
+            {"headword": "ran", "pos": "verb", "meaningJa": "走った"},
+        ],
+    )
+    validation = services.validate_import_data(app)
+
+    assert validation["valid"] is True
+    assert validation["details"]["near_duplicate_headwords"] == {"recieve": "receive", "apple": "Apple"}
+    assert sum("near-duplicate" in w for w in validation["warnings"]) == 2
+
+
+def test_symspell_lookup_matches_brute_force():
+    """Test SymSpell lookups agree with an exhaustive edit-distance scan, also after removals"""
+    import random
+
+    from app.service.symspell import SymSpellIndex, edit_distance
+
+    rng = random.Random(7)
+    keys = sorted({"".join(rng.choice("abcde") for _ in range(rng.randint(1, 10))) for _ in range(400)})
+    index = SymSpellIndex(max_distance=2)
+    for key in keys:
+        index.add(key)
+    for key in keys[::3]:
+        index.remove(key)
+    remaining = [k for i, k in enumerate(keys) if i % 3]
+
+    for _ in range(50):
+        query = "".join(rng.choice("abcde") for _ in range(rng.randint(1, 10)))
+        expected = sorted(
+            ((k, edit_distance(query, k, 2)) for k in remaining if edit_distance(query, k, 2) <= 2),
+            key=lambda kv: (kv[1], kv[0]),
+        )
+        assert index.lookup(query) == expected
@@ -0,0 +1,78 @@
+# tests/test_timing.py
+"""
+Tests for per-request phase timing (Server-Timing header and http_request log fields).
+"""
+
+import logging
+
+from fastapi import APIRouter, FastAPI
+from httpx import ASGITransport, AsyncClient
+from pydantic import BaseModel
+
+from app import storage, timing
+from app.middleware import RequestLoggingMiddleware
+from app.timing import TimedRoute
+
+
+class _Item(BaseModel):
+    name: str
+
+
+def _app(tmp_path, server_timing: bool) -> FastAPI:
+    path = tmp_path / "data.json"
+    storage.atomic_write_json(path, {"items": [1, 2, 3]})
+    router = APIRouter(route_class=TimedRoute)
+
+    @router.post("/items")
+    async def create_item(item: _Item, n: int = 1):
+        async with storage.user_lock("timing-test"):
+            data = storage.read_json(path)
+        return {"name": item.name, "n": n, "count": len(data["items"])}
+
+    @router.get("/sync")
+    def sync_endpoint():
+        return {"ok": True}
+
+    app = FastAPI()
+    app.include_router(router)
+    app.add_middleware(RequestLoggingMiddleware, server_timing=server_timing)
+    return app
+
+
+def _phases(header: str) -> dict:
+    phases = {}
+    for part in header.split(", "):
+        name, dur = part.split(";dur=")
+        phases[name] = float(dur)
+    return phases
+
+
+async def test_server_timing_header_breaks_down_phases(tmp_path):
+    """Test lock/read/parse/validate/handler/render are reported and DI still works"""
+    transport = ASGITransport(app=_app(tmp_path, server_timing=True))
+    async with AsyncClient(transport=transport, base_url="http://testserver") as ac:
+        response = await ac.post("/items?n=2", json={"name": "a"})
+        sync_response = await ac.get("/sync")
+
+    assert response.json() == {"name": "a", "n": 2, "count": 3}
+    phases = _phases(response.headers["server-timing"])
+    assert {"lock", "read", "parse", "validate", "handler", "render", "total"} <= set(phases)
+    assert phases["handler"] <= phases["total"]
+
+    # Sync endpoints run in the threadpool and are still timed
+    assert sync_response.json() == {"ok": True}
+    assert "handler" in _phases(sync_response.headers["server-timing"])
+
+
+async def test_timings_on_log_line_and_header_opt_in(tmp_path, caplog):
+    """Test the breakdown is logged while the header stays off by default"""
+    transport = ASGITransport(app=_app(tmp_path, server_timing=False))
+    with caplog.at_level(logging.INFO, logger="app.http"):
+        async with AsyncClient(transport=transport, base_url="http://testserver") as ac:
+            response = await ac.post("/items", json={"name": "a"})
+
+    assert "server-timing" not in response.headers
+    record = next(r for r in caplog.records if getattr(r, "event", None) == "http_request")
+    assert {"read", "parse", "handler"} <= set(record.timings)
+    # Nothing is attributed once the request is over
+    assert timing.current() is None
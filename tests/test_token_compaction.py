@@ -0,0 +1,43 @@
+# tests/test_token_compaction.py
+"""
+Tests for background refresh token store compaction.
+"""
+
+import asyncio
+import logging
+
+from app.infra.token_store_json import JsonTokenStore, hash_refresh_token
+from app.service.token_compaction import TokenStoreCompactor
+
+
+async def test_run_once_drains_in_batches_and_reports(tmp_path, caplog):
+    """Test one pass removes every dead token in batches and logs the counts"""
+    store = JsonTokenStore(data_dir=str(tmp_path))
+    for i in range(7):
+        await store.add_token(
+            token_id=f"tok_{i}",
+            user_id="user_123",
+            token_hash=hash_refresh_token(f"token-{i}", "test-salt"),
+            family_id=f"fam_{i}",
+            prev_token_id=None,
+            ttl_days=-1 if i < 5 else 30,
+        )
+    compactor = TokenStoreCompactor(store, batch_size=2)
+
+    with caplog.at_level(logging.INFO, logger="app.service.token_compaction"):
+        assert await compactor.run_once() == 5
+
+    assert compactor.stats() == {"passes": 1, "store_size": 2, "last_reclaimed": 5, "reclaimed_total": 5}
+    record = next(r for r in caplog.records if getattr(r, "event", None) == "refresh_store_compaction")
+    assert (record.reclaimed, record.store_size) == (5, 2)
+
+
+async def test_start_and_stop(tmp_path):
+    """Test the background task runs a pass on start and stops cleanly"""
+    compactor = TokenStoreCompactor(JsonTokenStore(data_dir=str(tmp_path)), interval_seconds=3600)
+    await compactor.start()
+    await asyncio.sleep(0.05)
+    await compactor.stop()
+
+    assert compactor.stats()["passes"] == 1
+    assert compactor.stats()["store_size"] == 0
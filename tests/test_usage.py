@@ -0,0 +1,109 @@
+# tests/test_usage.py
+"""Tests for per-user usage accounting and the admin top-N report."""
+from __future__ import annotations
+
+import json
+
+import pytest
+from httpx import AsyncClient
+
+from app import storage, usage
+from app.usage import UsageAccounting, usage_accounting, utc_day
+
+
+async def test_storage_and_lock_use_is_charged_to_current_user(tmp_path):
+    """Test read/write bytes, fsyncs and lock hold time land on the current RequestUsage"""
+    current, token = usage.begin()
+    try:
+        usage.set_user("u1")
+        async with storage.user_lock("usage-test"):
+            storage.atomic_write_json(tmp_path / "a.json", {"k": "v" * 100})
+            storage.read_json(tmp_path / "a.json")
+    finally:
+        usage.end(token)
+
+    assert current.user_id == "u1"
+    assert current.counters["bytes_written"] > 100
+    assert current.counters["bytes_read"] == current.counters["bytes_written"]
+    assert current.counters["fsyncs"] == 1
+    assert current.counters["lock_hold_seconds"] > 0
+    # Outside a request nothing is recorded
+    storage.read_json(tmp_path / "a.json")
+    assert current.counters["bytes_read"] == current.counters["bytes_written"]
+
+
+async def test_cpu_seconds_excludes_other_tasks_on_the_loop():
+    """Test a request is charged only for its own steps, not for tasks run while it awaits"""
+    import asyncio
+    import time
+
+    def burn(seconds: float) -> None:
+        end = time.thread_time() + seconds
+        while time.thread_time() < end:
+            pass
+
+    async def request() -> str:
+        burn(0.02)
+        await asyncio.sleep(0.1)
+        return "done"
+
+    async def neighbour() -> None:
+        await asyncio.sleep(0)
+        burn(0.2)
+
+    current = usage.RequestUsage("u1")
+    other = asyncio.create_task(neighbour())
+    assert await usage.CpuMetered(request(), current) == "done"
+    await other
+    assert 0.02 <= current.counters["cpu_seconds"] < 0.15
+
+
+async def test_flush_merges_into_day_file_and_top_includes_pending(tmp_path, monkeypatch):
+    """Test flushes accumulate per day, reports add unflushed counts, old days are pruned"""
+    monkeypatch.setattr(UsageAccounting, "usage_dir", lambda self: tmp_path)
+    accounting = UsageAccounting(flush_interval=0, retention_days=30)
+    (tmp_path / "2000-01-01.json").write_text("{}", encoding="utf-8")
+
+    for user_id, cpu in (("a", 0.5), ("b", 2.0), ("a", 0.25)):
+        request_usage = usage.RequestUsage(user_id)
+        request_usage.add("cpu_seconds", cpu)
+        accounting.record(request_usage)
+    accounting.record(usage.RequestUsage())  # unauthenticated: ignored
+    await accounting.flush()
+
+    stored = json.loads((tmp_path / f"{utc_day()}.json").read_text(encoding="utf-8"))["users"]
+    assert stored["a"] == {"requests": 2, "cpu_seconds": 0.75}
+    assert not (tmp_path / "2000-01-01.json").exists()
+
+    accounting.record(usage.RequestUsage("a"))
+    top = await accounting.top("requests", limit=1)
+    assert top[0]["userId"] == "a" and top[0]["requests"] == 3
+    assert top[0]["fsyncs"] == 0
+    top = await accounting.top("cpu_seconds")
+    assert [row["userId"] for row in top] == ["b", "a"]
+
+
+@pytest.mark.asyncio
+async def test_admin_usage_report_counts_payload_bytes(admin_client: tuple[AsyncClient, dict, str]):
+    """Test /vocab and /io traffic is counted per user and reported to admins"""
+    client, user_data, access_token = admin_client
+    headers = {"Authorization": f"Bearer {access_token}"}
+
+    await client.post("/api/words", json={"headword": "usage", "pos": "noun", "meaningJa": "使用"}, headers=headers)
+    export = await client.get("/api/io/export", headers=headers)
+    assert export.status_code == 200
+
+    response = await client.get("/api/admin/usage?metric=payload_out_bytes&limit=1000", headers=headers)
+    assert response.status_code == 200
+    body = response.json()
+    assert body["day"] == utc_day()
+    row = next(r for r in body["users"] if r["userId"] == user_data["userId"])
+    assert row["payload_out_bytes"] >= len(export.content)
+    assert row["requests"] >= 2
+    assert row["bytes_written"] > 0 and row["fsyncs"] >= 1
+
+    response = await client.get("/api/admin/usage?metric=nope", headers=headers)
+    assert response.status_code == 422
+    response = await client.get("/api/admin/usage?day=../x", headers=headers)
+    assert response.status_code == 422
+    await usage_accounting.flush()
@@ -189,3 +189,106 @@ async def test_words_isolated_by_user(client: AsyncClient, unique_username):
     )
     data = response.json()
     assert len(data["words"]) == 0
+
+
+@pytest.mark.asyncio
+async def test_suggest_words_tolerates_typos(authenticated_client: tuple[AsyncClient, dict, str]):
+    """Test typo-tolerant headword suggestions."""
+    client, _, access_token = authenticated_client
+    headers = {"Authorization": f"Bearer {access_token}"}
+
+    for headword in ("necessary", "accommodate", "cat"):
+        await client.post("/api/words", json={"headword": headword, "pos": "adj", "meaningJa": "x"}, headers=headers)
+
+    response = await client.get("/api/words/suggest", params={"q": "neccesary"}, headers=headers)
+    assert response.status_code == 200
+    suggestions = response.json()["suggestions"]
+    assert [s["headword"] for s in suggestions] == ["necessary"]
+    assert suggestions[0]["distance"] == 2
+
+    response = await client.get("/api/words/suggest", params={"q": "Acommodate"}, headers=headers)
+    assert [s["headword"] for s in response.json()["suggestions"]] == ["accommodate"]
+
+    response = await client.get("/api/words/suggest", params={"q": "dog"}, headers=headers)
+    assert response.json()["suggestions"] == []
+
+
+@pytest.mark.asyncio
+async def test_create_word_reports_near_duplicates(authenticated_client: tuple[AsyncClient, dict, str]):
+    """Test creating a word warns about existing near-duplicate headwords."""
+    client, _, access_token = authenticated_client
+    headers = {"Authorization": f"Bearer {access_token}"}
+
+    first = await client.post("/api/words", json={"headword": "receive", "pos": "verb", "meaningJa": "受け取る"}, headers=headers)
+    assert first.json()["nearDuplicates"] == []
+
+    response = await client.post("/api/words", json={"headword": "recieve", "pos": "verb", "meaningJa": "受け取る"}, headers=headers)
+    assert response.status_code == 200
+    near = response.json()["nearDuplicates"]
+    assert [(n["id"], n["distance"]) for n in near] == [(first.json()["word"]["id"], 1)]
+
+    # Deleted words stop being reported
+    await client.delete(f"/api/words/{first.json()['word']['id']}", headers=headers)
+    response = await client.post("/api/words", json={"headword": "Receive", "pos": "verb", "meaningJa": "受け取る"}, headers=headers)
+    assert [n["headword"] for n in response.json()["nearDuplicates"]] == ["recieve"]
+
+
+@pytest.mark.asyncio
+async def test_complete_words_by_prefix(authenticated_client: tuple[AsyncClient, dict, str]):
+    """Test prefix autocomplete over headwords and readings, kept in sync with edits and imports."""
+    client, _, access_token = authenticated_client
+    headers = {"Authorization": f"Bearer {access_token}"}
+
+    ids = {}
+    for headword, pronunciation in (("Run", None), ("runner", None), ("rune", None), ("eloquent", "ˈeləkwənt"), ("walk", None)):
+        response = await client.post(
+            "/api/words",
+            json={"headword": headword, "pronunciation": pronunciation, "pos": "noun", "meaningJa": "x"},
+            headers=headers,
+        )
+        ids[headword] = response.json()["word"]["id"]
+
+    response = await client.get("/api/words/complete", params={"prefix": "ru", "limit": 2}, headers=headers)
+    assert response.status_code == 200
+    assert [c["headword"] for c in response.json()["completions"]] == ["Run", "rune"]
+
+    # Readings are matched without IPA stress marks
+    response = await client.get("/api/words/complete", params={"prefix": "elə"}, headers=headers)
+    assert [c["headword"] for c in response.json()["completions"]] == ["eloquent"]
+
+    await client.put(f"/api/words/{ids['rune']}", json={"headword": "ruin", "pos": "verb", "meaningJa": "x"}, headers=headers)
+    await client.delete(f"/api/words/{ids['Run']}", headers=headers)
+    response = await client.get("/api/words/complete", params={"prefix": "ru"}, headers=headers)
+    assert [c["headword"] for c in response.json()["completions"]] == ["ruin", "runner"]
+
+    await client.post(
+        "/api/io/import?mode=merge",
+        json={"schemaVersion": 1, "words": [{"headword": "rural", "pos": "adj", "meaningJa": "田舎の"}]},
+        headers=headers,
+    )
+    response = await client.get("/api/words/complete", params={"prefix": "RU"}, headers=headers)
+    assert [c["headword"] for c in response.json()["completions"]] == ["ruin", "runner", "rural"]
+
+
+@pytest.mark.asyncio
+async def test_delete_account_drops_word_indexes(authenticated_client: tuple[AsyncClient, dict, str]):
+    """Test deleting an account drops the user's fuzzy, prefix and example search indexes."""
+    from app.service import example_search, headword_index
+
+    client, user_data, access_token = authenticated_client
+    headers = {"Authorization": f"Bearer {access_token}"}
+    user_id = user_data["userId"]
+    await client.post(
+        "/api/words",
+        json={"headword": "river", "pos": "noun", "meaningJa": "川", "examples": [{"en": "A long river."}]},
+        headers=headers,
+    )
+    await client.get("/api/words/suggest", params={"q": "rivr"}, headers=headers)
+    await client.get("/api/words/complete", params={"prefix": "ri"}, headers=headers)
+    await client.get("/api/examples/search", params={"q": "river"}, headers=headers)
+    registries = (headword_index.fuzzy_registry, headword_index.prefix_registry, example_search.registry)
+    assert all(user_id in registry for registry in registries)
+
+    response = await client.delete("/api/auth/me", headers=headers)
+    assert response.status_code == 200
+    assert not any(user_id in registry for registry in registries)